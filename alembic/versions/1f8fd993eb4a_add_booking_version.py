@@ -0,0 +1,27 @@
+"""add booking version
+
+Revision ID: 1f8fd993eb4a
+Revises: 57a3d1ae7d35
+Create Date: 2026-10-19 10:03:51.772410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f8fd993eb4a'
+down_revision: Union[str, None] = '57a3d1ae7d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('bookings', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,26 @@
+"""add bookings room/status/start index
+
+Revision ID: 3ec3b236778a
+Revises: 1f8fd993eb4a
+Create Date: 2026-10-19 11:26:08.914377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ec3b236778a'
+down_revision: Union[str, None] = '1f8fd993eb4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_bookings_room_status_start', 'bookings', ['room_id', 'status', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_room_status_start', table_name='bookings')
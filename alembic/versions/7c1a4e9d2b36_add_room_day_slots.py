@@ -0,0 +1,36 @@
+"""add room_day_slots
+
+The table starts empty; run scripts/rebuild_slot_bitmaps.py before turning
+SLOT_BITMAPS on.
+
+Revision ID: 7c1a4e9d2b36
+Revises: 5f2e9c41a7d8
+Create Date: 2026-10-19 17:08:32.914026
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1a4e9d2b36'
+down_revision: Union[str, None] = '5f2e9c41a7d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('room_day_slots',
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('active', sa.LargeBinary(length=12), nullable=False),
+    sa.Column('approved', sa.LargeBinary(length=12), nullable=False),
+    sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ),
+    sa.PrimaryKeyConstraint('room_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('room_day_slots')
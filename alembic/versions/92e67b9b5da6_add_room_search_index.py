@@ -0,0 +1,98 @@
+"""add room search index
+
+SQLite: FTS5 external-content table over rooms (trigram tokenizer, so
+substring, prefix and fuzzy trigram matching all work), kept in sync by
+triggers.
+Postgres: pg_trgm GIN index over the same lower-cased text.
+
+Revision ID: 92e67b9b5da6
+Revises: 3ec3b236778a
+Create Date: 2026-10-19 12:40:17.205561
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '92e67b9b5da6'
+down_revision: Union[str, None] = '3ec3b236778a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE rooms_fts USING fts5(
+        code, name, location,
+        content='rooms', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    INSERT INTO rooms_fts (rowid, code, name, location)
+    SELECT id, code, name, location FROM rooms
+    """,
+    """
+    CREATE TRIGGER rooms_fts_ai AFTER INSERT ON rooms BEGIN
+        INSERT INTO rooms_fts (rowid, code, name, location)
+        VALUES (new.id, new.code, new.name, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER rooms_fts_ad AFTER DELETE ON rooms BEGIN
+        INSERT INTO rooms_fts (rooms_fts, rowid, code, name, location)
+        VALUES ('delete', old.id, old.code, old.name, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER rooms_fts_au AFTER UPDATE OF code, name, location ON rooms BEGIN
+        INSERT INTO rooms_fts (rooms_fts, rowid, code, name, location)
+        VALUES ('delete', old.id, old.code, old.name, old.location);
+        INSERT INTO rooms_fts (rowid, code, name, location)
+        VALUES (new.id, new.code, new.name, new.location);
+    END
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS rooms_fts_au",
+    "DROP TRIGGER IF EXISTS rooms_fts_ad",
+    "DROP TRIGGER IF EXISTS rooms_fts_ai",
+    "DROP TABLE IF EXISTS rooms_fts",
+]
+
+# Must match the expression used by app.services.room_search for the planner to use the index
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX ix_rooms_search_trgm ON rooms
+    USING gin (lower(code || ' ' || name || ' ' || coalesce(location, '')) gin_trgm_ops)
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_rooms_search_trgm",
+]
+
+
+def _run(statements: list[str]) -> None:
+    for statement in statements:
+        op.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_UPGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _run(SQLITE_DOWNGRADE)
+    elif dialect == 'postgresql':
+        _run(POSTGRES_DOWNGRADE)
@@ -0,0 +1,36 @@
+"""add room attributes
+
+Revision ID: a6f1c3e8d254
+Revises: e3b8d5f01c92
+Create Date: 2026-10-19 18:06:12.483095
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f1c3e8d254'
+down_revision: Union[str, None] = 'e3b8d5f01c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('room_attributes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('bit', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bit'),
+    sa.UniqueConstraint('name')
+    )
+    op.add_column('rooms', sa.Column('attributes_mask', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('rooms', 'attributes_mask')
+    op.drop_table('room_attributes')
@@ -0,0 +1,31 @@
+"""add catalog_versions
+
+Revision ID: b4d0f7c2e913
+Revises: 92e67b9b5da6
+Create Date: 2026-10-19 13:52:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d0f7c2e913'
+down_revision: Union[str, None] = '92e67b9b5da6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(catalog_versions, [{'name': 'rooms', 'version': 1}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
@@ -0,0 +1,31 @@
+"""add booking group_id
+
+Revision ID: b7d3e9f15a62
+Revises: f2a9d4b6c1e7
+Create Date: 2026-10-19 22:14:05.318407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online_migrations import op_create_index_concurrently, op_drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9f15a62'
+down_revision: Union[str, None] = 'f2a9d4b6c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('bookings', sa.Column('group_id', sa.String(length=32), nullable=True))
+    op_create_index_concurrently(op.f('ix_bookings_group_id'), 'bookings', ['group_id'])
+
+
+def downgrade() -> None:
+    op_drop_index_concurrently(op.f('ix_bookings_group_id'), 'bookings')
+    with op.batch_alter_table('bookings') as batch_op:
+        batch_op.drop_column('group_id')
@@ -0,0 +1,43 @@
+"""add request_profiles
+
+Revision ID: d5c8a1e4f376
+Revises: b7d3e9f15a62
+Create Date: 2026-10-19 23:02:47.160254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5c8a1e4f376'
+down_revision: Union[str, None] = 'b7d3e9f15a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('request_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('method', sa.String(length=10), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('duration_ms', sa.Float(), nullable=False),
+    sa.Column('trigger', sa.String(length=10), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('interval_ms', sa.Float(), nullable=False),
+    sa.Column('stacks', sa.Text(), nullable=False),
+    sa.Column('sql_count', sa.Integer(), nullable=False),
+    sa.Column('sql_ms', sa.Float(), nullable=False),
+    sa.Column('sql', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['requested_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('request_profiles')
@@ -0,0 +1,42 @@
+"""add booking_audit_events
+
+Revision ID: d81c3a6f0b27
+Revises: b4d0f7c2e913
+Create Date: 2026-10-19 15:08:33.527190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81c3a6f0b27'
+down_revision: Union[str, None] = 'b4d0f7c2e913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('booking_audit_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.BigInteger(), nullable=False),
+    sa.Column('room_id', sa.Integer(), nullable=False),
+    sa.Column('actor_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['actor_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_booking_audit_events_actor_occurred', 'booking_audit_events', ['actor_id', 'occurred_at'], unique=False)
+    op.create_index('ix_booking_audit_events_booking_version', 'booking_audit_events', ['booking_id', 'version'], unique=False)
+    op.create_index(op.f('ix_booking_audit_events_occurred_at'), 'booking_audit_events', ['occurred_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_booking_audit_events_occurred_at'), table_name='booking_audit_events')
+    op.drop_index('ix_booking_audit_events_booking_version', table_name='booking_audit_events')
+    op.drop_index('ix_booking_audit_events_actor_occurred', table_name='booking_audit_events')
+    op.drop_table('booking_audit_events')
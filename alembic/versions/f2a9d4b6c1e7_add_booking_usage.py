@@ -0,0 +1,32 @@
+"""add booking_usage
+
+Revision ID: f2a9d4b6c1e7
+Revises: c4e7a2f9b813
+Create Date: 2026-10-19 21:08:12.441930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9d4b6c1e7'
+down_revision: Union[str, None] = 'c4e7a2f9b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('booking_usage',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('week', sa.Integer(), nullable=False),
+    sa.Column('minutes', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'week')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('booking_usage')
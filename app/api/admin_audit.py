@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.deps_auth import require_roles
+from app.core.enums import UserRole
+from app.models.booking_audit_event import BookingAuditEvent
+from app.schemas.audit import BookingAuditEventOut
+
+router = APIRouter(prefix="/admin/audit", tags=["admin-audit"])
+
+
+@router.get("", response_model=list[BookingAuditEventOut])
+def list_audit_events(
+    booking_id: int | None = None,
+    actor: int | None = None,
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """
+    Booking audit events, oldest first (ADMIN only).
+
+    With `booking_id` this is the booking's full history in version order.
+    `actor` is a user id. Events reach the log asynchronously, so the most
+    recent changes may take a moment to appear.
+    """
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+
+    q = select(BookingAuditEvent)
+    if booking_id is not None:
+        q = q.where(BookingAuditEvent.booking_id == booking_id)
+    if actor is not None:
+        q = q.where(BookingAuditEvent.actor_id == actor)
+    if from_ is not None:
+        q = q.where(BookingAuditEvent.occurred_at >= from_)
+    if to is not None:
+        q = q.where(BookingAuditEvent.occurred_at < to)
+
+    if booking_id is not None:
+        q = q.order_by(BookingAuditEvent.version, BookingAuditEvent.id)
+    else:
+        q = q.order_by(BookingAuditEvent.occurred_at, BookingAuditEvent.id)
+
+    return list(db.scalars(q.limit(limit).offset(offset)).all())
@@ -1,3 +1,5 @@
+from collections import Counter
+
 from fastapi import APIRouter, Depends
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
@@ -5,10 +7,12 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.api.deps_auth import require_roles
 from app.core.enums import BookingStatus, UserRole
+from app.db.shards import scatter
 from app.models.booking import Booking
 from app.models.room import Room
 from app.models.user import User
-from app.schemas.admin_metrics import AdminMetricsOut
+from app.schemas.admin_metrics import AdminMetricsOut, InvalidationLagOut
+from app.services import invalidation_bus
 
 router = APIRouter(prefix="/admin/metrics", tags=["admin-metrics"])
 
@@ -20,12 +24,21 @@ def get_metrics(
 ):
     total_rooms = db.scalar(select(func.count(Room.id))) or 0
     total_users = db.scalar(select(func.count(User.id))) or 0
-    total_bookings = db.scalar(select(func.count(Booking.id))) or 0
+
+    # One grouped count per booking shard, run in parallel and summed
+    by_status: Counter[str] = Counter()
+    for rows in scatter(
+        db,
+        lambda shard_db: shard_db.execute(
+            select(Booking.status, func.count(Booking.id)).group_by(Booking.status)
+        ).all(),
+    ):
+        for booking_status, count in rows:
+            by_status[booking_status] += count
+    total_bookings = sum(by_status.values())
 
     def count_status(status: BookingStatus) -> int:
-        return db.scalar(
-            select(func.count(Booking.id)).where(Booking.status == status.value)
-        ) or 0
+        return by_status[status.value]
 
     return AdminMetricsOut(
         total_rooms=total_rooms,
@@ -35,4 +48,10 @@ def get_metrics(
         approved_bookings=count_status(BookingStatus.APPROVED),
         rejected_bookings=count_status(BookingStatus.REJECTED),
         cancelled_bookings=count_status(BookingStatus.CANCELLED),
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/invalidation", response_model=InvalidationLagOut)
+def get_invalidation_lag(_admin=Depends(require_roles(UserRole.ADMIN.value))):
+    """Cache invalidation lag seen by the worker serving this request."""
+    return invalidation_bus.lag_stats()
@@ -0,0 +1,83 @@
+"""
+Request profiles API (ADMIN only).
+
+POST /admin/profiles/token hands out a signed X-Profile header value;
+requests sent with it are profiled (see app.core.profiling), as are one in
+PROFILE_SAMPLE_EVERY requests when that is set. The stored profiles are
+listed here and downloaded as collapsed stacks or speedscope JSON
+(https://www.speedscope.app).
+"""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.deps_auth import require_roles
+from app.core.config import settings
+from app.core.enums import UserRole
+from app.core.responses import FastJSONResponse
+from app.core.security import create_profile_token
+from app.schemas.profile import ProfileTokenOut, RequestProfileDetail, RequestProfileOut
+from app.services.request_profiles import get_profile, list_profiles, sql_timings, to_speedscope
+
+router = APIRouter(prefix="/admin/profiles", tags=["admin-profiles"])
+
+
+@router.post("/token", response_model=ProfileTokenOut)
+def profile_token(admin=Depends(require_roles(UserRole.ADMIN.value))):
+    """An X-Profile header value valid for PROFILE_TOKEN_MINUTES; any request sent with it is profiled."""
+    value, expires_at = create_profile_token(admin.id, settings.PROFILE_TOKEN_MINUTES)
+    return ProfileTokenOut(header="X-Profile", value=value, expires_at=expires_at)
+
+
+@router.get("", response_model=list[RequestProfileOut])
+def list_request_profiles(
+    path: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """Stored profiles, newest first; `path` filters by path prefix."""
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    return list_profiles(db, path=path, limit=limit, offset=offset)
+
+
+@router.get("/{profile_id}", response_model=RequestProfileDetail)
+def get_request_profile(
+    profile_id: int,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """A profile's summary and SQL statement timings."""
+    profile = get_profile(db, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return RequestProfileDetail.model_validate(
+        {**RequestProfileOut.model_validate(profile).model_dump(), "sql": sql_timings(profile)}
+    )
+
+
+@router.get("/{profile_id}/download")
+def download_request_profile(
+    profile_id: int,
+    format: Literal["speedscope", "collapsed"] = "speedscope",
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+) -> Response:
+    """The stack samples as speedscope JSON or collapsed stacks (`frame;frame;... count` per line)."""
+    profile = get_profile(db, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        response: Response = PlainTextResponse(profile.stacks + "\n")
+        filename = f"profile-{profile_id}.collapsed.txt"
+    else:
+        response = FastJSONResponse(to_speedscope(profile))
+        filename = f"profile-{profile_id}.speedscope.json"
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
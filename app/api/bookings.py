@@ -3,64 +3,213 @@ Bookings API.
 
 - STUDENT: can create a booking request (PENDING)
 - STAFF/ADMIN: can approve or reject PENDING bookings
+
+Write endpoints accept an optional `Idempotency-Key` header so clients can
+retry safely over flaky connections.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
 from app.api.deps_auth import get_current_user, require_roles
+from app.api.deps_rate_limit import rate_limit
+from app.api.idempotency import idempotency_key_header, idempotent_response
+from app.core.config import settings
 from app.core.enums import BookingStatus, UserRole
+from app.core.responses import rows_response
+from app.db.shards import scatter
 from app.models.booking import Booking
 from app.models.user import User
-from app.schemas.booking import BookingCreate, BookingOut
+from app.schemas.booking import (
+    BookingCreate,
+    BookingGroupCreate,
+    BookingGroupOut,
+    BookingOut,
+    BookingQueuePage,
+    BookingQuotaOut,
+    SchedulePlanApply,
+    SchedulePlanOut,
+)
+from app.services import booking_quotas
+from app.services.approval_queue import InvalidCursorError, load_approval_queue
 from app.services.booking_service import (
     BookingConflictError,
+    BookingPermissionError,
+    BookingVersionConflictError,
+    InvalidBookingGroupError,
     InvalidBookingTimeError,
+    InvalidHoldError,
+    apply_booking_decisions,
     approve_booking,
+    approve_booking_group,
+    cancel_booking_group,
+    create_booking_group,
     create_pending_booking,
     reject_booking,
 )
+from app.services.schedule_optimizer import InvalidPlanRequestError, build_plan, parse_role_weights
 from app.services.booking_service import cancel_booking
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
+# Columns backing BookingOut, in field order (used by the fast JSON path)
+BOOKING_OUT_COLUMNS = (
+    Booking.id,
+    Booking.room_id,
+    Booking.user_id,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.status,
+    Booking.created_at,
+    Booking.version,
+    Booking.group_id,
+)
+
+
+def expected_version_header(if_match: str | None = Header(default=None, alias="If-Match")) -> int | None:
+    """
+    Optional optimistic-concurrency guard: the booking `version` the client last saw.
+
+    Accepts `3`, `"3"` or `W/"3"`. A stale version makes the transition fail with 409.
+    """
+    if if_match is None:
+        return None
+    try:
+        return int(if_match.removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a booking version number")
+
 
-@router.post("", response_model=BookingOut, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=BookingOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("write"))],
+)
 def create_booking(
     payload: BookingCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(idempotency_key_header),
 ):
     """
     Create a PENDING booking request.
 
     Anyone authenticated can request a booking, but the slot cannot already
-    be occupied by an APPROVED booking.
+    be occupied by an APPROVED booking, nor held by another user (POST /holds).
+    Pass `hold_id` to use your own hold. Fails with 403 when it would take you
+    past your role's weekly quota (see GET /bookings/quota).
+
+    Send an `Idempotency-Key` header to make retries safe.
     """
-    try:
-        booking = create_pending_booking(
-            db,
-            user_id=current_user.id,
-            room_id=payload.room_id,
-            start_time=payload.start_time,
-            end_time=payload.end_time,
-        )
-        return booking
 
-    except InvalidBookingTimeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    def run():
+        try:
+            return create_pending_booking(
+                db,
+                user_id=current_user.id,
+                room_id=payload.room_id,
+                start_time=payload.start_time,
+                end_time=payload.end_time,
+                hold_id=payload.hold_id,
+                role=current_user.role,
+            )
 
-    except BookingConflictError as e:
-        raise HTTPException(status_code=409, detail=str(e))
+        except (InvalidBookingTimeError, InvalidHoldError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    except ValueError as e:
-        # e.g. room not found
-        raise HTTPException(status_code=404, detail=str(e))
+        except BookingConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        except booking_quotas.BookingQuotaExceededError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+
+        except ValueError as e:
+            # e.g. room not found
+            raise HTTPException(status_code=404, detail=str(e))
+
+    if idempotency_key is None:
+        return run()
+
+    return idempotent_response(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        method="POST",
+        path="/bookings",
+        body=payload.model_dump_json(),
+        call=run,
+        response_model=BookingOut,
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.post(
+    "/group",
+    response_model=BookingGroupOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def create_group(
+    payload: BookingGroupCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(idempotency_key_header),
+):
+    """
+    Book several rooms at once (e.g. a lecture hall and breakout rooms for an
+    event), each with its own time range: all of them are created PENDING, or
+    none is.
+
+    The bookings share a `group_id`; approve or cancel them together with
+    /bookings/group/{group_id}/approve and /cancel. Fails with 409 naming the
+    first room that is booked or held by someone else.
+
+    Send an `Idempotency-Key` header to make retries safe.
+    """
+
+    def run():
+        try:
+            bookings = create_booking_group(
+                db,
+                user_id=current_user.id,
+                items=[(b.room_id, b.start_time, b.end_time) for b in payload.bookings],
+                role=current_user.role,
+            )
+        except (InvalidBookingTimeError, InvalidBookingGroupError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except BookingConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except booking_quotas.BookingQuotaExceededError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except ValueError as e:
+            # e.g. room not found
+            raise HTTPException(status_code=404, detail=str(e))
+        return BookingGroupOut(group_id=bookings[0].group_id, bookings=bookings)
+
+    if idempotency_key is None:
+        return run()
+
+    return idempotent_response(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        method="POST",
+        path="/bookings/group",
+        body=payload.model_dump_json(),
+        call=run,
+        response_model=BookingGroupOut,
+        status_code=status.HTTP_201_CREATED,
+    )
 
 
-@router.get("", response_model=list[BookingOut])
+@router.get("", response_model=list[BookingOut], dependencies=[Depends(rate_limit("read"))])
 def list_my_bookings(
     status: BookingStatus | None = None,
     room_id: int | None = None,
@@ -71,11 +220,16 @@ def list_my_bookings(
 ):
     """
     List bookings for the current user with filtering + pagination.
+
+    With booking shards the query runs on every shard in parallel and the
+    results are merged (newest first).
     """
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
 
-    query = select(Booking).where(Booking.user_id == current_user.id)
+    fast = settings.FAST_JSON_RESPONSES
+    query = select(*BOOKING_OUT_COLUMNS) if fast else select(Booking)
+    query = query.where(Booking.user_id == current_user.id)
 
     if status:
         query = query.where(Booking.status == status.value)
@@ -83,53 +237,306 @@ def list_my_bookings(
     if room_id:
         query = query.where(Booking.room_id == room_id)
 
-    query = query.order_by(Booking.created_at.desc()).limit(limit).offset(offset)
+    query = query.order_by(Booking.created_at.desc(), Booking.id.desc())
 
-    rows = db.scalars(query).all()
-    return list(rows)
+    if not settings.BOOKING_SHARD_URLS:
+        query = query.limit(limit).offset(offset)
+        if fast:
+            return rows_response(db.execute(query).mappings())
+        return list(db.scalars(query).all())
 
+    # Every shard may hold the whole requested window, so each returns offset + limit rows
+    query = query.limit(offset + limit)
+    if fast:
+        parts = scatter(db, lambda shard_db: shard_db.execute(query).mappings().all())
+    else:
+        parts = scatter(db, lambda shard_db: shard_db.scalars(query).all())
 
-@router.post("/{booking_id}/approve", response_model=BookingOut)
-def approve(
-    booking_id: int,
+    def newest_first(row):
+        return (row["created_at"], row["id"]) if fast else (row.created_at, row.id)
+
+    page = list(islice(heapq.merge(*parts, key=newest_first, reverse=True), offset, offset + limit))
+    return rows_response(page) if fast else page
+
+
+@router.get("/quota", response_model=BookingQuotaOut, dependencies=[Depends(rate_limit("read"))])
+def my_quota(
+    at: datetime | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Hours booked (PENDING or APPROVED) in the ISO week containing `at` (default: this week), and the weekly quota."""
+    if not booking_quotas.enabled():
+        raise HTTPException(status_code=404, detail="Booking quotas are not enabled")
+    usage = booking_quotas.week_usage(db, current_user.id, current_user.role, at or datetime.now())
+    return BookingQuotaOut(
+        week=usage.week,
+        used_hours=usage.minutes / 60,
+        limit_hours=None if usage.limit_minutes is None else usage.limit_minutes / 60,
+    )
+
+
+@router.get(
+    "/queue",
+    response_model=BookingQueuePage,
+    dependencies=[Depends(rate_limit("read"))],
+)
+def approval_queue(
+    room_id: int | None = None,
+    from_: datetime | None = Query(default=None, alias="from"),
+    to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
     db: Session = Depends(get_db),
     _staff=Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
 ):
     """
-    Approve a PENDING booking (STAFF/ADMIN only).
+    PENDING bookings across rooms, grouped into conflict clusters (STAFF/ADMIN only).
 
-    Approval performs a final overlap check against existing APPROVED bookings.
+    Requests in the same cluster compete for the same room and time, so a
+    reviewer can settle a cluster at once. Items that overlap an APPROVED
+    booking are flagged with `conflicts_with_approved`.
+
+    `limit` counts clusters; pass `next_cursor` back as `cursor` for the next page.
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
+    try:
+        clusters, next_cursor = load_approval_queue(
+            db, room_id=room_id, start=from_, end=to, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BookingQueuePage.model_validate({"clusters": clusters, "next_cursor": next_cursor})
+
+
+@router.get(
+    "/optimizer/plan",
+    response_model=SchedulePlanOut,
+    dependencies=[Depends(rate_limit("read"))],
+)
+def optimizer_plan(
+    from_: datetime = Query(alias="from"),
+    to: datetime = Query(),
+    room_id: int | None = None,
+    role_weights: str | None = Query(default=None, description='e.g. "STAFF:2,STUDENT:1" (default 1 each)'),
+    by_length: bool = True,
+    reject_displaced: bool = False,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """
+    Dry run: the PENDING bookings starting in [from, to) to approve so each
+    room gets the most weight (role weight x hours, or role weight alone
+    without `by_length`), instead of first-come-first-served (ADMIN only).
+
+    Displaced requests come with a suggested alternative room. Post the
+    plan's `approve` (and `reject`, filled with `reject_displaced`) to
+    /bookings/optimizer/apply to carry it out.
+    """
+    try:
+        return build_plan(
+            db,
+            start=from_,
+            end=to,
+            room_id=room_id,
+            role_weights=parse_role_weights(role_weights),
+            by_length=by_length,
+            reject_displaced=reject_displaced,
+        )
+    except InvalidPlanRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/optimizer/apply",
+    response_model=list[BookingOut],
+    dependencies=[Depends(rate_limit("write"))],
+)
+def optimizer_apply(
+    payload: SchedulePlanApply,
+    db: Session = Depends(get_db),
+    admin: User = Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """
+    Apply a plan from /bookings/optimizer/plan atomically (ADMIN only).
+
+    Fails with 409, changing nothing, when any booking changed since the plan
+    was made or an approval now conflicts; request a new plan then.
     """
     try:
-        return approve_booking(db, booking_id=booking_id)
-    except BookingConflictError as e:
+        return apply_booking_decisions(
+            db,
+            approve=[(ref.id, ref.version) for ref in payload.approve],
+            reject=[(ref.id, ref.version) for ref in payload.reject],
+            actor_id=admin.id,
+        )
+    except (BookingConflictError, BookingVersionConflictError) as e:
         raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
-        # booking not found OR wrong status
         msg = str(e)
-        raise HTTPException(status_code=404 if "not found" in msg.lower() else 400, detail=msg)
+        raise HTTPException(status_code=404 if "not found" in msg.lower() else 409, detail=msg)
 
 
-@router.post("/{booking_id}/reject", response_model=BookingOut)
-def reject(
-    booking_id: int,
+@router.post(
+    "/group/{group_id}/approve",
+    response_model=list[BookingOut],
+    dependencies=[Depends(rate_limit("write"))],
+)
+def approve_group(
+    group_id: str,
     db: Session = Depends(get_db),
-    _staff=Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
+    staff: User = Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
 ):
     """
-    Reject a PENDING booking (STAFF/ADMIN only).
+    Approve every PENDING booking of a group (STAFF/ADMIN only).
+
+    All of them or none: fails with 409 when any of them conflicts with an
+    APPROVED booking.
     """
     try:
-        return reject_booking(db, booking_id=booking_id)
+        return approve_booking_group(db, group_id=group_id, actor_id=staff.id)
+    except (BookingConflictError, BookingVersionConflictError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        msg = str(e)
+        raise HTTPException(status_code=404 if "not found" in msg.lower() else 409, detail=msg)
+
+
+@router.post(
+    "/group/{group_id}/cancel",
+    response_model=list[BookingOut],
+    dependencies=[Depends(rate_limit("write"))],
+)
+def cancel_group(
+    group_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cancel every PENDING or APPROVED booking of a group.
+
+    - Users can cancel their own groups
+    - STAFF/ADMIN can cancel any group
+    """
+    is_admin_or_staff = current_user.role in ["ADMIN", "STAFF"]
+    try:
+        return cancel_booking_group(
+            db,
+            group_id=group_id,
+            owner_id=None if is_admin_or_staff else current_user.id,
+            actor_id=current_user.id,
+        )
+    except BookingPermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
     except ValueError as e:
         msg = str(e)
-        raise HTTPException(status_code=404 if "not found" in msg.lower() else 400, detail=msg)
-    
-@router.post("/{booking_id}/cancel", response_model=BookingOut)
+        raise HTTPException(status_code=400 if "already" in msg.lower() else 404, detail=msg)
+
+
+@router.post(
+    "/{booking_id}/approve",
+    response_model=BookingOut,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def approve(
+    booking_id: int,
+    db: Session = Depends(get_db),
+    staff: User = Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
+    idempotency_key: str | None = Depends(idempotency_key_header),
+    expected_version: int | None = Depends(expected_version_header),
+):
+    """
+    Approve a PENDING booking (STAFF/ADMIN only).
+
+    Approval performs a final overlap check against existing APPROVED bookings.
+    Bookings that have already started cannot be approved (400).
+    """
+
+    def run():
+        try:
+            return approve_booking(
+                db, booking_id=booking_id, expected_version=expected_version, actor_id=staff.id
+            )
+        except BookingConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except InvalidBookingTimeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ValueError as e:
+            # booking not found OR wrong status
+            msg = str(e)
+            raise HTTPException(status_code=404 if "not found" in msg.lower() else 400, detail=msg)
+
+    if idempotency_key is None:
+        return run()
+
+    return idempotent_response(
+        db,
+        key=idempotency_key,
+        user_id=staff.id,
+        method="POST",
+        path=f"/bookings/{booking_id}/approve",
+        body=str(expected_version or ""),
+        call=run,
+        response_model=BookingOut,
+    )
+
+
+@router.post(
+    "/{booking_id}/reject",
+    response_model=BookingOut,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def reject(
+    booking_id: int,
+    db: Session = Depends(get_db),
+    staff: User = Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
+    idempotency_key: str | None = Depends(idempotency_key_header),
+    expected_version: int | None = Depends(expected_version_header),
+):
+    """
+    Reject a PENDING booking (STAFF/ADMIN only).
+    """
+
+    def run():
+        try:
+            return reject_booking(
+                db, booking_id=booking_id, expected_version=expected_version, actor_id=staff.id
+            )
+        except BookingConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            msg = str(e)
+            raise HTTPException(status_code=404 if "not found" in msg.lower() else 400, detail=msg)
+
+    if idempotency_key is None:
+        return run()
+
+    return idempotent_response(
+        db,
+        key=idempotency_key,
+        user_id=staff.id,
+        method="POST",
+        path=f"/bookings/{booking_id}/reject",
+        body=str(expected_version or ""),
+        call=run,
+        response_model=BookingOut,
+    )
+
+
+@router.post(
+    "/{booking_id}/cancel",
+    response_model=BookingOut,
+    dependencies=[Depends(rate_limit("write"))],
+)
 def cancel(
     booking_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Depends(idempotency_key_header),
+    expected_version: int | None = Depends(expected_version_header),
 ):
     """
     Cancel a booking.
@@ -137,19 +544,38 @@ def cancel(
     - Users can cancel their own bookings
     - STAFF/ADMIN can cancel any booking
     """
-    booking = db.scalar(select(Booking).where(Booking.id == booking_id))
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-
     is_admin_or_staff = current_user.role in ["ADMIN", "STAFF"]
-    if booking.user_id != current_user.id and not is_admin_or_staff:
-        raise HTTPException(status_code=403, detail="Not allowed to cancel this booking")
 
-    try:
-        return cancel_booking(db, booking_id=booking_id)
-    except ValueError as e:
-        msg = str(e)
-        raise HTTPException(
-            status_code=400 if ("already" in msg.lower() or "cannot" in msg.lower()) else 404,
-            detail=msg,
-        )
\ No newline at end of file
+    def run():
+        try:
+            return cancel_booking(
+                db,
+                booking_id=booking_id,
+                owner_id=None if is_admin_or_staff else current_user.id,
+                expected_version=expected_version,
+                actor_id=current_user.id,
+            )
+        except BookingPermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except BookingConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            msg = str(e)
+            raise HTTPException(
+                status_code=400 if ("already" in msg.lower() or "cannot" in msg.lower()) else 404,
+                detail=msg,
+            )
+
+    if idempotency_key is None:
+        return run()
+
+    return idempotent_response(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        method="POST",
+        path=f"/bookings/{booking_id}/cancel",
+        body=str(expected_version or ""),
+        call=run,
+        response_model=BookingOut,
+    )
@@ -1,8 +1,11 @@
 from typing import Generator
+from app.core import profiling
 from app.db.session import SessionLocal
 
 
 def get_db() -> Generator:
+    # Usually the worker thread that then runs the endpoint (no-op unless profiled)
+    profiling.attach_thread()
     db = SessionLocal()
     try:
         yield db
@@ -17,6 +17,7 @@ from sqlalchemy import select
 from app.api.deps import get_db
 from app.core.config import settings
 from app.models.user import User
+from app.services.user_cache import get_cached_user
 
 
 # OAuth2 scheme for extracting Bearer tokens from Authorization header
@@ -30,6 +31,9 @@ def get_current_user(
     """
     Validate JWT token and return the associated user.
 
+    With USER_CACHE on this is a read-only CachedUser snapshot (id, email,
+    name, role) rather than an ORM object.
+
     Raises:
         401 if token is invalid or user no longer exists.
     """
@@ -46,7 +50,10 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.scalar(select(User).where(User.id == int(user_id)))
+    if settings.USER_CACHE:
+        user = get_cached_user(db, int(user_id))
+    else:
+        user = db.scalar(select(User).where(User.id == int(user_id)))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
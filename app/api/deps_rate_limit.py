@@ -0,0 +1,57 @@
+"""
+Admission control dependencies.
+
+Token-bucket limits applied in front of endpoints, keyed by the
+authenticated user and by client IP, with separate budgets for reads and
+writes. Rejected requests get 429 with a Retry-After header.
+
+Usage:
+    @router.post("", dependencies=[Depends(rate_limit("write"))])
+"""
+
+import math
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.api.deps_auth import get_current_user
+from app.core.config import settings
+from app.core.rate_limit import get_budget, get_store
+from app.models.user import User
+
+
+def _check(key: str, kind: str, *, per_ip: bool) -> None:
+    decision = get_store().take(f"{kind}:{key}", get_budget(kind, per_ip=per_ip))
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(kind: str):
+    """Limit an authenticated endpoint per user and per client IP."""
+
+    def rate_limit_dependency(request: Request, current_user: User = Depends(get_current_user)) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        # User first, so a throttled user does not also drain the shared IP bucket
+        _check(f"user:{current_user.id}", kind, per_ip=False)
+        _check(f"ip:{_client_ip(request)}", kind, per_ip=True)
+
+    return rate_limit_dependency
+
+
+def rate_limit_ip(kind: str):
+    """Limit a public endpoint per client IP."""
+
+    def rate_limit_ip_dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        _check(f"ip:{_client_ip(request)}", kind, per_ip=True)
+
+    return rate_limit_ip_dependency
@@ -0,0 +1,61 @@
+"""
+Booking holds API.
+
+A hold keeps a room interval for the current user for BOOKING_HOLD_SECONDS
+while they finish the booking form; pass its id as `hold_id` to
+POST /bookings. See services/booking_holds.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.deps_auth import get_current_user
+from app.api.deps_rate_limit import rate_limit
+from app.models.user import User
+from app.schemas.booking import HoldCreate, HoldOut
+from app.services import booking_holds
+from app.services.booking_service import BookingConflictError, InvalidBookingTimeError, create_hold
+
+router = APIRouter(prefix="/holds", tags=["holds"])
+
+
+@router.post(
+    "",
+    response_model=HoldOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def hold_slot(
+    payload: HoldCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Hold a room interval for a booking about to be submitted.
+
+    Fails with 409 when the slot is booked or held by someone else. Holding
+    an interval overlapping one of your own holds in the room replaces it.
+    """
+    try:
+        return create_hold(
+            db,
+            user_id=current_user.id,
+            room_id=payload.room_id,
+            start_time=payload.start_time,
+            end_time=payload.end_time,
+        )
+    except (InvalidBookingTimeError, booking_holds.HoldLimitError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BookingConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.delete("/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release_hold(hold_id: str, current_user: User = Depends(get_current_user)):
+    """Give a hold up before it expires."""
+    if not booking_holds.release(hold_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
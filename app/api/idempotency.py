@@ -0,0 +1,78 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+Wraps an endpoint body so that retries carrying the same `Idempotency-Key`
+header replay the stored response instead of running the handler again.
+"""
+
+import json
+from typing import Any, Callable
+
+from fastapi import Header, HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.services.idempotency_service import (
+    IdempotencyInProgressError,
+    IdempotencyKeyMismatchError,
+    StoredResponse,
+    execute_idempotent,
+    request_fingerprint,
+)
+
+
+def idempotency_key_header(
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+) -> str | None:
+    return idempotency_key
+
+
+def idempotent_response(
+    db: Session,
+    *,
+    key: str,
+    user_id: int,
+    method: str,
+    path: str,
+    body: str = "",
+    call: Callable[[], Any],
+    response_model: type[BaseModel],
+    status_code: int = 200,
+) -> Response:
+    """
+    Run `call` once per (user, key) and return its (possibly replayed) response.
+
+    Client errors raised by `call` as HTTPException are stored and replayed too,
+    so a retry sees the same 4xx as the original. 5xx and unexpected errors are
+    not stored and release the key.
+    """
+
+    def handler() -> StoredResponse:
+        try:
+            result = call()
+        except HTTPException as e:
+            # Release any write lock taken by the failed attempt before we store the outcome
+            db.rollback()
+            if e.status_code >= 500:
+                raise
+            return StoredResponse(e.status_code, json.dumps({"detail": e.detail}).encode())
+        return StoredResponse(status_code, response_model.model_validate(result).model_dump_json().encode())
+
+    try:
+        stored, replayed = execute_idempotent(
+            user_id=user_id,
+            key=key,
+            request_hash=request_fingerprint(method, path, body),
+            handler=handler,
+        )
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
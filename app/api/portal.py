@@ -0,0 +1,132 @@
+"""
+Portal API.
+
+GET /portal/bootstrap returns everything the portal needs when a page opens
+in one response, so it does not have to call /auth/me, /rooms, /bookings and
+per-room availability one after another.
+"""
+
+from collections import defaultdict
+from datetime import date as date_type, datetime, time
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.api.deps_auth import get_current_user
+from app.api.deps_rate_limit import rate_limit
+from app.api.rooms import ROOM_OUT_COLUMNS
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db.shards import scatter, shard_for_location, shard_session
+from app.models.booking import Booking
+from app.models.room import Room
+from app.models.user import User
+from app.schemas.portal import PortalBootstrap
+from app.schemas.room import RoomAvailability, TimeSlot
+from app.services.room_catalog import get_cached_room, get_room_catalog
+
+router = APIRouter(prefix="/portal", tags=["portal"])
+
+# Most rooms whose availability one bootstrap may ask for
+MAX_AVAILABILITY_ROOMS = 50
+
+
+def _booked_slots(db: Session, rooms: list, day: date_type) -> dict[int, list[TimeSlot]]:
+    """APPROVED bookings on `day` per room: one query per shard holding any of `rooms`."""
+    by_shard: dict[int, list[int]] = defaultdict(list)
+    for room in rooms:
+        by_shard[shard_for_location(room.location)].append(room.id)
+
+    start_of_day = datetime.combine(day, time.min)
+    end_of_day = datetime.combine(day, time.max)
+    slots: dict[int, list[TimeSlot]] = defaultdict(list)
+    for shard, room_ids in by_shard.items():
+        with shard_session(db, shard) as shard_db:
+            rows = shard_db.execute(
+                select(Booking.room_id, Booking.start_time, Booking.end_time)
+                .where(
+                    Booking.room_id.in_(room_ids),
+                    Booking.status == BookingStatus.APPROVED.value,
+                    Booking.start_time < end_of_day,
+                    Booking.end_time > start_of_day,
+                )
+                .order_by(Booking.start_time)
+            )
+            for room_id, start, end in rows:
+                slots[room_id].append(TimeSlot(start_time=start, end_time=end))
+    return slots
+
+
+@router.get("/bootstrap", response_model=PortalBootstrap, dependencies=[Depends(rate_limit("read"))])
+def portal_bootstrap(
+    room_id: list[int] | None = Query(default=None),
+    date: date_type | None = None,
+    rooms_limit: int = 20,
+    bookings_limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    The current user, the first page of rooms, the user's upcoming bookings
+    and `date`'s (default: today) availability for each `room_id` (default:
+    the rooms on that first page).
+
+    Unknown room ids are left out of `availability`. With the room catalog
+    cache on and one booking shard this takes two queries besides
+    authentication: upcoming bookings and availability.
+    """
+    if rooms_limit < 1 or rooms_limit > 100:
+        raise HTTPException(status_code=400, detail="rooms_limit must be between 1 and 100")
+    if bookings_limit < 1 or bookings_limit > 100:
+        raise HTTPException(status_code=400, detail="bookings_limit must be between 1 and 100")
+    if room_id and len(room_id) > MAX_AVAILABILITY_ROOMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_AVAILABILITY_ROOMS} room_id values")
+
+    if settings.ROOM_CATALOG_CACHE:
+        rooms = list(get_room_catalog().rooms[:rooms_limit])
+    else:
+        rooms = db.execute(select(*ROOM_OUT_COLUMNS).order_by(Room.code).limit(rooms_limit)).all()
+
+    # Rooms to report availability for, with their locations (for shard routing)
+    if room_id is None:
+        chosen = rooms
+    else:
+        wanted = list(dict.fromkeys(room_id))
+        if settings.ROOM_CATALOG_CACHE:
+            known = {rid: get_cached_room(rid) for rid in wanted}
+        else:
+            known = {room.id: room for room in rooms if room.id in wanted}
+            missing = [rid for rid in wanted if rid not in known]
+            if missing:
+                known.update(
+                    (room.id, room)
+                    for room in db.execute(select(Room.id, Room.location).where(Room.id.in_(missing)))
+                )
+        chosen = [known[rid] for rid in wanted if known.get(rid) is not None]
+
+    day = date or date_type.today()
+    slots = _booked_slots(db, chosen, day) if chosen else {}
+
+    upcoming_query = (
+        select(Booking)
+        .where(
+            Booking.user_id == current_user.id,
+            Booking.status.in_((BookingStatus.PENDING.value, BookingStatus.APPROVED.value)),
+            Booking.end_time > datetime.now(),
+        )
+        .order_by(Booking.start_time, Booking.id)
+        .limit(bookings_limit)
+    )
+    upcoming = [b for part in scatter(db, lambda s: s.scalars(upcoming_query).all()) for b in part]
+    upcoming.sort(key=lambda b: (b.start_time, b.id))
+
+    return PortalBootstrap(
+        user=current_user,
+        rooms=rooms,
+        upcoming_bookings=upcoming[:bookings_limit],
+        availability=[
+            RoomAvailability(room_id=room.id, date=day, booked_slots=slots.get(room.id, [])) for room in chosen
+        ],
+    )
@@ -5,26 +5,87 @@ Rooms represent bookable resources. Creation is restricted to STAFF/ADMIN.
 Read endpoints are public (can be changed to authenticated later).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import date, datetime, time, timedelta
-from app.schemas.room import RoomAvailability, TimeSlot
+from app.schemas.room import RoomAvailability, RoomFreeSlots, TimeSlot
 from app.core.enums import BookingStatus
 from app.models.booking import Booking
 from app.api.deps import get_db
 from app.api.deps_auth import require_roles
+from app.api.deps_rate_limit import rate_limit, rate_limit_ip
+from app.core.config import settings
 from app.core.enums import UserRole
+from app.core.responses import FastJSONResponse, rows_response
+from app.db.shards import scatter, shard_for_location, shard_session
 from app.models.room import Room
-from app.schemas.room import RoomCreate, RoomOut
+from app.schemas.room import (
+    RoomAttributeCreate,
+    RoomAttributeOut,
+    RoomAttributesUpdate,
+    RoomCreate,
+    RoomNowOut,
+    RoomOut,
+)
+from app.services import door_display
+from app.services.room_attributes import (
+    AttributeVocabularyError,
+    UnknownAttributeError,
+    create_attribute,
+    delete_attribute,
+    has_all,
+    mask_for,
+    parse_names,
+    set_room_attributes,
+    vocabulary,
+)
+from app.services.room_catalog import (
+    bump_room_catalog_version,
+    get_cached_room,
+    get_room_catalog,
+)
+from app.services.room_search import search_rooms
+from app.services.slot_bitmaps import SLOT, SLOTS_PER_DAY, approved_occupancy, free_runs
 
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
+# Columns backing RoomOut, in field order (used by the fast JSON path)
+ROOM_OUT_COLUMNS = (Room.id, Room.code, Room.name, Room.location, Room.capacity, Room.attributes_mask)
+
+
+def attributes_filter(
+    has: str | None = Query(
+        default=None,
+        max_length=500,
+        description="Comma-separated room attributes the room must all have, e.g. `projector,accessible`",
+    ),
+    db: Session = Depends(get_db),
+) -> int:
+    """The `has` query parameter as an attributes mask (0: no filter)."""
+    names = parse_names(has)
+    if not names:
+        return 0
+    try:
+        return mask_for(vocabulary(db), names)
+    except UnknownAttributeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _display_response(body: bytes, etag: str, if_none_match: str | None) -> Response:
+    # Displays revalidate every poll; an unchanged now/next costs a 304 and no body
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.post(
     "",
     response_model=RoomOut,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("write"))],
 )
 def create_room(
     payload: RoomCreate,
@@ -47,27 +108,65 @@ def create_room(
         capacity=payload.capacity,
     )
     db.add(room)
+    if payload.attributes:
+        try:
+            set_room_attributes(db, room, parse_names(",".join(payload.attributes)))
+        except UnknownAttributeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    # Also announces the change, so every worker's room catalog reloads after the commit
+    bump_room_catalog_version(db)
     db.commit()
     db.refresh(room)
     return room
 
 
-@router.get("", response_model=list[RoomOut])
+@router.get("", response_model=list[RoomOut], dependencies=[Depends(rate_limit_ip("read"))])
 def list_rooms(
+    q: str | None = Query(default=None, max_length=100),
     limit: int = 20,
     offset: int = 0,
+    attributes_mask: int = Depends(attributes_filter),
     db: Session = Depends(get_db),
 ):
     """
     List rooms with pagination.
 
     Default: limit=20, offset=0
+
+    With `q`, rooms are searched by code, name and location (prefix and
+    typo tolerant) and returned best match first. With `has`, only rooms
+    having all the listed attributes are returned.
     """
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
 
+    if q and q.strip():
+        return search_rooms(db, q.strip(), limit=limit, offset=offset, attributes_mask=attributes_mask)
+
+    if settings.ROOM_CATALOG_CACHE:
+        page = get_room_catalog().with_attributes(attributes_mask, offset, limit)
+        if settings.FAST_JSON_RESPONSES:
+            return FastJSONResponse(page)
+        return page
+
+    if settings.FAST_JSON_RESPONSES:
+        query = select(*ROOM_OUT_COLUMNS)
+        if attributes_mask:
+            query = query.where(has_all(attributes_mask))
+        return rows_response(
+            db.execute(
+                query
+                .order_by(Room.code)
+                .limit(limit)
+                .offset(offset)
+            ).mappings()
+        )
+
+    query = select(Room)
+    if attributes_mask:
+        query = query.where(has_all(attributes_mask))
     rooms = db.scalars(
-        select(Room)
+        query
         .order_by(Room.code)
         .limit(limit)
         .offset(offset)
@@ -76,17 +175,193 @@ def list_rooms(
     return list(rooms)
 
 
-@router.get("/{room_id}", response_model=RoomOut)
+@router.get("/free-slots", response_model=list[RoomFreeSlots], dependencies=[Depends(rate_limit_ip("read"))])
+def list_free_slots(
+    date: date,
+    days: int = 1,
+    duration_minutes: int = 15,
+    room_id: list[int] | None = Query(default=None),
+    limit: int = 100,
+    offset: int = 0,
+    attributes_mask: int = Depends(attributes_filter),
+    db: Session = Depends(get_db),
+):
+    """
+    Free time per room, from `date` for `days` days (not counting PENDING requests).
+
+    Only rooms with at least one free window of `duration_minutes` (and all
+    the attributes in `has`) are returned, with their maximal free windows
+    of that length or longer.
+    Computed on 15-minute slot bitmaps (see services/slot_bitmaps).
+    """
+    if days < 1 or days > 14:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 14")
+    if duration_minutes < 15 or duration_minutes > 24 * 60 or duration_minutes % 15:
+        raise HTTPException(status_code=400, detail="duration_minutes must be a multiple of 15 up to one day")
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+
+    if settings.ROOM_CATALOG_CACHE:
+        all_ids = [r.id for r in get_room_catalog().with_attributes(attributes_mask)]
+    else:
+        query = select(Room.id).order_by(Room.code)
+        if attributes_mask:
+            query = query.where(has_all(attributes_mask))
+        all_ids = list(db.scalars(query))
+    wanted = set(room_id or ())
+    room_ids = [r for r in all_ids if r in wanted] if wanted else all_ids
+
+    # Each room's bookings live on exactly one shard
+    busy: dict[int, int] = {}
+    for shard_busy in scatter(db, lambda s: approved_occupancy(s, date, days, room_id or None)):
+        busy.update(shard_busy)
+
+    slots = days * SLOTS_PER_DAY
+    min_slots = duration_minutes // 15
+    day_start = datetime.combine(date, time.min)
+    matches = []
+    for rid in room_ids:
+        runs = free_runs(busy.get(rid, 0), slots, min_slots)
+        if runs:
+            matches.append((rid, runs))
+
+    return [
+        RoomFreeSlots(
+            room_id=rid,
+            free_slots=[TimeSlot(start_time=day_start + lo * SLOT, end_time=day_start + hi * SLOT) for lo, hi in runs],
+        )
+        for rid, runs in matches[offset : offset + limit]
+    ]
+
+
+@router.get("/attributes", response_model=list[RoomAttributeOut], dependencies=[Depends(rate_limit_ip("read"))])
+def list_room_attributes(db: Session = Depends(get_db)):
+    """
+    The room attribute vocabulary, with the bit each attribute has in
+    `RoomOut.attributes_mask`.
+    """
+    return [RoomAttributeOut(name=name, bit=bit) for name, bit in sorted(vocabulary(db).items())]
+
+
+@router.post(
+    "/attributes",
+    response_model=RoomAttributeOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def add_room_attribute(
+    payload: RoomAttributeCreate,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """Add an attribute to the vocabulary (ADMIN only)."""
+    try:
+        attribute = create_attribute(db, payload.name)
+        db.commit()
+    except AttributeVocabularyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IntegrityError:
+        # Added concurrently
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Room attribute already exists, try again")
+    return attribute
+
+
+@router.delete(
+    "/attributes/{name}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def remove_room_attribute(
+    name: str,
+    db: Session = Depends(get_db),
+    _admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """Remove an attribute from the vocabulary and from every room (ADMIN only)."""
+    try:
+        delete_attribute(db, name)
+    except UnknownAttributeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    db.commit()
+
+
+@router.get("/now", response_model=list[RoomNowOut], dependencies=[Depends(rate_limit_ip("read"))])
+def list_rooms_now(
+    building: str | None = Query(default=None, max_length=120),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Now/next for every room whose location starts with `building` (all rooms
+    without it), for door displays polling a whole building at once.
+
+    Served from memory (services/door_display); send the ETag back in
+    If-None-Match to get 304 until something on the list changes.
+    """
+    body, etag = door_display.get_building(building)
+    return _display_response(body, etag, if_none_match)
+
+
+@router.put(
+    "/{room_id}/attributes",
+    response_model=RoomOut,
+    dependencies=[Depends(rate_limit("write"))],
+)
+def update_room_attributes(
+    room_id: int,
+    payload: RoomAttributesUpdate,
+    db: Session = Depends(get_db),
+    _current_user=Depends(require_roles(UserRole.STAFF.value, UserRole.ADMIN.value)),
+):
+    """Replace a room's attributes (STAFF/ADMIN)."""
+    room = db.scalar(select(Room).where(Room.id == room_id))
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    try:
+        set_room_attributes(db, room, parse_names(",".join(payload.attributes)))
+    except UnknownAttributeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    db.refresh(room)
+    return room
+
+
+@router.get("/{room_id}", response_model=RoomOut, dependencies=[Depends(rate_limit_ip("read"))])
 def get_room(room_id: int, db: Session = Depends(get_db)):
     """
     Fetch a single room by id.
     """
+    if settings.ROOM_CATALOG_CACHE:
+        room = get_cached_room(room_id)
+        if not room:
+            raise HTTPException(status_code=404, detail="Room not found")
+        return room
+
     room = db.scalar(select(Room).where(Room.id == room_id))
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     return room
 
-@router.get("/{room_id}/availability", response_model=RoomAvailability)
+@router.get("/{room_id}/now", response_model=RoomNowOut, dependencies=[Depends(rate_limit_ip("read"))])
+def get_room_now(room_id: int, if_none_match: str | None = Header(default=None)):
+    """
+    The APPROVED booking in progress in the room and the next one, for its
+    door display.
+
+    Served from memory (services/door_display), without touching the
+    database; send the ETag back in If-None-Match to get 304 until either
+    changes.
+    """
+    entry = door_display.get_entry(room_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return _display_response(entry.body, entry.etag, if_none_match)
+
+
+@router.get(
+    "/{room_id}/availability",
+    response_model=RoomAvailability,
+    dependencies=[Depends(rate_limit_ip("read"))],
+)
 def get_room_availability(
     room_id: int,
     date: date,
@@ -96,26 +371,36 @@ def get_room_availability(
     Return all APPROVED bookings for a room on a specific date.
     """
 
-    room = db.scalar(select(Room).where(Room.id == room_id))
+    if settings.ROOM_CATALOG_CACHE:
+        room = get_cached_room(room_id)
+    else:
+        room = db.execute(select(Room.id, Room.location).where(Room.id == room_id)).first()
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
 
     start_of_day = datetime.combine(date, time.min)
     end_of_day = datetime.combine(date, time.max)
 
-    bookings = db.scalars(
-        select(Booking).where(
-            Booking.room_id == room_id,
-            Booking.status == BookingStatus.APPROVED.value,
-            Booking.start_time < end_of_day,
-            Booking.end_time > start_of_day,
+    # Only the shard holding this room's bookings is queried
+    with shard_session(db, shard_for_location(room.location)) as shard_db:
+        bookings = shard_db.execute(
+            select(Booking.start_time, Booking.end_time).where(
+                Booking.room_id == room_id,
+                Booking.status == BookingStatus.APPROVED.value,
+                Booking.start_time < end_of_day,
+                Booking.end_time > start_of_day,
+            )
+        ).mappings().all()
+
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(
+            {"room_id": room_id, "date": date, "booked_slots": [dict(b) for b in bookings]}
         )
-    ).all()
 
     slots = [
         TimeSlot(
-            start_time=b.start_time,
-            end_time=b.end_time,
+            start_time=b["start_time"],
+            end_time=b["end_time"],
         )
         for b in bookings
     ]
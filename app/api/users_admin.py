@@ -4,7 +4,10 @@ Administrative user management endpoints.
 Restricted to ADMIN role.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -14,6 +17,8 @@ from app.core.enums import UserRole
 from app.models.user import User
 from app.schemas.user import UserOut
 from app.schemas.user_admin import UserRoleUpdate
+from app.services import invalidation_bus
+from app.services.user_import import UserImportError, import_users, read_csv
 
 router = APIRouter(prefix="/admin/users", tags=["admin-users"])
 
@@ -42,7 +47,65 @@ def update_user_role(
         )
 
     user.role = payload.role.value
+    # Drops the user from every worker's user cache after the commit
+    invalidation_bus.publish(db, invalidation_bus.USER, user.id)
     db.commit()
     db.refresh(user)
 
-    return user
\ No newline at end of file
+    return user
+
+
+@router.post(
+    "/import",
+    response_class=Response,
+    responses={200: {"content": {"text/csv": {}}, "description": "Invite tokens and invalid rows"}},
+)
+def import_users_csv(
+    file: UploadFile = File(...),
+    update_roles: bool = False,
+    db: Session = Depends(get_db),
+    current_admin=Depends(require_roles(UserRole.ADMIN.value)),
+):
+    """
+    Create accounts from a CSV upload (columns: email, name, optional role
+    and password), committing every 1000 rows. With `update_roles`, existing
+    accounts take the row's role. ADMIN only; scripts/import_users.py does
+    the same from the command line.
+
+    The response is a CSV download (columns: email, token, line, error) with
+    one row per account created without a password, carrying its invite
+    token (the initial password), and one per invalid row (the first 100).
+    Tokens are not kept anywhere, so this response is the only copy. The
+    counts are in the X-Import-Created, X-Import-Existing,
+    X-Import-Roles-Updated and X-Import-Invalid headers.
+    """
+    report = io.StringIO()
+    out = csv.writer(report)
+    out.writerow(["email", "token", "line", "error"])
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        summary = import_users(
+            db,
+            read_csv(lines),
+            update_roles=update_roles,
+            on_invite=lambda email, token: out.writerow([email, token, "", ""]),
+        )
+    except UserImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The file must be UTF-8 CSV")
+    for error in summary.errors:
+        out.writerow([error.email or "", "", error.line, error.reason])
+
+    return Response(
+        content=report.getvalue(),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": 'attachment; filename="user-import.csv"',
+            "Cache-Control": "no-store",
+            "X-Import-Created": str(summary.created),
+            "X-Import-Existing": str(summary.existing),
+            "X-Import-Roles-Updated": str(summary.roles_updated),
+            "X-Import-Invalid": str(summary.invalid),
+        },
+    )
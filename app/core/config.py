@@ -7,6 +7,114 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Serve list endpoints from Core rows rendered with orjson (skips Pydantic validation)
+    FAST_JSON_RESPONSES: bool = False
+
+    # Idempotency-Key support for booking writes
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # An unfinished claim older than this is from a crashed worker and may be taken over
+    IDEMPOTENCY_LEASE_SECONDS: float = 60.0
+
+    # Token-bucket admission control ("memory" for one worker, "sqlite" to share across workers)
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_STORE: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "./cbs_ratelimit.db"
+    RATE_LIMIT_WRITE_PER_MINUTE: float = 30
+    RATE_LIMIT_WRITE_BURST: int = 10
+    RATE_LIMIT_READ_PER_MINUTE: float = 300
+    RATE_LIMIT_READ_BURST: int = 60
+    # Per-IP budgets are the per-user budget times this factor (many students share campus NAT)
+    RATE_LIMIT_IP_FACTOR: float = 20
+
+    # SQLite only: queue booking inserts and commit them in batches from one writer thread
+    BOOKING_GROUP_COMMIT: bool = False
+    BOOKING_GROUP_COMMIT_MAX_BATCH: int = 64
+    BOOKING_GROUP_COMMIT_MAX_WAIT_MS: float = 2.0
+
+    # Allow competing PENDING requests and auto-approve them when an approved slot is cancelled
+    WAITLIST_MODE: bool = False
+
+    # Serve room reads from an in-process snapshot; other workers' changes are picked up
+    # by polling the catalog version at most this often
+    ROOM_CATALOG_CACHE: bool = True
+    ROOM_CATALOG_CHECK_SECONDS: float = 1.0
+
+    # Keep 15-minute occupancy bitmaps per room and day (room_day_slots) and check conflicts
+    # against them; bookings must then start and end on a 15-minute boundary.
+    # Run scripts/rebuild_slot_bitmaps.py before turning this on.
+    SLOT_BITMAPS: bool = False
+
+    # Optional booking shards (JSON). URLs are shards 1, 2, ...; shard 0 is DATABASE_URL.
+    # The map sends a building (prefix of Room.location) to a shard; unmapped rooms use shard 0.
+    BOOKING_SHARD_URLS: list[str] = []
+    BOOKING_SHARD_MAP: dict[str, int] = {}
+
+    # Booking audit log: events are buffered in memory and written in batches by a background
+    # thread; when the buffer is full they go to a local SQLite spool file instead.
+    # A spooled event the database keeps refusing (e.g. a constraint violation) is moved to the
+    # spool's dead-letter table after AUDIT_MAX_ATTEMPTS flushes.
+    AUDIT_LOG_ENABLED: bool = False
+    AUDIT_BUFFER_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: float = 200
+    AUDIT_SPOOL_PATH: str = "./cbs_audit_spool.db"
+    AUDIT_MAX_ATTEMPTS: int = 5
+
+    # Email notifications for approve/reject/cancel: written to the outbox table with the
+    # booking change and sent in batches by a background dispatcher
+    NOTIFICATIONS_ENABLED: bool = False
+    NOTIFY_BATCH_SIZE: int = 100
+    NOTIFY_POLL_INTERVAL_SECONDS: float = 2.0
+    NOTIFY_MAX_ATTEMPTS: int = 8
+    NOTIFY_LEASE_SECONDS: int = 60
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_USERNAME: str = ""
+    SMTP_PASSWORD: str = ""
+    SMTP_STARTTLS: bool = False
+    SMTP_FROM: str = "no-reply@campus-booking.local"
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+
+    # Cross-worker cache invalidation: a polled change_log table (SQLite) or LISTEN/NOTIFY
+    # (Postgres). Turn on when running several workers with in-process caches.
+    INVALIDATION_BUS: bool = False
+    INVALIDATION_POLL_SECONDS: float = 0.2
+    INVALIDATION_RETENTION_SECONDS: float = 600
+
+    # Cache the current user for authentication (dropped through the invalidation bus on change)
+    USER_CACHE: bool = False
+    USER_CACHE_SIZE: int = 10_000
+
+    # Processes hashing passwords during bulk user imports (0: one per CPU)
+    USER_IMPORT_HASH_WORKERS: int = 0
+
+    # Booking holds (POST /holds): how long a hold keeps a slot, and live holds per user
+    BOOKING_HOLD_SECONDS: float = 120
+    BOOKING_HOLDS_PER_USER: int = 3
+
+    # Weekly booking quotas: hours of PENDING or APPROVED bookings per ISO week by role,
+    # e.g. {"STUDENT": 10}; roles not listed are unlimited, empty turns quotas off.
+    # Run scripts/rebuild_booking_usage.py before turning this on.
+    BOOKING_QUOTA_HOURS_PER_WEEK: dict[str, float] = {}
+
+    # Door displays (GET /rooms/now): full reload interval of the in-memory now/next table when
+    # the invalidation bus is not running (with it, changes arrive as they happen)
+    DOOR_DISPLAY_RELOAD_SECONDS: float = 30
+
+    # Report time spent waiting for booking write locks in a Server-Timing response header
+    SERVER_TIMING: bool = False
+
+    # Request profiling (/admin/profiles): requests sent with a signed X-Profile header run under
+    # a sampling profiler, and so do 1 in PROFILE_SAMPLE_EVERY requests (0: none). Samples are
+    # taken every PROFILE_INTERVAL_MS; the newest PROFILE_KEEP profiles are stored.
+    PROFILE_SAMPLE_EVERY: int = 0
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_KEEP: int = 200
+    PROFILE_TOKEN_MINUTES: int = 30
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
@@ -0,0 +1,41 @@
+"""
+In-process domain events.
+
+A tiny publish/subscribe hook so side features (caches, notifications, ...)
+can react to booking changes without the service layer importing them.
+Events are emitted after the originating transaction commits; handlers run
+synchronously and a failing handler never breaks the request.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Event names
+# payload: booking, actor_id
+BOOKING_CREATED = "booking.created"
+# payload: booking (with its new status and version), actor_id
+BOOKING_STATUS_CHANGED = "booking.status_changed"
+# payload: booking, freed_by
+BOOKING_PROMOTED = "booking.promoted"
+
+_handlers: dict[str, list[Callable[..., Any]]] = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable[..., Any]) -> None:
+    _handlers[event].append(handler)
+
+
+def unsubscribe(event: str, handler: Callable[..., Any]) -> None:
+    if handler in _handlers.get(event, ()):
+        _handlers[event].remove(handler)
+
+
+def emit(event: str, **payload: Any) -> None:
+    for handler in list(_handlers.get(event, ())):
+        try:
+            handler(**payload)
+        except Exception:
+            logger.exception("Handler %r failed for event %s", handler, event)
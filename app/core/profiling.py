@@ -0,0 +1,267 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries a valid `X-Profile` header (a signed,
+expiring value an administrator gets from POST /admin/profiles/token), or,
+with PROFILE_SAMPLE_EVERY = N, for one in N requests. While it runs:
+
+- a sampler thread records the Python stack of the threads working on it
+  every PROFILE_INTERVAL_MS (sys._current_frames(), so the request itself
+  runs unchanged); the sampler only exists while a profile is active
+- every SQL statement it executes is timed (engine event hooks, installed
+  the first time a request is profiled)
+
+The profile is then stored in `request_profiles` (see
+services/request_profiles) and can be downloaded from /admin/profiles as
+collapsed stacks or speedscope JSON.
+
+A request that is not profiled pays for one scan of its header names and,
+once hooks are installed, a context variable lookup per SQL statement.
+
+Threads working on a request are the event loop thread and the worker
+threads that open its database session or run its SQL. Samples where they
+are idle (the event loop waiting for I/O, a worker waiting for work) are
+dropped, but the event loop thread may also be running other requests. The
+sampler needs the GIL to take a sample, so while any request is profiled the
+interpreter's switch interval (sys.setswitchinterval, 5 ms by default) is
+lowered to PROFILE_INTERVAL_MS; the stored interval is the measured one.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from types import CodeType, FrameType
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.security import verify_profile_token
+
+HEADER = b"x-profile"
+# Statements kept per profile (all of them are counted and timed)
+MAX_SQL_STATEMENTS = 1000
+MAX_STATEMENT_LENGTH = 2000
+# Requests under the sampler at once; sampled (1 in N) requests beyond it are not profiled
+MAX_CONCURRENT_PROFILES = 4
+# Never sampled: downloading a profile should not make a new one
+_EXCLUDED_PREFIXES = ("/admin/profiles", "/static")
+
+TRIGGER_HEADER = "header"
+TRIGGER_SAMPLE = "sample"
+
+
+class Profile:
+    """Samples and SQL timings of one request."""
+
+    def __init__(self, method: str, path: str, trigger: str, requested_by: int | None) -> None:
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.requested_by = requested_by
+        self.status_code: int | None = None
+        self.threads: set[int] = {threading.get_ident()}
+        self.stacks: Counter[tuple[CodeType, ...]] = Counter()
+        self.ticks = 0
+        self.sql: list[tuple[str, float]] = []
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def sample(self, frames: dict[int, FrameType]) -> None:
+        self.ticks += 1
+        for thread_id in list(self.threads):
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if not _is_idle(stack):
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+
+    @property
+    def interval_ms(self) -> float:
+        return self.duration_ms / self.ticks if self.ticks else settings.PROFILE_INTERVAL_MS
+
+    def collapsed(self) -> str:
+        """The samples as collapsed stacks: `root;...;leaf count` per line (flamegraph.pl, speedscope)."""
+        labels: dict[CodeType, str] = {}
+
+        def label(code: CodeType) -> str:
+            if code not in labels:
+                labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            return labels[code]
+
+        return "\n".join(
+            ";".join(label(code) for code in stack) + f" {count}" for stack, count in self.stacks.most_common()
+        )
+
+
+def _is_idle(stack: list[CodeType]) -> bool:
+    """Whether a thread's stack (leaf first) shows it waiting for work rather than working."""
+    leaf = stack[0]
+    if leaf.co_filename.endswith("selectors.py"):
+        # Event loop waiting for I/O
+        return True
+    for code in stack:
+        name = os.path.basename(code.co_filename)
+        if name in ("threading.py", "queue.py"):
+            continue
+        # Thread pool worker waiting for its next job
+        return code.co_name == "run" and "anyio" in code.co_filename
+    return False
+
+
+def _short_path(filename: str) -> str:
+    cwd = os.getcwd()
+    if filename.startswith(cwd + os.sep):
+        return os.path.relpath(filename, cwd)
+    head, tail = os.path.split(filename)
+    return os.path.join(os.path.basename(head), tail)
+
+
+_current: ContextVar[Profile | None] = ContextVar("request_profile", default=None)
+_lock = threading.Lock()
+_active: set[Profile] = set()
+_sampler: threading.Thread | None = None
+# Switch interval to restore when the sampler stops
+_switch_interval: float | None = None
+_sql_hooks_installed = False
+_requests = itertools.count(1)
+
+
+def attach_thread() -> None:
+    """Sample the calling thread for the current request's profile, if it has one."""
+    profile = _current.get()
+    if profile is not None:
+        profile.threads.add(threading.get_ident())
+
+
+def _run_sampler() -> None:
+    global _sampler, _switch_interval
+    me = threading.get_ident()
+    while True:
+        with _lock:
+            if not _active:
+                _sampler = None
+                if _switch_interval is not None:
+                    sys.setswitchinterval(_switch_interval)
+                    _switch_interval = None
+                return
+            profiles = list(_active)
+        frames = sys._current_frames()
+        frames.pop(me, None)
+        for profile in profiles:
+            profile.sample(frames)
+        del frames
+        time.sleep(settings.PROFILE_INTERVAL_MS / 1000)
+
+
+def _start(profile: Profile) -> None:
+    global _sampler, _switch_interval
+    _install_sql_hooks()
+    with _lock:
+        _active.add(profile)
+        if _sampler is None:
+            # Let the sampler take the GIL from a busy request thread on time
+            interval = settings.PROFILE_INTERVAL_MS / 1000
+            if _switch_interval is None and sys.getswitchinterval() > interval:
+                _switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(interval)
+            _sampler = threading.Thread(target=_run_sampler, name="request-profiler", daemon=True)
+            _sampler.start()
+
+
+def _stop(profile: Profile) -> None:
+    profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+    with _lock:
+        _active.discard(profile)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.threads.add(threading.get_ident())
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    if profile is None:
+        return
+    started = conn.info.get("profile_started")
+    if not started:
+        return
+    ms = (time.perf_counter() - started.pop()) * 1000
+    profile.sql_count += 1
+    profile.sql_ms += ms
+    if len(profile.sql) < MAX_SQL_STATEMENTS:
+        profile.sql.append((statement[:MAX_STATEMENT_LENGTH], ms))
+
+
+def _install_sql_hooks() -> None:
+    global _sql_hooks_installed
+    if _sql_hooks_installed:
+        return
+    with _lock:
+        if not _sql_hooks_installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _sql_hooks_installed = True
+
+
+def _trigger(scope) -> tuple[str, int | None] | None:
+    """(trigger, requesting user id) if the request is to be profiled."""
+    for name, value in scope["headers"]:
+        if name == HEADER:
+            user_id = verify_profile_token(value.decode("latin-1"))
+            if user_id is not None:
+                return TRIGGER_HEADER, user_id
+            break
+    every = settings.PROFILE_SAMPLE_EVERY
+    if every > 0 and next(_requests) % every == 0:
+        if len(_active) < MAX_CONCURRENT_PROFILES and not scope["path"].startswith(_EXCLUDED_PREFIXES):
+            return TRIGGER_SAMPLE, None
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running selected requests under the profiler and storing the result."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        trigger = _trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], *trigger)
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+            await send(message)
+
+        token = _current.set(profile)
+        _start(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _stop(profile)
+            _current.reset(token)
+            from app.services.request_profiles import save_profile
+
+            await run_in_threadpool(save_profile, profile)
@@ -0,0 +1,156 @@
+"""
+Token-bucket rate limiting.
+
+Each bucket refills continuously at `rate` tokens per second up to `burst`.
+A request spends one token; when the bucket is empty the caller is told how
+long to wait for the next token.
+
+Two stores are available:
+- InMemoryTokenBucketStore: process-local, for a single worker.
+- SQLiteTokenBucketStore: a small SQLite file shared by every worker on the
+  host (point RATE_LIMIT_SQLITE_PATH at /dev/shm to keep it in memory).
+  It is kept separate from the main database so limiter updates never
+  contend with booking writes.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Protocol
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class Budget:
+    rate: float  # tokens per second
+    burst: int
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    retry_after: float  # seconds until a token is available (0 when allowed)
+
+
+def _refill(tokens: float, updated: float, now: float, budget: Budget) -> float:
+    return min(float(budget.burst), tokens + (now - updated) * budget.rate)
+
+
+def _decide(tokens: float, budget: Budget) -> tuple[float, Decision]:
+    if tokens >= 1.0:
+        return tokens - 1.0, Decision(True, 0.0)
+    return tokens, Decision(False, (1.0 - tokens) / budget.rate)
+
+
+class TokenBucketStore(Protocol):
+    def take(self, key: str, budget: Budget) -> Decision: ...
+
+
+class InMemoryTokenBucketStore:
+    """Process-local buckets guarded by a single lock."""
+
+    # Past this many buckets, those that have refilled completely are dropped (a full
+    # bucket and no bucket admit the same), at most once per PRUNE_INTERVAL_SECONDS
+    MAX_BUCKETS = 100_000
+    PRUNE_INTERVAL_SECONDS = 10.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # key -> (tokens, updated, budget it refills with)
+        self._buckets: dict[str, tuple[float, float, Budget]] = {}
+        self._next_prune = 0.0
+
+    def take(self, key: str, budget: Budget) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (float(budget.burst), now, budget))
+            tokens, decision = _decide(_refill(tokens, updated, now, budget), budget)
+            self._buckets[key] = (tokens, now, budget)
+            if len(self._buckets) > self.MAX_BUCKETS and now >= self._next_prune:
+                self._prune(now)
+        return decision
+
+    def _prune(self, now: float) -> None:
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if _refill(bucket[0], bucket[1], now, bucket[2]) < bucket[2].burst
+        }
+        # Most buckets still refilling: don't rescan them on every request
+        self._next_prune = now + self.PRUNE_INTERVAL_SECONDS
+
+
+class SQLiteTokenBucketStore:
+    """Buckets in a shared SQLite file, updated atomically across processes."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Limiter state does not need to survive a power cut
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, budget: Budget) -> Decision:
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (float(budget.burst), now)
+            tokens, decision = _decide(_refill(tokens, updated, now, budget), budget)
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return decision
+
+
+_store: TokenBucketStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TokenBucketStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.RATE_LIMIT_STORE == "sqlite":
+                    _store = SQLiteTokenBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+                else:
+                    _store = InMemoryTokenBucketStore()
+    return _store
+
+
+def get_budget(kind: str, *, per_ip: bool = False) -> Budget:
+    """Budget for a "read" or "write" endpoint. IP buckets are scaled up for shared campus NAT."""
+    if kind == "write":
+        rate, burst = settings.RATE_LIMIT_WRITE_PER_MINUTE / 60, settings.RATE_LIMIT_WRITE_BURST
+    else:
+        rate, burst = settings.RATE_LIMIT_READ_PER_MINUTE / 60, settings.RATE_LIMIT_READ_BURST
+
+    if per_ip:
+        rate, burst = rate * settings.RATE_LIMIT_IP_FACTOR, math.ceil(burst * settings.RATE_LIMIT_IP_FACTOR)
+    return Budget(rate=rate, burst=burst)
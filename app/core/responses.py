@@ -0,0 +1,33 @@
+"""
+Fast JSON rendering for list endpoints.
+
+The default FastAPI path validates every ORM object through the response model
+and then runs the result through `jsonable_encoder` + `json.dumps`. For rows we
+just read from our own database that work buys nothing, so list endpoints can
+opt into rendering plain Core rows with orjson instead (see FAST_JSON_RESPONSES).
+
+The output is byte-for-byte identical to the default encoder for the types we
+return (ints, strings, naive/UTC datetimes, dates).
+"""
+
+from typing import Any, Iterable, Mapping
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (UTC datetimes use the `Z` suffix like Pydantic)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def rows_response(rows: Iterable[Mapping[str, Any]]) -> FastJSONResponse:
+    """
+    Render Core row mappings as a JSON list.
+
+    Column order of the select decides key order, so select columns in the
+    same order as the response model fields.
+    """
+    return FastJSONResponse([dict(r) for r in rows])
@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from jose import jwt
@@ -22,4 +24,30 @@ def create_access_token(subject: str, expires_minutes: int | None = None) -> str
         minutes=expires_minutes if expires_minutes is not None else settings.ACCESS_TOKEN_EXPIRE_MINUTES
     )
     to_encode: dict[str, Any] = {"sub": subject, "exp": expire}
-    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+def create_profile_token(user_id: int, expires_minutes: int) -> tuple[str, datetime]:
+    """
+    A value for the X-Profile header that makes requests run under the profiler
+    (see app.core.profiling): `1.<user id>.<expiry>.<signature>`.
+    """
+    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
+    payload = f"1.{user_id}.{int(expire.timestamp())}"
+    return f"{payload}.{_profile_signature(payload)}", expire
+
+
+def verify_profile_token(value: str) -> int | None:
+    """The id of the user who obtained the X-Profile `value`, or None if it is invalid or expired."""
+    payload, _, signature = value.rpartition(".")
+    parts = payload.split(".")
+    if len(parts) != 3 or parts[0] != "1" or not hmac.compare_digest(signature, _profile_signature(payload)):
+        return None
+    try:
+        user_id, expires = int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    return user_id if expires > datetime.now(timezone.utc).timestamp() else None
+
+
+def _profile_signature(payload: str) -> str:
+    return hmac.new(settings.JWT_SECRET.encode(), f"profile:{payload}".encode(), hashlib.sha256).hexdigest()[:32]
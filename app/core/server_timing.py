@@ -0,0 +1,70 @@
+"""
+Server-Timing header.
+
+Request code records named durations, such as the time spent waiting for the
+booking write lock, and with SERVER_TIMING on they are returned to the client
+as a `Server-Timing` header (e.g. `Server-Timing: lock;dur=3.20`, in
+milliseconds). scripts/stress_double_booking.py uses it to report lock waits.
+
+The timings of a request live in a context variable set by the middleware;
+sync endpoints run in a worker thread with a copy of the request context, so
+they add to the same dict.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from app.core.config import settings
+
+_timings: ContextVar[dict[str, float] | None] = ContextVar("server_timings", default=None)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add `seconds` to the request's `name` timing (no-op outside a timed request)."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def measure(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def header_value(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding the recorded timings to the response headers."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.SERVER_TIMING:
+            await self.app(scope, receive, send)
+            return
+
+        timings: dict[str, float] = {}
+
+        async def send_with_timings(message) -> None:
+            if message["type"] == "http.response.start" and timings:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", header_value(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _timings.reset(token)
@@ -9,5 +9,15 @@ from app.db.base import Base
 from app.models.user import User  # noqa: F401
 from app.models.room import Room  # noqa: F401
 from app.models.booking import Booking  # noqa: F401
+from app.models.idempotency_key import IdempotencyKey  # noqa: F401
+from app.models.catalog_version import CatalogVersion  # noqa: F401
+from app.models.booking_audit_event import BookingAuditEvent  # noqa: F401
+from app.models.outbox_message import OutboxMessage  # noqa: F401
+from app.models.room_day_slots import RoomDaySlots  # noqa: F401
+from app.models.change_log_entry import ChangeLogEntry  # noqa: F401
+from app.models.room_attribute import RoomAttribute  # noqa: F401
+from app.models.online_migration import OnlineMigration  # noqa: F401
+from app.models.booking_usage import BookingUsage  # noqa: F401
+from app.models.request_profile import RequestProfile  # noqa: F401
 
 target_metadata = Base.metadata
\ No newline at end of file
@@ -0,0 +1,503 @@
+"""
+Online schema changes for large tables.
+
+Plain `op.create_index` / `op.add_column` + UPDATE on a bookings table with
+millions of rows holds locks that stop booking writes for minutes. These
+helpers keep every lock short so booking traffic keeps flowing:
+
+- create_index_concurrently / drop_index_concurrently: on Postgres
+  `CREATE/DROP INDEX CONCURRENTLY`, which must run outside a transaction (an
+  INVALID index left by an interrupted build is dropped and rebuilt). Other
+  databases get a plain CREATE/DROP INDEX. Inside Alembic migrations use the
+  op_* variants, which step out of the migration transaction.
+- backfill: an UPDATE applied in keyset-ordered batches (`key > last AND
+  key <= upper`), each batch its own short transaction. The batch size adapts
+  to keep each batch near `target_batch_seconds`, with a pause between
+  batches so writers get the lock.
+- rebuild_sqlite_table: SQLite cannot alter most of a table in place. The
+  table is rebuilt to match its model definition: a new table is created,
+  triggers mirror writes on the old table into it, rows are copied across in
+  chunks, and a short transaction swaps the tables. The shadow table's
+  indexes are built as it fills; after the swap each is renamed (SQLite has
+  no ALTER INDEX ... RENAME, so it is rebuilt) in its own transaction.
+
+Backfills and rebuilds record their progress in `online_migrations`, in the
+same transaction as each batch, so an interrupted job resumes where it
+stopped when started again with the same name. See scripts/online_migrate.py
+for the command line.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Sequence
+
+from sqlalchemy import Column, Index, MetaData, Table, delete, insert, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from app.models.online_migration import OnlineMigration
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the shadow table (and its triggers) during a SQLite rebuild
+REBUILD_SUFFIX = "__rebuild"
+
+
+class OnlineMigrationError(RuntimeError):
+    pass
+
+
+@dataclass
+class Progress:
+    name: str
+    rows_done: int
+    last_key: int | None
+    # Key range still to go, as a share of the whole range (ids are close to dense)
+    fraction: float
+    rows_per_second: float
+    batch_size: int
+    finished: bool = False
+
+
+Reporter = Callable[[Progress], None]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@contextmanager
+def _write_transaction(engine: Engine) -> Iterator[Connection]:
+    """One short write transaction (SQLite: BEGIN IMMEDIATE, like booking writes)."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _index(name: str, table: str, columns: Sequence[str], unique: bool, where: str | None) -> Index:
+    source = Table(table, MetaData(), *(Column(c) for c in columns))
+    kwargs = {}
+    if where:
+        kwargs = {"postgresql_where": text(where), "sqlite_where": text(where)}
+    return Index(name, *(source.c[c] for c in columns), unique=unique, **kwargs)
+
+
+def _postgres_index_valid(conn: Connection, name: str) -> bool | None:
+    """True/False for an existing index's validity, None when it does not exist."""
+    return conn.scalar(
+        text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+        ),
+        {"name": name},
+    )
+
+
+def create_index_concurrently(
+    engine: Engine,
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+    where: str | None = None,
+) -> None:
+    """Create an index without blocking writes (Postgres); idempotent."""
+    index = _index(name, table, columns, unique, where)
+    with engine.connect() as conn:
+        if conn.dialect.name != "postgresql":
+            index.create(conn, checkfirst=True)
+            conn.commit()
+            return
+
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        valid = _postgres_index_valid(conn, name)
+        if valid:
+            return
+        if valid is False:
+            # Left behind by an interrupted concurrent build
+            logger.warning("Dropping invalid index %s before rebuilding it", name)
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(conn, name)}")
+        index.dialect_options["postgresql"]["concurrently"] = True
+        index.create(conn)
+
+
+def drop_index_concurrently(engine: Engine, name: str) -> None:
+    """Drop an index without blocking writes (Postgres); idempotent."""
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(conn, name)}")
+        else:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {_quote(conn, name)}")
+            conn.commit()
+
+
+def op_create_index_concurrently(
+    name: str, table: str, columns: Sequence[str], *, unique: bool = False, where: str | None = None
+) -> None:
+    """create_index_concurrently for Alembic migrations (in place of op.create_index)."""
+    from alembic import op
+
+    context = op.get_context()
+    if op.get_bind().dialect.name != "postgresql":
+        op.create_index(name, table, list(columns), unique=unique, sqlite_where=text(where) if where else None)
+        return
+    with context.autocommit_block():
+        conn = op.get_bind()
+        valid = _postgres_index_valid(conn, name)
+        if valid:
+            return
+        if valid is False:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(conn, name)}")
+        op.create_index(
+            name,
+            table,
+            list(columns),
+            unique=unique,
+            postgresql_concurrently=True,
+            postgresql_where=text(where) if where else None,
+        )
+
+
+def op_drop_index_concurrently(name: str, table: str) -> None:
+    """drop_index_concurrently for Alembic migrations (in place of op.drop_index)."""
+    from alembic import op
+
+    if op.get_bind().dialect.name != "postgresql":
+        op.drop_index(name, table_name=table)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def _load_job(engine: Engine, name: str, kind: str, table: str, restart: bool) -> OnlineMigration | None:
+    """The job's progress row, created if new; None when it already finished."""
+    # Alembic creates it on the main database; booking shards get it on their first job
+    OnlineMigration.__table__.create(engine, checkfirst=True)
+    with _write_transaction(engine) as conn:
+        if restart:
+            conn.execute(delete(OnlineMigration).where(OnlineMigration.name == name))
+        row = conn.execute(select(OnlineMigration).where(OnlineMigration.name == name)).first()
+        if row is None:
+            now = _now()
+            conn.execute(
+                insert(OnlineMigration).values(
+                    name=name, kind=kind, table_name=table, rows_done=0, started_at=now, updated_at=now
+                )
+            )
+            return OnlineMigration(name=name, kind=kind, table_name=table, last_key=None, rows_done=0)
+    job = OnlineMigration(**row._mapping)
+    if job.kind != kind or job.table_name != table:
+        raise OnlineMigrationError(f"Job {name!r} is a {job.kind} of {job.table_name}, not a {kind} of {table}")
+    return None if job.finished_at is not None else job
+
+
+def _save_progress(conn: Connection, name: str, last_key: int, rows_done: int, finished: bool = False) -> None:
+    values = {"last_key": last_key, "rows_done": rows_done, "updated_at": _now()}
+    if finished:
+        values["finished_at"] = values["updated_at"]
+    conn.execute(update(OnlineMigration).where(OnlineMigration.name == name).values(**values))
+
+
+def job_status(engine: Engine) -> list[OnlineMigration]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(OnlineMigration.__tablename__):
+            return []
+        return [
+            OnlineMigration(**row._mapping)
+            for row in conn.execute(select(OnlineMigration).order_by(OnlineMigration.started_at))
+        ]
+
+
+class _Throttle:
+    """Adapts the batch size to `target` seconds per batch and pauses between batches."""
+
+    def __init__(self, batch_size: int, target: float, pause: float, min_size: int = 50) -> None:
+        self.size = batch_size
+        self.max_size = batch_size
+        self.min_size = min(min_size, batch_size)
+        self.target = target
+        self.pause = pause
+
+    def done(self, seconds: float) -> None:
+        if seconds > self.target * 1.5:
+            self.size = max(self.min_size, self.size // 2)
+        elif seconds < self.target / 2:
+            self.size = min(self.max_size, self.size * 2)
+        if self.pause:
+            time.sleep(self.pause)
+
+
+def _key_range(conn: Connection, table: str, key: str) -> tuple[int | None, int | None]:
+    row = conn.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table}")).first()
+    return row[0], row[1]
+
+
+def _fraction(last: int | None, low: int | None, high: int | None) -> float:
+    if last is None or low is None or high is None or high <= low:
+        return 0.0 if last is None else 1.0
+    return min(1.0, (last - low + 1) / (high - low + 1))
+
+
+def backfill(
+    engine: Engine,
+    name: str,
+    table: str,
+    set_clause: str,
+    *,
+    where: str | None = None,
+    key: str = "id",
+    batch_size: int = 1000,
+    target_batch_seconds: float = 0.1,
+    pause_seconds: float = 0.05,
+    restart: bool = False,
+    report: Reporter | None = None,
+) -> int:
+    """
+    `UPDATE table SET <set_clause> [WHERE <where>]` in keyset-ordered batches.
+
+    `key` must be a unique, indexed integer column (the primary key). Rows
+    inserted during the backfill with a key above the current position are
+    still covered. Returns the rows updated by this run.
+    """
+    job = _load_job(engine, name, "backfill", table, restart)
+    if job is None:
+        logger.info("Backfill %s already finished", name)
+        return 0
+
+    with engine.connect() as conn:
+        qtable, qkey = _quote(conn, table), _quote(conn, key)
+        low, high = _key_range(conn, qtable, qkey)
+
+    upper_sql = text(
+        f"SELECT MAX({qkey}) FROM (SELECT {qkey} FROM {qtable} WHERE {qkey} > :last ORDER BY {qkey} LIMIT :n) batch"
+    )
+    update_sql = text(
+        f"UPDATE {qtable} SET {set_clause} WHERE {qkey} > :last AND {qkey} <= :upper"
+        + (f" AND ({where})" if where else "")
+    )
+
+    throttle = _Throttle(batch_size, target_batch_seconds, pause_seconds)
+    last = job.last_key if job.last_key is not None else (low - 1 if low is not None else 0)
+    rows_done = job.rows_done
+    updated = 0
+    started = time.monotonic()
+    while True:
+        t0 = time.monotonic()
+        with _write_transaction(engine) as conn:
+            upper = conn.scalar(upper_sql, {"last": last, "n": throttle.size})
+            if upper is None:
+                _save_progress(conn, name, last, rows_done, finished=True)
+                break
+            count = conn.execute(update_sql, {"last": last, "upper": upper}).rowcount
+            rows_done += count
+            _save_progress(conn, name, upper, rows_done)
+        last = upper
+        updated += count
+        if report:
+            report(
+                Progress(
+                    name,
+                    rows_done,
+                    last,
+                    _fraction(last, low, high),
+                    updated / max(time.monotonic() - started, 1e-9),
+                    throttle.size,
+                )
+            )
+        throttle.done(time.monotonic() - t0)
+
+    if report:
+        report(Progress(name, rows_done, last, 1.0, updated / max(time.monotonic() - started, 1e-9), 0, True))
+    return updated
+
+
+def _sqlite_columns(conn: Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({_quote(conn, table)})")]
+
+
+def _sqlite_table_exists(conn: Connection, table: str) -> bool:
+    return bool(
+        conn.scalar(text("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": table})
+    )
+
+
+def _mirror_triggers(conn: Connection, old: str, new: str, key: str, columns: list[str]) -> list[str]:
+    q = lambda n: _quote(conn, n)  # noqa: E731
+    cols = ", ".join(q(c) for c in columns)
+    new_values = ", ".join(f"NEW.{q(c)}" for c in columns)
+    upsert = f"INSERT OR REPLACE INTO {q(new)} ({cols}) VALUES ({new_values});"
+    remove = f"DELETE FROM {q(new)} WHERE {q(key)} = OLD.{q(key)};"
+    return [
+        f"CREATE TRIGGER {q(old + REBUILD_SUFFIX + '_ai')} AFTER INSERT ON {q(old)} BEGIN {upsert} END",
+        f"CREATE TRIGGER {q(old + REBUILD_SUFFIX + '_au')} AFTER UPDATE ON {q(old)} BEGIN {remove} {upsert} END",
+        f"CREATE TRIGGER {q(old + REBUILD_SUFFIX + '_ad')} AFTER DELETE ON {q(old)} BEGIN {remove} END",
+    ]
+
+
+def _sqlite_autoincrement(conn: Connection, table: str) -> bool:
+    """Whether an existing table was created with INTEGER PRIMARY KEY AUTOINCREMENT."""
+    sql = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": table})
+    return bool(sql) and re.search(r"\bAUTOINCREMENT\b", sql, re.IGNORECASE) is not None
+
+
+def _sqlite_sequence(conn: Connection, table: str) -> int | None:
+    if not _sqlite_table_exists(conn, "sqlite_sequence"):
+        return None
+    return conn.scalar(text("SELECT seq FROM sqlite_sequence WHERE name = :n"), {"n": table})
+
+
+def _sqlite_index_names(conn: Connection, table: str) -> set[str]:
+    return set(
+        conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"), {"t": table})
+    )
+
+
+def rebuild_sqlite_table(
+    engine: Engine,
+    table: Table,
+    *,
+    name: str | None = None,
+    chunk_size: int = 2000,
+    target_batch_seconds: float = 0.1,
+    pause_seconds: float = 0.05,
+    restart: bool = False,
+    report: Reporter | None = None,
+) -> int:
+    """
+    Rebuild a SQLite table to match `table` (its model definition), online.
+
+    Columns present in both the old table and `table` are copied; new columns
+    take their defaults. The table must have a single-column integer primary
+    key. Returns the rows copied by this run.
+
+    The rebuilt table keeps AUTOINCREMENT if the old one had it (even when
+    the model does not ask for it), and its sqlite_sequence value is carried
+    across the swap: ids are never handed out twice, and a table started at
+    an id base (booking shards) keeps it.
+
+    The shadow table gets its indexes (under temporary names) while still
+    empty, so they are filled chunk by chunk. The swap itself is a DROP and a
+    RENAME; afterwards each index is rebuilt under its real name and the
+    temporary one dropped, one index per transaction, so the longest write
+    stall is one index build rather than all of them.
+    """
+    if engine.dialect.name != "sqlite":
+        raise OnlineMigrationError("Table rebuilds are for SQLite; use ALTER TABLE and backfill() elsewhere")
+    (key,) = [c.name for c in table.primary_key.columns]
+    old, new = table.name, table.name + REBUILD_SUFFIX
+    name = name or f"rebuild_{old}"
+
+    # The shadow table: `table` under the new name, its indexes under temporary names
+    shadow_metadata = MetaData()
+    for source in table.metadata.sorted_tables:
+        if source is not table:
+            source.to_metadata(shadow_metadata)
+    shadow = table.to_metadata(shadow_metadata, name=new)
+    shadow.indexes.clear()
+    for index in table.indexes:
+        Index(index.name + REBUILD_SUFFIX, *(shadow.c[c.name] for c in index.columns), unique=index.unique)
+
+    job = _load_job(engine, name, "rebuild", old, restart)
+    if job is None:
+        logger.info("Rebuild %s already finished", name)
+        return 0
+
+    with _write_transaction(engine) as conn:
+        swapped = job.last_key is not None and not _sqlite_table_exists(conn, new)
+        columns = [c for c in _sqlite_columns(conn, old) if c in table.c]
+        if job.last_key is None:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_quote(conn, new)}")
+            for suffix in ("_ai", "_au", "_ad"):
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {_quote(conn, old + REBUILD_SUFFIX + suffix)}")
+            if _sqlite_autoincrement(conn, old):
+                shadow.dialect_options["sqlite"]["autoincrement"] = True
+            conn.execute(CreateTable(shadow))
+            for index in shadow.indexes:
+                index.create(conn)
+            for ddl in _mirror_triggers(conn, old, new, key, columns):
+                conn.exec_driver_sql(ddl)
+        qold, qnew, qkey = _quote(conn, old), _quote(conn, new), _quote(conn, key)
+        cols = ", ".join(_quote(conn, c) for c in columns)
+        low, high = _key_range(conn, qold, qkey)
+
+    upper_sql = text(
+        f"SELECT MAX({qkey}) FROM (SELECT {qkey} FROM {qold} WHERE {qkey} > :last ORDER BY {qkey} LIMIT :n) batch"
+    )
+    copy_sql = text(
+        f"INSERT OR REPLACE INTO {qnew} ({cols}) SELECT {cols} FROM {qold} WHERE {qkey} > :last AND {qkey} <= :upper"
+    )
+
+    throttle = _Throttle(chunk_size, target_batch_seconds, pause_seconds)
+    last = job.last_key if job.last_key is not None else (low - 1 if low is not None else 0)
+    rows_done = job.rows_done
+    copied = 0
+    started = time.monotonic()
+    while not swapped:
+        t0 = time.monotonic()
+        with _write_transaction(engine) as conn:
+            upper = conn.scalar(upper_sql, {"last": last, "n": throttle.size})
+            if upper is None:
+                # Caught up (later writes are mirrored by the triggers): swap
+                seqs = [_sqlite_sequence(conn, old), _sqlite_sequence(conn, new)]
+                conn.exec_driver_sql(f"DROP TABLE {qold}")
+                conn.exec_driver_sql(f"ALTER TABLE {qnew} RENAME TO {qold}")
+                if _sqlite_autoincrement(conn, old):
+                    # DROP TABLE deleted the old table's sequence; keep the higher of the two
+                    seq = max((s for s in seqs if s is not None), default=None)
+                    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :n"), {"n": old})
+                    if seq is not None:
+                        conn.execute(
+                            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:n, :seq)"), {"n": old, "seq": seq}
+                        )
+                _save_progress(conn, name, last, rows_done)
+                logger.info("Swapped %s in %.2fs", old, time.monotonic() - t0)
+                break
+            count = conn.execute(copy_sql, {"last": last, "upper": upper}).rowcount
+            rows_done += count
+            _save_progress(conn, name, upper, rows_done)
+        last = upper
+        copied += count
+        if report:
+            report(
+                Progress(
+                    name,
+                    rows_done,
+                    last,
+                    _fraction(last, low, high),
+                    copied / max(time.monotonic() - started, 1e-9),
+                    throttle.size,
+                )
+            )
+        throttle.done(time.monotonic() - t0)
+
+    for index in table.indexes:
+        t0 = time.monotonic()
+        with _write_transaction(engine) as conn:
+            existing = _sqlite_index_names(conn, old)
+            if index.name not in existing:
+                index.create(conn)
+            if index.name + REBUILD_SUFFIX in existing:
+                conn.exec_driver_sql(f"DROP INDEX {_quote(conn, index.name + REBUILD_SUFFIX)}")
+        logger.info("Index %s ready in %.2fs", index.name, time.monotonic() - t0)
+        if pause_seconds:
+            time.sleep(pause_seconds)
+
+    with _write_transaction(engine) as conn:
+        _save_progress(conn, name, last, rows_done, finished=True)
+    if report:
+        report(Progress(name, rows_done, last, 1.0, copied / max(time.monotonic() - started, 1e-9), 0, True))
+    return copied
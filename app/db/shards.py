@@ -0,0 +1,223 @@
+"""
+Booking shards.
+
+With BOOKING_SHARD_URLS set, bookings are split across several databases by
+building: shard 0 is the main DATABASE_URL (users, rooms and everything else
+live only there), shards 1..n hold only bookings and the tables written with
+them. BOOKING_SHARD_MAP maps a building, matched as a case-insensitive prefix
+of Room.location, to a shard number; rooms that match nothing stay on shard 0.
+Each shard has its own write lock (BEGIN IMMEDIATE on SQLite), so campuses
+stop serializing against each other.
+
+Booking ids are globally unique: shard k hands out ids above k << SHARD_ID_BITS,
+so the owning shard of any booking id is `id >> SHARD_ID_BITS` and no lookup
+table is needed.
+
+Changing the map does not move existing bookings; only remap buildings that
+have no bookings yet.
+
+Shard schemas are created on first use: the bookings, outbox,
+room_day_slots, booking_usage and change_log tables and their indexes, without the foreign keys to
+users/rooms (those tables are on shard 0). Nullable columns added to the
+bookings model later are added to existing shard tables the same way.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+from sqlalchemy import BigInteger, Column, Index, Integer, MetaData, Table, create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.db.online_migrations import create_index_concurrently
+from app.db.session import SessionLocal
+from app.models.booking import Booking
+from app.models.booking_usage import BookingUsage
+from app.models.change_log_entry import ChangeLogEntry
+from app.models.outbox_message import OutboxMessage
+from app.models.room_day_slots import RoomDaySlots
+
+T = TypeVar("T")
+
+SHARD_ID_BITS = 40
+
+# Shard ids do not fit a 32-bit INTEGER; SQLite keeps INTEGER (its rowid is 64-bit already)
+_ID_TYPE = BigInteger().with_variant(Integer(), "sqlite")
+
+
+class _ShardSet:
+    def __init__(self, urls: tuple[str, ...]) -> None:
+        self.urls = urls
+        self.sessionmakers: list[sessionmaker] = [SessionLocal]
+        for shard, url in enumerate(urls, start=1):
+            connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+            engine = create_engine(url, connect_args=connect_args)
+            _ensure_shard_schema(engine, shard)
+            self.sessionmakers.append(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        self.pool = ThreadPoolExecutor(max_workers=max(len(urls), 1), thread_name_prefix="booking-shard")
+
+
+_shards: _ShardSet | None = None
+_shards_lock = threading.Lock()
+
+
+def _shard_table(source: Table, metadata: MetaData, **kwargs) -> Table:
+    """Copy of `source` without foreign keys (users and rooms live on shard 0 only)."""
+    table = Table(
+        source.name,
+        metadata,
+        *(
+            Column(
+                c.name,
+                _ID_TYPE if c.name == "id" else c.type,
+                primary_key=c.primary_key,
+                nullable=c.nullable,
+                server_default=c.server_default,
+            )
+            for c in source.columns
+        ),
+        **kwargs,
+    )
+    for index in source.indexes:
+        Index(index.name, *(table.c[c.name] for c in index.columns), unique=index.unique)
+    return table
+
+
+def _shard_bookings_table() -> Table:
+    # AUTOINCREMENT keeps a per-table sequence we can start at the shard's id base
+    return _shard_table(Booking.__table__, MetaData(), sqlite_autoincrement=True)
+
+
+def _add_missing_columns(engine, table: Table) -> None:
+    """
+    Bring an existing shard table up to the model: add nullable columns added
+    since it was created (alembic only migrates shard 0), then their indexes.
+    """
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [c for c in table.columns if c.name not in existing]
+    if not missing:
+        return
+    preparer = engine.dialect.identifier_preparer
+    try:
+        with engine.begin() as conn:
+            for column in missing:
+                if not column.nullable:
+                    raise RuntimeError(
+                        f"Shard table {table.name} lacks NOT NULL column {column.name}; migrate it by hand"
+                    )
+                # Metadata-only on SQLite and Postgres: no table rewrite
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                        f"{preparer.format_column(column)} {column.type.compile(engine.dialect)}"
+                    )
+                )
+    except DBAPIError:
+        # Another worker process added them first
+        existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+        if any(c.name not in existing for c in missing):
+            raise
+    names = {c.name for c in missing}
+    for index in table.indexes:
+        columns = [c.name for c in index.columns]
+        if names.intersection(columns):
+            create_index_concurrently(engine, index.name, table.name, columns, unique=index.unique)
+
+
+def _ensure_shard_schema(engine, shard: int) -> None:
+    # Written in the same transactions as bookings, so they live next to them
+    for source in (OutboxMessage.__table__, RoomDaySlots.__table__, BookingUsage.__table__):
+        _shard_table(source, MetaData()).create(engine, checkfirst=True)
+    _shard_table(ChangeLogEntry.__table__, MetaData(), sqlite_autoincrement=True).create(engine, checkfirst=True)
+
+    if inspect(engine).has_table(Booking.__tablename__):
+        _add_missing_columns(engine, _shard_bookings_table())
+        return
+    base = shard << SHARD_ID_BITS
+    try:
+        # Table and id base in one transaction, so no booking can get an id below the base
+        with engine.begin() as conn:
+            _shard_bookings_table().create(conn)
+            if engine.dialect.name == "sqlite":
+                conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('bookings', :base)"), {"base": base})
+            elif engine.dialect.name == "postgresql":
+                conn.execute(text("SELECT setval(pg_get_serial_sequence('bookings', 'id'), :base)"), {"base": base})
+    except DBAPIError:
+        # Another worker process created it first
+        if not inspect(engine).has_table(Booking.__tablename__):
+            raise
+
+
+def _get_shards() -> _ShardSet:
+    global _shards
+    urls = tuple(settings.BOOKING_SHARD_URLS)
+    shards = _shards
+    if shards is None or shards.urls != urls:
+        with _shards_lock:
+            if _shards is None or _shards.urls != urls:
+                _shards = _ShardSet(urls)
+            shards = _shards
+    return shards
+
+
+def shard_count() -> int:
+    return len(settings.BOOKING_SHARD_URLS) + 1
+
+
+def shard_for_location(location: str | None) -> int:
+    """Shard holding bookings for a room at `location` (longest matching building wins)."""
+    if not settings.BOOKING_SHARD_MAP or not location:
+        return 0
+    location = location.lower()
+    best, best_len = 0, -1
+    for building, shard in settings.BOOKING_SHARD_MAP.items():
+        if len(building) > best_len and location.startswith(building.lower()):
+            best, best_len = shard, len(building)
+    return best if best < shard_count() else 0
+
+
+def shard_for_booking(booking_id: int) -> int | None:
+    """Shard that issued `booking_id`, or None if no configured shard could have."""
+    shard = booking_id >> SHARD_ID_BITS
+    return shard if 0 <= shard < shard_count() else None
+
+
+def get_shard_sessionmaker(shard: int) -> sessionmaker:
+    return _get_shards().sessionmakers[shard]
+
+
+@contextmanager
+def shard_session(db: Session, shard: int) -> Iterator[Session]:
+    """`db` itself for shard 0, otherwise a new session on the shard (closed afterwards)."""
+    if shard == 0:
+        yield db
+        return
+    with get_shard_sessionmaker(shard)() as session:
+        yield session
+
+
+def scatter(db: Session, fn: Callable[[Session], T]) -> list[T]:
+    """
+    Run `fn` on every shard and return the results in shard order.
+
+    Shard 0 runs on the caller's thread with `db`; the others run in parallel
+    on the shard thread pool, each with its own session.
+    """
+    if not settings.BOOKING_SHARD_URLS:
+        return [fn(db)]
+
+    shards = _get_shards()
+
+    def run(shard: int) -> T:
+        with shards.sessionmakers[shard]() as session:
+            return fn(session)
+
+    futures = [shards.pool.submit(run, shard) for shard in range(1, len(shards.sessionmakers))]
+    results = [fn(db)]
+    results.extend(f.result() for f in futures)
+    return results
@@ -1,21 +1,75 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.api.auth import router as auth_router
 from app.api.rooms import router as rooms_router
 from app.api.bookings import router as bookings_router
 from app.api.users_admin import router as users_admin_router
 from app.api.admin_metrics import router as admin_metrics_router
+from app.api.admin_audit import router as admin_audit_router
+from app.api.portal import router as portal_router
+from app.api.holds import router as holds_router
+from app.api.admin_profiles import router as admin_profiles_router
 from fastapi.staticfiles import StaticFiles
 from app.web.pages import router as web_router
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware
+from app.core.server_timing import ServerTimingMiddleware
+from app.services import (
+    audit_log,
+    door_display,
+    invalidation_bus,
+    notification_dispatcher,
+    room_catalog,
+    user_cache,
+    user_import,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.ROOM_CATALOG_CACHE:
+        room_catalog.load_room_catalog()
+        room_catalog.install()
+    if settings.USER_CACHE:
+        user_cache.install()
+    if settings.INVALIDATION_BUS:
+        invalidation_bus.get_bus().start()
+    if settings.AUDIT_LOG_ENABLED:
+        audit_log.install()
+    if settings.NOTIFICATIONS_ENABLED:
+        notification_dispatcher.start()
+    yield
+    if settings.INVALIDATION_BUS:
+        invalidation_bus.get_bus().stop()
+    door_display.uninstall()
+    if settings.USER_CACHE:
+        user_cache.uninstall()
+    if settings.ROOM_CATALOG_CACHE:
+        room_catalog.uninstall()
+    if settings.NOTIFICATIONS_ENABLED:
+        notification_dispatcher.stop()
+    if settings.AUDIT_LOG_ENABLED:
+        audit_log.uninstall()
+        audit_log.get_audit_log().close()
+    user_import.shutdown_hash_pool()
+
 
-app = FastAPI(title="Campus Booking System API", version="1.0.0")
+app = FastAPI(title="Campus Booking System API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(ProfilingMiddleware)
 app.include_router(auth_router)
 app.include_router(rooms_router)
 app.include_router(bookings_router)
+app.include_router(holds_router)
 app.include_router(users_admin_router)
+app.include_router(portal_router)
 
 app.include_router(web_router)
 app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
 app.include_router(admin_metrics_router)
+app.include_router(admin_audit_router)
+app.include_router(admin_profiles_router)
 
 @app.get("/health")
 def health():
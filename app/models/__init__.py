@@ -1,5 +1,15 @@
 from app.models.booking import Booking
+from app.models.booking_audit_event import BookingAuditEvent
+from app.models.booking_usage import BookingUsage
+from app.models.catalog_version import CatalogVersion
+from app.models.change_log_entry import ChangeLogEntry
+from app.models.idempotency_key import IdempotencyKey
+from app.models.online_migration import OnlineMigration
+from app.models.outbox_message import OutboxMessage
+from app.models.request_profile import RequestProfile
 from app.models.room import Room
+from app.models.room_attribute import RoomAttribute
+from app.models.room_day_slots import RoomDaySlots
 from app.models.user import User
 
-__all__ = ["User", "Room", "Booking"]
\ No newline at end of file
+__all__ = ["User", "Room", "Booking", "IdempotencyKey", "CatalogVersion", "BookingAuditEvent", "OutboxMessage", "RoomDaySlots", "ChangeLogEntry", "RoomAttribute", "OnlineMigration", "BookingUsage", "RequestProfile"]
\ No newline at end of file
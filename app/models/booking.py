@@ -7,7 +7,7 @@ Double-booking prevention will be enforced at the service layer using overlap de
 
 from datetime import datetime
 
-from sqlalchemy import Integer, DateTime, ForeignKey, String, func
+from sqlalchemy import Integer, DateTime, ForeignKey, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.enums import BookingStatus
@@ -16,6 +16,10 @@ from app.db.base import Base
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Per-room range scans by status (overlap checks, waitlist promotion)
+        Index("ix_bookings_room_status_start", "room_id", "status", "start_time"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
@@ -31,6 +35,12 @@ class Booking(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # Bumped on every status transition; clients can send it back (If-Match) for optimistic concurrency
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+    # Shared by the bookings of one multi-room request (POST /bookings/group)
+    group_id: Mapped[str | None] = mapped_column(String(32), nullable=True, index=True)
+
     # Relationships (optional but useful)
     room = relationship("Room")
     user = relationship("User")
\ No newline at end of file
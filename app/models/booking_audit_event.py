@@ -0,0 +1,38 @@
+"""
+Booking audit event model.
+
+Append-only history of booking status changes: one row per creation or
+transition, recording the status the booking moved to, its new version and
+who did it. Rows are never updated. A booking's history is its rows ordered
+by version (served by ix_booking_audit_events_booking_version).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BookingAuditEvent(Base):
+    __tablename__ = "booking_audit_events"
+    __table_args__ = (
+        Index("ix_booking_audit_events_booking_version", "booking_id", "version"),
+        Index("ix_booking_audit_events_actor_occurred", "actor_id", "occurred_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Not a foreign key: with booking shards the booking may live in another database
+    booking_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    room_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # NULL for system actions (e.g. waitlist promotion)
+    actor_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # When the change committed (not when the row was flushed)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,23 @@
+"""
+Booking usage model.
+
+Minutes of active (PENDING or APPROVED) bookings per user and ISO week of
+their start, for weekly quotas. Maintained by booking_service in the same
+transaction as each booking change while quotas are on (see
+services/booking_quotas).
+"""
+
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BookingUsage(Base):
+    __tablename__ = "booking_usage"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    # ISO year * 100 + ISO week, e.g. 202642
+    week: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -0,0 +1,19 @@
+"""
+Catalog version model.
+
+One row per cached catalog (currently only "rooms"). The version is bumped in
+the same transaction as any change to that catalog, so every worker process
+can tell its in-memory copy is stale with a single primary-key lookup.
+"""
+
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
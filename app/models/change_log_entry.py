@@ -0,0 +1,31 @@
+"""
+Change log entry model.
+
+Append-only log of cache invalidations for databases without LISTEN/NOTIFY:
+a row is written in the same transaction as the change it announces and
+every worker polls for ids above the last one it has seen (see
+services/invalidation_bus). Old rows are pruned; AUTOINCREMENT keeps ids
+from being reused after that.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # What changed: an entity type and one id, or every entity of the type when NULL
+    entity: Mapped[str] = mapped_column(String(30), nullable=False)
+    entity_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    # Publishing worker, so it can skip its own entries
+    origin: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,33 @@
+"""
+Online migration progress model.
+
+One row per long-running schema job (backfill or table rebuild) started with
+app/db/online_migrations. The last processed key is written in the same
+transaction as each batch, so an interrupted job resumes exactly where it
+stopped.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OnlineMigration(Base):
+    __tablename__ = "online_migrations"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    # "backfill" or "rebuild"
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    table_name: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Highest key processed so far (None: nothing yet)
+    last_key: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    rows_done: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
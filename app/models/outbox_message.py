@@ -0,0 +1,44 @@
+"""
+Outbox message model.
+
+Transactional outbox for user notifications: a row is inserted in the same
+transaction as the booking change it announces, so a notification exists if
+and only if the change committed. The dispatcher (services/notification_dispatcher)
+sends PENDING rows later and marks them SENT, or DEAD after too many failures.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Dispatcher scan: due PENDING rows in id order
+        Index("ix_outbox_status_available", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    booking_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    # Booking status the message announces, plus the booking details at that moment (JSON)
+    event: Mapped[str] = mapped_column(String(20), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # PENDING -> SENT, or DEAD after NOTIFY_MAX_ATTEMPTS failures
+    status: Mapped[str] = mapped_column(String(10), nullable=False, default="PENDING", server_default="PENDING")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Not before this time (retry backoff)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Lease taken by a dispatcher; expired leases are claimable again
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
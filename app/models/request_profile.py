@@ -0,0 +1,42 @@
+"""
+Request profile model.
+
+One profiled request (see app.core.profiling): what it was, how long it
+took, its stack samples as collapsed stacks and the SQL statements it ran
+with their durations. Only the newest PROFILE_KEEP rows are kept.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RequestProfile(Base):
+    __tablename__ = "request_profiles"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    method: Mapped[str] = mapped_column(String(10), nullable=False)
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    # NULL when the request failed before sending a response
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    duration_ms: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # "header" (X-Profile, requested_by set) or "sample" (PROFILE_SAMPLE_EVERY)
+    trigger: Mapped[str] = mapped_column(String(10), nullable=False)
+    requested_by: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Measured time between samples
+    interval_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    # `frame;frame;... count` per line, root first
+    stacks: Mapped[str] = mapped_column(Text, nullable=False)
+
+    sql_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sql_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    # JSON list of {"statement", "ms"} in execution order (the first MAX_SQL_STATEMENTS)
+    sql: Mapped[str] = mapped_column(Text, nullable=False)
@@ -4,7 +4,7 @@ Room model.
 Represents a bookable campus space (e.g., lecture room, study room, lab).
 """
 
-from sqlalchemy import Integer, String, DateTime, func
+from sqlalchemy import BigInteger, Integer, String, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -25,4 +25,7 @@ class Room(Base):
     # Basic constraint used later for booking validation/rules
     capacity: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
 
+    # One bit per RoomAttribute the room has (see models/room_attribute)
+    attributes_mask: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+
     created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
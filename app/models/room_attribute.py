@@ -0,0 +1,26 @@
+"""
+Room attribute model.
+
+The managed vocabulary of room equipment/features (projector, whiteboard,
+accessible, ...). Each attribute owns one bit of `rooms.attributes_mask`, so
+"has all of these attributes" is a single mask test per room.
+"""
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RoomAttribute(Base):
+    __tablename__ = "room_attributes"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Lower-case identifier used in filters (e.g. "projector")
+    name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
+
+    # Bit position in rooms.attributes_mask (0-62, so the mask stays a positive BIGINT)
+    bit: Mapped[int] = mapped_column(Integer, unique=True, nullable=False)
+
+    created_at: Mapped[str] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,26 @@
+"""
+Room day slots model.
+
+Occupancy bitmaps for one room on one day: bit i stands for the 15-minute
+slot starting at 00:00 + 15 * i minutes (96 slots, stored as 12 bytes,
+little-endian). `active` covers PENDING and APPROVED bookings, `approved`
+only APPROVED ones. Maintained by booking_service when SLOT_BITMAPS is on
+(see services/slot_bitmaps).
+"""
+
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RoomDaySlots(Base):
+    __tablename__ = "room_day_slots"
+
+    room_id: Mapped[int] = mapped_column(ForeignKey("rooms.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    active: Mapped[bytes] = mapped_column(LargeBinary(12), nullable=False)
+    approved: Mapped[bytes] = mapped_column(LargeBinary(12), nullable=False)
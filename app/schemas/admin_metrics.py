@@ -8,4 +8,14 @@ class AdminMetricsOut(BaseModel):
     pending_bookings: int
     approved_bookings: int
     rejected_bookings: int
-    cancelled_bookings: int
\ No newline at end of file
+    cancelled_bookings: int
+
+
+class InvalidationLagOut(BaseModel):
+    # Whether this worker's bus listener is running
+    running: bool
+    # Changes received from other workers, and how long after their commit (last 1000)
+    received: int
+    mean_ms: float
+    p99_ms: float
+    max_ms: float
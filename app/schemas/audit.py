@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class BookingAuditEventOut(BaseModel):
+    id: int
+    booking_id: int
+    room_id: int
+    actor_id: int | None
+    status: str
+    version: int
+    occurred_at: datetime
+
+    class Config:
+        from_attributes = True
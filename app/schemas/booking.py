@@ -19,6 +19,9 @@ class BookingCreate(BaseModel):
     # Optional note for the approver (kept simple for now)
     note: str | None = Field(default=None, max_length=300)
 
+    # From POST /holds: the slot was held for this request
+    hold_id: str | None = Field(default=None, max_length=64)
+
 
 class BookingOut(BaseModel):
     id: int
@@ -28,10 +31,115 @@ class BookingOut(BaseModel):
     end_time: datetime
     status: BookingStatus
     created_at: datetime
+    version: int
+    # Set on the bookings of one multi-room request (POST /bookings/group)
+    group_id: str | None = None
 
     class Config:
         from_attributes = True
 
 
+class BookingQueueItem(BookingOut):
+    # True when the request overlaps an APPROVED booking and cannot be approved as-is
+    conflicts_with_approved: bool
+
+
+class ConflictCluster(BaseModel):
+    """PENDING requests for one room whose time ranges overlap (directly or through a chain)."""
+
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+    items: list[BookingQueueItem]
+
+    class Config:
+        from_attributes = True
+
+
+class BookingQueuePage(BaseModel):
+    clusters: list[ConflictCluster]
+    next_cursor: str | None = None
+
+
 class BookingDecision(BaseModel):
-    note: str | None = Field(default=None, max_length=300)
\ No newline at end of file
+    note: str | None = Field(default=None, max_length=300)
+
+class PlannedBookingOut(BookingOut):
+    weight: float
+    # Displaced requests: why they were left out, and a free room that fits instead (if any)
+    reason: str | None = None
+    alternative_room_id: int | None = None
+
+
+class BookingVersionRef(BaseModel):
+    id: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class SchedulePlanOut(BaseModel):
+    start: datetime
+    end: datetime
+    approve: list[PlannedBookingOut]
+    displaced: list[PlannedBookingOut]
+    reject: list[BookingVersionRef]
+    # Room-hours the plan approves, and what first-come-first-served approval would
+    planned_hours: float
+    fcfs_hours: float
+
+    class Config:
+        from_attributes = True
+
+
+class SchedulePlanApply(BaseModel):
+    """The `approve` and `reject` lists of a plan (ids and versions are enough)."""
+
+    approve: list[BookingVersionRef] = Field(max_length=5000)
+    reject: list[BookingVersionRef] = Field(default=[], max_length=5000)
+
+
+class HoldCreate(BaseModel):
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class HoldOut(BaseModel):
+    id: str
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BookingQuotaOut(BaseModel):
+    # ISO year * 100 + ISO week, e.g. 202642
+    week: int
+    used_hours: float
+    # None: no quota for the user's role
+    limit_hours: float | None
+
+
+class BookingGroupItem(BaseModel):
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class BookingGroupCreate(BaseModel):
+    """One entry per room, each with its own time range; all are booked or none."""
+
+    bookings: list[BookingGroupItem] = Field(min_length=1, max_length=20)
+
+    # Optional note for the approver (kept simple for now)
+    note: str | None = Field(default=None, max_length=300)
+
+
+class BookingGroupOut(BaseModel):
+    group_id: str
+    bookings: list[BookingOut]
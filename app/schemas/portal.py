@@ -0,0 +1,19 @@
+"""
+Pydantic schemas for the portal bootstrap endpoint.
+"""
+
+from pydantic import BaseModel
+
+from app.schemas.booking import BookingOut
+from app.schemas.room import RoomAvailability, RoomOut
+from app.schemas.user import UserOut
+
+
+class PortalBootstrap(BaseModel):
+    user: UserOut
+    # First page of GET /rooms
+    rooms: list[RoomOut]
+    # PENDING and APPROVED bookings that have not ended yet, soonest first
+    upcoming_bookings: list[BookingOut]
+    # APPROVED bookings on `date` for each requested room, in request order
+    availability: list[RoomAvailability]
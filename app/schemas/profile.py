@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class RequestProfileOut(BaseModel):
+    id: int
+    created_at: datetime
+    method: str
+    path: str
+    status_code: int | None
+    duration_ms: float
+    trigger: str
+    requested_by: int | None
+    samples: int
+    interval_ms: float
+    sql_count: int
+    sql_ms: float
+
+    class Config:
+        from_attributes = True
+
+
+class SqlTiming(BaseModel):
+    statement: str
+    ms: float
+
+
+class RequestProfileDetail(RequestProfileOut):
+    # The first statements in execution order (sql_count counts all of them)
+    sql: list[SqlTiming]
+
+
+class ProfileTokenOut(BaseModel):
+    """Send `header: value` with a request to profile it, until `expires_at`."""
+
+    header: str
+    value: str
+    expires_at: datetime
@@ -14,6 +14,8 @@ class RoomCreate(BaseModel):
     name: str = Field(min_length=1, max_length=120, examples=["Study Room A101"])
     location: str | None = Field(default=None, max_length=120, examples=["Main Building - Floor 1"])
     capacity: int = Field(ge=1, le=500, default=1)
+    # Names from the room attribute vocabulary (GET /rooms/attributes)
+    attributes: list[str] = Field(default_factory=list, max_length=63, examples=[["projector", "whiteboard"]])
 
 
 class RoomOut(BaseModel):
@@ -22,11 +24,29 @@ class RoomOut(BaseModel):
     name: str
     location: str | None
     capacity: int
+    # Bit `bit` is set for each room attribute the room has (see GET /rooms/attributes)
+    attributes_mask: int
 
     class Config:
         from_attributes = True
 
 
+class RoomAttributeCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=50, examples=["projector"])
+
+
+class RoomAttributeOut(BaseModel):
+    name: str
+    bit: int
+
+    class Config:
+        from_attributes = True
+
+
+class RoomAttributesUpdate(BaseModel):
+    attributes: list[str] = Field(max_length=63, examples=[["projector", "accessible"]])
+
+
 
 
 class TimeSlot(BaseModel):
@@ -37,4 +57,23 @@ class TimeSlot(BaseModel):
 class RoomAvailability(BaseModel):
     room_id: int
     date: date
-    booked_slots: List[TimeSlot]
\ No newline at end of file
+    booked_slots: List[TimeSlot]
+
+
+class RoomFreeSlots(BaseModel):
+    room_id: int
+    free_slots: List[TimeSlot]
+
+
+class DisplaySlot(BaseModel):
+    booking_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class RoomNowOut(BaseModel):
+    """What a door display shows: the APPROVED booking in progress and the next one (within 7 days)."""
+
+    room_id: int
+    now: DisplaySlot | None
+    next: DisplaySlot | None
@@ -7,4 +7,4 @@ from app.core.enums import UserRole
 
 
 class UserRoleUpdate(BaseModel):
-    role: UserRole
\ No newline at end of file
+    role: UserRole
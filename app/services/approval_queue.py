@@ -0,0 +1,198 @@
+"""
+Staff approval queue.
+
+Lists PENDING bookings across rooms grouped into conflict clusters: maximal
+runs of pending requests for the same room whose intervals overlap (directly
+or through a chain). Clusters are built in a single pass over the bookings
+sorted by (room_id, start_time, id), merging while the next start is before
+the running end of the cluster.
+
+Each item is also flagged when it collides with an APPROVED booking (such a
+request cannot be approved as-is).
+
+Pagination is keyset-based over the same sort order, and pages always end on
+a cluster boundary, so a cluster is never split across pages.
+
+With booking shards, every shard builds its own page (a room, and so each of
+its clusters, lives on exactly one shard) and the pages are merged.
+"""
+
+from __future__ import annotations
+
+import base64
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.enums import BookingStatus
+from app.db.shards import scatter
+from app.models.booking import Booking
+
+_QUEUE_COLUMNS = (
+    Booking.id,
+    Booking.room_id,
+    Booking.user_id,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.status,
+    Booking.created_at,
+    Booking.version,
+    Booking.group_id,
+)
+
+
+class InvalidCursorError(Exception):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass
+class QueueItem:
+    id: int
+    room_id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    status: str
+    created_at: datetime
+    version: int
+    group_id: str | None = None
+    conflicts_with_approved: bool = False
+
+
+@dataclass
+class ConflictCluster:
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+    items: list[QueueItem] = field(default_factory=list)
+
+
+def encode_cursor(item: QueueItem) -> str:
+    raw = f"{item.room_id}|{item.start_time.isoformat()}|{item.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[int, datetime, int]:
+    try:
+        room_id, start, booking_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return int(room_id), datetime.fromisoformat(start), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _mark_approved_collisions(db: Session, clusters: list[ConflictCluster]) -> None:
+    """Flag queue items that overlap an APPROVED booking (one query per page)."""
+    if not clusters:
+        return
+
+    lo = min(c.start_time for c in clusters)
+    hi = max(c.end_time for c in clusters)
+    approved: dict[int, list[tuple[datetime, datetime]]] = defaultdict(list)
+    for room_id, start, end in db.execute(
+        select(Booking.room_id, Booking.start_time, Booking.end_time)
+        .where(
+            Booking.room_id.in_({c.room_id for c in clusters}),
+            Booking.status == BookingStatus.APPROVED.value,
+            Booking.start_time < hi,
+            Booking.end_time > lo,
+        )
+        .order_by(Booking.room_id, Booking.start_time)
+    ):
+        approved[room_id].append((start, end))
+
+    for cluster in clusters:
+        intervals = approved.get(cluster.room_id)
+        if not intervals:
+            continue
+        # Approved bookings never overlap each other, so sorting by start sorts by end too
+        ends = [end for _, end in intervals]
+        for item in cluster.items:
+            i = bisect_right(ends, item.start_time)
+            item.conflicts_with_approved = i < len(intervals) and intervals[i][0] < item.end_time
+
+
+def load_approval_queue(
+    db: Session,
+    *,
+    room_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> tuple[list[ConflictCluster], str | None]:
+    """
+    Return up to `limit` conflict clusters of PENDING bookings and the cursor for the next page.
+
+    `start`/`end` restrict the queue to pending bookings overlapping that window.
+    """
+    after = decode_cursor(cursor) if cursor is not None else None
+    pages = scatter(
+        db,
+        lambda shard_db: _load_shard_page(
+            shard_db, room_id=room_id, start=start, end=end, after=after, limit=limit
+        ),
+    )
+
+    if len(pages) == 1:
+        clusters, has_more = pages[0]
+    else:
+        merged = sorted(
+            (c for page, _ in pages for c in page),
+            key=lambda c: (c.room_id, c.start_time, c.items[0].id),
+        )
+        clusters = merged[:limit]
+        has_more = len(merged) > limit or any(more for _, more in pages)
+
+    next_cursor = encode_cursor(clusters[-1].items[-1]) if has_more else None
+    return clusters, next_cursor
+
+
+def _load_shard_page(
+    db: Session,
+    *,
+    room_id: int | None,
+    start: datetime | None,
+    end: datetime | None,
+    after: tuple[int, datetime, int] | None,
+    limit: int,
+) -> tuple[list[ConflictCluster], bool]:
+    q = select(*_QUEUE_COLUMNS).where(Booking.status == BookingStatus.PENDING.value)
+    if room_id is not None:
+        q = q.where(Booking.room_id == room_id)
+    if start is not None:
+        q = q.where(Booking.end_time > start)
+    if end is not None:
+        q = q.where(Booking.start_time < end)
+    if after is not None:
+        q = q.where(tuple_(Booking.room_id, Booking.start_time, Booking.id) > tuple_(*after))
+    q = q.order_by(Booking.room_id, Booking.start_time, Booking.id)
+
+    clusters: list[ConflictCluster] = []
+    has_more = False
+    current: ConflictCluster | None = None
+
+    result = db.execute(q.execution_options(yield_per=500))
+    try:
+        for row in result:
+            item = QueueItem(*row)
+            if current is not None and item.room_id == current.room_id and item.start_time < current.end_time:
+                current.items.append(item)
+                current.end_time = max(current.end_time, item.end_time)
+                continue
+
+            if len(clusters) == limit:
+                # The page is full and this row opens the next cluster
+                has_more = True
+                break
+
+            current = ConflictCluster(item.room_id, item.start_time, item.end_time, [item])
+            clusters.append(current)
+    finally:
+        result.close()
+
+    _mark_approved_collisions(db, clusters)
+    return clusters, has_more
@@ -0,0 +1,322 @@
+"""
+Booking audit log writer.
+
+Status transitions must not hold the booking write lock any longer than they
+already do, so the audit trail is written off the request path:
+
+- after a booking change commits, its event is appended to a bounded
+  in-memory buffer (see app.core.events for the hooks)
+- a background writer thread drains the buffer in bulk INSERTs every
+  AUDIT_FLUSH_INTERVAL_MS, or sooner once AUDIT_BATCH_SIZE events are waiting
+- events that do not fit in the buffer, or whose INSERT failed, are appended
+  to a local SQLite spool file and moved into the database on later flushes
+- a spooled batch the database refuses outright (a constraint violation, bad
+  data) is retried event by event, so one bad event does not hold up the rest;
+  an event refused on AUDIT_MAX_ATTEMPTS flushes is moved to the spool's
+  `audit_dead_letter` table and logged. Connection errors are only retried.
+
+Off by default (AUDIT_LOG_ENABLED); point AUDIT_SPOOL_PATH at a data directory
+when enabling it.
+
+Delivery is at least once: an event can be written twice if the process dies
+between inserting a spooled batch and deleting it from the spool. Events still
+in memory when the process is killed are lost; a normal shutdown flushes them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.core import events
+from app.core.config import settings
+from app.models.booking import Booking
+from app.models.booking_audit_event import BookingAuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class AuditRecord:
+    booking_id: int
+    room_id: int
+    actor_id: int | None
+    status: str
+    version: int
+    occurred_at: datetime
+
+    @classmethod
+    def from_booking(cls, booking: Booking, actor_id: int | None) -> AuditRecord:
+        return cls(
+            booking_id=booking.id,
+            room_id=booking.room_id,
+            actor_id=actor_id,
+            status=booking.status,
+            version=booking.version,
+            occurred_at=datetime.now(timezone.utc),
+        )
+
+    def to_json(self) -> str:
+        row = asdict(self)
+        row["occurred_at"] = self.occurred_at.isoformat()
+        return json.dumps(row)
+
+    @classmethod
+    def from_json(cls, raw: str) -> AuditRecord:
+        row = json.loads(raw)
+        row["occurred_at"] = datetime.fromisoformat(row["occurred_at"])
+        return cls(**row)
+
+
+class AuditSpool:
+    """Durable overflow for audit events: a SQLite file shared by all worker processes."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_spool"
+            " (id INTEGER PRIMARY KEY, record TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_dead_letter"
+            " (id INTEGER PRIMARY KEY, record TEXT NOT NULL, error TEXT NOT NULL, failed_at TEXT NOT NULL)"
+        )
+        # Spool files from before attempts were counted
+        if "attempts" not in {row[1] for row in conn.execute("PRAGMA table_info(audit_spool)")}:
+            try:
+                conn.execute("ALTER TABLE audit_spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                # Another worker process added it first
+                pass
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, records: list[AuditRecord]) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO audit_spool (record) VALUES (?)", [(r.to_json(),) for r in records])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def peek(self, limit: int) -> list[tuple[int, AuditRecord]]:
+        rows = self._connect().execute("SELECT id, record FROM audit_spool ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(spool_id, AuditRecord.from_json(raw)) for spool_id, raw in rows]
+
+    def delete_through(self, spool_id: int) -> None:
+        self._connect().execute("DELETE FROM audit_spool WHERE id <= ?", (spool_id,))
+
+    def delete(self, spool_id: int) -> None:
+        self._connect().execute("DELETE FROM audit_spool WHERE id = ?", (spool_id,))
+
+    def fail(self, spool_id: int, error: str, max_attempts: int) -> bool:
+        """Count a refused insert; at `max_attempts` move the event to the dead-letter table (True)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE audit_spool SET attempts = attempts + 1 WHERE id = ?", (spool_id,))
+            moved = conn.execute(
+                "INSERT INTO audit_dead_letter (record, error, failed_at)"
+                " SELECT record, ?, ? FROM audit_spool WHERE id = ? AND attempts >= ?",
+                (error, datetime.now(timezone.utc).isoformat(), spool_id, max_attempts),
+            ).rowcount
+            if moved:
+                conn.execute("DELETE FROM audit_spool WHERE id = ?", (spool_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(moved)
+
+    def dead_letters(self) -> list[tuple[AuditRecord, str]]:
+        rows = self._connect().execute("SELECT record, error FROM audit_dead_letter ORDER BY id").fetchall()
+        return [(AuditRecord.from_json(raw), error) for raw, error in rows]
+
+
+class AuditLog:
+    """Bounded buffer of audit records plus the writer thread that flushes it."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        spool: AuditSpool,
+        *,
+        capacity: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_attempts: int = 5,
+    ) -> None:
+        self._session_factory = session_factory
+        self._spool = spool
+        self._capacity = capacity
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_attempts = max_attempts
+        self._buffer: deque[AuditRecord] = deque()
+        self._lock = threading.Lock()
+        # Only one thread drains at a time (the writer, or flush() at shutdown)
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def record(self, record: AuditRecord) -> None:
+        with self._lock:
+            overflow = len(self._buffer) >= self._capacity
+            if not overflow:
+                self._buffer.append(record)
+                full_batch = len(self._buffer) >= self._batch_size
+        if overflow:
+            self._spool.append([record])
+            return
+        self._ensure_started()
+        if full_batch:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Write everything buffered (and spooled) now."""
+        with self._drain_lock:
+            while self._drain_once():
+                pass
+
+    def close(self) -> None:
+        """Stop the writer thread and flush what is left (a later record() starts a new one)."""
+        with self._start_lock:
+            self._stopping = True
+            self._wake.set()
+            if self._thread is not None:
+                self._thread.join(timeout=10)
+            self._thread = None
+            self._stopping = False
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit log flush failed")
+
+    def _take_batch(self) -> list[AuditRecord]:
+        with self._lock:
+            n = min(len(self._buffer), self._batch_size)
+            return [self._buffer.popleft() for _ in range(n)]
+
+    def _insert(self, records: list[AuditRecord]) -> None:
+        with self._session_factory() as db:
+            db.execute(insert(BookingAuditEvent), [asdict(r) for r in records])
+            db.commit()
+
+    def _drain_once(self) -> bool:
+        """Write one batch from the buffer, else one from the spool; False when both are empty."""
+        batch = self._take_batch()
+        if batch:
+            try:
+                self._insert(batch)
+            except Exception:
+                logger.exception("Audit insert failed; spooling %d events", len(batch))
+                self._spool.append(batch)
+                return False
+            return True
+
+        spooled = self._spool.peek(self._batch_size)
+        if not spooled:
+            return False
+        try:
+            self._insert([record for _, record in spooled])
+        except (IntegrityError, DataError):
+            return self._drain_one_by_one(spooled)
+        self._spool.delete_through(spooled[-1][0])
+        return True
+
+    def _drain_one_by_one(self, spooled: list[tuple[int, AuditRecord]]) -> bool:
+        """Insert spooled events singly around the ones refused; False if any is left for a later flush."""
+        all_written = True
+        for spool_id, record in spooled:
+            try:
+                self._insert([record])
+            except (IntegrityError, DataError) as e:
+                if self._spool.fail(spool_id, str(e.orig), self._max_attempts):
+                    logger.error(
+                        "Audit event %s refused %d times; moved to the dead-letter table", record, self._max_attempts
+                    )
+                else:
+                    all_written = False
+                continue
+            self._spool.delete(spool_id)
+        return all_written
+
+
+_audit_log: AuditLog | None = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log() -> AuditLog:
+    global _audit_log
+    if _audit_log is None:
+        with _audit_log_lock:
+            if _audit_log is None:
+                from app.db.session import SessionLocal
+
+                _audit_log = AuditLog(
+                    SessionLocal,
+                    AuditSpool(settings.AUDIT_SPOOL_PATH),
+                    capacity=settings.AUDIT_BUFFER_SIZE,
+                    batch_size=settings.AUDIT_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+                    max_attempts=settings.AUDIT_MAX_ATTEMPTS,
+                )
+    return _audit_log
+
+
+def _on_booking_changed(booking: Booking, actor_id: int | None = None, **_) -> None:
+    get_audit_log().record(AuditRecord.from_booking(booking, actor_id))
+
+
+def _on_booking_promoted(booking: Booking, **_) -> None:
+    # Promotion is a system action: no acting user
+    get_audit_log().record(AuditRecord.from_booking(booking, None))
+
+
+def install() -> None:
+    """Start recording booking changes (idempotent)."""
+    uninstall()
+    events.subscribe(events.BOOKING_CREATED, _on_booking_changed)
+    events.subscribe(events.BOOKING_STATUS_CHANGED, _on_booking_changed)
+    events.subscribe(events.BOOKING_PROMOTED, _on_booking_promoted)
+
+
+def uninstall() -> None:
+    events.unsubscribe(events.BOOKING_CREATED, _on_booking_changed)
+    events.unsubscribe(events.BOOKING_STATUS_CHANGED, _on_booking_changed)
+    events.unsubscribe(events.BOOKING_PROMOTED, _on_booking_promoted)
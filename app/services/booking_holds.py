@@ -0,0 +1,175 @@
+"""
+Short-lived booking holds (tentative reservations).
+
+While a user is filling in the booking form, POST /holds keeps the room
+interval for them for BOOKING_HOLD_SECONDS. Other users' booking requests
+that overlap a live hold fail with 409 before they take the booking write
+lock, and the holder's own request (sent with the hold id) no longer races
+them for it.
+
+Holds live in memory, per worker: a list of holds per room (a room rarely has
+more than a handful at once), checked next to the booking overlap check.
+Expired holds are dropped when their room is checked, and every
+_SWEEP_SECONDS all rooms are swept on the next access, so rooms nobody looks
+at again do not keep them.
+
+Hold intervals are kept as aware UTC datetimes, so requests sent with and
+without an offset compare (naive times are local, as booking validation
+treats them).
+
+Holds are advisory: booking_service still runs its overlap check in the write
+transaction, so a booking is never double-booked because of a hold. With
+several workers a hold only stops requests served by the worker that
+granted it.
+"""
+
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+
+_SWEEP_SECONDS = 10.0
+
+
+class HoldConflictError(Exception):
+    """Another user holds part of the interval."""
+
+
+class HoldLimitError(Exception):
+    """The user already has BOOKING_HOLDS_PER_USER live holds."""
+
+
+@dataclass(frozen=True, slots=True)
+class Hold:
+    id: str
+    room_id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    expires_at: datetime
+    # time.monotonic() deadline
+    deadline: float
+
+    def covers(self, room_id: int, start_time: datetime, end_time: datetime) -> bool:
+        start_time, end_time = _utc(start_time), _utc(end_time)
+        return self.room_id == room_id and self.start_time <= start_time and end_time <= self.end_time
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc)
+
+
+_lock = threading.Lock()
+_by_room: dict[int, list[Hold]] = defaultdict(list)
+_by_id: dict[str, Hold] = {}
+_swept_at = 0.0
+
+
+def _live(room_id: int, now: float) -> list[Hold]:
+    """The room's unexpired holds, dropping expired ones (holding _lock)."""
+    holds = _by_room.get(room_id)
+    if not holds:
+        return []
+    if any(h.deadline <= now for h in holds):
+        for h in holds:
+            if h.deadline <= now:
+                _by_id.pop(h.id, None)
+        holds[:] = [h for h in holds if h.deadline > now]
+        if not holds:
+            del _by_room[room_id]
+    return holds
+
+
+def _sweep(now: float) -> None:
+    global _swept_at
+    if now - _swept_at < _SWEEP_SECONDS:
+        return
+    _swept_at = now
+    for room_id in list(_by_room):
+        _live(room_id, now)
+
+
+def _drop(hold: Hold) -> None:
+    _by_id.pop(hold.id, None)
+    holds = _by_room.get(hold.room_id)
+    if holds and hold in holds:
+        holds.remove(hold)
+        if not holds:
+            del _by_room[hold.room_id]
+
+
+def blocking_hold(room_id: int, start_time: datetime, end_time: datetime, user_id: int) -> Hold | None:
+    """A live hold of another user overlapping [start_time, end_time), if any."""
+    start_time, end_time = _utc(start_time), _utc(end_time)
+    now = time.monotonic()
+    with _lock:
+        _sweep(now)
+        for h in _live(room_id, now):
+            if h.user_id != user_id and h.start_time < end_time and h.end_time > start_time:
+                return h
+    return None
+
+
+def acquire(room_id: int, user_id: int, start_time: datetime, end_time: datetime) -> Hold:
+    """
+    Hold [start_time, end_time) in the room for `user_id`.
+
+    The user's own overlapping holds in the room are replaced (they picked
+    another slot). Raises HoldConflictError or HoldLimitError.
+    """
+    start_time, end_time = _utc(start_time), _utc(end_time)
+    now = time.monotonic()
+    ttl = settings.BOOKING_HOLD_SECONDS
+    with _lock:
+        _sweep(now)
+        holds = _live(room_id, now)
+        replaced = []
+        for h in holds:
+            if h.start_time < end_time and h.end_time > start_time:
+                if h.user_id != user_id:
+                    raise HoldConflictError("Someone else is booking this slot right now; try again shortly")
+                replaced.append(h)
+        for h in replaced:
+            _drop(h)
+
+        mine = sum(1 for h in _by_id.values() if h.user_id == user_id and h.deadline > now)
+        if mine >= settings.BOOKING_HOLDS_PER_USER:
+            raise HoldLimitError(f"At most {settings.BOOKING_HOLDS_PER_USER} holds at a time")
+
+        hold = Hold(
+            id=secrets.token_urlsafe(12),
+            room_id=room_id,
+            user_id=user_id,
+            start_time=start_time,
+            end_time=end_time,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            deadline=now + ttl,
+        )
+        _by_room[room_id].append(hold)
+        _by_id[hold.id] = hold
+    return hold
+
+
+def get_hold(hold_id: str) -> Hold | None:
+    """The hold, if it exists and has not expired."""
+    hold = _by_id.get(hold_id)
+    if hold is None or hold.deadline <= time.monotonic():
+        return None
+    return hold
+
+
+def release(hold_id: str, user_id: int | None = None) -> bool:
+    """Drop the hold (only if it belongs to `user_id`, when given); False if there was none."""
+    with _lock:
+        hold = _by_id.get(hold_id)
+        if hold is None or (user_id is not None and hold.user_id != user_id):
+            return False
+        _drop(hold)
+    return True
+
@@ -0,0 +1,191 @@
+"""
+Weekly booking quotas per role.
+
+BOOKING_QUOTA_HOURS_PER_WEEK caps the hours of active (PENDING or APPROVED)
+bookings a user of a given role may hold per ISO week, counted by the week a
+booking starts in. Roles not listed are unlimited; an empty map turns quotas
+off.
+
+Usage is not summed from the bookings table on every request: while quotas
+are on, booking_service keeps a `booking_usage` row per user and week up to
+date in the same transaction as each booking is created, rejected or
+cancelled. The check is then a single upsert on the row's primary key inside
+the booking write transaction: the booking's minutes are added and taken back
+if the new total is over the limit. The upsert locks the row, so two bookings
+of the same user cannot both squeeze in, even where the write lock is per
+room (Postgres).
+
+Usage rows live on the booking shards, next to the bookings they count. A
+user booking rooms on several shards is checked against the other shards'
+rows read just before the write lock is taken.
+
+rebuild() regenerates the rows from the bookings table (see
+scripts/rebuild_booking_usage.py); run it before turning quotas on, and
+after they were off for a while.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db.shards import get_shard_sessionmaker, shard_count
+from app.models.booking import Booking
+from app.models.booking_usage import BookingUsage
+from app.services.slot_bitmaps import stored_time
+
+_ACTIVE = (BookingStatus.PENDING.value, BookingStatus.APPROVED.value)
+
+
+class BookingQuotaExceededError(Exception):
+    """Raised when a booking would take the user past their weekly quota."""
+
+
+@dataclass(frozen=True, slots=True)
+class WeekUsage:
+    week: int
+    minutes: int
+    # None: the role is unlimited
+    limit_minutes: int | None
+
+
+def enabled() -> bool:
+    return bool(settings.BOOKING_QUOTA_HOURS_PER_WEEK)
+
+
+def limit_minutes(role: str | None) -> int | None:
+    """The weekly quota of `role` in minutes, or None if it has none."""
+    hours = settings.BOOKING_QUOTA_HOURS_PER_WEEK.get(role or "")
+    return None if hours is None else round(hours * 60)
+
+
+def week_of(dt: datetime) -> int:
+    """ISO year * 100 + ISO week of `dt`, e.g. 202642."""
+    year, week, _ = dt.isocalendar()
+    return year * 100 + week
+
+
+def minutes_of(start: datetime, end: datetime) -> int:
+    """Length of [start, end) in minutes, a started minute counting in full."""
+    return -(-int((end - start).total_seconds()) // 60)
+
+
+def used_minutes(db: Session, user_id: int, week: int) -> int:
+    q = select(BookingUsage.minutes).where(BookingUsage.user_id == user_id, BookingUsage.week == week)
+    return db.scalar(q) or 0
+
+
+def used_elsewhere(db: Session, shard: int, user_id: int, start: datetime) -> int:
+    """The user's usage in the week of `start` on every booking shard but `shard` (0 without shards)."""
+    if shard_count() == 1:
+        return 0
+    week = week_of(stored_time(db, start))
+    total = 0
+    for other in range(shard_count()):
+        if other == shard:
+            continue
+        if other == 0:
+            total += used_minutes(db, user_id, week)
+            db.rollback()
+            continue
+        with get_shard_sessionmaker(other)() as shard_db:
+            total += used_minutes(shard_db, user_id, week)
+    return total
+
+
+def _add(db: Session, user_id: int, week: int, minutes: int) -> int:
+    """Add `minutes` to the user's week (locking its row) and return the new total."""
+    values = {"user_id": user_id, "week": week, "minutes": minutes}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(BookingUsage).values(values)
+        return db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[BookingUsage.user_id, BookingUsage.week],
+                set_={"minutes": BookingUsage.minutes + minutes},
+            ).returning(BookingUsage.minutes)
+        )
+    changed = db.execute(
+        update(BookingUsage)
+        .where(BookingUsage.user_id == user_id, BookingUsage.week == week)
+        .values(minutes=BookingUsage.minutes + minutes)
+    ).rowcount
+    if not changed:
+        db.execute(insert(BookingUsage).values(values))
+    return used_minutes(db, user_id, week)
+
+
+def charge(
+    db: Session,
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    *,
+    limit: int | None,
+    elsewhere: int = 0,
+) -> None:
+    """
+    Count a new booking against the user's week, or raise
+    BookingQuotaExceededError (leaving the usage as it was) if that takes
+    them past `limit` minutes (`elsewhere`: their usage on other shards).
+
+    Runs inside the caller's booking write transaction.
+    """
+    week = week_of(stored_time(db, start))
+    minutes = minutes_of(start, end)
+    used = _add(db, user_id, week, minutes) + elsewhere
+    if limit is not None and used > limit:
+        _add(db, user_id, week, -minutes)
+        raise BookingQuotaExceededError(
+            f"Weekly booking quota exceeded: this would make {used / 60:g} of {limit / 60:g} hours booked this week"
+        )
+
+
+def release(db: Session, bookings) -> None:
+    """Give back the time of bookings that stopped being active (inside their write transaction)."""
+    for b in bookings:
+        _add(db, b.user_id, week_of(stored_time(db, b.start_time)), -minutes_of(b.start_time, b.end_time))
+
+
+def week_usage(db: Session, user_id: int, role: str | None, at: datetime) -> WeekUsage:
+    """The user's usage (over every shard) in the week containing `at`."""
+    week = week_of(stored_time(db, at))
+    minutes = used_minutes(db, user_id, week) + used_elsewhere(db, 0, user_id, at)
+    return WeekUsage(week=week, minutes=minutes, limit_minutes=limit_minutes(role))
+
+
+def rebuild(db: Session) -> int:
+    """
+    Regenerate every usage row in this database from its bookings table.
+
+    Blocks booking writes for the duration. Returns the number of rows written.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(text("BEGIN IMMEDIATE"))
+    elif dialect == "postgresql":
+        db.execute(text("LOCK TABLE bookings IN SHARE MODE"))
+
+    rows: dict[tuple[int, int], int] = defaultdict(int)
+    bookings = db.execute(
+        select(Booking.user_id, Booking.start_time, Booking.end_time).where(Booking.status.in_(_ACTIVE))
+    )
+    for user_id, start, end in bookings:
+        rows[(user_id, week_of(stored_time(db, start)))] += minutes_of(start, end)
+
+    db.execute(delete(BookingUsage))
+    if rows:
+        db.execute(
+            insert(BookingUsage),
+            [{"user_id": user_id, "week": week, "minutes": minutes} for (user_id, week), minutes in rows.items()],
+        )
+    db.commit()
+    return len(rows)
@@ -4,31 +4,79 @@ Booking service.
 Contains the core business logic:
 - Time validation
 - Overlap detection (prevents double booking)
-- Approval workflow checks
+- Approval workflow checks (single conditional UPDATE per status transition)
+- Domain events after every committed change, carrying the acting user
+  (`actor_id`) for the audit log
+- With NOTIFICATIONS_ENABLED, an outbox row per status change, written in the
+  same transaction (sent later by services/notification_dispatcher)
+- With SLOT_BITMAPS, conflict checks against the per-room-day slot bitmaps,
+  which are updated in the same transaction (see services/slot_bitmaps)
+- An availability invalidation per room whose APPROVED bookings changed (see
+  services/invalidation_bus); new PENDING requests and rejections send none
+- Short-lived holds on a room interval, checked before the write lock is
+  taken (see services/booking_holds)
+- Booking groups: several rooms booked, approved or cancelled together,
+  all or nothing
+- With BOOKING_QUOTA_HOURS_PER_WEEK, weekly usage per user kept in the same
+  transaction as each booking change and checked against the role's quota
+  (see services/booking_quotas)
 
 Keeping this logic out of the router makes it easier to test and maintain.
 """
 
 from __future__ import annotations
 
+import json
+import uuid
+from contextlib import ExitStack
 from datetime import datetime, timedelta, timezone
+from functools import wraps
 
-from sqlalchemy import select, text
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, exists, func, insert, or_, select, text, update
+from sqlalchemy.orm import Session, aliased, object_session
 
+from app.core import events, server_timing
+from app.core.config import settings
 from app.core.enums import BookingStatus
+from app.db.shards import scatter, shard_for_booking, shard_for_location, shard_session
 from app.models.booking import Booking
+from app.models.outbox_message import OutboxMessage
 from app.models.room import Room
+from app.models.user import User
+from app.services import booking_holds, booking_quotas, invalidation_bus, slot_bitmaps
+from app.services.room_catalog import get_cached_room
+
+
+MIN_BOOKING_DURATION = timedelta(minutes=15)
+MAX_BOOKING_DURATION = timedelta(hours=4)
+# Rooms in one booking group (POST /bookings/group)
+MAX_GROUP_BOOKINGS = 20
 
 
 class BookingConflictError(Exception):
     """Raised when a booking overlaps with an existing booking."""
 
 
+class BookingVersionConflictError(BookingConflictError):
+    """Raised when the booking changed since the caller last read it (optimistic concurrency)."""
+
+
+class BookingPermissionError(Exception):
+    """Raised when a user acts on a booking they do not own."""
+
+
 class InvalidBookingTimeError(Exception):
     """Raised when start/end times are invalid."""
 
 
+class InvalidHoldError(Exception):
+    """Raised when a booking names a hold of another user, room or time."""
+
+
+class InvalidBookingGroupError(Exception):
+    """Raised when a booking group is empty, too large or names a room twice."""
+
+
 def _validate_time_range(start_time: datetime, end_time: datetime) -> None:
     # Strict validation: must be increasing and non-zero duration
     if start_time >= end_time:
@@ -41,14 +89,18 @@ def _validate_booking_window(start_time: datetime, end_time: datetime) -> None:
     - booking must be in the future
     - minimum duration (15 minutes)
     - maximum duration (4 hours)
+    - with SLOT_BITMAPS, start and end on a 15-minute boundary
     """
     _validate_time_range(start_time, end_time)
 
+    if settings.SLOT_BITMAPS and not (slot_bitmaps.is_aligned(start_time) and slot_bitmaps.is_aligned(end_time)):
+        raise InvalidBookingTimeError("Bookings must start and end on a 15-minute boundary")
+
     duration = end_time - start_time
-    if duration < timedelta(minutes=15):
+    if duration < MIN_BOOKING_DURATION:
         raise InvalidBookingTimeError("Booking duration must be at least 15 minutes")
 
-    if duration > timedelta(hours=4):
+    if duration > MAX_BOOKING_DURATION:
         raise InvalidBookingTimeError("Booking duration cannot exceed 4 hours")
 
     # Compare using UTC if datetime is timezone-aware
@@ -115,6 +167,13 @@ def assert_no_active_overlap(
         raise BookingConflictError("Room already booked for this time range")
 
 
+def overlap_error() -> BookingConflictError:
+    """The error for a new request that overlaps a blocking booking, worded like the overlap checks above."""
+    if settings.WAITLIST_MODE:
+        return BookingConflictError("Booking conflicts with an existing approved booking")
+    return BookingConflictError("Room already booked for this time range")
+
+
 def create_pending_booking(
     db: Session,
     *,
@@ -122,26 +181,153 @@ def create_pending_booking(
     room_id: int,
     start_time: datetime,
     end_time: datetime,
+    hold_id: str | None = None,
+    role: str | None = None,
 ) -> Booking:
     """
     Create a PENDING booking request.
 
     We validate:
-    - room exists
+    - room exists (from the in-process room catalog when ROOM_CATALOG_CACHE is on)
     - booking window is valid
     - no overlap vs ACTIVE bookings (PENDING or APPROVED)
 
+    In WAITLIST_MODE only APPROVED bookings block a request; overlapping
+    PENDING requests queue up and compete for approval.
+
     SQLite note: BEGIN IMMEDIATE is used to reduce race conditions during
-    conflict check + insert.
+    conflict check + insert. With BOOKING_GROUP_COMMIT the insert is handed to
+    the batching writer instead (see booking_writer).
+
+    With booking shards configured, the booking is written to the shard of the
+    room's building (see app.db.shards).
+
+    A request overlapping another user's live hold fails before taking the
+    write lock. `hold_id` names the caller's own hold on (an interval
+    containing) this slot; it is used up by the booking. An expired hold is
+    ignored.
+
+    With quotas on, a request that would take the user past their role's
+    weekly quota raises booking_quotas.BookingQuotaExceededError. `role` is
+    the user's role, looked up when not given.
     """
     _validate_booking_window(start_time, end_time)
 
-    room = db.scalar(select(Room).where(Room.id == room_id))
+    if settings.ROOM_CATALOG_CACHE:
+        room = get_cached_room(room_id)
+    else:
+        room = db.execute(select(Room.id, Room.location).where(Room.id == room_id)).first()
     if not room:
         raise ValueError("Room not found")
 
-    db.execute(text("BEGIN IMMEDIATE"))
-    assert_no_active_overlap(db, room_id, start_time, end_time)
+    hold = booking_holds.get_hold(hold_id) if hold_id else None
+    if hold is not None and (hold.user_id != user_id or not hold.covers(room_id, start_time, end_time)):
+        raise InvalidHoldError("The hold is for another user, room or time")
+    # A live hold of our own rules out everyone else's in the interval
+    if hold is None and booking_holds.blocking_hold(room_id, start_time, end_time, user_id):
+        raise BookingConflictError("Someone else is booking this slot right now; try again shortly")
+
+    shard = shard_for_location(room.location)
+    limit = elsewhere = None
+    if booking_quotas.enabled():
+        if role is None:
+            role = db.scalar(select(User.role).where(User.id == user_id))
+        limit = booking_quotas.limit_minutes(role)
+        elsewhere = booking_quotas.used_elsewhere(db, shard, user_id, start_time) if limit is not None else 0
+
+    with shard_session(db, shard) as shard_db:
+        booking = _insert_pending_booking(
+            shard_db,
+            shard,
+            user_id=user_id,
+            room_id=room_id,
+            start_time=start_time,
+            end_time=end_time,
+            quota=(limit, elsewhere) if booking_quotas.enabled() else None,
+        )
+    if hold is not None:
+        booking_holds.release(hold.id)
+    events.emit(events.BOOKING_CREATED, booking=booking, actor_id=user_id)
+    return booking
+
+
+def create_hold(
+    db: Session,
+    *,
+    user_id: int,
+    room_id: int,
+    start_time: datetime,
+    end_time: datetime,
+) -> booking_holds.Hold:
+    """
+    Hold a slot for `user_id` for BOOKING_HOLD_SECONDS (see services/booking_holds).
+
+    Same validation as create_pending_booking, and the slot must be free of
+    bookings that would block a request, checked without the write lock.
+    Raises BookingConflictError (booked or held by someone else) or
+    booking_holds.HoldLimitError.
+    """
+    _validate_booking_window(start_time, end_time)
+
+    if settings.ROOM_CATALOG_CACHE:
+        room = get_cached_room(room_id)
+    else:
+        room = db.execute(select(Room.id, Room.location).where(Room.id == room_id)).first()
+    if not room:
+        raise ValueError("Room not found")
+
+    with shard_session(db, shard_for_location(room.location)) as shard_db:
+        if settings.SLOT_BITMAPS:
+            if slot_bitmaps.conflicts(shard_db, room_id, start_time, end_time, approved_only=settings.WAITLIST_MODE):
+                raise overlap_error()
+        elif settings.WAITLIST_MODE:
+            assert_no_approved_overlap(shard_db, room_id, start_time, end_time)
+        else:
+            assert_no_active_overlap(shard_db, room_id, start_time, end_time)
+        shard_db.rollback()
+
+    try:
+        return booking_holds.acquire(room_id, user_id, start_time, end_time)
+    except booking_holds.HoldConflictError as e:
+        raise BookingConflictError(str(e))
+
+
+def _insert_pending_booking(
+    db: Session,
+    shard: int,
+    *,
+    user_id: int,
+    room_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    quota: tuple[int | None, int] | None = None,
+) -> Booking:
+    """`quota`: the user's weekly limit (None: unlimited) and usage on other shards, when quotas are on."""
+    if settings.BOOKING_GROUP_COMMIT and db.get_bind().dialect.name == "sqlite":
+        from app.services.booking_writer import get_booking_writer
+
+        # Hand our pooled connection back while we wait; the writer needs one to commit
+        db.rollback()
+        with server_timing.measure("commit_queue"):
+            return get_booking_writer(shard).submit(
+                user_id=user_id,
+                room_id=room_id,
+                start_time=start_time,
+                end_time=end_time,
+                quota=quota,
+            )
+
+    _begin_write(db, (room_id,))
+    if settings.SLOT_BITMAPS:
+        if slot_bitmaps.conflicts(db, room_id, start_time, end_time, approved_only=settings.WAITLIST_MODE):
+            raise overlap_error()
+    elif settings.WAITLIST_MODE:
+        assert_no_approved_overlap(db, room_id, start_time, end_time)
+    else:
+        assert_no_active_overlap(db, room_id, start_time, end_time)
+    if quota is not None:
+        limit, elsewhere = quota
+        booking_quotas.charge(db, user_id, start_time, end_time, limit=limit, elsewhere=elsewhere)
 
     booking = Booking(
         room_id=room_id,
@@ -151,65 +337,765 @@ def create_pending_booking(
         status=BookingStatus.PENDING.value,
     )
     db.add(booking)
+    if settings.SLOT_BITMAPS:
+        slot_bitmaps.update(db, room_id, start_time, end_time, active=True)
     db.commit()
     db.refresh(booking)
     return booking
 
 
-def approve_booking(db: Session, *, booking_id: int) -> Booking:
+def _on_booking_shard(fn):
+    """Run a booking transition on the shard that owns `booking_id`."""
+
+    @wraps(fn)
+    def wrapper(db: Session, *, booking_id: int, **kwargs):
+        shard = shard_for_booking(booking_id)
+        if shard is None:
+            raise ValueError("Booking not found")
+        with shard_session(db, shard) as shard_db:
+            return fn(shard_db, booking_id=booking_id, **kwargs)
+
+    return wrapper
+
+
+def _begin_write(db: Session, room_ids: tuple[int, ...] = ()) -> None:
     """
-    Approve a booking.
+    Start a booking write transaction.
+
+    SQLite: BEGIN IMMEDIATE takes the database write lock up front.
+    Postgres: transaction-scoped advisory locks per room, taken in sorted
+    order so concurrent writers cannot deadlock.
 
-    Approval must fail if it conflicts with an existing APPROVED booking.
+    The wait is reported as the `lock` Server-Timing metric.
     """
-    booking = db.scalar(select(Booking).where(Booking.id == booking_id))
-    if not booking:
-        raise ValueError("Booking not found")
+    dialect = db.get_bind().dialect.name
+    with server_timing.measure("lock"):
+        if dialect == "sqlite":
+            db.execute(text("BEGIN IMMEDIATE"))
+        elif dialect == "postgresql":
+            for room_id in sorted(set(room_ids)):
+                db.execute(select(func.pg_advisory_xact_lock(room_id)))
 
-    if booking.status != BookingStatus.PENDING.value:
-        raise ValueError("Only PENDING bookings can be approved")
 
-    db.execute(text("BEGIN IMMEDIATE"))
-    assert_no_approved_overlap(
-        db,
-        room_id=booking.room_id,
-        start_time=booking.start_time,
-        end_time=booking.end_time,
-        exclude_booking_id=booking.id,
+def _approved_overlap_exists():
+    """Correlated EXISTS: another APPROVED booking overlaps the row being updated."""
+    other = aliased(Booking)
+    return exists().where(
+        other.room_id == Booking.room_id,
+        other.id != Booking.id,
+        other.status == BookingStatus.APPROVED.value,
+        other.start_time < Booking.end_time,
+        other.end_time > Booking.start_time,
     )
 
-    booking.status = BookingStatus.APPROVED.value
-    db.commit()
-    db.refresh(booking)
-    return booking
 
+def _transition(
+    db: Session,
+    booking_id: int,
+    *,
+    to_status: BookingStatus,
+    from_statuses: tuple[BookingStatus, ...],
+    expected_version: int | None = None,
+    extra_where: tuple = (),
+) -> Booking | None:
+    """
+    Apply a status transition as one conditional UPDATE ... RETURNING.
+
+    Returns the updated booking, or None if no row matched (the caller
+    works out why from the current row).
+    """
+    stmt = (
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.status.in_([s.value for s in from_statuses]),
+            *extra_where,
+        )
+        .values(status=to_status.value, version=Booking.version + 1)
+        .returning(Booking)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(Booking.version == expected_version)
 
-def reject_booking(db: Session, *, booking_id: int) -> Booking:
-    booking = db.scalar(select(Booking).where(Booking.id == booking_id))
-    if not booking:
-        raise ValueError("Booking not found")
+    return db.scalars(stmt).first()
+
+
+def _enqueue_notifications(db: Session, bookings: list[Booking]) -> None:
+    """Queue a notification per booking in the current transaction (no-op unless enabled)."""
+    if not settings.NOTIFICATIONS_ENABLED or not bookings:
+        return
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(OutboxMessage),
+        [
+            {
+                "user_id": b.user_id,
+                "booking_id": b.id,
+                "event": b.status,
+                "payload": json.dumps(
+                    {
+                        "room_id": b.room_id,
+                        "start_time": b.start_time.isoformat(),
+                        "end_time": b.end_time.isoformat(),
+                        "status": b.status,
+                        "version": b.version,
+                    }
+                ),
+                "available_at": now,
+            }
+            for b in bookings
+        ],
+    )
+
+
+def _update_slots(
+    db: Session,
+    bookings: list[Booking],
+    *,
+    active: bool | None = None,
+    approved: bool | None = None,
+) -> None:
+    """Follow a status change in the slot bitmaps and, for bookings no longer active, in the quota usage."""
+    if active is False and booking_quotas.enabled():
+        booking_quotas.release(db, bookings)
+    if not settings.SLOT_BITMAPS:
+        return
+    for b in bookings:
+        slot_bitmaps.update(db, b.room_id, b.start_time, b.end_time, active=active, approved=approved)
+
+
+def _detach(bookings: list[Booking]) -> None:
+    """
+    Expunge bookings changed on several shards, once all of the shards'
+    changes succeeded and before they are committed (so they keep their
+    loaded values). Until then they stay in their sessions, so a rollback
+    expires them rather than leaving the caller uncommitted state.
+    """
+    for booking in bookings:
+        session = object_session(booking)
+        if session is not None:
+            session.expunge(booking)
 
-    if booking.status != BookingStatus.PENDING.value:
-        raise ValueError("Only PENDING bookings can be rejected")
 
-    booking.status = BookingStatus.REJECTED.value
+def _finish_transition(
+    db: Session, booking: Booking, actor_id: int | None, *, approved_changed: bool = True
+) -> Booking:
+    _enqueue_notifications(db, [booking])
+    if approved_changed:
+        # Also covers waitlist promotions, which are always in the same room
+        invalidation_bus.publish(db, invalidation_bus.AVAILABILITY, booking.room_id)
+    # RETURNING already loaded every column; detach before commit so the
+    # object is not expired and re-selected afterwards.
+    db.expunge(booking)
     db.commit()
-    db.refresh(booking)
+    events.emit(events.BOOKING_STATUS_CHANGED, booking=booking, actor_id=actor_id)
     return booking
 
 
-def cancel_booking(db: Session, *, booking_id: int) -> Booking:
-    booking = db.scalar(select(Booking).where(Booking.id == booking_id))
-    if not booking:
+def _current_state(db: Session, booking_id: int, expected_version: int | None):
+    """
+    Load the row after a transition matched nothing and raise the generic errors.
+
+    Raises ValueError (not found) or BookingVersionConflictError, otherwise
+    returns the row for transition-specific checks.
+    """
+    row = db.execute(
+        select(Booking.status, Booking.version, Booking.user_id, Booking.start_time).where(Booking.id == booking_id)
+    ).first()
+    db.rollback()
+
+    if row is None:
         raise ValueError("Booking not found")
+    if expected_version is not None and row.version != expected_version:
+        raise BookingVersionConflictError("Booking was modified by another request")
+    return row
+
+
+@_on_booking_shard
+def approve_booking(
+    db: Session,
+    *,
+    booking_id: int,
+    expected_version: int | None = None,
+    actor_id: int | None = None,
+) -> Booking:
+    """
+    Approve a booking.
+
+    Approval must fail if it conflicts with an existing APPROVED booking, and
+    a request that has already started can no longer be approved
+    (InvalidBookingTimeError). The status, start and overlap checks are folded
+    into one conditional UPDATE, so two staff members approving competing
+    requests cannot both win. With SLOT_BITMAPS the overlap check is made
+    against the room's approved bitmap instead, under the same write lock.
+    """
+    room_ids: tuple[int, ...] = ()
+    if db.get_bind().dialect.name == "postgresql":
+        # Advisory locks need the room up front; NOT EXISTS alone is racy under READ COMMITTED
+        room_ids = tuple(db.scalars(select(Booking.room_id).where(Booking.id == booking_id)))
+
+    _begin_write(db, room_ids)
+    now = slot_bitmaps.stored_now(db)
+    booking = None
+    if settings.SLOT_BITMAPS:
+        row = db.execute(
+            select(Booking.room_id, Booking.start_time, Booking.end_time).where(Booking.id == booking_id)
+        ).first()
+        if row is not None and not slot_bitmaps.conflicts(db, *row, approved_only=True):
+            booking = _transition(
+                db,
+                booking_id,
+                to_status=BookingStatus.APPROVED,
+                from_statuses=(BookingStatus.PENDING,),
+                expected_version=expected_version,
+                extra_where=(Booking.start_time > now,),
+            )
+    else:
+        booking = _transition(
+            db,
+            booking_id,
+            to_status=BookingStatus.APPROVED,
+            from_statuses=(BookingStatus.PENDING,),
+            expected_version=expected_version,
+            extra_where=(Booking.start_time > now, ~_approved_overlap_exists()),
+        )
+    if booking is not None:
+        _update_slots(db, [booking], approved=True)
+        return _finish_transition(db, booking, actor_id)
+
+    row = _current_state(db, booking_id, expected_version)
+    if row.status != BookingStatus.PENDING.value:
+        raise ValueError("Only PENDING bookings can be approved")
+    if row.start_time <= now:
+        raise InvalidBookingTimeError("Bookings that have already started cannot be approved")
+    raise BookingConflictError("Booking conflicts with an existing approved booking")
 
-    if booking.status == BookingStatus.CANCELLED.value:
+
+@_on_booking_shard
+def reject_booking(
+    db: Session,
+    *,
+    booking_id: int,
+    expected_version: int | None = None,
+    actor_id: int | None = None,
+) -> Booking:
+    _begin_write(db)
+    booking = _transition(
+        db,
+        booking_id,
+        to_status=BookingStatus.REJECTED,
+        from_statuses=(BookingStatus.PENDING,),
+        expected_version=expected_version,
+    )
+    if booking is not None:
+        _update_slots(db, [booking], active=False)
+        return _finish_transition(db, booking, actor_id, approved_changed=False)
+
+    _current_state(db, booking_id, expected_version)
+    raise ValueError("Only PENDING bookings can be rejected")
+
+
+def _promote_waitlisted(db: Session, freed: Booking) -> list[Booking]:
+    """
+    Approve PENDING requests that fit into the slot freed by `freed`.
+
+    Candidates are the PENDING bookings for the room overlapping the freed
+    interval, taken earliest `created_at` first; a candidate is promoted when
+    its whole interval is free of APPROVED bookings (including ones promoted
+    just before it). Runs inside the caller's transaction.
+    """
+    candidates = db.execute(
+        select(Booking.id, Booking.start_time, Booking.end_time)
+        .where(
+            Booking.room_id == freed.room_id,
+            Booking.status == BookingStatus.PENDING.value,
+            # Bounds the index range scan: nothing longer than MAX_BOOKING_DURATION exists
+            Booking.start_time > freed.start_time - MAX_BOOKING_DURATION,
+            Booking.start_time < freed.end_time,
+            Booking.end_time > freed.start_time,
+        )
+        .order_by(Booking.created_at, Booking.id)
+    ).all()
+    if not candidates:
+        return []
+
+    lo = min(c.start_time for c in candidates)
+    hi = max(c.end_time for c in candidates)
+    taken = list(
+        db.execute(
+            select(Booking.start_time, Booking.end_time).where(
+                Booking.room_id == freed.room_id,
+                Booking.status == BookingStatus.APPROVED.value,
+                Booking.start_time < hi,
+                Booking.end_time > lo,
+            )
+        ).all()
+    )
+
+    promoted: list[Booking] = []
+    for candidate in candidates:
+        if any(s < candidate.end_time and e > candidate.start_time for s, e in taken):
+            continue
+
+        # Same guarded UPDATE as approve_booking, so the no-overlap invariant holds regardless
+        booking = _transition(
+            db,
+            candidate.id,
+            to_status=BookingStatus.APPROVED,
+            from_statuses=(BookingStatus.PENDING,),
+            extra_where=(~_approved_overlap_exists(),),
+        )
+        if booking is not None:
+            promoted.append(booking)
+            taken.append((candidate.start_time, candidate.end_time))
+    return promoted
+
+
+@_on_booking_shard
+def cancel_booking(
+    db: Session,
+    *,
+    booking_id: int,
+    owner_id: int | None = None,
+    expected_version: int | None = None,
+    actor_id: int | None = None,
+) -> Booking:
+    """
+    Cancel a PENDING or APPROVED booking.
+
+    When `owner_id` is given the booking must belong to that user
+    (BookingPermissionError otherwise).
+
+    In WAITLIST_MODE, cancelling an APPROVED booking promotes the waiting
+    PENDING requests that now fit, in the same transaction.
+    """
+    extra_where = (Booking.user_id == owner_id,) if owner_id is not None else ()
+
+    _begin_write(db)
+    if settings.WAITLIST_MODE:
+        # RETURNING only sees new values, so try APPROVED first to know whether a slot was freed
+        booking = _transition(
+            db,
+            booking_id,
+            to_status=BookingStatus.CANCELLED,
+            from_statuses=(BookingStatus.APPROVED,),
+            expected_version=expected_version,
+            extra_where=extra_where,
+        )
+        if booking is not None:
+            promoted = _promote_waitlisted(db, booking)
+            _update_slots(db, [booking], active=False, approved=False)
+            _update_slots(db, promoted, approved=True)
+            _enqueue_notifications(db, promoted)
+            for p in promoted:
+                db.expunge(p)
+            _finish_transition(db, booking, actor_id)
+            for p in promoted:
+                events.emit(events.BOOKING_PROMOTED, booking=p, freed_by=booking)
+            return booking
+
+    booking = _transition(
+        db,
+        booking_id,
+        to_status=BookingStatus.CANCELLED,
+        from_statuses=(BookingStatus.PENDING, BookingStatus.APPROVED),
+        expected_version=expected_version,
+        extra_where=extra_where,
+    )
+    if booking is not None:
+        # In WAITLIST_MODE an APPROVED booking was handled above, so this one was PENDING;
+        # otherwise nothing else can hold approved slots inside an active booking
+        _update_slots(db, [booking], active=False, approved=None if settings.WAITLIST_MODE else False)
+        return _finish_transition(db, booking, actor_id)
+
+    row = _current_state(db, booking_id, expected_version)
+    if owner_id is not None and row.user_id != owner_id:
+        raise BookingPermissionError("Not allowed to cancel this booking")
+    if row.status == BookingStatus.CANCELLED.value:
         raise ValueError("Booking already cancelled")
+    raise ValueError("Rejected bookings cannot be cancelled")
 
-    if booking.status == BookingStatus.REJECTED.value:
-        raise ValueError("Rejected bookings cannot be cancelled")
 
-    booking.status = BookingStatus.CANCELLED.value
-    db.commit()
-    db.refresh(booking)
-    return booking
\ No newline at end of file
+def apply_booking_decisions(
+    db: Session,
+    *,
+    approve: list[tuple[int, int]],
+    reject: list[tuple[int, int]] = (),
+    actor_id: int | None = None,
+) -> list[Booking]:
+    """
+    Approve and reject several PENDING bookings at once: all of them or none.
+
+    `approve` and `reject` hold (booking_id, expected_version) pairs, e.g. a
+    plan from services/schedule_optimizer. Each approval makes the same
+    overlap check as approve_booking, against APPROVED bookings including
+    those approved earlier in the batch. Any failure rolls the whole batch
+    back and raises BookingVersionConflictError (a booking changed since the
+    plan was made), BookingConflictError or ValueError.
+
+    With booking shards every involved shard gets its own transaction; they
+    are committed together only after all of them succeeded.
+    """
+    by_shard: dict[int, tuple[list, list]] = {}
+    for decisions, slot in ((approve, 0), (reject, 1)):
+        for booking_id, version in decisions:
+            shard = shard_for_booking(booking_id)
+            if shard is None:
+                raise ValueError(f"Booking {booking_id} not found")
+            by_shard.setdefault(shard, ([], []))[slot].append((booking_id, version))
+
+    with ExitStack() as stack:
+        sessions = []
+        bookings: list[Booking] = []
+        try:
+            for shard, (to_approve, to_reject) in sorted(by_shard.items()):
+                shard_db = stack.enter_context(shard_session(db, shard))
+                sessions.append(shard_db)
+                bookings.extend(_apply_on_shard(shard_db, to_approve, to_reject))
+        except Exception:
+            for shard_db in sessions:
+                shard_db.rollback()
+            raise
+
+        _detach(bookings)
+        for shard_db in sessions:
+            shard_db.commit()
+    for booking in bookings:
+        events.emit(events.BOOKING_STATUS_CHANGED, booking=booking, actor_id=actor_id)
+    return bookings
+
+
+def _apply_on_shard(
+    db: Session,
+    approve: list[tuple[int, int]],
+    reject: list[tuple[int, int]],
+) -> list[Booking]:
+    """Apply one shard's share of apply_booking_decisions, without committing or detaching."""
+    room_ids: tuple[int, ...] = ()
+    if db.get_bind().dialect.name == "postgresql":
+        ids = [booking_id for booking_id, _ in (*approve, *reject)]
+        room_ids = tuple(db.scalars(select(Booking.room_id).where(Booking.id.in_(ids))))
+
+    _begin_write(db, room_ids)
+    bookings: list[Booking] = []
+    for (booking_id, version), to_status in [
+        *((d, BookingStatus.APPROVED) for d in approve),
+        *((d, BookingStatus.REJECTED) for d in reject),
+    ]:
+        approving = to_status == BookingStatus.APPROVED
+        extra_where: tuple = ()
+        booking = None
+        if approving and settings.SLOT_BITMAPS:
+            row = db.execute(
+                select(Booking.room_id, Booking.start_time, Booking.end_time).where(Booking.id == booking_id)
+            ).first()
+            if row is not None and not slot_bitmaps.conflicts(db, *row, approved_only=True):
+                booking = _transition(
+                    db,
+                    booking_id,
+                    to_status=to_status,
+                    from_statuses=(BookingStatus.PENDING,),
+                    expected_version=version,
+                )
+        else:
+            if approving:
+                extra_where = (~_approved_overlap_exists(),)
+            booking = _transition(
+                db,
+                booking_id,
+                to_status=to_status,
+                from_statuses=(BookingStatus.PENDING,),
+                expected_version=version,
+                extra_where=extra_where,
+            )
+
+        if booking is None:
+            row = _current_state(db, booking_id, version)
+            if row.status != BookingStatus.PENDING.value:
+                raise ValueError(f"Booking {booking_id} is no longer PENDING")
+            raise BookingConflictError(f"Booking {booking_id} conflicts with an existing approved booking")
+        if approving:
+            _update_slots(db, [booking], approved=True)
+        else:
+            _update_slots(db, [booking], active=False)
+        bookings.append(booking)
+
+    _enqueue_notifications(db, bookings)
+    for room_id in sorted({b.room_id for b in bookings if b.status == BookingStatus.APPROVED.value}):
+        invalidation_bus.publish(db, invalidation_bus.AVAILABILITY, room_id)
+    return bookings
+
+
+def create_booking_group(
+    db: Session,
+    *,
+    user_id: int,
+    items: list[tuple[int, datetime, datetime]],
+    role: str | None = None,
+) -> list[Booking]:
+    """
+    Create PENDING bookings for several rooms at once: all of them or none.
+
+    `items` holds one (room_id, start_time, end_time) per room. Each is
+    validated like create_pending_booking (without holds of our own); if any
+    room is missing, held by another user or already booked, or the group
+    takes the user past their weekly quota, nothing is written.
+
+    The bookings share a new `group_id`, so they can be approved or cancelled
+    together (approve_booking_group, cancel_booking_group). Every shard
+    involved takes its booking write lock once for all of its rooms (on
+    Postgres, advisory locks in room id order), checks them in one query and
+    inserts them in one transaction; shards are locked in shard order and
+    committed together after all of them succeeded.
+    """
+    if not items:
+        raise InvalidBookingGroupError("A booking group needs at least one room")
+    if len(items) > MAX_GROUP_BOOKINGS:
+        raise InvalidBookingGroupError(f"A booking group has at most {MAX_GROUP_BOOKINGS} rooms")
+    room_ids = [room_id for room_id, _, _ in items]
+    if len(set(room_ids)) != len(room_ids):
+        raise InvalidBookingGroupError("Each room can appear only once in a booking group")
+    for _, start_time, end_time in items:
+        _validate_booking_window(start_time, end_time)
+
+    if settings.ROOM_CATALOG_CACHE:
+        rooms = {room_id: room for room_id in room_ids if (room := get_cached_room(room_id))}
+    else:
+        rooms = {
+            room.id: room
+            for room in db.execute(select(Room.id, Room.location).where(Room.id.in_(room_ids))).all()
+        }
+    missing = [room_id for room_id in room_ids if room_id not in rooms]
+    if missing:
+        raise ValueError(f"Room {missing[0]} not found")
+
+    for room_id, start_time, end_time in items:
+        if booking_holds.blocking_hold(room_id, start_time, end_time, user_id):
+            raise BookingConflictError(f"Someone else is booking room {room_id} right now; try again shortly")
+
+    by_shard: dict[int, list[tuple[int, datetime, datetime]]] = {}
+    for item in items:
+        by_shard.setdefault(shard_for_location(rooms[item[0]].location), []).append(item)
+
+    # Room id -> (weekly limit, the user's usage on other shards that week), when quotas are on
+    quotas: dict[int, tuple[int | None, int]] | None = None
+    if booking_quotas.enabled():
+        if role is None:
+            role = db.scalar(select(User.role).where(User.id == user_id))
+        limit = booking_quotas.limit_minutes(role)
+        quotas = {room_id: (limit, 0) for room_id in room_ids}
+        if limit is not None and len(by_shard) > 1:
+            # Committed usage on the other shards, plus this group's bookings there
+            for shard, shard_items in by_shard.items():
+                for room_id, start_time, _ in shard_items:
+                    week = booking_quotas.week_of(slot_bitmaps.stored_time(db, start_time))
+                    group_elsewhere = sum(
+                        booking_quotas.minutes_of(s, e)
+                        for other, other_items in by_shard.items()
+                        if other != shard
+                        for _, s, e in other_items
+                        if booking_quotas.week_of(slot_bitmaps.stored_time(db, s)) == week
+                    )
+                    used = booking_quotas.used_elsewhere(db, shard, user_id, start_time)
+                    quotas[room_id] = (limit, used + group_elsewhere)
+
+    group_id = uuid.uuid4().hex
+    with ExitStack() as stack:
+        sessions = []
+        try:
+            for shard, shard_items in sorted(by_shard.items()):
+                shard_db = stack.enter_context(shard_session(db, shard))
+                sessions.append(shard_db)
+                _insert_group_on_shard(shard_db, user_id, group_id, shard_items, quotas)
+        except Exception:
+            for shard_db in sessions:
+                shard_db.rollback()
+            raise
+
+        for shard_db in sessions:
+            shard_db.commit()
+
+        bookings: list[Booking] = []
+        for shard_db in sessions:
+            # One query loads server defaults (created_at) for the shard's bookings
+            loaded = shard_db.scalars(
+                select(Booking).where(Booking.group_id == group_id).execution_options(populate_existing=True)
+            ).all()
+            for booking in loaded:
+                shard_db.expunge(booking)
+            bookings.extend(loaded)
+
+    order = {room_id: i for i, room_id in enumerate(room_ids)}
+    bookings.sort(key=lambda b: order[b.room_id])
+    for booking in bookings:
+        events.emit(events.BOOKING_CREATED, booking=booking, actor_id=user_id)
+    return bookings
+
+
+def _insert_group_on_shard(
+    db: Session,
+    user_id: int,
+    group_id: str,
+    items: list[tuple[int, datetime, datetime]],
+    quotas: dict[int, tuple[int | None, int]] | None,
+) -> None:
+    """Insert one shard's share of create_booking_group, without committing."""
+    _begin_write(db, tuple(room_id for room_id, _, _ in items))
+
+    # In waitlist mode only APPROVED bookings block, and PENDING requests may overlap
+    blocking = [BookingStatus.APPROVED.value]
+    if not settings.WAITLIST_MODE:
+        blocking.append(BookingStatus.PENDING.value)
+    conflict = db.scalar(
+        select(Booking.room_id)
+        .where(
+            Booking.status.in_(blocking),
+            or_(
+                *(
+                    and_(Booking.room_id == room_id, Booking.start_time < end_time, Booking.end_time > start_time)
+                    for room_id, start_time, end_time in items
+                )
+            ),
+        )
+        .limit(1)
+    )
+    if conflict is not None:
+        raise BookingConflictError(
+            f"Room {conflict}: booking conflicts with an existing approved booking"
+            if settings.WAITLIST_MODE
+            else f"Room {conflict} already booked for this time range"
+        )
+
+    if quotas is not None:
+        for room_id, start_time, end_time in items:
+            limit, elsewhere = quotas[room_id]
+            booking_quotas.charge(db, user_id, start_time, end_time, limit=limit, elsewhere=elsewhere)
+
+    db.add_all(
+        [
+            Booking(
+                room_id=room_id,
+                user_id=user_id,
+                start_time=start_time,
+                end_time=end_time,
+                status=BookingStatus.PENDING.value,
+                group_id=group_id,
+            )
+            for room_id, start_time, end_time in items
+        ]
+    )
+    if settings.SLOT_BITMAPS:
+        for room_id, start_time, end_time in items:
+            slot_bitmaps.update(db, room_id, start_time, end_time, active=True)
+    db.flush()
+
+
+def _group_members(db: Session, group_id: str) -> list:
+    """(id, user_id, status, version) of every booking in the group, on every shard."""
+    q = select(Booking.id, Booking.user_id, Booking.status, Booking.version).where(Booking.group_id == group_id)
+    members = [row for part in scatter(db, lambda s: s.execute(q).all()) for row in part]
+    db.rollback()
+    if not members:
+        raise ValueError("Booking group not found")
+    return members
+
+
+def approve_booking_group(db: Session, *, group_id: str, actor_id: int | None = None) -> list[Booking]:
+    """
+    Approve every PENDING booking of a group at once (see apply_booking_decisions).
+
+    Fails, approving nothing, with BookingConflictError when any of them
+    conflicts with an APPROVED booking, or BookingVersionConflictError when
+    one changed in the meantime. Members cancelled or rejected on their own
+    are left as they are.
+    """
+    pending = [(m.id, m.version) for m in _group_members(db, group_id) if m.status == BookingStatus.PENDING.value]
+    if not pending:
+        raise ValueError("No PENDING bookings in this group")
+    return apply_booking_decisions(db, approve=pending, actor_id=actor_id)
+
+
+def cancel_booking_group(
+    db: Session,
+    *,
+    group_id: str,
+    owner_id: int | None = None,
+    actor_id: int | None = None,
+) -> list[Booking]:
+    """
+    Cancel every PENDING or APPROVED booking of a group at once.
+
+    When `owner_id` is given the group must belong to that user
+    (BookingPermissionError otherwise). In WAITLIST_MODE the slots freed by
+    cancelled APPROVED bookings promote waiting requests, as in cancel_booking.
+    """
+    members = _group_members(db, group_id)
+    if owner_id is not None and any(m.user_id != owner_id for m in members):
+        raise BookingPermissionError("Not allowed to cancel this booking group")
+    active = (BookingStatus.PENDING.value, BookingStatus.APPROVED.value)
+    shards = sorted({shard_for_booking(m.id) for m in members if m.status in active})
+    if not shards:
+        raise ValueError("Booking group already cancelled")
+
+    with ExitStack() as stack:
+        sessions = []
+        cancelled: list[Booking] = []
+        promoted: list[tuple[Booking, Booking]] = []
+        try:
+            for shard in shards:
+                shard_db = stack.enter_context(shard_session(db, shard))
+                sessions.append(shard_db)
+                shard_cancelled, shard_promoted = _cancel_group_on_shard(shard_db, group_id)
+                cancelled.extend(shard_cancelled)
+                promoted.extend(shard_promoted)
+        except Exception:
+            for shard_db in sessions:
+                shard_db.rollback()
+            raise
+
+        _detach(cancelled + [p for p, _ in promoted])
+        for shard_db in sessions:
+            shard_db.commit()
+    for booking in cancelled:
+        events.emit(events.BOOKING_STATUS_CHANGED, booking=booking, actor_id=actor_id)
+    for p, freed in promoted:
+        events.emit(events.BOOKING_PROMOTED, booking=p, freed_by=freed)
+    return cancelled
+
+
+def _cancel_group_on_shard(db: Session, group_id: str) -> tuple[list[Booking], list[tuple[Booking, Booking]]]:
+    """
+    Cancel one shard's share of a group, without committing or detaching;
+    returns (cancelled, [(promoted, freed_by)]).
+    """
+    _begin_write(db)
+
+    def cancel(from_status: BookingStatus) -> list[Booking]:
+        return list(
+            db.scalars(
+                update(Booking)
+                .where(Booking.group_id == group_id, Booking.status == from_status.value)
+                .values(status=BookingStatus.CANCELLED.value, version=Booking.version + 1)
+                .returning(Booking)
+            ).all()
+        )
+
+    # RETURNING only sees new values, so cancel APPROVED ones first to know which slots were freed
+    approved = cancel(BookingStatus.APPROVED)
+    pending = cancel(BookingStatus.PENDING)
+    _update_slots(db, approved, active=False, approved=False)
+    _update_slots(db, pending, active=False, approved=None if settings.WAITLIST_MODE else False)
+
+    promoted: list[tuple[Booking, Booking]] = []
+    if settings.WAITLIST_MODE:
+        for freed in approved:
+            for p in _promote_waitlisted(db, freed):
+                _update_slots(db, [p], approved=True)
+                promoted.append((p, freed))
+
+    bookings = approved + pending
+    _enqueue_notifications(db, bookings + [p for p, _ in promoted])
+    # Promotions are in the rooms of the approved bookings they replace
+    for room_id in sorted({b.room_id for b in approved}):
+        invalidation_bus.publish(db, invalidation_bus.AVAILABILITY, room_id)
+    return bookings, promoted
@@ -0,0 +1,269 @@
+"""
+Now/next table for room door displays.
+
+Each display polls for its room's current and next APPROVED booking. Every
+worker keeps the answer for every room in memory, already rendered to JSON
+with an ETag (a hash of the body, so all workers agree on it):
+
+- built on first use from one query per booking shard (APPROVED bookings
+  that have not ended and start within HORIZON)
+- a room is reloaded (one small query) when the invalidation bus announces
+  its APPROVED bookings changed, which booking_service does for approvals and
+  cancellations; this worker sees its own changes right after the commit,
+  other workers' via the bus
+- the clock is handled without a thread: each room's entry records when it
+  next changes (its current booking ends or its next one starts), and reads
+  first recompute the entries whose time has come (a heap of those times)
+- everything is reloaded every DOOR_DISPLAY_RELOAD_SECONDS as a backstop
+  when the invalidation bus is not running (with several workers it should
+  be), and hourly otherwise, to slide the horizon
+
+Bookings keep their stored times for display, but the clock compares UTC
+instants: Postgres returns aware times, SQLite naive local wall-clock times
+(see slot_bitmaps.stored_now).
+
+A display poll is then a dictionary lookup and, most of the time, a 304.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db.session import SessionLocal
+from app.db.shards import scatter, shard_for_location, shard_session
+from app.models.booking import Booking
+from app.models.room import Room
+from app.services import invalidation_bus
+from app.services.slot_bitmaps import stored_now
+
+# How far ahead "next" looks
+HORIZON = timedelta(days=7)
+# Full reload interval while the invalidation bus keeps the table current
+_BUS_RELOAD_SECONDS = 3600.0
+
+
+@dataclass(frozen=True, slots=True)
+class DisplayEntry:
+    room_id: int
+    body: bytes
+    etag: str
+    # When `now`/`next` change next (None: not within the horizon)
+    changes_at: datetime | None
+
+
+_lock = threading.Lock()
+_reload_lock = threading.Lock()
+# Room id -> location, for building filters
+_rooms: dict[int, str | None] = {}
+# Room id -> APPROVED (start instant, end instant, booking id, stored start, stored end) not yet ended, sorted
+_bookings: dict[int, list[tuple[datetime, datetime, int, datetime, datetime]]] = {}
+_entries: dict[int, DisplayEntry] = {}
+# (changes_at, room id); stale items are skipped when popped
+_changes: list[tuple[datetime, int]] = []
+# Room id -> sequence number of the load its bookings came from
+_loaded_seq: dict[int, int] = {}
+_seq = itertools.count(1)
+_building_rooms: dict[str, tuple[int, ...]] = {}
+_loaded = False
+_reload_at = 0.0
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _instant(value: datetime) -> datetime:
+    """A stored booking time as an aware UTC datetime (naive ones are local wall-clock time)."""
+    return value.astimezone(timezone.utc)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _slot(booking: tuple[datetime, datetime, int, datetime, datetime] | None) -> dict | None:
+    if booking is None:
+        return None
+    _, _, booking_id, start, end = booking
+    return {"booking_id": booking_id, "start_time": start, "end_time": end}
+
+
+def _render(room_id: int, now: datetime) -> None:
+    """Recompute `room_id`'s entry at `now` (aware UTC), dropping bookings that have ended (holding _lock)."""
+    bookings = _bookings.get(room_id, [])
+    while bookings and bookings[0][1] <= now:
+        bookings.pop(0)
+    current = bookings[0] if bookings and bookings[0][0] <= now else None
+    i = 1 if current else 0
+    upcoming = bookings[i] if len(bookings) > i else None
+
+    changes_at = current[1] if current else (upcoming[0] if upcoming else None)
+    body = orjson.dumps(
+        {"room_id": room_id, "now": _slot(current), "next": _slot(upcoming)},
+        option=orjson.OPT_UTC_Z,
+    )
+    _entries[room_id] = DisplayEntry(room_id, body, _etag(body), changes_at)
+    if changes_at is not None:
+        heapq.heappush(_changes, (changes_at, room_id))
+
+
+def _approved_query(db: Session):
+    now = stored_now(db)
+    return (
+        select(Booking.room_id, Booking.start_time, Booking.end_time, Booking.id)
+        .where(
+            Booking.status == BookingStatus.APPROVED.value,
+            Booking.end_time > now,
+            Booking.start_time < now + HORIZON,
+        )
+        .order_by(Booking.room_id, Booking.start_time)
+    )
+
+
+def _install(seq: int, rows: dict[int, list], now: datetime, room_ids) -> None:
+    """Take the bookings of `room_ids` from a load numbered `seq`, unless a later load already did."""
+    rows = {
+        room_id: sorted((_instant(start), _instant(end), booking_id, start, end) for start, end, booking_id in bookings)
+        for room_id, bookings in rows.items()
+    }
+    with _lock:
+        for room_id in room_ids:
+            if _loaded_seq.get(room_id, 0) > seq:
+                continue
+            _loaded_seq[room_id] = seq
+            _bookings[room_id] = rows.get(room_id, [])
+            _render(room_id, now)
+
+
+def _load_rooms(db: Session) -> None:
+    rooms = dict(db.execute(select(Room.id, Room.location)).all())
+    with _lock:
+        _rooms.clear()
+        _rooms.update(rooms)
+        _building_rooms.clear()
+        for room_id in list(_entries):
+            if room_id not in rooms:
+                del _entries[room_id]
+
+
+def reload_all() -> None:
+    """Reload rooms and bookings (one query per shard)."""
+    global _loaded, _reload_at
+    seq = next(_seq)
+    now = _now()
+    with SessionLocal() as db:
+        _load_rooms(db)
+        rows: dict[int, list] = defaultdict(list)
+        for part in scatter(db, lambda s: s.execute(_approved_query(s)).all()):
+            for room_id, start, end, booking_id in part:
+                rows[room_id].append((start, end, booking_id))
+    with _lock:
+        room_ids = list(_rooms)
+    _install(seq, rows, now, room_ids)
+    with _lock:
+        # Drop superseded heap items now and then
+        _changes[:] = [(at, room_id) for room_id, entry in _entries.items() if (at := entry.changes_at)]
+        heapq.heapify(_changes)
+    _loaded = True
+    reload_seconds = _BUS_RELOAD_SECONDS if invalidation_bus.is_running() else settings.DOOR_DISPLAY_RELOAD_SECONDS
+    _reload_at = time.monotonic() + reload_seconds
+
+
+def reload_room(room_id: int) -> None:
+    """Reload one room's bookings (one query on its shard)."""
+    if room_id not in _rooms:
+        return
+    seq = next(_seq)
+    now = _now()
+    with SessionLocal() as db, shard_session(db, shard_for_location(_rooms.get(room_id))) as shard_db:
+        rows = shard_db.execute(_approved_query(shard_db).where(Booking.room_id == room_id)).all()
+    _install(seq, {room_id: [(start, end, booking_id) for _, start, end, booking_id in rows]}, now, [room_id])
+
+
+def _tick() -> None:
+    """Load on first use, reload when due, and recompute the entries whose time has come."""
+    if not _loaded or time.monotonic() >= _reload_at:
+        # One reload at a time; everyone else keeps serving the current table
+        if _reload_lock.acquire(blocking=not _loaded):
+            try:
+                if not _loaded:
+                    install()
+                if not _loaded or time.monotonic() >= _reload_at:
+                    reload_all()
+            finally:
+                _reload_lock.release()
+
+    now = _now()
+    if not _changes or _changes[0][0] > now:
+        return
+    with _lock:
+        while _changes and _changes[0][0] <= now:
+            at, room_id = heapq.heappop(_changes)
+            entry = _entries.get(room_id)
+            if entry is not None and entry.changes_at == at:
+                _render(room_id, now)
+
+
+def get_entry(room_id: int) -> DisplayEntry | None:
+    _tick()
+    return _entries.get(room_id)
+
+
+def get_building(building: str | None) -> tuple[bytes, str]:
+    """JSON list of the entries of rooms whose location starts with `building` (all rooms if None), and its ETag."""
+    _tick()
+    key = (building or "").lower()
+    room_ids = _building_rooms.get(key)
+    if room_ids is None:
+        # Under the lock: _load_rooms refills _rooms and empties this cache
+        with _lock:
+            room_ids = tuple(
+                sorted(room_id for room_id, location in _rooms.items() if (location or "").lower().startswith(key))
+            )
+            _building_rooms[key] = room_ids
+    entries = [entry for room_id in room_ids if (entry := _entries.get(room_id)) is not None]
+    body = b"[" + b",".join(entry.body for entry in entries) + b"]"
+    return body, _etag("".join(entry.etag for entry in entries).encode())
+
+
+def _on_availability_changed(room_id: int | None) -> None:
+    if not _loaded:
+        return
+    if room_id is None:
+        reload_all()
+    else:
+        reload_room(room_id)
+
+
+def _on_rooms_changed(_room_id: int | None) -> None:
+    if _loaded:
+        reload_all()
+
+
+def install() -> None:
+    """Keep the table current from booking and room change announcements (idempotent)."""
+    invalidation_bus.unsubscribe(invalidation_bus.AVAILABILITY, _on_availability_changed)
+    invalidation_bus.unsubscribe(invalidation_bus.ROOM, _on_rooms_changed)
+    invalidation_bus.subscribe(invalidation_bus.AVAILABILITY, _on_availability_changed)
+    invalidation_bus.subscribe(invalidation_bus.ROOM, _on_rooms_changed)
+
+
+def uninstall() -> None:
+    """Stop updating; the next read loads the table again."""
+    global _loaded
+    _loaded = False
+    invalidation_bus.unsubscribe(invalidation_bus.AVAILABILITY, _on_availability_changed)
+    invalidation_bus.unsubscribe(invalidation_bus.ROOM, _on_rooms_changed)
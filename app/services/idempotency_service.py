@@ -0,0 +1,290 @@
+"""
+Idempotency service.
+
+Lets clients safely retry mutating requests by sending an `Idempotency-Key`.
+The first request with a key runs normally and its response is stored; any
+retry with the same key gets the stored response back without re-running
+the booking logic.
+
+- Outcomes are persisted in `idempotency_keys` (TTL via expires_at) and
+  fronted by a bounded in-memory cache, so most replays never hit the DB.
+- Concurrent duplicates in the same process wait on the first request.
+- Duplicates in other workers see the in-flight row and poll until it
+  completes (or IDEMPOTENCY_WAIT_SECONDS runs out).
+- An in-flight row older than IDEMPOTENCY_LEASE_SECONDS belongs to a worker
+  that died mid-request; the next request with the key takes it over.
+
+Times are UTC-aware; SQLite hands DateTime(timezone=True) columns back
+naive (they were written in UTC), Postgres aware.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when a key is reused for a different request."""
+
+
+class IdempotencyInProgressError(Exception):
+    """Raised when the original request with this key is still running."""
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: bytes
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    request_hash: str
+    response: StoredResponse
+    expires_at: datetime
+
+
+_CacheKey = tuple[int, str]
+
+_lock = threading.Lock()
+_cache: OrderedDict[_CacheKey, _CacheEntry] = OrderedDict()
+_inflight: dict[_CacheKey, threading.Event] = {}
+_last_purge = 0.0
+
+# How often expired rows are deleted (checked opportunistically on writes)
+_PURGE_INTERVAL_SECONDS = 300
+_POLL_INTERVAL_SECONDS = 0.05
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they were written in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def request_fingerprint(method: str, path: str, body: str = "") -> str:
+    return hashlib.sha256(f"{method} {path}\n{body}".encode()).hexdigest()
+
+
+def _cache_get(ck: _CacheKey) -> _CacheEntry | None:
+    with _lock:
+        entry = _cache.get(ck)
+        if entry is None:
+            return None
+        if entry.expires_at <= _now():
+            del _cache[ck]
+            return None
+        _cache.move_to_end(ck)
+        return entry
+
+
+def _cache_put(ck: _CacheKey, entry: _CacheEntry) -> None:
+    with _lock:
+        _cache[ck] = entry
+        _cache.move_to_end(ck)
+        while len(_cache) > settings.IDEMPOTENCY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _replay(entry: _CacheEntry, request_hash: str) -> StoredResponse:
+    if entry.request_hash != request_hash:
+        raise IdempotencyKeyMismatchError("Idempotency-Key was already used for a different request")
+    return entry.response
+
+
+def _claim(user_id: int, key: str, request_hash: str) -> _CacheEntry | None:
+    """
+    Claim the key in the database.
+
+    Returns the stored entry if the request already completed, or None once
+    this caller owns an in-flight row: a new one, or one whose lease ran out.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    db = SessionLocal()
+    try:
+        while True:
+            now = _now()
+            row = db.scalar(
+                select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            )
+
+            if row is not None and _utc(row.expires_at) <= now:
+                db.delete(row)
+                db.commit()
+                row = None
+
+            if row is None:
+                db.add(
+                    IdempotencyKey(
+                        user_id=user_id,
+                        key=key,
+                        request_hash=request_hash,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                    )
+                )
+                try:
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    # Another worker claimed it between our select and insert
+                    db.rollback()
+                    continue
+
+            if row.status_code is not None:
+                return _CacheEntry(
+                    request_hash=row.request_hash,
+                    response=StoredResponse(row.status_code, row.response_body or b""),
+                    expires_at=_utc(row.expires_at),
+                )
+
+            lease_end = _utc(row.created_at) + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+            if lease_end <= now:
+                # The worker that claimed it died; take the claim over (only one taker wins)
+                taken = db.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.id == row.id,
+                        IdempotencyKey.status_code.is_(None),
+                        IdempotencyKey.created_at <= now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+                    )
+                    .values(
+                        request_hash=request_hash,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                if taken:
+                    return None
+                continue
+
+            if row.request_hash != request_hash:
+                raise IdempotencyKeyMismatchError("Idempotency-Key was already used for a different request")
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgressError("A request with this Idempotency-Key is still in progress")
+
+            db.rollback()
+            time.sleep(_POLL_INTERVAL_SECONDS)
+    finally:
+        db.close()
+
+
+def _complete(user_id: int, key: str, response: StoredResponse) -> datetime:
+    global _last_purge
+
+    expires_at = _now() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None),
+            )
+            .values(status_code=response.status_code, response_body=response.body, expires_at=expires_at)
+        )
+        db.commit()
+
+        if time.monotonic() - _last_purge > _PURGE_INTERVAL_SECONDS:
+            _last_purge = time.monotonic()
+            purge_expired_keys(db)
+    finally:
+        db.close()
+    return expires_at
+
+
+def _release(user_id: int, key: str) -> None:
+    """Drop an in-flight claim so the client can retry after an unexpected failure."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None),
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge_expired_keys(db) -> int:
+    """Delete expired idempotency rows. Returns the number of rows removed."""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _now()))
+    db.commit()
+    return result.rowcount or 0
+
+
+def execute_idempotent(
+    *,
+    user_id: int,
+    key: str,
+    request_hash: str,
+    handler: Callable[[], StoredResponse],
+) -> tuple[StoredResponse, bool]:
+    """
+    Run `handler` at most once per (user_id, key).
+
+    Returns (response, replayed). `handler` should return the response to
+    store; if it raises, the claim is released and the exception propagates.
+    """
+    ck = (user_id, key)
+
+    while True:
+        entry = _cache_get(ck)
+        if entry is not None:
+            return _replay(entry, request_hash), True
+
+        with _lock:
+            waiting_on = _inflight.get(ck)
+            if waiting_on is None:
+                owned = threading.Event()
+                _inflight[ck] = owned
+
+        if waiting_on is None:
+            break
+
+        # Same key already running in this process: wait for it, then replay
+        if not waiting_on.wait(settings.IDEMPOTENCY_WAIT_SECONDS):
+            raise IdempotencyInProgressError("A request with this Idempotency-Key is still in progress")
+
+    try:
+        entry = _claim(user_id, key, request_hash)
+        if entry is not None:
+            _cache_put(ck, entry)
+            return _replay(entry, request_hash), True
+
+        try:
+            response = handler()
+        except BaseException:
+            _release(user_id, key)
+            raise
+
+        expires_at = _complete(user_id, key, response)
+        _cache_put(ck, _CacheEntry(request_hash, response, expires_at))
+        return response, False
+    finally:
+        with _lock:
+            _inflight.pop(ck, None)
+        owned.set()
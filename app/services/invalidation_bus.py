@@ -0,0 +1,286 @@
+"""
+Cross-worker cache invalidation bus.
+
+In-process caches (room catalog, user cache, ...) go stale when another
+worker process changes what they hold. With INVALIDATION_BUS on, writers
+announce changes and every worker drops the affected entries:
+
+- publish(db, entity, entity_id) is called inside the transaction making the
+  change. On Postgres it issues NOTIFY (delivered only if the transaction
+  commits); elsewhere it appends a `change_log` row (see models/change_log_entry).
+- Each worker runs one listener thread per booking shard: LISTEN on
+  Postgres, otherwise a poll for change_log ids above the last one seen,
+  every INVALIDATION_POLL_SECONDS.
+- Handlers registered with subscribe(entity, handler) are called with the
+  entity id (None means "all of them"), in the publishing worker once the
+  committed transaction has ended and its connection is back in the pool
+  (also with the bus off), and in every other worker when the listener sees
+  the change. Handlers may open sessions of their own (e.g. to reload a
+  cache) without a request holding two pooled connections at once.
+
+Invalidation lag is therefore bounded by INVALIDATION_POLL_SECONDS plus one
+small indexed query on SQLite, and by the NOTIFY round trip on Postgres. Each
+worker measures it for the changes it receives from others (lag_stats()).
+
+The change_log poll relies on ids becoming visible in commit order, which
+holds on SQLite (one writer at a time).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import select as select_module
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.models.change_log_entry import ChangeLogEntry
+
+logger = logging.getLogger(__name__)
+
+# Entity types
+ROOM = "room"
+USER = "user"
+# APPROVED bookings of one room (entity_id = room id); new PENDING requests are not announced
+AVAILABILITY = "availability"
+
+CHANNEL = "cbs_invalidation"
+
+# Identifies this worker in change_log rows / NOTIFY payloads
+ORIGIN = f"{os.getpid()}:{uuid.uuid4().hex}"
+
+Handler = Callable[[int | None], None]
+
+_handlers: dict[str, list[Handler]] = defaultdict(list)
+
+
+def subscribe(entity: str, handler: Handler) -> None:
+    _handlers[entity].append(handler)
+
+
+def unsubscribe(entity: str, handler: Handler) -> None:
+    if handler in _handlers.get(entity, ()):
+        _handlers[entity].remove(handler)
+
+
+def _dispatch(entity: str, entity_id: int | None) -> None:
+    for handler in list(_handlers.get(entity, ())):
+        try:
+            handler(entity_id)
+        except Exception:
+            logger.exception("Invalidation handler %r failed for %s %s", handler, entity, entity_id)
+
+
+def _after_commit(session: Session) -> None:
+    # The connection is still checked out here: only hand the changes over to _after_transaction_end
+    session.info.setdefault("committed_invalidations", []).extend(session.info.pop("invalidations", ()))
+
+
+def _after_transaction_end(session: Session, transaction) -> None:
+    if transaction.parent is not None:
+        return  # a savepoint; the outermost transaction is still open
+    committed = session.info.pop("committed_invalidations", ())
+    for entity, entity_id in dict.fromkeys(committed):
+        _dispatch(entity, entity_id)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop("invalidations", None)
+
+
+def publish(db: Session, entity: str, entity_id: int | None = None) -> None:
+    """
+    Announce that `entity` (one id, or all of them when None) changes in the
+    current transaction of `db`.
+
+    This worker's handlers always run after the commit, once the session has
+    released its connection; other workers are told only when
+    INVALIDATION_BUS is on.
+    """
+    if settings.INVALIDATION_BUS:
+        now = datetime.now(timezone.utc)
+        if db.get_bind().dialect.name == "postgresql":
+            payload = json.dumps({"e": entity, "i": entity_id, "o": ORIGIN, "t": now.timestamp()})
+            db.execute(select(func.pg_notify(CHANNEL, payload)))
+        else:
+            db.execute(
+                insert(ChangeLogEntry).values(entity=entity, entity_id=entity_id, origin=ORIGIN, created_at=now)
+            )
+    elif not _handlers.get(entity):
+        return
+
+    if "invalidation_hooks" not in db.info:
+        event.listen(db, "after_commit", _after_commit)
+        event.listen(db, "after_rollback", _after_rollback)
+        event.listen(db, "after_transaction_end", _after_transaction_end)
+        db.info["invalidation_hooks"] = True
+    db.info.setdefault("invalidations", []).append((entity, entity_id))
+
+
+class _LagStats:
+    def __init__(self, size: int = 1000) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.received = 0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.received += 1
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            received, worst = self.received, self.max_seconds
+        if not samples:
+            return {"received": received, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "received": received,
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            "max_ms": round(worst * 1000, 2),
+        }
+
+
+def _utc_timestamp(value: datetime) -> float:
+    # SQLite hands back naive datetimes; they were written in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class InvalidationBus:
+    """Listener threads (one per booking shard) feeding the subscribed handlers."""
+
+    def __init__(self, session_factories: list[sessionmaker], *, poll_interval: float, retention_seconds: float) -> None:
+        self._session_factories = session_factories
+        self._poll_interval = poll_interval
+        self._retention = timedelta(seconds=retention_seconds)
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self.lag = _LagStats()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for shard, factory in enumerate(self._session_factories):
+            if factory.kw["bind"].dialect.name == "postgresql":
+                target, args = self._listen, (factory,)
+            else:
+                # Start from now: caches are loaded fresh when the worker starts
+                with factory() as db:
+                    last_id = db.scalar(select(func.max(ChangeLogEntry.id))) or 0
+                target, args = self._poll, (factory, last_id)
+            thread = threading.Thread(target=target, args=args, name=f"invalidation-bus-{shard}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+
+    def _received(self, entity: str, entity_id: int | None, origin: str, published: float) -> None:
+        if origin == ORIGIN:
+            return  # already dispatched after our own commit
+        self.lag.add(max(time.time() - published, 0.0))
+        _dispatch(entity, entity_id)
+
+    def _poll(self, factory: sessionmaker, last_id: int) -> None:
+        pruned_at = 0.0
+        while not self._stopping.is_set():
+            try:
+                with factory() as db:
+                    rows = db.execute(
+                        select(
+                            ChangeLogEntry.id,
+                            ChangeLogEntry.entity,
+                            ChangeLogEntry.entity_id,
+                            ChangeLogEntry.origin,
+                            ChangeLogEntry.created_at,
+                        )
+                        .where(ChangeLogEntry.id > last_id)
+                        .order_by(ChangeLogEntry.id)
+                    ).all()
+                    if time.monotonic() - pruned_at > 60:
+                        pruned_at = time.monotonic()
+                        db.execute(
+                            delete(ChangeLogEntry).where(
+                                ChangeLogEntry.created_at < datetime.now(timezone.utc) - self._retention
+                            )
+                        )
+                        db.commit()
+                for row in rows:
+                    last_id = row.id
+                    self._received(row.entity, row.entity_id, row.origin, _utc_timestamp(row.created_at))
+            except Exception:
+                logger.exception("Invalidation poll failed")
+            self._stopping.wait(self._poll_interval)
+
+    def _listen(self, factory: sessionmaker) -> None:
+        engine = factory.kw["bind"]
+        while not self._stopping.is_set():
+            try:
+                raw = engine.raw_connection()
+                try:
+                    conn = raw.driver_connection
+                    conn.autocommit = True
+                    conn.cursor().execute(f"LISTEN {CHANNEL}")
+                    while not self._stopping.is_set():
+                        # Wake up at least every poll interval to notice stop()
+                        if select_module.select([conn], [], [], self._poll_interval) == ([], [], []):
+                            continue
+                        conn.poll()
+                        while conn.notifies:
+                            note = json.loads(conn.notifies.pop(0).payload)
+                            self._received(note["e"], note["i"], note["o"], note["t"])
+                finally:
+                    raw.invalidate()
+            except Exception:
+                logger.exception("Invalidation listener failed; reconnecting")
+                self._stopping.wait(1.0)
+
+
+_bus: InvalidationBus | None = None
+_bus_lock = threading.Lock()
+
+
+def get_bus() -> InvalidationBus:
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                from app.db.shards import get_shard_sessionmaker, shard_count
+
+                _bus = InvalidationBus(
+                    [get_shard_sessionmaker(shard) for shard in range(shard_count())],
+                    poll_interval=settings.INVALIDATION_POLL_SECONDS,
+                    retention_seconds=settings.INVALIDATION_RETENTION_SECONDS,
+                )
+    return _bus
+
+
+def is_running() -> bool:
+    return _bus is not None and _bus.running
+
+
+def lag_stats() -> dict:
+    """Invalidation lag for changes this worker received from other workers."""
+    return {"running": is_running(), **(_bus.lag.snapshot() if _bus is not None else _LagStats().snapshot())}
@@ -0,0 +1,408 @@
+"""
+Notification dispatcher.
+
+Sends the email notifications queued in the `outbox` table by booking_service
+(see models/outbox_message). Requests only insert the outbox row inside the
+transaction they already run; everything that talks to the mail server
+happens here, on a background thread, so a slow or unreachable SMTP server
+never adds latency to approve/reject/cancel.
+
+Each pass:
+
+- claims up to NOTIFY_BATCH_SIZE due PENDING rows per booking shard by setting
+  a lease (`claimed_until`); several workers can run a dispatcher, a row is
+  only handed to one of them until its lease expires
+- coalesces the claimed rows per user into one email, keeping only the
+  latest event per booking
+- sends the emails over a small pool of reused SMTP connections
+- marks delivered rows SENT; failed rows are retried with exponential backoff
+  (plus jitter) and marked DEAD after NOTIFY_MAX_ATTEMPTS
+
+Delivery is at least once: a message can be sent twice if the process dies
+between sending it and marking it SENT.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import random
+import smtplib
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Iterator
+
+from sqlalchemy import or_, select, update
+
+from app.core import events
+from app.core.config import settings
+from app.db.shards import get_shard_sessionmaker, shard_count
+from app.models.outbox_message import OutboxMessage
+from app.models.room import Room
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+PENDING = "PENDING"
+SENT = "SENT"
+DEAD = "DEAD"
+
+# Retry backoff: 30s, 1m, 2m, ... capped at one hour, each scaled by a random 50-100%
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+
+_SUBJECTS = {
+    "APPROVED": "approved",
+    "REJECTED": "rejected",
+    "CANCELLED": "cancelled",
+}
+
+
+class SmtpPool:
+    """At most `size` SMTP connections, kept open between sends."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        size: int = 2,
+        timeout: float = 10.0,
+        username: str = "",
+        password: str = "",
+        starttls: bool = False,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._username = username
+        self._password = password
+        self._starttls = starttls
+        self._idle: queue.LifoQueue[smtplib.SMTP] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(size, 1))
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+        if self._starttls:
+            conn.starttls()
+        if self._username:
+            conn.login(self._username, self._password)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                # State unknown after a failure; never hand it out again
+                _close_quietly(conn)
+                raise
+            self._idle.put(conn)
+
+    def send(self, message: EmailMessage) -> None:
+        try:
+            with self.connection() as conn:
+                conn.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connections get dropped by the server; retry once on a fresh one
+            with self.connection() as conn:
+                conn.send_message(message)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, OSError):
+                _close_quietly(conn)
+
+
+def _close_quietly(conn: smtplib.SMTP) -> None:
+    try:
+        conn.close()
+    except OSError:
+        pass
+
+
+@dataclass(frozen=True, slots=True)
+class _Claimed:
+    shard: int
+    id: int
+    user_id: int
+    booking_id: int
+    event: str
+    payload: dict
+    attempts: int
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` (1-based)."""
+    seconds = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return timedelta(seconds=seconds * random.uniform(0.5, 1.0))
+
+
+class NotificationDispatcher:
+    """Background thread that drains the outbox of every booking shard."""
+
+    def __init__(
+        self,
+        smtp: SmtpPool,
+        *,
+        sender: str,
+        batch_size: int = 100,
+        poll_interval: float = 2.0,
+        max_attempts: int = 8,
+        lease_seconds: int = 60,
+        send_workers: int = 2,
+    ) -> None:
+        self._smtp = smtp
+        self._sender = sender
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_attempts = max_attempts
+        self._lease = timedelta(seconds=lease_seconds)
+        self._send_pool = ThreadPoolExecutor(max_workers=max(send_workers, 1), thread_name_prefix="notify-send")
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+        self._thread = None
+        self._smtp.close()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = self.dispatch_once()
+            except Exception:
+                logger.exception("Notification dispatch failed")
+                claimed = 0
+            # A full batch means more is probably waiting
+            if claimed < self._batch_size:
+                self._wake.wait(self._poll_interval)
+                self._wake.clear()
+
+    def dispatch_once(self) -> int:
+        """Claim, send and settle one batch per shard; returns the number of rows claimed."""
+        claimed: list[_Claimed] = []
+        for shard in range(shard_count()):
+            claimed.extend(self._claim(shard))
+        if not claimed:
+            return 0
+
+        by_user: dict[int, list[_Claimed]] = defaultdict(list)
+        for row in claimed:
+            by_user[row.user_id].append(row)
+
+        emails, rooms = self._lookup(claimed)
+        futures = {
+            user_id: self._send_pool.submit(self._send, emails.get(user_id), rows, rooms)
+            for user_id, rows in by_user.items()
+        }
+
+        delivered: list[_Claimed] = []
+        failed: list[tuple[_Claimed, str]] = []
+        for user_id, future in futures.items():
+            error = future.result()
+            if error is None:
+                delivered.extend(by_user[user_id])
+            else:
+                failed.extend((row, error) for row in by_user[user_id])
+        self._settle(delivered, failed)
+        return len(claimed)
+
+    def _claim(self, shard: int) -> list[_Claimed]:
+        now = datetime.now(timezone.utc)
+        with get_shard_sessionmaker(shard)() as db:
+            due = (
+                select(OutboxMessage.id)
+                .where(
+                    OutboxMessage.status == PENDING,
+                    OutboxMessage.available_at <= now,
+                    or_(OutboxMessage.claimed_until.is_(None), OutboxMessage.claimed_until < now),
+                )
+                .order_by(OutboxMessage.id)
+                .limit(self._batch_size)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                # Concurrent dispatchers claim disjoint batches instead of queueing on each other
+                due = due.with_for_update(skip_locked=True)
+
+            rows = db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(due.scalar_subquery()))
+                .values(claimed_until=now + self._lease)
+                .returning(
+                    OutboxMessage.id,
+                    OutboxMessage.user_id,
+                    OutboxMessage.booking_id,
+                    OutboxMessage.event,
+                    OutboxMessage.payload,
+                    OutboxMessage.attempts,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+        return [
+            _Claimed(shard, r.id, r.user_id, r.booking_id, r.event, json.loads(r.payload), r.attempts) for r in rows
+        ]
+
+    def _lookup(self, claimed: list[_Claimed]) -> tuple[dict[int, str], dict[int, str]]:
+        user_ids = {r.user_id for r in claimed}
+        room_ids = {r.payload["room_id"] for r in claimed}
+        with get_shard_sessionmaker(0)() as db:
+            emails = dict(db.execute(select(User.id, User.email).where(User.id.in_(user_ids))).all())
+            rooms = {
+                room_id: f"{code} ({name})"
+                for room_id, code, name in db.execute(
+                    select(Room.id, Room.code, Room.name).where(Room.id.in_(room_ids))
+                ).all()
+            }
+        return emails, rooms
+
+    def _compose(self, to: str, rows: list[_Claimed], rooms: dict[int, str]) -> EmailMessage:
+        # Latest event per booking: a booking approved and then cancelled is only reported cancelled
+        latest: dict[int, _Claimed] = {}
+        for row in sorted(rows, key=lambda r: (r.payload["version"], r.id)):
+            latest[row.booking_id] = row
+        updates = sorted(latest.values(), key=lambda r: r.payload["start_time"])
+
+        message = EmailMessage()
+        message["From"] = self._sender
+        message["To"] = to
+        if len(updates) == 1:
+            row = updates[0]
+            room = rooms.get(row.payload["room_id"], f"room {row.payload['room_id']}")
+            message["Subject"] = f"Booking {_SUBJECTS.get(row.event, row.event.lower())}: {room}"
+        else:
+            message["Subject"] = f"{len(updates)} booking updates"
+
+        lines = ["Your bookings have been updated:", ""]
+        for row in updates:
+            room = rooms.get(row.payload["room_id"], f"room {row.payload['room_id']}")
+            lines.append(
+                f"- #{row.booking_id} {room}, {row.payload['start_time']} to {row.payload['end_time']}: {row.event}"
+            )
+        message.set_content("\n".join(lines) + "\n")
+        return message
+
+    def _send(self, to: str | None, rows: list[_Claimed], rooms: dict[int, str]) -> str | None:
+        """Send one user's email; returns the error text, or None on success."""
+        if not to:
+            return "User has no email address"
+        try:
+            self._smtp.send(self._compose(to, rows, rooms))
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning("Notification to %s failed: %s", to, e)
+            return f"{type(e).__name__}: {e}"
+        return None
+
+    def _settle(self, delivered: list[_Claimed], failed: list[tuple[_Claimed, str]]) -> None:
+        now = datetime.now(timezone.utc)
+        by_shard: dict[int, tuple[list, list]] = defaultdict(lambda: ([], []))
+        for row in delivered:
+            by_shard[row.shard][0].append(row.id)
+        for row, error in failed:
+            attempts = row.attempts + 1
+            by_shard[row.shard][1].append(
+                {
+                    "id": row.id,
+                    "attempts": attempts,
+                    "status": DEAD if attempts >= self._max_attempts else PENDING,
+                    "available_at": now + backoff_delay(attempts),
+                    "claimed_until": None,
+                    "last_error": error[:1000],
+                }
+            )
+
+        for shard, (sent_ids, retries) in by_shard.items():
+            with get_shard_sessionmaker(shard)() as db:
+                if sent_ids:
+                    db.execute(
+                        update(OutboxMessage)
+                        .where(OutboxMessage.id.in_(sent_ids))
+                        .values(status=SENT, sent_at=now, claimed_until=None)
+                        .execution_options(synchronize_session=False)
+                    )
+                if retries:
+                    # Bulk UPDATE by primary key
+                    db.execute(update(OutboxMessage), retries)
+                db.commit()
+
+
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                smtp = SmtpPool(
+                    settings.SMTP_HOST,
+                    settings.SMTP_PORT,
+                    size=settings.SMTP_POOL_SIZE,
+                    timeout=settings.SMTP_TIMEOUT_SECONDS,
+                    username=settings.SMTP_USERNAME,
+                    password=settings.SMTP_PASSWORD,
+                    starttls=settings.SMTP_STARTTLS,
+                )
+                _dispatcher = NotificationDispatcher(
+                    smtp,
+                    sender=settings.SMTP_FROM,
+                    batch_size=settings.NOTIFY_BATCH_SIZE,
+                    poll_interval=settings.NOTIFY_POLL_INTERVAL_SECONDS,
+                    max_attempts=settings.NOTIFY_MAX_ATTEMPTS,
+                    lease_seconds=settings.NOTIFY_LEASE_SECONDS,
+                    send_workers=settings.SMTP_POOL_SIZE,
+                )
+    return _dispatcher
+
+
+def _on_booking_changed(**_) -> None:
+    # The outbox row is committed by now; send it without waiting for the next poll
+    get_dispatcher().wake()
+
+
+def start() -> None:
+    """Start the dispatcher thread and wake it on local booking changes (idempotent)."""
+    events.unsubscribe(events.BOOKING_STATUS_CHANGED, _on_booking_changed)
+    events.unsubscribe(events.BOOKING_PROMOTED, _on_booking_changed)
+    events.subscribe(events.BOOKING_STATUS_CHANGED, _on_booking_changed)
+    events.subscribe(events.BOOKING_PROMOTED, _on_booking_changed)
+    get_dispatcher().start()
+
+
+def stop() -> None:
+    events.unsubscribe(events.BOOKING_STATUS_CHANGED, _on_booking_changed)
+    events.unsubscribe(events.BOOKING_PROMOTED, _on_booking_changed)
+    get_dispatcher().stop()
@@ -0,0 +1,116 @@
+"""
+Stored request profiles (see app.core.profiling).
+
+Profiles are written by the profiling middleware after the response has been
+sent, pruned to the newest PROFILE_KEEP, and exported as collapsed stacks
+(flamegraph.pl, speedscope, most flame graph tools) or speedscope JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, defer
+
+from app.core.config import settings
+from app.core.profiling import Profile
+from app.db.session import SessionLocal
+from app.models.request_profile import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+# `name (file:line)` as written by Profile.collapsed()
+_FRAME = re.compile(r"^(?P<name>.*) \((?P<file>.*):(?P<line>\d+)\)$")
+
+
+def save_profile(profile: Profile) -> None:
+    """Store `profile` and drop the oldest beyond PROFILE_KEEP (errors are logged, not raised)."""
+    try:
+        with SessionLocal() as db:
+            db.add(
+                RequestProfile(
+                    method=profile.method,
+                    path=profile.path[:500],
+                    status_code=profile.status_code,
+                    duration_ms=profile.duration_ms,
+                    trigger=profile.trigger,
+                    requested_by=profile.requested_by,
+                    samples=sum(profile.stacks.values()),
+                    interval_ms=profile.interval_ms,
+                    stacks=profile.collapsed(),
+                    sql_count=profile.sql_count,
+                    sql_ms=profile.sql_ms,
+                    sql=json.dumps([{"statement": s, "ms": round(ms, 3)} for s, ms in profile.sql]),
+                )
+            )
+            db.flush()
+            oldest_kept = db.scalar(
+                select(RequestProfile.id).order_by(RequestProfile.id.desc()).offset(settings.PROFILE_KEEP - 1).limit(1)
+            )
+            if oldest_kept is not None:
+                db.execute(delete(RequestProfile).where(RequestProfile.id < oldest_kept))
+            db.commit()
+    except Exception:
+        logger.exception("Could not store the profile of %s %s", profile.method, profile.path)
+
+
+def list_profiles(db: Session, *, path: str | None = None, limit: int = 50, offset: int = 0) -> list[RequestProfile]:
+    """Newest first, without loading the stacks and SQL."""
+    q = select(RequestProfile).options(defer(RequestProfile.stacks), defer(RequestProfile.sql))
+    if path is not None:
+        q = q.where(RequestProfile.path.startswith(path, autoescape=True))
+    return list(db.scalars(q.order_by(RequestProfile.id.desc()).limit(limit).offset(offset)).all())
+
+
+def get_profile(db: Session, profile_id: int) -> RequestProfile | None:
+    return db.get(RequestProfile, profile_id)
+
+
+def sql_timings(profile: RequestProfile) -> list[dict]:
+    return json.loads(profile.sql)
+
+
+def to_speedscope(profile: RequestProfile) -> dict:
+    """The profile in speedscope's file format: one sampled profile, weighted in milliseconds."""
+    frames: list[dict] = []
+    index: dict[str, int] = {}
+    samples: list[list[int]] = []
+    weights: list[float] = []
+    for line in profile.stacks.splitlines():
+        stack, _, count = line.rpartition(" ")
+        sample = []
+        for label in stack.split(";"):
+            if label not in index:
+                index[label] = len(frames)
+                m = _FRAME.match(label)
+                frames.append(
+                    {"name": m["name"], "file": m["file"], "line": int(m["line"])} if m else {"name": label}
+                )
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(int(count) * profile.interval_ms)
+
+    name = f"{profile.method} {profile.path} #{profile.id}"
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "campus-booking-system",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
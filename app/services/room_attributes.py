@@ -0,0 +1,110 @@
+"""
+Room attributes (equipment and features).
+
+The vocabulary lives in `room_attributes`; every attribute owns one bit of
+`rooms.attributes_mask`. Filtering rooms by "has all of these" is then:
+
+- with ROOM_CATALOG_CACHE: a few big-integer ANDs over the catalog snapshot,
+  which keeps, per attribute, one integer with bit i set when the i-th room
+  (in catalog order) has it (see RoomCatalog.with_attributes)
+- otherwise: `attributes_mask & mask = mask` in SQL
+
+Any change to the vocabulary or to a room's attributes bumps the room catalog
+version, like other room changes.
+"""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.room import Room
+from app.models.room_attribute import RoomAttribute
+from app.services.room_catalog import bump_room_catalog_version, get_room_catalog
+
+# Bits 0-62: the mask must stay a positive signed 64-bit integer
+MAX_ATTRIBUTES = 63
+
+_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,49}$")
+
+
+class UnknownAttributeError(ValueError):
+    pass
+
+
+class AttributeVocabularyError(ValueError):
+    """Invalid, duplicate or one too many attribute names."""
+
+
+def parse_names(value: str | None) -> list[str]:
+    """`"projector, Accessible"` -> `["projector", "accessible"]` (empty entries dropped)."""
+    if not value:
+        return []
+    return list(dict.fromkeys(part.strip().lower() for part in value.split(",") if part.strip()))
+
+
+def vocabulary(db: Session) -> dict[str, int]:
+    """Attribute name -> bit."""
+    if settings.ROOM_CATALOG_CACHE:
+        return dict(get_room_catalog().attributes)
+    return dict(db.execute(select(RoomAttribute.name, RoomAttribute.bit)).all())
+
+
+def mask_for(vocab: dict[str, int], names: list[str]) -> int:
+    unknown = [name for name in names if name not in vocab]
+    if unknown:
+        raise UnknownAttributeError(f"Unknown room attribute(s): {', '.join(unknown)}")
+    mask = 0
+    for name in names:
+        mask |= 1 << vocab[name]
+    return mask
+
+
+def has_all(mask: int):
+    """SQL condition: the room has every attribute in `mask`."""
+    return Room.attributes_mask.op("&")(mask) == mask
+
+
+def create_attribute(db: Session, name: str) -> RoomAttribute:
+    """Add `name` to the vocabulary with the lowest free bit (caller commits)."""
+    name = name.strip().lower()
+    if not _NAME_RE.match(name):
+        raise AttributeVocabularyError(
+            "Attribute names are 1-50 lower-case letters, digits, '-' or '_', starting with a letter or digit"
+        )
+    used = dict(db.execute(select(RoomAttribute.bit, RoomAttribute.name)).all())
+    if name in used.values():
+        raise AttributeVocabularyError(f"Room attribute '{name}' already exists")
+    free = next((bit for bit in range(MAX_ATTRIBUTES) if bit not in used), None)
+    if free is None:
+        raise AttributeVocabularyError(f"At most {MAX_ATTRIBUTES} room attributes")
+
+    attribute = RoomAttribute(name=name, bit=free)
+    db.add(attribute)
+    bump_room_catalog_version(db)
+    return attribute
+
+
+def delete_attribute(db: Session, name: str) -> None:
+    """Remove `name` from the vocabulary and from every room (caller commits)."""
+    attribute = db.scalar(select(RoomAttribute).where(RoomAttribute.name == name.strip().lower()))
+    if attribute is None:
+        raise UnknownAttributeError(f"Unknown room attribute: {name}")
+    bit = 1 << attribute.bit
+    db.execute(
+        update(Room)
+        .where(Room.attributes_mask.op("&")(bit) != 0)
+        .values(attributes_mask=Room.attributes_mask.op("&")(~bit))
+    )
+    db.delete(attribute)
+    bump_room_catalog_version(db)
+
+
+def set_room_attributes(db: Session, room: Room, names: list[str]) -> None:
+    """Replace the attributes of `room` (caller commits)."""
+    vocab = dict(db.execute(select(RoomAttribute.name, RoomAttribute.bit)).all())
+    room.attributes_mask = mask_for(vocab, names)
+    bump_room_catalog_version(db)
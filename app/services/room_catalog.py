@@ -0,0 +1,225 @@
+"""
+In-process room catalog.
+
+Rooms change a few times a term but are read on nearly every request, so each
+worker keeps an immutable snapshot of the whole `rooms` table:
+
+- loaded in the application lifespan (or lazily on first use)
+- replaced atomically (a single reference swap) after a room change commits
+- checked against the `catalog_versions` row at most every
+  ROOM_CATALOG_CHECK_SECONDS, so changes committed by other workers are picked
+  up without any cross-process signalling
+- with the invalidation bus running, reloaded when a room change is announced
+  instead of polling the version
+
+The snapshot also carries the room attribute vocabulary and, per attribute, a
+bitset over its rooms for `has=` filters (see services/room_attributes).
+
+Lookups that miss the snapshot re-check the version before reporting a room as
+missing, so a room created by another worker a moment ago is still found.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.catalog_version import CatalogVersion
+from app.models.room import Room
+from app.models.room_attribute import RoomAttribute
+from app.services import invalidation_bus
+
+CATALOG_NAME = "rooms"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedRoom:
+    id: int
+    code: str
+    name: str
+    location: str | None
+    capacity: int
+    attributes_mask: int
+
+
+@dataclass(frozen=True, slots=True)
+class RoomCatalog:
+    version: int
+    rooms: tuple[CachedRoom, ...]  # sorted by code, like GET /rooms
+    by_id: Mapping[int, CachedRoom]
+    # Room attribute vocabulary: name -> bit of attributes_mask
+    attributes: Mapping[str, int]
+    # Per attribute bit, an integer with bit i set when rooms[i] has that attribute
+    attribute_index: tuple[int, ...]
+
+    def with_attributes(self, mask: int, offset: int = 0, limit: int | None = None) -> list[CachedRoom]:
+        """Rooms having every attribute in `mask`, in catalog order, paginated."""
+        end = None if limit is None else offset + limit
+        if not mask:
+            return list(self.rooms[offset:end])
+
+        hits = (1 << len(self.rooms)) - 1
+        for bit in range(mask.bit_length()):
+            if mask >> bit & 1:
+                hits &= self.attribute_index[bit] if bit < len(self.attribute_index) else 0
+
+        # Character i of the reversed binary string is bit i: str.find walks the hits in C
+        bits = format(hits, "b")[::-1]
+        page: list[CachedRoom] = []
+        position = 0
+        i = bits.find("1")
+        while i >= 0 and (end is None or position < end):
+            if position >= offset:
+                page.append(self.rooms[i])
+            position += 1
+            i = bits.find("1", i + 1)
+        return page
+
+
+_catalog: RoomCatalog | None = None
+_checked_at = 0.0
+# Neither lock is held during database I/O: request threads calling in may
+# already hold a pooled connection, so waiting on a lock that a thread waiting
+# for the pool holds could exhaust the pool.
+_swap_lock = threading.Lock()
+_check_lock = threading.Lock()
+
+
+def _session_factory():
+    from app.db.session import SessionLocal
+
+    return SessionLocal
+
+
+def _read_version(db: Session) -> int:
+    return db.scalar(select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_NAME)) or 0
+
+
+def _load(db: Session) -> RoomCatalog:
+    # Version first: a change committed while we read the rows only makes the snapshot look older
+    version = _read_version(db)
+    rooms = tuple(
+        CachedRoom(*row)
+        for row in db.execute(
+            select(Room.id, Room.code, Room.name, Room.location, Room.capacity, Room.attributes_mask).order_by(
+                Room.code
+            )
+        )
+    )
+    attributes = dict(db.execute(select(RoomAttribute.name, RoomAttribute.bit)).all())
+    return RoomCatalog(
+        version,
+        rooms,
+        MappingProxyType({r.id: r for r in rooms}),
+        MappingProxyType(attributes),
+        _attribute_index(rooms, max(attributes.values(), default=-1) + 1),
+    )
+
+
+def _attribute_index(rooms: tuple[CachedRoom, ...], bits: int) -> tuple[int, ...]:
+    columns = [bytearray((len(rooms) + 7) // 8) for _ in range(bits)]
+    for i, room in enumerate(rooms):
+        mask = room.attributes_mask
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            if bit < bits:
+                columns[bit][i >> 3] |= 1 << (i & 7)
+            mask ^= low
+    return tuple(int.from_bytes(column, "little") for column in columns)
+
+
+def _install(catalog: RoomCatalog) -> RoomCatalog:
+    """Swap in `catalog` unless a newer snapshot was installed meanwhile; return the current one."""
+    global _catalog, _checked_at
+    with _swap_lock:
+        if _catalog is None or catalog.version >= _catalog.version:
+            _catalog = catalog
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def load_room_catalog() -> RoomCatalog:
+    """(Re)load the snapshot from the database and swap it in."""
+    with _session_factory()() as db:
+        catalog = _load(db)
+    return _install(catalog)
+
+
+def _check(catalog: RoomCatalog) -> RoomCatalog:
+    with _session_factory()() as db:
+        if _read_version(db) == catalog.version:
+            return _install(catalog)
+        fresh = _load(db)
+    return _install(fresh)
+
+
+def _refresh(*, force: bool = False) -> RoomCatalog:
+    catalog = _catalog
+    if catalog is None:
+        return load_room_catalog()
+    if force:
+        return _check(catalog)
+    if invalidation_bus.is_running() or time.monotonic() - _checked_at < settings.ROOM_CATALOG_CHECK_SECONDS:
+        return catalog
+
+    # One periodic check at a time; everyone else keeps serving the current snapshot
+    if not _check_lock.acquire(blocking=False):
+        return catalog
+    try:
+        return _check(catalog)
+    finally:
+        _check_lock.release()
+
+
+def get_room_catalog() -> RoomCatalog:
+    """Current snapshot (re-validated against the catalog version if the check interval has passed)."""
+    return _refresh()
+
+
+def get_cached_room(room_id: int) -> CachedRoom | None:
+    room = _refresh().by_id.get(room_id)
+    if room is None:
+        # Possibly created by another worker since our last check
+        room = _refresh(force=True).by_id.get(room_id)
+    return room
+
+
+def bump_room_catalog_version(db: Session) -> None:
+    """
+    Mark the room catalog as changed.
+
+    Call inside the transaction that changes `rooms`. It also announces the
+    change on the invalidation bus, so after the commit every worker with the
+    catalog installed (this one included) reloads it.
+    """
+    invalidation_bus.publish(db, invalidation_bus.ROOM)
+    updated = db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG_NAME)
+        .values(version=CatalogVersion.version + 1)
+    ).rowcount
+    if not updated:
+        # Schema built without the migration's seed row
+        db.add(CatalogVersion(name=CATALOG_NAME, version=1))
+
+
+def _on_rooms_changed(_room_id: int | None) -> None:
+    load_room_catalog()
+
+
+def install() -> None:
+    """Reload the snapshot whenever a room change is announced (idempotent)."""
+    invalidation_bus.unsubscribe(invalidation_bus.ROOM, _on_rooms_changed)
+    invalidation_bus.subscribe(invalidation_bus.ROOM, _on_rooms_changed)
+
+
+def uninstall() -> None:
+    invalidation_bus.unsubscribe(invalidation_bus.ROOM, _on_rooms_changed)
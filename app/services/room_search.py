@@ -0,0 +1,136 @@
+"""
+Room search.
+
+Ranked, prefix- and typo-tolerant search over room code, name and location.
+
+- SQLite: the `rooms_fts` FTS5 table (trigram tokenizer) created by migration
+  92e67b9b5da6. The query's trigrams are OR-ed together to find candidates.
+- Postgres: the pg_trgm GIN index `ix_rooms_search_trgm` via the `<%`
+  (word similarity) operator.
+- Anything else, or a database without the index: a plain scan.
+
+Candidates are ranked with the same trigram word-similarity score on every
+backend, so results do not depend on the database in use. The index only
+narrows the rooms to score: every room it returns is ranked before a page is
+cut, so paging reaches every match. The attribute filter (`has=`) is part of
+the candidate query too.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+
+from sqlalchemy import bindparam, func, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.services.room_attributes import has_all
+
+# Minimum share of the query's trigrams a room must contain to be returned
+MIN_SIMILARITY = 0.3
+
+_WORD_RE = re.compile(r"\w+")
+
+# Must match the expression of ix_rooms_search_trgm
+_SEARCH_TEXT = func.lower(
+    Room.code
+    + literal_column("' '")
+    + Room.name
+    + literal_column("' '")
+    + func.coalesce(Room.location, literal_column("''"))
+)
+
+
+def _words(value: str) -> list[str]:
+    return _WORD_RE.findall(value.lower())
+
+
+def _word_trigrams(word: str) -> set[str]:
+    # Padded like pg_trgm, so a word's start weighs more (prefix matches rank first)
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _trigrams(value: str) -> set[str]:
+    grams: set[str] = set()
+    for word in _words(value):
+        grams |= _word_trigrams(word)
+    return grams
+
+
+def similarity(query: str, value: str) -> float:
+    """Share of the query's trigrams found in `value` (close to pg_trgm word_similarity)."""
+    q = _trigrams(query)
+    if not q:
+        return 0.0
+    return len(q & _trigrams(value)) / len(q)
+
+
+def _fts_query(query: str) -> str | None:
+    # The trigram tokenizer matches unpadded 3-character substrings
+    grams = {w[i : i + 3] for w in _words(query) for i in range(len(w) - 2)}
+    if not grams:
+        return None
+    return " OR ".join('"' + g.replace('"', '""') + '"' for g in sorted(grams))
+
+
+_CANDIDATE_COLUMNS = (Room.id, Room.code, Room.name, Room.location)
+
+
+def _candidates(attributes_mask: int):
+    query = select(*_CANDIDATE_COLUMNS)
+    return query.where(has_all(attributes_mask)) if attributes_mask else query
+
+
+def _sqlite_candidates(db: Session, query: str, attributes_mask: int) -> list | None:
+    match = _fts_query(query)
+    if match is None:
+        return None
+    fts = table("rooms_fts")
+    matching = select(literal_column("rowid")).select_from(fts).where(literal_column("rooms_fts").op("MATCH")(match))
+    try:
+        return db.execute(_candidates(attributes_mask).where(Room.id.in_(matching))).all()
+    except OperationalError:
+        # Search index not created (e.g. schema built with create_all)
+        db.rollback()
+        return None
+
+
+def _postgres_candidates(db: Session, query: str, attributes_mask: int) -> list:
+    q = bindparam("q", query.lower())
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+        {"t": str(MIN_SIMILARITY)},
+    )
+    return db.execute(_candidates(attributes_mask).where(q.op("<%")(_SEARCH_TEXT))).all()
+
+
+def search_rooms(db: Session, query: str, *, limit: int = 20, offset: int = 0, attributes_mask: int = 0) -> list[Room]:
+    """Rooms matching `query` and having every attribute in `attributes_mask`, best match first."""
+    dialect = db.get_bind().dialect.name
+    candidates = None
+    if dialect == "sqlite":
+        candidates = _sqlite_candidates(db, query, attributes_mask)
+    elif dialect == "postgresql":
+        candidates = _postgres_candidates(db, query, attributes_mask)
+
+    if candidates is None:
+        candidates = db.execute(_candidates(attributes_mask)).all()
+
+    q_grams = _trigrams(query)
+    # Short queries (under 3 characters) also accept a case-insensitive substring match
+    q_text = query.lower().strip()
+    scored = []
+    for room_id, code, name, location in candidates:
+        room_text = f"{code} {name} {location or ''}"
+        score = len(q_grams & _trigrams(room_text)) / len(q_grams) if q_grams else 0.0
+        if score >= MIN_SIMILARITY or (q_text and q_text in room_text.lower()):
+            scored.append((-score, code, room_id))
+
+    page = [room_id for _, _, room_id in heapq.nsmallest(offset + limit, scored)[offset:]]
+    if not page:
+        return []
+    rooms = {r.id: r for r in db.scalars(select(Room).where(Room.id.in_(page)))}
+    return [rooms[room_id] for room_id in page]
@@ -0,0 +1,279 @@
+"""
+Schedule optimizer for the pending queue.
+
+Approving requests first-come-first-served lets one long early request
+block several later ones (or the reverse), leaving room-hours unused. For a
+date range, the optimizer picks per room the maximum-weight set of
+non-overlapping PENDING bookings (weighted interval scheduling: sort by end,
+binary-search the last compatible request, dynamic programming; O(n log n)
+per room). Requests that collide with an APPROVED booking are left out.
+
+A request's weight is its role weight (default 1) times its length in hours,
+or just the role weight when not weighting by length. Ties go to the
+selection with the earlier requests.
+
+Displaced requests get a suggested alternative: the smallest other room
+with at least the capacity and every attribute of the requested one that is
+free at that time, considering APPROVED bookings, the plan and earlier
+suggestions (heaviest displaced request first).
+
+build_plan() only reads. The plan lists the (id, version) pairs to approve
+(and, optionally, to reject); booking_service.apply_booking_decisions()
+applies them atomically and fails if any booking changed in between.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import BookingStatus, UserRole
+from app.db.shards import scatter
+from app.models.booking import Booking
+from app.models.room import Room
+from app.models.user import User
+from app.services.booking_service import MAX_BOOKING_DURATION
+from app.services.room_catalog import get_room_catalog
+
+# Longest date range one plan may cover
+MAX_PLAN_DAYS = 31
+
+CONFLICTS_WITH_APPROVED = "conflicts_with_approved"
+OUTWEIGHED = "outweighed"
+
+_PLAN_COLUMNS = (
+    Booking.id,
+    Booking.room_id,
+    Booking.user_id,
+    Booking.start_time,
+    Booking.end_time,
+    Booking.status,
+    Booking.created_at,
+    Booking.version,
+)
+
+
+class InvalidPlanRequestError(ValueError):
+    pass
+
+
+@dataclass
+class PlannedBooking:
+    id: int
+    room_id: int
+    user_id: int
+    start_time: datetime
+    end_time: datetime
+    status: str
+    created_at: datetime
+    version: int
+    weight: float = 0.0
+    # Displaced requests only
+    reason: str | None = None
+    alternative_room_id: int | None = None
+
+
+@dataclass
+class SchedulePlan:
+    start: datetime
+    end: datetime
+    approve: list[PlannedBooking] = field(default_factory=list)
+    displaced: list[PlannedBooking] = field(default_factory=list)
+    # Filled only when the displaced requests are to be rejected
+    reject: list[PlannedBooking] = field(default_factory=list)
+    # Room-hours approved by the plan, and by approving first-come-first-served instead
+    planned_hours: float = 0.0
+    fcfs_hours: float = 0.0
+
+
+def parse_role_weights(value: str | None) -> dict[str, float]:
+    """`"STAFF:2,student:1"` -> `{"STAFF": 2.0, "STUDENT": 1.0}`."""
+    weights: dict[str, float] = {}
+    for part in (value or "").split(","):
+        if not part.strip():
+            continue
+        role, _, weight = part.partition(":")
+        role = role.strip().upper()
+        if role not in UserRole.__members__:
+            raise InvalidPlanRequestError(f"Unknown role in weights: {role}")
+        try:
+            weights[role] = float(weight)
+        except ValueError:
+            raise InvalidPlanRequestError(f"Invalid weight for {role}: {weight.strip()!r}")
+        if weights[role] < 0:
+            raise InvalidPlanRequestError("Weights cannot be negative")
+    return weights
+
+
+def _hours(b) -> float:
+    return (b.end_time - b.start_time).total_seconds() / 3600
+
+
+def max_weight_schedule(intervals: list[tuple[datetime, datetime, float]]) -> list[int]:
+    """
+    Indices of a maximum-weight subset of pairwise non-overlapping half-open
+    [start, end) intervals. Among equal weights, lower indices are preferred.
+    """
+    n = len(intervals)
+    order = sorted(range(n), key=lambda i: intervals[i][1])
+    ends = [intervals[i][1] for i in order]
+    # best[k]: (weight, -sum of indices) of the best subset of the first k intervals by end
+    best: list[tuple[float, int]] = [(0.0, 0)] * (n + 1)
+    take = [False] * (n + 1)
+    previous = [0] * (n + 1)
+    for k in range(1, n + 1):
+        i = order[k - 1]
+        start, _, weight = intervals[i]
+        # Intervals (among the first k - 1) that end by the time this one starts
+        previous[k] = bisect_right(ends, start, 0, k - 1)
+        with_it = (best[previous[k]][0] + weight, best[previous[k]][1] - i)
+        if with_it > best[k - 1]:
+            best[k], take[k] = with_it, True
+        else:
+            best[k] = best[k - 1]
+
+    chosen = []
+    k = n
+    while k > 0:
+        if take[k]:
+            chosen.append(order[k - 1])
+            k = previous[k]
+        else:
+            k -= 1
+    return chosen
+
+
+def _first_come_first_served(bookings: list[PlannedBooking]) -> list[PlannedBooking]:
+    """What approving `bookings` (one room, none colliding with APPROVED ones) in request order keeps."""
+    busy: tuple[list, list] = ([], [])
+    kept = []
+    for b in sorted(bookings, key=lambda b: (b.created_at, b.id)):
+        if _is_free(*busy, b.start_time, b.end_time):
+            _occupy(busy, b.start_time, b.end_time)
+            kept.append(b)
+    return kept
+
+
+def _is_free(starts: list[datetime], ends: list[datetime], start: datetime, end: datetime) -> bool:
+    """Whether [start, end) misses every interval of a sorted, non-overlapping list."""
+    i = bisect_left(starts, end)
+    return i == 0 or ends[i - 1] <= start
+
+
+def _occupy(busy: tuple[list, list], start: datetime, end: datetime) -> None:
+    starts, ends = busy
+    i = bisect_left(starts, start)
+    starts.insert(i, start)
+    ends.insert(i, end)
+
+
+def _rooms(db: Session) -> dict[int, tuple[int, int]]:
+    """Room id -> (capacity, attributes_mask)."""
+    if settings.ROOM_CATALOG_CACHE:
+        return {r.id: (r.capacity, r.attributes_mask) for r in get_room_catalog().rooms}
+    return {
+        room_id: (capacity, mask)
+        for room_id, capacity, mask in db.execute(select(Room.id, Room.capacity, Room.attributes_mask)).all()
+    }
+
+
+def build_plan(
+    db: Session,
+    *,
+    start: datetime,
+    end: datetime,
+    room_id: int | None = None,
+    role_weights: dict[str, float] | None = None,
+    by_length: bool = True,
+    reject_displaced: bool = False,
+) -> SchedulePlan:
+    """Plan which PENDING bookings starting in [start, end) to approve (dry run, nothing is written)."""
+    if end <= start:
+        raise InvalidPlanRequestError("'to' must be after 'from'")
+    if end - start > timedelta(days=MAX_PLAN_DAYS):
+        raise InvalidPlanRequestError(f"A plan covers at most {MAX_PLAN_DAYS} days")
+    role_weights = role_weights or {}
+
+    pending_query = select(*_PLAN_COLUMNS).where(
+        Booking.status == BookingStatus.PENDING.value,
+        Booking.start_time >= start,
+        Booking.start_time < end,
+    )
+    # Anything that can collide with a pending booking, or with a suggested alternative
+    approved_query = select(Booking.room_id, Booking.start_time, Booking.end_time).where(
+        Booking.status == BookingStatus.APPROVED.value,
+        Booking.start_time < end + MAX_BOOKING_DURATION,
+        Booking.end_time > start,
+    )
+    if room_id is not None:
+        pending_query = pending_query.where(Booking.room_id == room_id)
+    pending = [
+        PlannedBooking(*row)
+        for part in scatter(db, lambda s: s.execute(pending_query).all())
+        for row in part
+    ]
+    busy: dict[int, tuple[list, list]] = defaultdict(lambda: ([], []))
+    for part in scatter(db, lambda s: s.execute(approved_query).all()):
+        for rid, a_start, a_end in part:
+            _occupy(busy[rid], a_start, a_end)
+
+    roles = {}
+    user_ids = list({b.user_id for b in pending})
+    for i in range(0, len(user_ids), 500):
+        roles.update(db.execute(select(User.id, User.role).where(User.id.in_(user_ids[i : i + 500]))).all())
+    for b in pending:
+        b.weight = role_weights.get(roles.get(b.user_id), 1.0) * (_hours(b) if by_length else 1.0)
+
+    plan = SchedulePlan(start=start, end=end)
+    by_room: dict[int, list[PlannedBooking]] = defaultdict(list)
+    for b in sorted(pending, key=lambda b: (b.created_at, b.id)):
+        by_room[b.room_id].append(b)
+
+    for rid, requests in by_room.items():
+        starts, ends = busy[rid]
+        open_requests = []
+        for b in requests:
+            if _is_free(starts, ends, b.start_time, b.end_time):
+                open_requests.append(b)
+            else:
+                b.reason = CONFLICTS_WITH_APPROVED
+                plan.displaced.append(b)
+
+        chosen = set(max_weight_schedule([(b.start_time, b.end_time, b.weight) for b in open_requests]))
+        for i, b in enumerate(open_requests):
+            if i in chosen:
+                plan.approve.append(b)
+            else:
+                b.reason = OUTWEIGHED
+                plan.displaced.append(b)
+        plan.fcfs_hours += sum(_hours(b) for b in _first_come_first_served(open_requests))
+
+    for b in plan.approve:
+        _occupy(busy[b.room_id], b.start_time, b.end_time)
+    plan.planned_hours = sum(_hours(b) for b in plan.approve)
+
+    # Alternatives: smallest fitting room first
+    rooms = _rooms(db)
+    by_capacity = sorted(rooms.items(), key=lambda item: (item[1][0], item[0]))
+    capacities = [capacity for _, (capacity, _) in by_capacity]
+    for b in sorted(plan.displaced, key=lambda b: (-b.weight, b.created_at, b.id)):
+        capacity, mask = rooms.get(b.room_id, (0, 0))
+        for rid, (_, room_mask) in by_capacity[bisect_left(capacities, capacity) :]:
+            if rid == b.room_id or room_mask & mask != mask:
+                continue
+            if _is_free(*busy[rid], b.start_time, b.end_time):
+                b.alternative_room_id = rid
+                _occupy(busy[rid], b.start_time, b.end_time)
+                break
+
+    plan.approve.sort(key=lambda b: (b.room_id, b.start_time, b.id))
+    plan.displaced.sort(key=lambda b: (b.room_id, b.start_time, b.id))
+    if reject_displaced:
+        plan.reject = list(plan.displaced)
+    return plan
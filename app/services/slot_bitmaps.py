@@ -0,0 +1,307 @@
+"""
+Room-day slot bitmaps.
+
+With SLOT_BITMAPS on, every room has one `room_day_slots` row per day that
+has bookings, holding two 96-bit bitmaps of 15-minute slots: `active`
+(PENDING or APPROVED bookings) and `approved`. booking_service keeps them
+up to date in the same transaction as each booking change, so:
+
+- a conflict check is a primary-key lookup (two rows when a booking crosses
+  midnight) and a bitwise AND, instead of a range query over bookings
+- free time for many rooms and days is a handful of big-integer operations
+  per room: the day bitmaps are concatenated into one integer per room
+
+Times are slotted in the database's own clock (see `stored_time`). A slot
+touched by a booking counts as taken, so bookings must start and end on a
+15-minute boundary while SLOT_BITMAPS is on; older unaligned bookings are
+still covered, rounded outwards.
+
+Clearing bits is only safe when no other booking shares them. That is not
+the case for overlapping PENDING requests (WAITLIST_MODE) or for unaligned
+bookings, so those bits are recounted from the bookings table instead.
+
+rebuild() regenerates all bitmaps from the bookings table (see
+scripts/rebuild_slot_bitmaps.py); run it before turning SLOT_BITMAPS on.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select, text, update as sql_update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.models.room_day_slots import RoomDaySlots
+
+SLOT = timedelta(minutes=15)
+SLOTS_PER_DAY = 96
+BITMAP_BYTES = SLOTS_PER_DAY // 8
+EMPTY = bytes(BITMAP_BYTES)
+
+_ACTIVE = (BookingStatus.PENDING.value, BookingStatus.APPROVED.value)
+_APPROVED = (BookingStatus.APPROVED.value,)
+
+
+def to_bits(blob: bytes | None) -> int:
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+def to_blob(bits: int) -> bytes:
+    return bits.to_bytes(BITMAP_BYTES, "little")
+
+
+def is_aligned(dt: datetime) -> bool:
+    return dt.minute % 15 == 0 and dt.second == 0 and dt.microsecond == 0
+
+
+def stored_time(db: Session, dt: datetime) -> datetime:
+    """`dt` as a naive datetime in the clock the database compares bookings in."""
+    if dt.tzinfo is None:
+        return dt
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite stores the wall-clock time as given and drops the offset
+        return dt.replace(tzinfo=None)
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def stored_now(db: Session) -> datetime:
+    """Now, comparable with stored booking times (naive local on SQLite, as _validate_booking_window assumes)."""
+    if db.get_bind().dialect.name == "sqlite":
+        return datetime.now()
+    return datetime.now(timezone.utc)
+
+
+def day_masks(start: datetime, end: datetime) -> dict[date, int]:
+    """Slots touched by [start, end), per day."""
+    masks: dict[date, int] = {}
+    day = start.date()
+    while True:
+        day_start = datetime.combine(day, time.min)
+        lo = max(start, day_start)
+        hi = min(end, day_start + timedelta(days=1))
+        if lo >= hi:
+            return masks
+        first = (lo - day_start) // SLOT
+        last = -((day_start - hi) // SLOT)  # ceil: a partly used slot is taken
+        masks[day] = ((1 << (last - first)) - 1) << first
+        day += timedelta(days=1)
+
+
+def conflicts(db: Session, room_id: int, start: datetime, end: datetime, *, approved_only: bool) -> bool:
+    """Whether [start, end) touches a slot taken by an APPROVED (or, unless approved_only, PENDING) booking."""
+    masks = day_masks(stored_time(db, start), stored_time(db, end))
+    column = RoomDaySlots.approved if approved_only else RoomDaySlots.active
+    rows = db.execute(
+        select(RoomDaySlots.day, column).where(RoomDaySlots.room_id == room_id, RoomDaySlots.day.in_(masks))
+    ).all()
+    return any(to_bits(bits) & masks[day] for day, bits in rows)
+
+
+def _bits_from_bookings(
+    db: Session, room_id: int | None, first_day: date, last_day: date, statuses: tuple[str, ...]
+) -> dict[int, dict[date, int]]:
+    """Bitmaps per room and day computed from the bookings table (range query)."""
+    lo = datetime.combine(first_day, time.min)
+    hi = datetime.combine(last_day + timedelta(days=1), time.min)
+    q = select(Booking.room_id, Booking.start_time, Booking.end_time).where(
+        Booking.status.in_(statuses),
+        Booking.start_time < hi,
+        Booking.end_time > lo,
+    )
+    if room_id is not None:
+        q = q.where(Booking.room_id == room_id)
+
+    bits: dict[int, dict[date, int]] = defaultdict(lambda: defaultdict(int))
+    for booking_room, start, end in db.execute(q):
+        for day, mask in day_masks(stored_time(db, start), stored_time(db, end)).items():
+            if first_day <= day <= last_day:
+                bits[booking_room][day] |= mask
+    return bits
+
+
+def _ensure_rows(db: Session, room_id: int, days: Iterable[date]) -> None:
+    rows = [{"room_id": room_id, "day": day, "active": EMPTY, "approved": EMPTY} for day in days]
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(sqlite_insert(RoomDaySlots).on_conflict_do_nothing(), rows)
+    elif dialect == "postgresql":
+        db.execute(pg_insert(RoomDaySlots).on_conflict_do_nothing(), rows)
+    else:
+        existing = set(
+            db.scalars(
+                select(RoomDaySlots.day).where(
+                    RoomDaySlots.room_id == room_id, RoomDaySlots.day.in_([r["day"] for r in rows])
+                )
+            )
+        )
+        missing = [r for r in rows if r["day"] not in existing]
+        if missing:
+            db.execute(insert(RoomDaySlots), missing)
+
+
+def update(
+    db: Session,
+    room_id: int,
+    start: datetime,
+    end: datetime,
+    *,
+    active: bool | None = None,
+    approved: bool | None = None,
+) -> None:
+    """
+    Set (True) or clear (False) the slots of [start, end) in the room's bitmaps.
+
+    Runs inside the caller's booking write transaction, after the booking row
+    itself was changed (recounting reads the bookings table).
+    """
+    start, end = stored_time(db, start), stored_time(db, end)
+    masks = day_masks(start, end)
+    if not masks:
+        return
+    _ensure_rows(db, room_id, masks)
+
+    # Bits another booking may share cannot just be cleared: recount them instead
+    shared = not (is_aligned(start) and is_aligned(end))
+    first_day, last_day = min(masks), max(masks)
+    recount_active = recount_approved = None
+    if active is False and (shared or settings.WAITLIST_MODE):
+        recount_active = _bits_from_bookings(db, room_id, first_day, last_day, _ACTIVE)[room_id]
+    if approved is False and shared:
+        recount_approved = _bits_from_bookings(db, room_id, first_day, last_day, _APPROVED)[room_id]
+
+    rows = db.execute(
+        select(RoomDaySlots.day, RoomDaySlots.active, RoomDaySlots.approved)
+        .where(RoomDaySlots.room_id == room_id, RoomDaySlots.day.in_(masks))
+        .with_for_update()
+    ).all()
+
+    def apply(bits: int, mask: int, change: bool | None, recount: dict[date, int] | None, day: date) -> int:
+        if change is True:
+            return bits | mask
+        if change is False:
+            bits &= ~mask
+            if recount is not None:
+                bits |= recount.get(day, 0) & mask
+        return bits
+
+    db.execute(
+        sql_update(RoomDaySlots),
+        [
+            {
+                "room_id": room_id,
+                "day": day,
+                "active": to_blob(apply(to_bits(a), masks[day], active, recount_active, day)),
+                "approved": to_blob(apply(to_bits(ap), masks[day], approved, recount_approved, day)),
+            }
+            for day, a, ap in rows
+        ],
+    )
+
+
+def approved_occupancy(
+    db: Session, first_day: date, days: int, room_ids: Iterable[int] | None = None
+) -> dict[int, int]:
+    """
+    APPROVED occupancy per room over `days` days from `first_day`.
+
+    Each room's bitmaps are concatenated into one integer: slot i of day k is
+    bit k * SLOTS_PER_DAY + i. Rooms without approved bookings are left out.
+    Read from room_day_slots with SLOT_BITMAPS on, else from the bookings table.
+    """
+    last_day = first_day + timedelta(days=days - 1)
+    per_day: dict[int, dict[date, int]]
+    if settings.SLOT_BITMAPS:
+        q = select(RoomDaySlots.room_id, RoomDaySlots.day, RoomDaySlots.approved).where(
+            RoomDaySlots.day >= first_day, RoomDaySlots.day <= last_day
+        )
+        if room_ids is not None:
+            q = q.where(RoomDaySlots.room_id.in_(list(room_ids)))
+        per_day = defaultdict(dict)
+        for room_id, day, bits in db.execute(q):
+            per_day[room_id][day] = to_bits(bits)
+    else:
+        per_day = _bits_from_bookings(db, None, first_day, last_day, _APPROVED)
+        if room_ids is not None:
+            wanted = set(room_ids)
+            per_day = {room_id: v for room_id, v in per_day.items() if room_id in wanted}
+
+    occupancy = {}
+    for room_id, by_day in per_day.items():
+        bits = 0
+        for day, day_bits in by_day.items():
+            bits |= day_bits << ((day - first_day).days * SLOTS_PER_DAY)
+        if bits:
+            occupancy[room_id] = bits
+    return occupancy
+
+
+def free_runs(busy: int, slots: int, min_slots: int = 1) -> list[tuple[int, int]]:
+    """
+    Maximal runs of free slots (start, end) at least `min_slots` long, in `slots` slots.
+    """
+    free = ~busy & ((1 << slots) - 1)
+
+    # Bit j of `fits` is set iff slots j .. j + min_slots - 1 are all free;
+    # doubling the shift keeps this at O(log min_slots) operations
+    fits, span = free, 1
+    while span < min_slots:
+        step = min(span, min_slots - span)
+        fits &= fits >> step
+        span += step
+    if not fits:
+        return []
+
+    runs = []
+    while free:
+        lo = (free & -free).bit_length() - 1
+        shifted = free >> lo
+        length = (~shifted & (shifted + 1)).bit_length() - 1  # trailing ones
+        if length >= min_slots:
+            runs.append((lo, lo + length))
+        free &= ~(((1 << length) - 1) << lo)
+    return runs
+
+
+def rebuild(db: Session) -> int:
+    """
+    Regenerate every bitmap in this database from its bookings table.
+
+    Blocks booking writes for the duration. Returns the number of rows written.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(text("BEGIN IMMEDIATE"))
+    elif dialect == "postgresql":
+        db.execute(text("LOCK TABLE bookings IN SHARE MODE"))
+
+    rows: dict[tuple[int, date], list[int]] = defaultdict(lambda: [0, 0])
+    bookings = db.execute(
+        select(Booking.room_id, Booking.start_time, Booking.end_time, Booking.status).where(
+            Booking.status.in_(_ACTIVE)
+        )
+    )
+    for room_id, start, end, status in bookings:
+        for day, mask in day_masks(stored_time(db, start), stored_time(db, end)).items():
+            row = rows[(room_id, day)]
+            row[0] |= mask
+            if status == BookingStatus.APPROVED.value:
+                row[1] |= mask
+
+    db.execute(delete(RoomDaySlots))
+    if rows:
+        db.execute(
+            insert(RoomDaySlots),
+            [
+                {"room_id": room_id, "day": day, "active": to_blob(a), "approved": to_blob(ap)}
+                for (room_id, day), (a, ap) in rows.items()
+            ],
+        )
+    db.commit()
+    return len(rows)
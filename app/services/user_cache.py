@@ -0,0 +1,77 @@
+"""
+User cache for authentication.
+
+get_current_user runs on every authenticated request; with USER_CACHE on,
+the few columns it needs are kept in a per-worker LRU instead of being
+loaded each time. Entries are dropped when a user changes, through the
+invalidation bus (turn INVALIDATION_BUS on when running several workers).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+from app.services import invalidation_bus
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    id: int
+    email: str
+    name: str
+    role: str
+
+
+_users: OrderedDict[int, CachedUser] = OrderedDict()
+_lock = threading.Lock()
+# Bumped by every invalidation, so a load that raced with one is not cached
+_generation = 0
+
+
+def get_cached_user(db: Session, user_id: int) -> CachedUser | None:
+    with _lock:
+        user = _users.get(user_id)
+        if user is not None:
+            _users.move_to_end(user_id)
+            return user
+        generation = _generation
+
+    row = db.execute(select(User.id, User.email, User.name, User.role).where(User.id == user_id)).first()
+    if row is None:
+        return None
+    user = CachedUser(*row)
+
+    with _lock:
+        if generation == _generation:
+            _users[user_id] = user
+            while len(_users) > settings.USER_CACHE_SIZE:
+                _users.popitem(last=False)
+    return user
+
+
+def invalidate(user_id: int | None) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        if user_id is None:
+            _users.clear()
+        else:
+            _users.pop(user_id, None)
+
+
+def install() -> None:
+    """Drop cached users when they change (idempotent)."""
+    invalidation_bus.unsubscribe(invalidation_bus.USER, invalidate)
+    invalidation_bus.subscribe(invalidation_bus.USER, invalidate)
+
+
+def uninstall() -> None:
+    invalidation_bus.unsubscribe(invalidation_bus.USER, invalidate)
+    invalidate(None)
@@ -0,0 +1,278 @@
+"""
+Bulk user provisioning from CSV (student registry exports).
+
+The input has a header row with `email` and `name` columns and optionally
+`role` (default STUDENT) and `password`. Rows without a password get an
+invite token instead: a random secret that works as the initial password and
+is handed back to the caller (on_invite) for distribution.
+
+Rows are processed in chunks:
+
+- one `email IN (...)` query per chunk finds accounts that already exist
+- password hashing runs across a process pool (bcrypt is CPU-bound, about
+  0.3 s per password) of spawned, not forked, processes, started on first
+  use and shared by later imports. Invite tokens are hashed at the normal
+  cost too: they are the account's password until the user changes it
+- the chunk's users (and, with update_roles, role changes of existing users)
+  are written in one transaction, while the next chunk is already hashing
+
+A chunk is committed as a whole, so an interrupted import can be rerun with
+the same file: accounts created by the first run are reported as existing.
+"""
+
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import os
+import secrets
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.enums import UserRole
+from app.core.security import hash_password
+from app.models.user import User
+from app.services import invalidation_bus
+
+CHUNK_SIZE = 1000
+# Errors kept for the report; all of them are counted
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_COLUMNS = ("email", "name")
+
+_email = TypeAdapter(EmailStr)
+
+
+class UserImportError(ValueError):
+    """The input cannot be imported at all (e.g. missing columns)."""
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    line: int
+    email: str | None
+    reason: str
+
+
+@dataclass
+class ImportSummary:
+    created: int = 0
+    # Rows whose email already has an account (role updated or not)
+    existing: int = 0
+    roles_updated: int = 0
+    invalid: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    def error(self, line: int, email: str | None, reason: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, email, reason))
+
+
+@dataclass(slots=True)
+class _Row:
+    line: int
+    email: str
+    name: str
+    role: str
+    password: str | None
+    invite: str | None = None
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict[str, str]]]:
+    """(line number, row) for each data row of CSV `lines`."""
+    reader = csv.DictReader(lines)
+    columns = [c.strip().lower() for c in reader.fieldnames or []]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise UserImportError(f"Missing CSV column(s): {', '.join(missing)}")
+    reader.fieldnames = columns
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _parse(line: int, raw: dict[str, str], summary: ImportSummary) -> _Row | None:
+    email = (raw.get("email") or "").strip()
+    name = (raw.get("name") or "").strip()
+    role = (raw.get("role") or "").strip().upper() or UserRole.STUDENT.value
+    password = raw.get("password") or None
+    try:
+        email = _email.validate_python(email)
+    except ValidationError:
+        summary.error(line, email or None, "invalid email")
+        return None
+    if not 1 <= len(name) <= 120:
+        summary.error(line, email, "name must be 1-120 characters")
+    elif role not in UserRole.__members__:
+        summary.error(line, email, f"unknown role {role}")
+    elif password is not None and not 8 <= len(password) <= 72:
+        summary.error(line, email, "password must be 8-72 characters")
+    else:
+        return _Row(line, email, name, role, password)
+    return None
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _hash_pool(workers: int) -> ProcessPoolExecutor:
+    """The shared hashing pool with at least `workers` processes."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                # Hashes already submitted by a running import still complete
+                _pool.shutdown(wait=False)
+            # Never fork: the API process runs background threads (booking writer, audit writer, ...)
+            # whose locks a forked child could inherit held
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_hash_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool, _pool_workers = None, 0
+
+
+def _update_roles(db: Session, role_changes: list[tuple[int, str]]) -> None:
+    if role_changes:
+        db.execute(update(User), [{"id": user_id, "role": role} for user_id, role in role_changes])
+        for user_id, _ in role_changes:
+            # Drops the user from every worker's user cache after the commit
+            invalidation_bus.publish(db, invalidation_bus.USER, user_id)
+
+
+def _write_chunk(
+    db: Session,
+    rows: list[_Row],
+    hashes: Iterable[str],
+    role_changes: list[tuple[int, str]],
+    summary: ImportSummary,
+    on_invite: Callable[[str, str], None] | None,
+) -> None:
+    values = [
+        {"email": row.email, "name": row.name, "role": row.role, "password_hash": password_hash}
+        for row, password_hash in zip(rows, hashes)
+    ]
+    try:
+        if values:
+            db.execute(insert(User), values)
+        _update_roles(db, role_changes)
+        db.commit()
+        created = rows
+    except IntegrityError:
+        # Someone registered one of these emails since the chunk was checked:
+        # insert the rows one at a time and count the duplicates as existing
+        db.rollback()
+        created = []
+        for row, row_values in zip(rows, values):
+            try:
+                with db.begin_nested():
+                    db.execute(insert(User), row_values)
+                created.append(row)
+            except IntegrityError:
+                summary.existing += 1
+        _update_roles(db, role_changes)
+        db.commit()
+
+    summary.created += len(created)
+    summary.roles_updated += len(role_changes)
+    if on_invite:
+        for row in created:
+            if row.invite is not None:
+                on_invite(row.email, row.invite)
+
+
+def import_users(
+    db: Session,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    *,
+    update_roles: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int | None = None,
+    on_invite: Callable[[str, str], None] | None = None,
+    report: Callable[[ImportSummary], None] | None = None,
+) -> ImportSummary:
+    """
+    Create accounts for `rows` (from read_csv), committing once per chunk.
+
+    Existing accounts are left alone unless `update_roles`, which sets their
+    role to the row's `role` when one is given. Emails repeated in the input
+    are imported once. `on_invite(email, token)` is called for each account
+    created without a password, after its chunk commits.
+    """
+    workers = workers or settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+    summary = ImportSummary()
+    seen: set[str] = set()
+    pool = _hash_pool(workers) if workers > 1 else None
+    # The chunk whose hashes are being computed while the next one is read
+    pending = None
+    chunk: list[_Row] = []
+    explicit_roles: set[str] = set()
+    source = iter(rows)
+    while True:
+        for line, raw in source:
+            row = _parse(line, raw, summary)
+            if row is None:
+                continue
+            if row.email in seen:
+                summary.error(line, row.email, "duplicate email in input")
+                continue
+            seen.add(row.email)
+            if (raw.get("role") or "").strip():
+                explicit_roles.add(row.email)
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                break
+        if not chunk and pending is None:
+            break
+
+        new_rows: list[_Row] = []
+        role_changes: list[tuple[int, str]] = []
+        if chunk:
+            existing = {
+                email: (user_id, role)
+                for user_id, email, role in db.execute(
+                    select(User.id, User.email, User.role).where(User.email.in_([r.email for r in chunk]))
+                ).all()
+            }
+            # Don't hold the read transaction while the previous chunk hashes
+            db.rollback()
+            for row in chunk:
+                if row.email not in existing:
+                    if row.password is None:
+                        row.invite = secrets.token_urlsafe(16)
+                    new_rows.append(row)
+                    continue
+                summary.existing += 1
+                user_id, role = existing[row.email]
+                if update_roles and row.email in explicit_roles and role != row.role:
+                    role_changes.append((user_id, row.role))
+
+        secrets_to_hash = [row.password if row.password is not None else row.invite for row in new_rows]
+        if pool is not None:
+            hashes = pool.map(hash_password, secrets_to_hash, chunksize=max(1, len(secrets_to_hash) // (workers * 4)))
+        else:
+            hashes = map(hash_password, secrets_to_hash)
+
+        if pending is not None:
+            _write_chunk(db, *pending, summary, on_invite)
+            if report:
+                report(summary)
+        pending = (new_rows, hashes, role_changes) if chunk else None
+        chunk, explicit_roles = [], set()
+    return summary
@@ -1,5 +1,6 @@
 const CBS = (() => {
   const TOKEN_KEY = "cbs_token";
+  let bootstrapPromise = null;
 
   function getToken() {
     return localStorage.getItem(TOKEN_KEY);
@@ -9,6 +10,7 @@ const CBS = (() => {
   }
   function clearToken() {
     localStorage.removeItem(TOKEN_KEY);
+    bootstrapPromise = null;
   }
 
   function esc(s) {
@@ -79,11 +81,27 @@ const CBS = (() => {
 
     if (!data?.access_token) throw new Error("Login did not return access_token");
     setToken(data.access_token);
+    bootstrapPromise = null;
     await refreshHeader();
   }
 
+  function localDate(d = new Date()) {
+    const pad = (n) => String(n).padStart(2, "0");
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+  }
+
+  // GET /portal/bootstrap: user, first page of rooms, upcoming bookings and
+  // today's availability in one round trip, shared by everything on the page
+  function bootstrap({ refresh = false } = {}) {
+    if (refresh || !bootstrapPromise) {
+      bootstrapPromise = get(`/portal/bootstrap?date=${localDate()}`, { auth: true });
+      bootstrapPromise.catch(() => { bootstrapPromise = null; });
+    }
+    return bootstrapPromise;
+  }
+
   async function me() {
-    return get("/auth/me", { auth: true });
+    return (await bootstrap()).user;
   }
 
   async function safeMe() {
@@ -135,5 +153,5 @@ const CBS = (() => {
     wireLogout();
   });
 
-  return { getToken, setToken, clearToken, esc, request, get, post, login, me, safeMe, refreshHeader };
+  return { getToken, setToken, clearToken, esc, request, get, post, login, localDate, bootstrap, me, safeMe, refreshHeader };
 })();
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Benchmark per-user admission control under an abusive client.
+
+One "abusive" user hammers POST /bookings from several threads while a few
+well-behaved users each submit a booking every couple of seconds. The run is
+repeated with RATE_LIMIT_ENABLED off and on, and reports the latency the
+well-behaved users see plus how many abusive requests got through.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_admission_control.py [--seconds 15] [--abuse-threads 8]
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+FAIR_USERS = 5
+FAIR_INTERVAL_SECONDS = 2.5
+ROOMS = 50
+
+
+def seed() -> tuple[str, list[str]]:
+    target_metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        users = [User(email=f"user{i}@test.com", name=f"User {i}", password_hash="x") for i in range(FAIR_USERS + 1)]
+        db.add_all(users)
+        db.add_all(Room(code=f"R{i:03d}", name=f"Room {i}", capacity=10) for i in range(ROOMS))
+        db.commit()
+        tokens = [create_access_token(str(u.id)) for u in users]
+        return tokens[0], tokens[1:]
+    finally:
+        db.close()
+
+
+# Every request books a distinct slot so the write path does real work
+_slot_counter = itertools.count()
+_slot_lock = threading.Lock()
+_base = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=2)
+
+
+def next_payload() -> dict:
+    with _slot_lock:
+        n = next(_slot_counter)
+    start = _base + timedelta(hours=n // ROOMS)
+    return {
+        "room_id": n % ROOMS + 1,
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=30)).isoformat(),
+    }
+
+
+def run(seconds: float, abuse_threads: int, abuser: str, fair: list[str]) -> dict:
+    stop = threading.Event()
+    fair_latencies: list[float] = []
+    fair_rejected = 0
+    abuse_counts = {"accepted": 0, "limited": 0}
+    lock = threading.Lock()
+
+    def abuse():
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {abuser}"}
+        while not stop.is_set():
+            resp = client.post("/bookings", json=next_payload(), headers=headers)
+            with lock:
+                abuse_counts["limited" if resp.status_code == 429 else "accepted"] += 1
+
+    def behave(token: str):
+        nonlocal fair_rejected
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {token}"}
+        while not stop.wait(FAIR_INTERVAL_SECONDS):
+            t0 = time.perf_counter()
+            resp = client.post("/bookings", json=next_payload(), headers=headers)
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                fair_latencies.append(elapsed)
+                fair_rejected += resp.status_code == 429
+
+    threads = [threading.Thread(target=abuse) for _ in range(abuse_threads)]
+    threads += [threading.Thread(target=behave, args=(t,)) for t in fair]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    fair_latencies.sort()
+    return {
+        "fair_p50": statistics.median(fair_latencies),
+        "fair_p95": fair_latencies[int(len(fair_latencies) * 0.95) - 1],
+        "fair_max": fair_latencies[-1],
+        "fair_429": fair_rejected,
+        **abuse_counts,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--abuse-threads", type=int, default=8)
+    args = parser.parse_args()
+
+    abuser, fair = seed()
+    print(f"{'limiter':8} {'fair p50 ms':>12} {'fair p95 ms':>12} {'fair max ms':>12} {'fair 429':>9} {'abuse ok':>9} {'abuse 429':>10}")
+    for enabled in (False, True):
+        settings.RATE_LIMIT_ENABLED = enabled
+        r = run(args.seconds, args.abuse_threads, abuser, fair)
+        print(
+            f"{'on' if enabled else 'off':8} {r['fair_p50']:12.1f} {r['fair_p95']:12.1f} {r['fair_max']:12.1f}"
+            f" {r['fair_429']:9d} {r['accepted']:9d} {r['limited']:10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
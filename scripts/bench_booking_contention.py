@@ -0,0 +1,123 @@
+"""
+Booking write contention benchmark.
+
+Many threads call create_pending_booking concurrently against a file-backed
+SQLite database. A share of the requests deliberately target slots that are
+already requested, so the conflict path is exercised too. The run is repeated
+with BOOKING_GROUP_COMMIT off and on, and afterwards the database is checked
+for overlapping active bookings.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_booking_contention.py [--threads 32] [--bookings 2000]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import delete, text  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.booking_service import BookingConflictError, create_pending_booking  # noqa: E402
+
+ROOMS = 20
+DUPLICATE_EVERY = 4  # every 4th request re-requests an earlier slot
+
+OVERLAP_SQL = """
+SELECT COUNT(*) FROM bookings a JOIN bookings b
+  ON a.room_id = b.room_id AND a.id < b.id
+ AND a.start_time < b.end_time AND a.end_time > b.start_time
+WHERE a.status IN ('PENDING', 'APPROVED') AND b.status IN ('PENDING', 'APPROVED')
+"""
+
+
+def seed() -> int:
+    target_metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench@test.com", name="Bench", password_hash="x")
+        db.add(user)
+        db.add_all(Room(code=f"R{i:03d}", name=f"Room {i}", capacity=10) for i in range(ROOMS))
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def run(user_id: int, threads: int, bookings: int) -> tuple[float, int, int]:
+    base = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=2)
+    created = conflicts = 0
+    lock = threading.Lock()
+    per_thread = bookings // threads
+
+    def worker(tid: int):
+        nonlocal created, conflicts
+        db = SessionLocal()
+        try:
+            for i in range(per_thread):
+                n = tid * per_thread + i
+                if i and i % DUPLICATE_EVERY == 0:
+                    n -= 1
+                start = base + timedelta(hours=n // ROOMS)
+                try:
+                    create_pending_booking(
+                        db,
+                        user_id=user_id,
+                        room_id=n % ROOMS + 1,
+                        start_time=start,
+                        end_time=start + timedelta(minutes=45),
+                    )
+                    ok = True
+                except BookingConflictError:
+                    db.rollback()
+                    ok = False
+                with lock:
+                    created += ok
+                    conflicts += not ok
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - t0, created, conflicts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--bookings", type=int, default=2000)
+    args = parser.parse_args()
+
+    user_id = seed()
+    print(f"{'group commit':13} {'seconds':>8} {'created':>8} {'409s':>6} {'bookings/s':>11} {'overlaps':>9}")
+    for enabled in (False, True):
+        settings.BOOKING_GROUP_COMMIT = enabled
+        elapsed, created, conflicts = run(user_id, args.threads, args.bookings)
+        with engine.connect() as conn:
+            overlaps = conn.execute(text(OVERLAP_SQL)).scalar()
+        print(
+            f"{'on' if enabled else 'off':13} {elapsed:8.2f} {created:8d} {conflicts:6d}"
+            f" {(created + conflicts) / elapsed:11.1f} {overlaps:9d}"
+        )
+        with SessionLocal() as db:
+            db.execute(delete(Booking))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Booking write throughput vs number of booking shards.
+
+Rooms are spread over four buildings. For 1, 2 and 4 shards the buildings are
+mapped round-robin onto that many SQLite files (shard 0 is the main database),
+and several worker processes (like uvicorn workers) call create_pending_booking
+concurrently, one session per booking, each for its own slots. Every request is
+accepted, so the run measures pure write throughput; with one file all workers
+queue on the same write lock.
+
+Sharding helps when the write lock is held mostly waiting on storage, not on
+CPU; on a single-core host the Python work alone is the limit. --commit-delay-ms
+sleeps inside every write transaction just before COMMIT to model slower
+fsync (e.g. network block storage).
+
+Usage:
+    PYTHONPATH=. python scripts/bench_booking_shards.py [--workers 8] [--bookings 2000] [--commit-delay-ms 0]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = os.environ.setdefault("CBS_BENCH_DIR", tempfile.mkdtemp(prefix="cbs-bench-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import delete, event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+BUILDINGS = ["Main Building", "Library", "Science Park", "Engineering Hall"]
+ROOMS = len(BUILDINGS) * 6
+
+
+def seed() -> int:
+    target_metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(email="bench@test.com", name="Bench", password_hash="x")
+        db.add(user)
+        db.add_all(
+            Room(code=f"R{i:02d}", name=f"Room {i}", capacity=10, location=f"{BUILDINGS[i % len(BUILDINGS)]} - Floor 1")
+            for i in range(ROOMS)
+        )
+        db.commit()
+        return user.id
+
+
+def configure(shards: int, run: int) -> None:
+    # Read by the worker processes' Settings at import
+    urls = [f"sqlite:///{_tmpdir}/run{run}-shard{k}.db" for k in range(1, shards)]
+    os.environ["BOOKING_SHARD_URLS"] = json.dumps(urls)
+    os.environ["BOOKING_SHARD_MAP"] = json.dumps({b: i % shards for i, b in enumerate(BUILDINGS)})
+
+
+def _init_worker() -> None:
+    from app.db.shards import get_shard_sessionmaker
+    from app.services.room_catalog import load_room_catalog
+
+    load_room_catalog()
+    get_shard_sessionmaker(0)  # opens the shard engines
+
+    delay = float(os.environ.get("CBS_BENCH_COMMIT_DELAY_MS", "0")) / 1000
+    if delay:
+        # Fires before the DBAPI commit, i.e. while the write lock is held
+        event.listen(Engine, "commit", lambda conn: time.sleep(delay))
+
+
+def _warm(_: int) -> None:
+    time.sleep(0.05)
+
+
+def _book(args: tuple[int, int, int, str]) -> int:
+    """Create this worker's bookings; returns how many attempts hit SQLite's busy timeout."""
+    from app.services.booking_service import create_pending_booking
+
+    user_id, first, count, base_iso = args
+    base = datetime.fromisoformat(base_iso)
+    lock_timeouts = 0
+    for n in range(first, first + count):
+        start = base + timedelta(hours=n // ROOMS)
+        while True:
+            # One session per booking, like one per request in the API
+            with SessionLocal() as db:
+                try:
+                    create_pending_booking(
+                        db,
+                        user_id=user_id,
+                        room_id=n % ROOMS + 1,
+                        start_time=start,
+                        end_time=start + timedelta(minutes=45),
+                    )
+                    break
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    lock_timeouts += 1
+    return lock_timeouts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--commit-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+    os.environ["CBS_BENCH_COMMIT_DELAY_MS"] = str(args.commit_delay_ms)
+
+    user_id = seed()
+    engine.dispose()
+    base = (datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=2)).isoformat()
+    per_worker = args.bookings // args.workers
+    chunks = [(user_id, w * per_worker, per_worker, base) for w in range(args.workers)]
+
+    ctx = multiprocessing.get_context("spawn")
+    created = per_worker * args.workers
+    print(f"{'shards':>6} {'seconds':>8} {'bookings/s':>11} {'lock timeouts':>14} {'speedup':>8}")
+    baseline = None
+    for run, shards in enumerate((1, 2, 4)):
+        configure(shards, run)
+        with ctx.Pool(args.workers, initializer=_init_worker) as pool:
+            pool.map(_warm, range(args.workers * 4))
+            t0 = time.perf_counter()
+            lock_timeouts = sum(pool.map(_book, chunks, chunksize=1))
+            elapsed = time.perf_counter() - t0
+        rate = created / elapsed
+        baseline = baseline or rate
+        print(f"{shards:6d} {elapsed:8.2f} {rate:11.1f} {lock_timeouts:14d} {rate / baseline:7.2f}x")
+        with SessionLocal() as db:
+            db.execute(delete(Booking))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Door display polls: /rooms/{id}/availability vs the in-memory now/next table.
+
+Seeds --rooms rooms in --buildings buildings with --per-room APPROVED
+bookings each over the coming week, then replays one polling round (every
+display asks once) through the ASGI app in-process:
+
+- availability: GET /rooms/{id}/availability?date=today (a query per poll)
+- now:          GET /rooms/{id}/now
+- now 304:      the same with If-None-Match (what a display sends after its
+                first poll)
+- building:     GET /rooms/now?building=... once per building
+
+and counts the SQL statements each round runs.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_door_display.py [--rooms 2000] [--buildings 20] [--per-room 20]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+os.environ["AUDIT_SPOOL_PATH"] = f"{_tmpdir}/spool.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, insert  # noqa: E402
+
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def seed(rooms: int, buildings: int, per_room: int) -> None:
+    target_metadata.create_all(engine)
+    rng = random.Random(7)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    with SessionLocal() as db:
+        db.add(User(email="bench@example.edu", name="Bench", password_hash="x"))
+        db.execute(
+            insert(Room),
+            [
+                {"code": f"R{i:05d}", "name": f"Room {i}", "location": f"Building {i % buildings:02d}", "capacity": 10}
+                for i in range(rooms)
+            ],
+        )
+        rows = []
+        for room_id in range(1, rooms + 1):
+            hours = sorted(rng.sample(range(-2, 7 * 24), per_room))
+            for h in hours:
+                start = now + timedelta(hours=h)
+                rows.append(
+                    {
+                        "room_id": room_id,
+                        "user_id": 1,
+                        "start_time": start,
+                        "end_time": start + timedelta(minutes=50),
+                        "status": "APPROVED",
+                    }
+                )
+        db.execute(insert(Booking), rows)
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--buildings", type=int, default=20)
+    parser.add_argument("--per-room", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.rooms, args.buildings, args.per_room)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(1))
+
+    room_ids = range(1, args.rooms + 1)
+    today = date.today().isoformat()
+    with TestClient(app) as client:
+        etags = {room_id: client.get(f"/rooms/{room_id}/now").headers["etag"] for room_id in room_ids}
+        rounds = {
+            "availability": lambda: [client.get(f"/rooms/{i}/availability", params={"date": today}) for i in room_ids],
+            "now": lambda: [client.get(f"/rooms/{i}/now") for i in room_ids],
+            "now 304": lambda: [client.get(f"/rooms/{i}/now", headers={"If-None-Match": etags[i]}) for i in room_ids],
+            "building": lambda: [
+                client.get("/rooms/now", params={"building": f"Building {b:02d}"}) for b in range(args.buildings)
+            ],
+        }
+        print(f"{'round':<14} {'requests':>9} {'ms':>9} {'req/s':>9} {'SQL':>7}")
+        for name, run in rounds.items():
+            statements.clear()
+            t0 = time.perf_counter()
+            responses = run()
+            elapsed = time.perf_counter() - t0
+            assert all(r.status_code in (200, 304) for r in responses)
+            print(
+                f"{name:<14} {len(responses):>9} {elapsed * 1000:>9.0f} {len(responses) / elapsed:>9.0f} "
+                f"{len(statements):>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
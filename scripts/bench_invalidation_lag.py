@@ -0,0 +1,98 @@
+"""
+Cross-worker cache invalidation lag.
+
+Runs a subscriber in a separate process with the invalidation bus started,
+then publishes --changes room changes from this process, each in its own
+transaction, --interval-ms apart. The subscriber reports how long after each
+commit it saw the change (lag_stats()) and whether any change was missed.
+
+With the default SQLite database the lag is bounded by
+INVALIDATION_POLL_SECONDS (pass --poll-seconds to try other values); against
+Postgres (--database-url, migrated) it is the NOTIFY round trip.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_invalidation_lag.py [--changes 200] [--interval-ms 20] [--poll-seconds 0.2]
+        [--database-url URL]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def subscribe(changes: int, timeout: float) -> None:
+    from app.services import invalidation_bus
+
+    seen = []
+    invalidation_bus.subscribe(invalidation_bus.ROOM, seen.append)
+    bus = invalidation_bus.get_bus()
+    bus.start()
+    print("ready", flush=True)
+
+    deadline = time.monotonic() + timeout
+    while len(seen) < changes and time.monotonic() < deadline:
+        time.sleep(0.05)
+    bus.stop()
+    print(json.dumps({"seen": len(seen), **invalidation_bus.lag_stats()}), flush=True)
+
+
+def publish(changes: int, interval: float) -> None:
+    from app.db.session import SessionLocal
+    from app.services import invalidation_bus
+
+    with SessionLocal() as db:
+        for n in range(changes):
+            invalidation_bus.publish(db, invalidation_bus.ROOM, n + 1)
+            db.commit()
+            time.sleep(interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--changes", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=20)
+    parser.add_argument("--poll-seconds", type=float, default=0.2)
+    parser.add_argument("--database-url", help="Migrated database to use (default: a new SQLite file)")
+    parser.add_argument("--subscriber", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.subscriber:
+        subscribe(args.changes, timeout=args.changes * args.interval_ms / 1000 + 30)
+        return
+
+    url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='cbs-bench-')}/bench.db"
+    os.environ.update(
+        DATABASE_URL=url,
+        INVALIDATION_BUS="true",
+        INVALIDATION_POLL_SECONDS=str(args.poll_seconds),
+    )
+    if not args.database_url:
+        from app.db.metadata import target_metadata
+        from app.db.session import engine
+
+        target_metadata.create_all(engine)
+
+    child = subprocess.Popen(
+        [sys.executable, __file__, "--subscriber", "--changes", str(args.changes), "--interval-ms", str(args.interval_ms)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    if child.stdout.readline().strip() != "ready":
+        raise SystemExit("subscriber failed to start")
+    publish(args.changes, args.interval_ms / 1000)
+    result = json.loads(child.stdout.readline())
+    child.wait()
+
+    print(f"poll interval   {args.poll_seconds * 1000:.0f} ms")
+    print(f"changes seen    {result['seen']} / {args.changes}")
+    print(f"lag ms          mean {result['mean_ms']:.1f}  p99 {result['p99_ms']:.1f}  max {result['max_ms']:.1f}")
+    if result["seen"] < args.changes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark the fast JSON path for list endpoints.
+
+Seeds a throwaway SQLite database, then hits the list endpoints with
+FAST_JSON_RESPONSES off and on. Reports CPU time per request for each mode
+and checks that both modes return identical response bytes.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_list_serialization.py [--rows 100] [--requests 300]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before any app module builds its engine.
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.enums import BookingStatus  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def seed(rows: int) -> tuple[int, int, str]:
+    target_metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        user = User(email="bench@test.com", name="Bench", password_hash="x", role="STUDENT")
+        db.add(user)
+        rooms = [
+            Room(code=f"R{i:04d}", name=f"Room {i}", location=f"Building {i % 7} - Floor {i % 3}", capacity=10 + i)
+            for i in range(rows)
+        ]
+        db.add_all(rooms)
+        db.flush()
+
+        base = datetime(2030, 1, 1, 8, 0)
+        db.add_all(
+            Booking(
+                room_id=rooms[0].id,
+                user_id=user.id,
+                start_time=base + timedelta(hours=i),
+                end_time=base + timedelta(hours=i, minutes=45),
+                status=BookingStatus.APPROVED.value,
+            )
+            for i in range(rows)
+        )
+        db.commit()
+        return user.id, rooms[0].id, create_access_token(str(user.id))
+    finally:
+        db.close()
+
+
+def measure(client: TestClient, url: str, headers: dict, requests: int) -> tuple[float, bytes]:
+    body = client.get(url, headers=headers).content  # warm-up
+    start = time.process_time()
+    for _ in range(requests):
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200, resp.text
+    return (time.process_time() - start) / requests * 1000, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    _user_id, room_id, token = seed(args.rows)
+    headers = {"Authorization": f"Bearer {token}"}
+    limit = min(args.rows, 100)
+    endpoints = {
+        "GET /bookings": f"/bookings?limit={limit}",
+        "GET /rooms": f"/rooms?limit={limit}",
+        "GET /rooms/{id}/availability": f"/rooms/{room_id}/availability?date=2030-01-02",
+    }
+
+    client = TestClient(app)
+    print(f"{'endpoint':32} {'default ms':>11} {'fast ms':>9} {'speedup':>8}  bytes")
+    for name, url in endpoints.items():
+        settings.FAST_JSON_RESPONSES = False
+        slow_ms, slow_body = measure(client, url, headers, args.requests)
+        settings.FAST_JSON_RESPONSES = True
+        fast_ms, fast_body = measure(client, url, headers, args.requests)
+
+        same = "identical" if slow_body == fast_body else "DIFFERENT"
+        print(f"{name:32} {slow_ms:11.3f} {fast_ms:9.3f} {slow_ms / fast_ms:7.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
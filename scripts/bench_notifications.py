@@ -0,0 +1,143 @@
+"""
+Booking transition latency with email notifications.
+
+Approves and then cancels a set of bookings three times: with notifications
+off, with notifications on and a fast SMTP server, and with notifications on
+and an SMTP server that takes --smtp-delay-ms to accept each message (the
+debug server from scripts/debug_smtp_server.py, run in-process). Afterwards
+it waits for the dispatcher to drain the outbox and reports how many emails
+were sent: each user gets one email per dispatcher batch, so approvals and
+cancellations of the same booking collapse into a single message.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_notifications.py [--bookings 200] [--users 10] [--smtp-delay-ms 500]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.outbox_message import OutboxMessage  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import notification_dispatcher  # noqa: E402
+from app.services.booking_service import approve_booking, cancel_booking, create_pending_booking  # noqa: E402
+from debug_smtp_server import DebugSMTPServer  # noqa: E402
+
+ROOMS = 10
+
+
+def start_smtp_server(port: int, delay: float) -> DebugSMTPServer:
+    server = DebugSMTPServer(delay, quiet=True)
+    started = threading.Event()
+
+    async def serve() -> None:
+        srv = await asyncio.start_server(server.handle, "127.0.0.1", port)
+        started.set()
+        async with srv:
+            await srv.serve_forever()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+    return server
+
+
+def seed(users: int) -> list[int]:
+    target_metadata.create_all(engine)
+    with SessionLocal() as db:
+        rows = [User(email=f"user{i}@test.com", name=f"User {i}", password_hash="x") for i in range(users)]
+        db.add_all(rows)
+        db.add_all(Room(code=f"R{i:02d}", name=f"Room {i}", capacity=10) for i in range(ROOMS))
+        db.commit()
+        return [u.id for u in rows]
+
+
+def run(user_ids: list[int], bookings: int) -> list[float]:
+    """Create, approve and cancel `bookings` bookings; returns approve/cancel latencies in ms."""
+    base = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(days=2)
+    latencies = []
+    with SessionLocal() as db:
+        for n in range(bookings):
+            start = base + timedelta(hours=n // ROOMS)
+            booking = create_pending_booking(
+                db,
+                user_id=user_ids[n % len(user_ids)],
+                room_id=n % ROOMS + 1,
+                start_time=start,
+                end_time=start + timedelta(minutes=45),
+            )
+            for transition in (approve_booking, cancel_booking):
+                t0 = time.perf_counter()
+                transition(db, booking_id=booking.id)
+                latencies.append((time.perf_counter() - t0) * 1000)
+    with SessionLocal() as db:
+        db.execute(delete(Booking))
+        db.commit()
+    return latencies
+
+
+def outbox_counts() -> dict[str, int]:
+    with SessionLocal() as db:
+        return dict(db.execute(select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)).all())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--smtp-delay-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    user_ids = seed(args.users)
+    settings.NOTIFY_POLL_INTERVAL_SECONDS = 0.2
+    fast = start_smtp_server(18025, 0)
+    slow = start_smtp_server(18026, args.smtp_delay_ms / 1000)
+
+    print(f"{'mode':<28} {'p50 ms':>8} {'p99 ms':>8} {'emails':>7} {'outbox rows':>12} {'drain s':>8}")
+    for label, server, port in (
+        ("notifications off", None, None),
+        ("smtp fast", fast, 18025),
+        (f"smtp +{args.smtp_delay_ms:.0f} ms per message", slow, 18026),
+    ):
+        settings.NOTIFICATIONS_ENABLED = server is not None
+        if server is not None:
+            settings.SMTP_PORT = port
+            notification_dispatcher._dispatcher = None
+            notification_dispatcher.start()
+
+        latencies = sorted(run(user_ids, args.bookings))
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+        emails = rows = 0
+        drain = 0.0
+        if server is not None:
+            t0 = time.perf_counter()
+            while outbox_counts().get("PENDING"):
+                time.sleep(0.05)
+            drain = time.perf_counter() - t0
+            notification_dispatcher.stop()
+            emails = server.received
+            rows = sum(outbox_counts().values())
+            with SessionLocal() as db:
+                db.execute(delete(OutboxMessage))
+                db.commit()
+        print(f"{label:<28} {p50:8.2f} {p99:8.2f} {emails:7d} {rows:12d} {drain:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Room attribute filters: SQL mask test vs the catalog's per-attribute bitsets.
+
+Seeds --rooms rooms with random attributes from a vocabulary of
+--attributes names (each room has each attribute with probability
+--density), then times `has=` filters of one, two and three attributes:
+
+- in SQL: `attributes_mask & mask = mask` over the rooms table
+- in memory: RoomCatalog.with_attributes(), for the first page of 20 rooms
+  and for every matching room
+
+Both paths must return the same rooms, which is asserted.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_room_attributes.py [--rooms 10000] [--attributes 16] [--density 0.3]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.room_attribute import RoomAttribute  # noqa: E402
+from app.services.room_attributes import has_all  # noqa: E402
+from app.services.room_catalog import load_room_catalog  # noqa: E402
+
+
+def seed(rooms: int, attributes: int, density: float) -> None:
+    target_metadata.create_all(engine)
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        db.execute(insert(RoomAttribute), [{"name": f"attr{bit}", "bit": bit} for bit in range(attributes)])
+        db.execute(
+            insert(Room),
+            [
+                {
+                    "code": f"R{i:05d}",
+                    "name": f"Room {i}",
+                    "capacity": 10,
+                    "attributes_mask": sum(1 << bit for bit in range(attributes) if rng.random() < density),
+                }
+                for i in range(rooms)
+            ],
+        )
+        db.commit()
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat * 1e6, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--attributes", type=int, default=16)
+    parser.add_argument("--density", type=float, default=0.3)
+    args = parser.parse_args()
+
+    seed(args.rooms, args.attributes, args.density)
+    catalog = load_room_catalog()
+
+    print(f"{'filter':<8} {'matches':>8} {'sql us':>10} {'page us':>10} {'all us':>10}")
+    with SessionLocal() as db:
+        for size in (1, 2, 3):
+            mask = sum(1 << bit for bit in range(size))
+            query = select(Room.id).where(has_all(mask)).order_by(Room.code)
+            sql_us, sql_ids = timed(lambda: db.scalars(query).all(), 20)
+            page_us, page = timed(lambda: catalog.with_attributes(mask, 0, 20), 2000)
+            all_us, everything = timed(lambda: catalog.with_attributes(mask), 200)
+            assert [r.id for r in everything] == list(sql_ids)
+            assert [r.id for r in page] == list(sql_ids[:20])
+            print(f"{size:<8} {len(sql_ids):8d} {sql_us:10.1f} {page_us:10.1f} {all_us:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
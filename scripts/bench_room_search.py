@@ -0,0 +1,81 @@
+"""
+Benchmark room search over a large catalog.
+
+Builds a throwaway SQLite database through the Alembic migrations (so the
+FTS5 index and its triggers exist), inserts --rooms rooms and times a set of
+exact, prefix and misspelled queries through search_rooms.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_room_search.py [--rooms 10000] [--repeat 50]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.room import Room
+from app.services.room_search import search_rooms
+
+BUILDINGS = ["Main Building", "Library", "Science Park", "Engineering Hall", "Arts Centre", "Student Union"]
+KINDS = ["Study Room", "Lecture Hall", "Seminar Room", "Computer Lab", "Chemistry Lab", "Meeting Room", "Studio"]
+
+QUERIES = {
+    "exact code": None,  # filled in with a code that exists
+    "prefix": "semin",
+    "word": "library",
+    "typo": "chemestry labb",
+    "multi-word": "computer lab science",
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{tempfile.mkdtemp(prefix='cbs-bench-')}/bench.db"
+    cfg = Config("alembic.ini")
+    cfg.set_main_option("sqlalchemy.url", url)
+    command.upgrade(cfg, "head")
+
+    engine = create_engine(url)
+    rng = random.Random(7)
+    rows = []
+    for i in range(args.rooms):
+        building = rng.choice(BUILDINGS)
+        floor = rng.randint(0, 5)
+        rows.append(
+            {
+                "code": f"{building[:3].upper()}-{floor}-{i:03d}",
+                "name": f"{rng.choice(KINDS)} {i}",
+                "location": f"{building} - Floor {floor}",
+                "capacity": rng.randint(2, 300),
+            }
+        )
+    with engine.begin() as conn:
+        conn.execute(insert(Room), rows)
+
+    QUERIES["exact code"] = rows[len(rows) // 2]["code"]
+
+    Session = sessionmaker(bind=engine)
+    print(f"{'query':12} {'q':24} {'ms/search':>10}  top hit")
+    with Session() as db:
+        for label, q in QUERIES.items():
+            hits = search_rooms(db, q, limit=10)
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                search_rooms(db, q, limit=10)
+            ms = (time.perf_counter() - t0) / args.repeat * 1000
+            top = f"{hits[0].code} | {hits[0].name} | {hits[0].location}" if hits else "-"
+            print(f"{label:12} {q:24} {ms:10.2f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Conflict checks and free-time lookups: bookings range queries vs slot bitmaps.
+
+Seeds --rooms rooms with --days days of APPROVED bookings (one to four
+hours each, packed with gaps), builds the room_day_slots bitmaps, then times:
+
+- one conflict check for a random room and 15-minute-aligned interval, as the
+  existing overlap query and as a bitmap lookup (same answers are asserted)
+- free windows of at least an hour for every room over a week, from the
+  bookings table and from the bitmaps
+
+Usage:
+    PYTHONPATH=. python scripts/bench_slot_bitmaps.py [--rooms 200] [--days 60] [--checks 2000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="cbs-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.booking import Booking  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import slot_bitmaps  # noqa: E402
+from app.services.booking_service import BookingConflictError, assert_no_active_overlap  # noqa: E402
+
+
+def seed(rooms: int, days: int, first: datetime) -> int:
+    target_metadata.create_all(engine)
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        user = User(email="bench@test.com", name="Bench", password_hash="x")
+        db.add(user)
+        db.add_all(Room(code=f"R{i:04d}", name=f"Room {i}", capacity=10) for i in range(rooms))
+        db.commit()
+
+        rows = []
+        for room_id in range(1, rooms + 1):
+            t = first
+            end = first + timedelta(days=days)
+            while t < end:
+                t += timedelta(minutes=15 * rng.randint(0, 12))
+                length = timedelta(minutes=15 * rng.randint(4, 16))
+                rows.append(
+                    {"room_id": room_id, "user_id": user.id, "start_time": t, "end_time": t + length, "status": "APPROVED"}
+                )
+                t += length
+        db.execute(insert(Booking), rows)
+        db.commit()
+        print(f"{len(rows)} bookings, {slot_bitmaps.rebuild(db)} room-days")
+        return len(rows)
+
+
+def time_checks(rooms: int, days: int, first: datetime, checks: int) -> None:
+    rng = random.Random(11)
+    probes = []
+    for _ in range(checks):
+        start = first + timedelta(minutes=15 * rng.randint(0, days * 96 - 17))
+        probes.append((rng.randint(1, rooms), start, start + timedelta(minutes=15 * rng.randint(1, 16))))
+
+    with SessionLocal() as db:
+        t0 = time.perf_counter()
+        by_query = []
+        for room_id, start, end in probes:
+            try:
+                assert_no_active_overlap(db, room_id, start, end)
+                by_query.append(False)
+            except BookingConflictError:
+                by_query.append(True)
+        query_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        by_bitmap = [slot_bitmaps.conflicts(db, r, s, e, approved_only=False) for r, s, e in probes]
+        bitmap_s = time.perf_counter() - t0
+
+    assert by_query == by_bitmap, "bitmap and overlap query disagree"
+    print(f"{'conflict check':<24} {query_s / checks * 1e6:10.1f} us {bitmap_s / checks * 1e6:10.1f} us")
+
+
+def time_free(first: datetime) -> None:
+    results = {}
+    for label, enabled in (("query", False), ("bitmap", True)):
+        settings.SLOT_BITMAPS = enabled
+        with SessionLocal() as db:
+            room_ids = list(db.scalars(select(Room.id)))
+            t0 = time.perf_counter()
+            busy = slot_bitmaps.approved_occupancy(db, first.date(), 7)
+            free = {r: slot_bitmaps.free_runs(busy.get(r, 0), 7 * 96, 4) for r in room_ids}
+            results[label] = (time.perf_counter() - t0, free)
+    assert results["query"][1] == results["bitmap"][1], "free windows differ"
+    print(f"{'free windows, 7 days':<24} {results['query'][0] * 1e3:10.1f} ms {results['bitmap'][0] * 1e3:10.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    first = (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    seed(args.rooms, args.days, first)
+    print(f"{'':<24} {'range query':>13} {'bitmap':>13}")
+    time_checks(args.rooms, args.days, first, args.checks)
+    time_free(first)
+
+
+if __name__ == "__main__":
+    main()
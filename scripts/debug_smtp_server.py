@@ -0,0 +1,91 @@
+"""
+Local debugging SMTP server.
+
+Accepts every message and prints it instead of delivering it, for trying out
+notifications (NOTIFICATIONS_ENABLED=true, SMTP_HOST=localhost, SMTP_PORT=1025).
+--delay-ms makes the server slow to accept each message, to check that the API
+does not wait on the mail server.
+
+Only the small subset of SMTP that smtplib needs is spoken (no TLS, no AUTH).
+
+Usage:
+    python scripts/debug_smtp_server.py [--port 1025] [--delay-ms 0] [--quiet]
+"""
+
+import argparse
+import asyncio
+from email import message_from_bytes, policy
+
+
+class DebugSMTPServer:
+    def __init__(self, delay: float = 0.0, quiet: bool = False) -> None:
+        self.delay = delay
+        self.quiet = quiet
+        self.received = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 localhost debug SMTP server")
+        try:
+            while raw := await reader.readline():
+                command = raw.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250 8BITMIME")
+                elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = bytearray()
+                    while (line := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        # Undo dot-stuffing
+                        data += line[1:] if line.startswith(b"..") else line
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    self.received += 1
+                    self._print(bytes(data))
+                    await reply("250 OK: queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    def _print(self, data: bytes) -> None:
+        if self.quiet:
+            return
+        message = message_from_bytes(data, policy=policy.default)
+        print(f"---------- message {self.received} ----------")
+        print(f"To: {message['To']}")
+        print(f"Subject: {message['Subject']}")
+        print(message.get_content().rstrip(), flush=True)
+
+
+async def serve(host: str, port: int, delay: float, quiet: bool) -> None:
+    server = await asyncio.start_server(DebugSMTPServer(delay, quiet).handle, host, port)
+    print(f"Debug SMTP server on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--delay-ms", type=float, default=0, help="Wait this long before accepting each message")
+    parser.add_argument("--quiet", action="store_true", help="Only count messages")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.delay_ms / 1000, args.quiet))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Bulk-create users from a CSV file (e.g. the student registry export).
+
+Columns: email, name, and optionally role (STUDENT/STAFF/ADMIN, default
+STUDENT) and password. Accounts without a password get an invite token as
+their initial password; tokens are written to --invites (CSV: email,token).
+Rerunning with the same file skips accounts that already exist, so an
+interrupted import can simply be restarted.
+
+Usage:
+    PYTHONPATH=. python scripts/import_users.py students.csv [--invites invites.csv] [--update-roles]
+        [--workers N] [--chunk-size 1000]
+    PYTHONPATH=. python scripts/import_users.py --generate 50000 > students.csv
+"""
+
+import argparse
+import csv
+import sys
+import time
+
+from app.db.session import SessionLocal
+from app.services.user_import import CHUNK_SIZE, UserImportError, import_users, read_csv, shutdown_hash_pool
+
+
+def generate(count: int) -> None:
+    out = csv.writer(sys.stdout)
+    out.writerow(["email", "name", "role"])
+    for n in range(count):
+        out.writerow([f"student{n:06d}@students.example.edu", f"Student {n}", "STUDENT"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file", nargs="?", help="CSV file ('-' for stdin)")
+    parser.add_argument("--invites", help="Write invite tokens here (default: invites.csv)", default="invites.csv")
+    parser.add_argument("--update-roles", action="store_true", help="Set the role of existing accounts too")
+    parser.add_argument("--workers", type=int, help="Hashing processes (default: USER_IMPORT_HASH_WORKERS)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--generate", type=int, metavar="N", help="Print a sample CSV of N students and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.generate)
+        return
+    if not args.file:
+        parser.error("a CSV file is required")
+
+    started = time.monotonic()
+
+    def report(summary) -> None:
+        elapsed = time.monotonic() - started
+        print(
+            f"{summary.created} created, {summary.existing} existing, {summary.invalid} invalid "
+            f"({summary.created / elapsed:.0f} users/s)",
+            flush=True,
+        )
+
+    source = sys.stdin if args.file == "-" else open(args.file, newline="", encoding="utf-8-sig")
+    with source, open(args.invites, "w", newline="") as invites_file, SessionLocal() as db:
+        invites = csv.writer(invites_file)
+        invites.writerow(["email", "token"])
+        try:
+            summary = import_users(
+                db,
+                read_csv(source),
+                update_roles=args.update_roles,
+                chunk_size=args.chunk_size,
+                workers=args.workers,
+                on_invite=lambda email, token: invites.writerow([email, token]),
+                report=report,
+            )
+        except UserImportError as e:
+            sys.exit(str(e))
+        finally:
+            shutdown_hash_pool()
+
+    for error in summary.errors:
+        print(f"line {error.line}: {error.email or '-'}: {error.reason}", file=sys.stderr)
+    if summary.invalid > len(summary.errors):
+        print(f"... and {summary.invalid - len(summary.errors)} more invalid rows", file=sys.stderr)
+    print(
+        f"Done in {time.monotonic() - started:.1f}s: {summary.created} created, {summary.existing} existing, "
+        f"{summary.roles_updated} roles updated, {summary.invalid} invalid"
+    )
+
+
+if __name__ == "__main__":
+    main()
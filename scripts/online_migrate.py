@@ -0,0 +1,137 @@
+"""
+Online schema changes for large tables (see app/db/online_migrations).
+
+Every command keeps its locks short, so it can run while the application
+serves booking traffic. Backfills and rebuilds are resumable: rerun the same
+command after an interruption and it continues from the last batch.
+
+Usage:
+    PYTHONPATH=. python scripts/online_migrate.py [--database-url URL] COMMAND ...
+
+    create-index NAME --table bookings --columns user_id,start_time [--unique] [--where SQL]
+    drop-index NAME
+    backfill NAME --table bookings --set "col = expr" [--where SQL] [--batch-size 1000]
+        [--target-ms 100] [--pause-ms 50] [--restart]
+    rebuild bookings [--name NAME] [--chunk-size 2000] [--target-ms 100] [--pause-ms 50] [--restart]
+        (SQLite: rebuild the table to match its model definition)
+    status
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.db import online_migrations
+from app.db.metadata import target_metadata
+
+
+class ProgressPrinter:
+    """Prints job progress at most once per `interval` seconds, and when the job finishes."""
+
+    def __init__(self, interval: float = 1.0) -> None:
+        self.interval = interval
+        self.printed_at = 0.0
+
+    def __call__(self, progress: online_migrations.Progress) -> None:
+        now = time.monotonic()
+        if not progress.finished and now - self.printed_at < self.interval:
+            return
+        self.printed_at = now
+        state = "done" if progress.finished else f"batch {progress.batch_size}"
+        print(
+            f"{progress.name}: {progress.rows_done} rows, {progress.fraction:.1%} of key range, "
+            f"{progress.rows_per_second:.0f} rows/s, last key {progress.last_key} ({state})",
+            flush=True,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("create-index")
+    p.add_argument("name")
+    p.add_argument("--table", required=True)
+    p.add_argument("--columns", required=True, help="Comma-separated")
+    p.add_argument("--unique", action="store_true")
+    p.add_argument("--where", help="Partial index condition (SQL)")
+
+    p = commands.add_parser("drop-index")
+    p.add_argument("name")
+
+    p = commands.add_parser("backfill")
+    p.add_argument("name", help="Job name (resume key)")
+    p.add_argument("--table", required=True)
+    p.add_argument("--set", dest="set_clause", required=True, help='SQL SET clause, e.g. "version = 1"')
+    p.add_argument("--where", help="Only update rows matching this SQL condition")
+    p.add_argument("--key", default="id")
+    p.add_argument("--batch-size", type=int, default=1000)
+    p.add_argument("--target-ms", type=float, default=100)
+    p.add_argument("--pause-ms", type=float, default=50)
+    p.add_argument("--restart", action="store_true", help="Forget earlier progress of this job")
+
+    p = commands.add_parser("rebuild")
+    p.add_argument("table")
+    p.add_argument("--name", help="Job name (default: rebuild_<table>)")
+    p.add_argument("--chunk-size", type=int, default=2000)
+    p.add_argument("--target-ms", type=float, default=100)
+    p.add_argument("--pause-ms", type=float, default=50)
+    p.add_argument("--restart", action="store_true", help="Start over with a fresh copy")
+
+    commands.add_parser("status")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Wait for the write lock rather than failing while the application writes
+    connect_args = {"timeout": 30} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, connect_args=connect_args)
+
+    if args.command == "create-index":
+        t0 = time.monotonic()
+        online_migrations.create_index_concurrently(
+            engine, args.name, args.table, args.columns.split(","), unique=args.unique, where=args.where
+        )
+        print(f"{args.name}: created in {time.monotonic() - t0:.1f}s")
+    elif args.command == "drop-index":
+        online_migrations.drop_index_concurrently(engine, args.name)
+        print(f"{args.name}: dropped")
+    elif args.command == "backfill":
+        online_migrations.backfill(
+            engine,
+            args.name,
+            args.table,
+            args.set_clause,
+            where=args.where,
+            key=args.key,
+            batch_size=args.batch_size,
+            target_batch_seconds=args.target_ms / 1000,
+            pause_seconds=args.pause_ms / 1000,
+            restart=args.restart,
+            report=ProgressPrinter(),
+        )
+    elif args.command == "rebuild":
+        if args.table not in target_metadata.tables:
+            sys.exit(f"Unknown table: {args.table}")
+        online_migrations.rebuild_sqlite_table(
+            engine,
+            target_metadata.tables[args.table],
+            name=args.name,
+            chunk_size=args.chunk_size,
+            target_batch_seconds=args.target_ms / 1000,
+            pause_seconds=args.pause_ms / 1000,
+            restart=args.restart,
+            report=ProgressPrinter(),
+        )
+    else:
+        for job in online_migrations.job_status(engine):
+            state = f"finished {job.finished_at}" if job.finished_at else f"last key {job.last_key}"
+            print(f"{job.name:<30} {job.kind:<9} {job.table_name:<20} {job.rows_done:>10} rows  {state}")
+
+
+if __name__ == "__main__":
+    main()
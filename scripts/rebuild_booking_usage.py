@@ -0,0 +1,26 @@
+"""
+Regenerate the booking_usage rows (weekly quota usage) from the bookings
+table, on every booking shard. Run it before setting
+BOOKING_QUOTA_HOURS_PER_WEEK (and after turning quotas back on if they were
+off for a while). Booking writes wait while a shard is being rebuilt.
+
+Usage:
+    PYTHONPATH=. python scripts/rebuild_booking_usage.py
+"""
+
+import time
+
+from app.db.shards import get_shard_sessionmaker, shard_count
+from app.services.booking_quotas import rebuild
+
+
+def main():
+    for shard in range(shard_count()):
+        t0 = time.perf_counter()
+        with get_shard_sessionmaker(shard)() as db:
+            rows = rebuild(db)
+        print(f"shard {shard}: {rows} user-weeks in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
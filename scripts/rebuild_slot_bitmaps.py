@@ -0,0 +1,26 @@
+"""
+Regenerate the room_day_slots bitmaps from the bookings table, on every
+booking shard. Run it before turning SLOT_BITMAPS on (and after turning it
+back on if it was off for a while). Booking writes wait while a shard is
+being rebuilt.
+
+Usage:
+    PYTHONPATH=. python scripts/rebuild_slot_bitmaps.py
+"""
+
+import time
+
+from app.db.shards import get_shard_sessionmaker, shard_count
+from app.services.slot_bitmaps import rebuild
+
+
+def main():
+    for shard in range(shard_count()):
+        t0 = time.perf_counter()
+        with get_shard_sessionmaker(shard)() as db:
+            rows = rebuild(db)
+        print(f"shard {shard}: {rows} room-days in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
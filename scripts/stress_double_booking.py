@@ -0,0 +1,349 @@
+"""
+Multi-process double-booking stress harness.
+
+Starts uvicorn with several worker processes against one shared database (a
+fresh SQLite file by default, or an empty database given with
+--database-url, e.g. a local Postgres), then lets many concurrent clients
+fire randomized, heavily overlapping requests at a few hot rooms:
+POST /bookings, approvals, rejections and cancellations.
+
+Afterwards the bookings table is checked with a self-join:
+
+- no two APPROVED bookings of a room may overlap
+- unless WAITLIST_MODE is on, no two active (PENDING or APPROVED) bookings
+  of a room may overlap either
+
+It reports throughput, the 409 rate, server errors, latency and the time
+requests spent waiting for the booking write lock (from the Server-Timing
+header), and exits with status 1 if the invariant is broken. Extra server
+settings can be passed with --env, so feature flags can be checked the same
+way, e.g. --env BOOKING_GROUP_COMMIT=true or --env SLOT_BITMAPS=true.
+
+--during runs a shell command (with DATABASE_URL set) --during-delay
+seconds into the run, e.g. a schema change from scripts/online_migrate.py,
+and reports the booking traffic while it ran next to the rest of the run.
+--seed-bookings pre-fills the table with that many old CANCELLED bookings
+so the command has a large table to work on.
+
+Usage:
+    PYTHONPATH=. python scripts/stress_double_booking.py [--workers 4] [--clients 200] [--duration 20]
+        [--rooms 3] [--database-url URL] [--env KEY=VALUE ...]
+        [--seed-bookings N] [--during CMD] [--during-delay 3]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import bindparam, create_engine, text
+
+from app.core.security import create_access_token
+
+# Share of each operation in the request mix
+MIX = (("create", 0.55), ("approve", 0.25), ("cancel", 0.15), ("reject", 0.05))
+
+OVERLAP_SQL = """
+SELECT COUNT(*) FROM bookings a JOIN bookings b
+  ON a.room_id = b.room_id AND a.id < b.id
+ AND a.start_time < b.end_time AND a.end_time > b.start_time
+WHERE a.status IN :statuses AND b.status IN :statuses
+"""
+
+_TIMING_RE = re.compile(r"(\w+);dur=([\d.]+)")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prepare_database(url: str, rooms: int, users: int, old_bookings: int) -> tuple[list[int], list[int]]:
+    """Migrate and seed; returns (room ids, user ids). The first user is STAFF."""
+    cfg = Config("alembic.ini")
+    cfg.set_main_option("sqlalchemy.url", url)
+    command.upgrade(cfg, "head")
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        room_ids = [
+            conn.execute(
+                text("INSERT INTO rooms (code, name, capacity) VALUES (:code, :name, 10) RETURNING id"),
+                {"code": f"HOT{i}", "name": f"Hot room {i}"},
+            ).scalar_one()
+            for i in range(rooms)
+        ]
+        user_ids = [
+            conn.execute(
+                text(
+                    "INSERT INTO users (email, name, password_hash, role) "
+                    "VALUES (:email, :name, 'x', :role) RETURNING id"
+                ),
+                {"email": f"stress{i}@test.com", "name": f"Stress {i}", "role": "STAFF" if i == 0 else "STUDENT"},
+            ).scalar_one()
+            for i in range(users + 1)
+        ]
+    # Old CANCELLED bookings a year back: table size only, no effect on conflicts
+    first = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=365)
+    for chunk in range(0, old_bookings, 10_000):
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO bookings (room_id, user_id, start_time, end_time, status, version) "
+                    "VALUES (:room_id, :user_id, :start_time, :end_time, 'CANCELLED', 1)"
+                ),
+                [
+                    {
+                        "room_id": room_ids[n % rooms],
+                        "user_id": user_ids[1 + n % users],
+                        "start_time": first + timedelta(minutes=15 * n),
+                        "end_time": first + timedelta(minutes=15 * n + 15),
+                    }
+                    for n in range(chunk, min(chunk + 10_000, old_bookings))
+                ],
+            )
+    engine.dispose()
+    return room_ids, user_ids
+
+
+def start_server(url: str, workers: int, port: int, extra_env: dict[str, str], log_path: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "SERVER_TIMING": "true",
+        "RATE_LIMIT_ENABLED": "false",
+        "NOTIFICATIONS_ENABLED": "false",
+        "AUDIT_SPOOL_PATH": os.path.join(os.path.dirname(log_path), "audit_spool.db"),
+        **extra_env,
+    }
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+
+
+async def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.status: dict[str, Counter] = defaultdict(Counter)
+        self.latency: list[float] = []
+        self.timings: dict[str, list[float]] = defaultdict(list)
+        self.transport_errors = 0
+        # (monotonic time of the response, status code, latency ms)
+        self.responses: list[tuple[float, int, float]] = []
+
+    def add(self, op: str, response: httpx.Response, seconds: float) -> None:
+        self.status[op][response.status_code] += 1
+        self.responses.append((time.monotonic(), response.status_code, seconds * 1000))
+        self.latency.append(seconds * 1000)
+        for name, ms in _TIMING_RE.findall(response.headers.get("server-timing", "")):
+            self.timings[name].append(float(ms))
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    rng: random.Random,
+    deadline: float,
+    rooms: list[int],
+    students: list[tuple[int, dict]],
+    staff: dict,
+    day: datetime,
+    created: list[tuple[int, dict]],
+    stats: Stats,
+) -> None:
+    ops, weights = zip(*MIX)
+    while time.monotonic() < deadline:
+        op = rng.choices(ops, weights)[0]
+        if op != "create" and not created:
+            op = "create"
+
+        if op == "create":
+            _, headers = rng.choice(students)
+            start = day + timedelta(minutes=15 * rng.randint(0, 32))
+            end = start + timedelta(minutes=15 * rng.randint(1, 8))
+            body = {"room_id": rng.choice(rooms), "start_time": start.isoformat(), "end_time": end.isoformat()}
+            request = client.post("/bookings", json=body, headers=headers)
+        else:
+            booking_id, owner_headers = rng.choice(created)
+            headers = owner_headers if op == "cancel" else staff
+            request = client.post(f"/bookings/{booking_id}/{op}", headers=headers)
+
+        t0 = time.perf_counter()
+        try:
+            response = await request
+        except httpx.TransportError:
+            stats.transport_errors += 1
+            continue
+        stats.add(op, response, time.perf_counter() - t0)
+        if op == "create" and response.status_code == 201:
+            created.append((response.json()["id"], headers))
+
+
+async def run_during(command: str, url: str, delay: float) -> tuple[float, float, int]:
+    """Run `command` after `delay` seconds; returns its (start, end) monotonic times and exit status."""
+    await asyncio.sleep(delay)
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_shell(command, env={**os.environ, "DATABASE_URL": url})
+    status = await process.wait()
+    return start, time.monotonic(), status
+
+
+async def run_clients(base_url: str, url: str, args, rooms: list[int], user_ids: list[int]) -> tuple[Stats, float, tuple | None]:
+    staff = {"Authorization": f"Bearer {create_access_token(str(user_ids[0]))}"}
+    students = [(uid, {"Authorization": f"Bearer {create_access_token(str(uid))}"}) for uid in user_ids[1:]]
+    day = (datetime.utcnow() + timedelta(days=2)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+    stats = Stats()
+    created: list[tuple[int, dict]] = []
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.monotonic() + args.duration
+        t0 = time.perf_counter()
+        during = asyncio.create_task(run_during(args.during, url, args.during_delay)) if args.during else None
+        await asyncio.gather(
+            *(
+                client_loop(client, random.Random(args.seed + i), deadline, rooms, students, staff, day, created, stats)
+                for i in range(args.clients)
+            )
+        )
+        elapsed = time.perf_counter() - t0
+        window = await during if during else None
+    return stats, elapsed, window
+
+
+def check_invariant(url: str, waitlist: bool) -> dict[str, int]:
+    engine = create_engine(url)
+    checks = {"approved overlaps": ("APPROVED",)}
+    if not waitlist:
+        checks["active overlaps"] = ("PENDING", "APPROVED")
+    query = text(OVERLAP_SQL).bindparams(bindparam("statuses", expanding=True))
+    with engine.connect() as conn:
+        counts = {"bookings": conn.execute(text("SELECT COUNT(*) FROM bookings")).scalar_one()}
+        for name, statuses in checks.items():
+            counts[name] = conn.execute(query, {"statuses": list(statuses)}).scalar_one()
+    engine.dispose()
+    return counts
+
+
+def pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report_during(stats: Stats, window: tuple[float, float, int]) -> None:
+    start, end, status = window
+    inside = [r for r in stats.responses if start <= r[0] <= end]
+    outside = [r for r in stats.responses if not start <= r[0] <= end]
+    first, last = stats.responses[0][0], stats.responses[-1][0]
+    overlap = max(0.0, min(end, last) - max(start, first))
+    times = [r[0] for r in inside]
+    gap = max((b - a for a, b in zip(times, times[1:])), default=0.0)
+    print(f"--during        ran {end - start:.1f}s, exit status {status}")
+    for label, rows, seconds in (("  while running", inside, overlap), ("  otherwise", outside, last - first - overlap)):
+        latency = [r[2] for r in rows]
+        errors = sum(1 for r in rows if r[1] >= 500)
+        print(
+            f"{label:<15} {len(rows) / max(seconds, 1e-9):.1f} req/s  p50 {statistics.median(latency) if latency else 0:.1f} ms  "
+            f"p99 {pct(latency, 0.99):.1f} ms  5xx {errors}"
+        )
+    print(f"  longest gap between responses while running: {gap * 1000:.0f} ms")
+
+
+def report(stats: Stats, elapsed: float, counts: dict[str, int]) -> None:
+    total = sum(sum(c.values()) for c in stats.status.values())
+    conflicts = sum(c[409] for c in stats.status.values())
+    server_errors = sum(n for c in stats.status.values() for code, n in c.items() if code >= 500)
+
+    print(f"requests        {total} in {elapsed:.1f}s = {total / elapsed:.1f} req/s")
+    print(f"409 rate        {conflicts / max(total, 1):.1%}")
+    print(f"5xx / transport {server_errors} / {stats.transport_errors}")
+    print(f"latency ms      p50 {statistics.median(stats.latency) if stats.latency else 0:.1f}  p99 {pct(stats.latency, 0.99):.1f}")
+    for name, values in sorted(stats.timings.items()):
+        print(
+            f"{name + ' wait ms':<15} mean {statistics.fmean(values):.1f}  p99 {pct(values, 0.99):.1f}  "
+            f"total {sum(values) / 1000:.1f}s over {len(values)} requests"
+        )
+    for op, codes in sorted(stats.status.items()):
+        print(f"  {op:<8} " + "  ".join(f"{code}: {n}" for code, n in sorted(codes.items())))
+    for name, n in counts.items():
+        print(f"{name:<15} {n}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--rooms", type=int, default=3)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", help="Empty database to use (default: a new SQLite file)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra server setting")
+    parser.add_argument("--seed-bookings", type=int, default=0, help="Old CANCELLED bookings to pre-fill")
+    parser.add_argument("--during", metavar="CMD", help="Shell command to run during the load, e.g. a migration")
+    parser.add_argument("--during-delay", type=float, default=3, help="Seconds into the run to start --during")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="cbs-stress-")
+    url = args.database_url or f"sqlite:///{tmpdir}/stress.db"
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    waitlist = extra_env.get("WAITLIST_MODE", os.environ.get("WAITLIST_MODE", "false")).lower() in ("1", "true", "yes")
+
+    rooms, user_ids = prepare_database(url, args.rooms, args.users, args.seed_bookings)
+    port = free_port()
+    log_path = os.path.join(tmpdir, "server.log")
+    server = start_server(url, args.workers, port, extra_env, log_path)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        asyncio.run(wait_ready(base_url, server))
+        stats, elapsed, window = asyncio.run(run_clients(base_url, url, args, rooms, user_ids))
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+
+    counts = check_invariant(url, waitlist)
+    report(stats, elapsed, counts)
+    if window:
+        report_during(stats, window)
+    print(f"server log      {log_path}")
+    if any(n for name, n in counts.items() if name.endswith("overlaps")):
+        print("INVARIANT BROKEN: overlapping bookings found")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+# Before anything imports app.core.config: a scratch database per test run
+_tmp = tempfile.mkdtemp(prefix="cbs-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/cbs.db"
+os.environ["AUDIT_SPOOL_PATH"] = f"{_tmp}/audit_spool.db"
+
+from datetime import datetime, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.metadata import target_metadata  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    # The room catalog snapshot would outlive each test's fresh tables
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CACHE", False)
+    monkeypatch.setattr(settings, "USER_CACHE", False)
+    monkeypatch.setattr(settings, "BOOKING_SHARD_URLS", [])
+    monkeypatch.setattr(settings, "BOOKING_SHARD_MAP", {})
+    monkeypatch.setattr(settings, "BOOKING_QUOTA_HOURS_PER_WEEK", {})
+
+
+@pytest.fixture
+def db():
+    target_metadata.drop_all(engine)
+    target_metadata.create_all(engine)
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client(db):
+    """The API without its lifespan: no caches or background threads unless a test starts them."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def sharded(monkeypatch, tmp_path):
+    """Rooms in buildings starting with "North" have their bookings on shard 1."""
+    monkeypatch.setattr(settings, "BOOKING_SHARD_URLS", [f"sqlite:///{tmp_path}/shard1.db"])
+    monkeypatch.setattr(settings, "BOOKING_SHARD_MAP", {"north": 1})
+
+
+@pytest.fixture
+def monday() -> datetime:
+    """Midnight of next week's Monday: every booking of a test falls in one ISO week."""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday())
+
+
+def add_user(db, email: str, role: str = "STUDENT") -> int:
+    user = User(email=email, name=email, password_hash="x", role=role)
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def auth(user_id: int) -> dict[str, str]:
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token(str(user_id))}"}
+
+
+def add_room(db, code: str, location: str | None = None) -> int:
+    room = Room(code=code, name=code, capacity=10, location=location)
+    db.add(room)
+    db.commit()
+    return room.id
+
+
+@pytest.fixture
+def aware_datetimes():
+    """Load naive DateTime(timezone=True) values as UTC-aware, the way Postgres returns them."""
+    from datetime import timezone
+
+    from sqlalchemy import DateTime, event
+
+    from app.db.base import Base
+
+    def to_aware(target, _context):
+        for column in target.__table__.columns:
+            value = target.__dict__.get(column.key)
+            if isinstance(column.type, DateTime) and column.type.timezone and isinstance(value, datetime):
+                if value.tzinfo is None:
+                    target.__dict__[column.key] = value.replace(tzinfo=timezone.utc)
+
+    event.listen(Base, "load", to_aware, propagate=True)
+    yield
+    event.remove(Base, "load", to_aware)
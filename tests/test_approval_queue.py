@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.approval_queue import load_approval_queue
+from app.services.booking_service import approve_booking, create_pending_booking
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture(autouse=True)
+def _waitlist(monkeypatch):
+    # Competing PENDING requests are only possible in waitlist mode
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+
+
+def _book(db, user_id, room_id, start, hours=1.0):
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=hours)
+    ).id
+
+
+def _pages(db, **kwargs) -> list[list[list[int]]]:
+    pages, cursor = [], None
+    while True:
+        clusters, cursor = load_approval_queue(db, cursor=cursor, **kwargs)
+        pages.append([[item.id for item in c.items] for c in clusters])
+        if cursor is None:
+            return pages
+
+
+def test_clusters_follow_overlap_chains_and_pages_never_split_them(db, monday):
+    user = add_user(db, "s@example.edu")
+    r1, r2 = add_room(db, "R1"), add_room(db, "R2")
+    nine = monday + timedelta(hours=9)
+    # 9-11, 10-12 and 11:30-12:30 chain into one cluster; 12:30 only touches it
+    a = _book(db, user, r1, nine, 2)
+    b = _book(db, user, r1, nine + timedelta(hours=1), 2)
+    c = _book(db, user, r1, nine + timedelta(hours=2.5))
+    d = _book(db, user, r1, nine + timedelta(hours=3.5))
+    # Same time, other room
+    e = _book(db, user, r2, nine)
+
+    assert _pages(db, limit=10) == [[[a, b, c], [d], [e]]]
+    assert _pages(db, limit=1) == [[[a, b, c]], [[d]], [[e]]]
+    assert _pages(db, limit=2, room_id=r1) == [[[a, b, c], [d]]]
+    # A window keeps every request overlapping it
+    assert _pages(db, limit=10, start=nine + timedelta(hours=3), end=nine + timedelta(hours=4)) == [[[c], [d]]]
+
+
+def test_items_overlapping_an_approved_booking_are_flagged(db, monday):
+    user = add_user(db, "s@example.edu")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+    first = _book(db, user, room, nine)
+    clashing = _book(db, user, room, nine + timedelta(minutes=30))
+    after = _book(db, user, room, nine + timedelta(hours=1))
+    approve_booking(db, booking_id=first)
+
+    (cluster,), _ = load_approval_queue(db)
+
+    assert {item.id: item.conflicts_with_approved for item in cluster.items} == {clashing: True, after: False}
+
+
+def test_shard_pages_are_merged_in_order(db, sharded, monday):
+    user = add_user(db, "s@example.edu")
+    rooms = [add_room(db, f"R{n}", "North Hall" if n % 2 else "South Hall") for n in range(4)]
+    nine = monday + timedelta(hours=9)
+    ids = [_book(db, user, room, nine) for room in rooms]
+
+    assert _pages(db, limit=3) == [[[ids[0]], [ids[1]], [ids[2]]], [[ids[3]]]]
+
+
+def test_queue_endpoint(client, db, monday):
+    user, staff = add_user(db, "s@example.edu"), add_user(db, "staff@example.edu", "STAFF")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+    first, second = _book(db, user, room, nine), _book(db, user, room, nine)
+
+    response = client.get("/bookings/queue", headers=auth(staff))
+    assert response.status_code == 200
+    body = response.json()
+    assert [[item["id"] for item in c["items"]] for c in body["clusters"]] == [[first, second]]
+    assert body["next_cursor"] is None
+
+    assert client.get("/bookings/queue", headers=auth(user)).status_code == 403
+    assert client.get("/bookings/queue?cursor=nope", headers=auth(staff)).status_code == 400
+    assert client.get("/bookings/queue?limit=0", headers=auth(staff)).status_code == 400
@@ -0,0 +1,120 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import Settings
+from app.db.session import SessionLocal
+from app.models.booking_audit_event import BookingAuditEvent
+from app.services import audit_log
+from app.services.audit_log import AuditLog, AuditRecord, AuditSpool
+from app.services.booking_service import approve_booking, create_pending_booking
+from conftest import add_room, add_user
+
+
+def _record(booking_id: int, status: str | None = "PENDING") -> AuditRecord:
+    return AuditRecord(booking_id, 1, None, status, 1, datetime.now(timezone.utc))
+
+
+def _written(db) -> list[tuple[int, str, int | None, int]]:
+    db.rollback()
+    event = BookingAuditEvent
+    return db.execute(
+        select(event.booking_id, event.status, event.actor_id, event.version).order_by(event.id)
+    ).all()
+
+
+@pytest.fixture
+def spool(tmp_path):
+    return AuditSpool(str(tmp_path / "spool.db"))
+
+
+def test_disabled_by_default():
+    assert Settings.model_fields["AUDIT_LOG_ENABLED"].default is False
+
+
+def test_booking_changes_are_recorded(db, spool, monkeypatch, monday):
+    log = AuditLog(SessionLocal, spool)
+    monkeypatch.setattr(audit_log, "_audit_log", log)
+    audit_log.install()
+    try:
+        student, staff = add_user(db, "s@example.edu"), add_user(db, "staff@example.edu", "STAFF")
+        start = monday + timedelta(hours=9)
+        booking = create_pending_booking(
+            db, user_id=student, room_id=add_room(db, "R1"), start_time=start, end_time=start + timedelta(hours=1)
+        )
+        approve_booking(db, booking_id=booking.id, actor_id=staff)
+    finally:
+        audit_log.uninstall()
+        log.close()
+
+    assert _written(db) == [(booking.id, "PENDING", student, 1), (booking.id, "APPROVED", staff, 2)]
+
+
+def test_overflow_goes_through_the_spool(db, spool):
+    log = AuditLog(SessionLocal, spool, capacity=1)
+
+    log.record(_record(1))
+    log.record(_record(2))
+    assert [r.booking_id for _, r in spool.peek(10)] == [2]
+    log.close()
+
+    assert [row[0] for row in _written(db)] == [1, 2]
+    assert spool.peek(10) == []
+
+
+def test_a_refused_event_does_not_hold_up_the_spool(db, spool):
+    log = AuditLog(SessionLocal, spool, max_attempts=3)
+    # status is NOT NULL: the database will never take this one
+    spool.append([_record(1), _record(2, status=None), _record(3)])
+
+    log.flush()
+    assert [row[0] for row in _written(db)] == [1, 3]
+    assert [r.booking_id for _, r in spool.peek(10)] == [2]
+
+    log.flush()
+    assert spool.dead_letters() == []
+    log.flush()
+
+    assert spool.peek(10) == []
+    ((dead, error),) = spool.dead_letters()
+    assert dead.booking_id == 2 and "NOT NULL" in error
+    # Later events flow again
+    log.record(_record(4))
+    log.close()
+    assert [row[0] for row in _written(db)] == [1, 3, 4]
+
+
+def test_connection_errors_are_retried_without_counting_attempts(db, spool, monkeypatch):
+    log = AuditLog(SessionLocal, spool, max_attempts=1)
+    spool.append([_record(1)])
+
+    def unavailable(records):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(log, "_insert", unavailable)
+    with pytest.raises(OperationalError):
+        log.flush()
+    monkeypatch.undo()
+
+    assert spool.dead_letters() == []
+    log.flush()
+    assert [row[0] for row in _written(db)] == [1]
+
+
+def test_old_spool_files_are_upgraded(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE audit_spool (id INTEGER PRIMARY KEY, record TEXT NOT NULL)")
+    conn.execute("INSERT INTO audit_spool (record) VALUES (?)", (_record(1).to_json(),))
+    conn.commit()
+    conn.close()
+
+    spool = AuditSpool(path)
+
+    ((spool_id, record),) = spool.peek(10)
+    assert record.booking_id == 1
+    assert spool.fail(spool_id, "refused", max_attempts=1)
+    assert [r.booking_id for r, _ in spool.dead_letters()] == [1]
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db.shards import get_shard_sessionmaker
+from app.models.booking import Booking
+from app.models.booking_usage import BookingUsage
+from app.services import booking_quotas
+from app.services.booking_quotas import BookingQuotaExceededError
+from app.services.booking_service import (
+    BookingConflictError,
+    approve_booking_group,
+    cancel_booking_group,
+    create_booking_group,
+    create_pending_booking,
+)
+from conftest import add_room, add_user
+
+
+def _bookings(shard: int) -> list[tuple[int, int, str]]:
+    with get_shard_sessionmaker(shard)() as s:
+        return s.execute(select(Booking.room_id, Booking.user_id, Booking.status).order_by(Booking.id)).all()
+
+
+def _usage(shard: int) -> list[tuple[int, int]]:
+    with get_shard_sessionmaker(shard)() as s:
+        return s.execute(select(BookingUsage.user_id, BookingUsage.minutes).where(BookingUsage.minutes != 0)).all()
+
+
+def test_conflict_on_one_room_writes_nothing(db, monday):
+    student, other = add_user(db, "s@example.edu"), add_user(db, "o@example.edu")
+    a, b, c = add_room(db, "A"), add_room(db, "B"), add_room(db, "C")
+    start = monday + timedelta(hours=9)
+    create_pending_booking(db, user_id=other, room_id=b, start_time=start, end_time=start + timedelta(hours=1))
+
+    items = [(r, start, start + timedelta(hours=2)) for r in (a, b, c)]
+    with pytest.raises(BookingConflictError, match=f"Room {b}"):
+        create_booking_group(db, user_id=student, items=items)
+
+    assert _bookings(0) == [(b, other, BookingStatus.PENDING.value)]
+
+
+def test_conflict_on_one_shard_rolls_back_the_others(db, sharded, monday):
+    student, other = add_user(db, "s@example.edu"), add_user(db, "o@example.edu")
+    south, north = add_room(db, "S1", "South Hall"), add_room(db, "N1", "North Hall")
+    start = monday + timedelta(hours=9)
+    create_pending_booking(db, user_id=other, room_id=north, start_time=start, end_time=start + timedelta(hours=1))
+
+    # Shard 0 (south) is written first, then shard 1 fails
+    items = [(south, start, start + timedelta(hours=1)), (north, start, start + timedelta(hours=1))]
+    with pytest.raises(BookingConflictError):
+        create_booking_group(db, user_id=student, items=items)
+
+    assert _bookings(0) == []
+    assert _bookings(1) == [(north, other, BookingStatus.PENDING.value)]
+
+
+def test_group_members_share_a_group_id(db, sharded, monday):
+    student = add_user(db, "s@example.edu")
+    south, north = add_room(db, "S1", "South Hall"), add_room(db, "N1", "North Hall")
+    start = monday + timedelta(hours=9)
+
+    group = create_booking_group(
+        db, user_id=student, items=[(north, start, start + timedelta(hours=1)), (south, start, start + timedelta(hours=1))]
+    )
+
+    assert [b.room_id for b in group] == [north, south]
+    assert len({b.group_id for b in group}) == 1
+    assert [b.id >> 40 for b in group] == [1, 0]
+
+
+def test_group_quota_counts_every_shard(db, sharded, monday, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_QUOTA_HOURS_PER_WEEK", {"STUDENT": 3})
+    student = add_user(db, "s@example.edu")
+    south, north = add_room(db, "S1", "South Hall"), add_room(db, "N1", "North Hall")
+    start = monday + timedelta(hours=9)
+
+    # 2 h + 2 h: each shard's part fits on its own, the group does not
+    items = [(south, start, start + timedelta(hours=2)), (north, start, start + timedelta(hours=2))]
+    with pytest.raises(BookingQuotaExceededError):
+        create_booking_group(db, user_id=student, items=items, role="STUDENT")
+    assert _bookings(0) == _bookings(1) == []
+    assert _usage(0) == _usage(1) == []
+
+    items = [(south, start, start + timedelta(minutes=90)), (north, start, start + timedelta(minutes=90))]
+    group = create_booking_group(db, user_id=student, items=items, role="STUDENT")
+    assert _usage(0) == _usage(1) == [(student, 90)]
+    assert booking_quotas.week_usage(db, student, "STUDENT", start).minutes == 180
+
+    # The week is full on either shard
+    later = start + timedelta(hours=4)
+    for room in (south, north):
+        with pytest.raises(BookingQuotaExceededError):
+            create_pending_booking(
+                db, user_id=student, room_id=room, start_time=later, end_time=later + timedelta(minutes=15), role="STUDENT"
+            )
+
+    cancelled = cancel_booking_group(db, group_id=group[0].group_id, owner_id=student)
+    assert {b.status for b in cancelled} == {BookingStatus.CANCELLED.value}
+    assert _usage(0) == _usage(1) == []
+
+
+def test_cancelling_an_approved_group_promotes_the_waitlist(db, sharded, monday, monkeypatch):
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+    student, waiting = add_user(db, "s@example.edu"), add_user(db, "w@example.edu", "STAFF")
+    south, north = add_room(db, "S1", "South Hall"), add_room(db, "N1", "North Hall")
+    start = monday + timedelta(hours=9)
+    items = [(south, start, start + timedelta(hours=1)), (north, start, start + timedelta(hours=1))]
+    group_id = create_booking_group(db, user_id=student, items=items)[0].group_id
+    # Waitlisted behind the group's north room
+    create_pending_booking(db, user_id=waiting, room_id=north, start_time=start, end_time=start + timedelta(hours=1))
+    approve_booking_group(db, group_id=group_id)
+
+    cancelled = cancel_booking_group(db, group_id=group_id)
+
+    assert sorted((b.room_id, b.status) for b in cancelled) == [
+        (south, BookingStatus.CANCELLED.value),
+        (north, BookingStatus.CANCELLED.value),
+    ]
+    assert _bookings(1)[-1] == (north, waiting, BookingStatus.APPROVED.value)
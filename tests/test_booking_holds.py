@@ -0,0 +1,117 @@
+from datetime import timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.services import booking_holds
+from app.services.booking_holds import HoldConflictError, HoldLimitError, acquire, blocking_hold
+from app.services.booking_service import (
+    BookingConflictError,
+    InvalidHoldError,
+    create_hold,
+    create_pending_booking,
+)
+from conftest import add_room, add_user, auth
+
+# An offset no test machine runs in, so aware and naive local times differ in wall-clock digits
+ELSEWHERE = timezone(timedelta(hours=5, minutes=45))
+
+
+@pytest.fixture(autouse=True)
+def holds(monkeypatch):
+    monkeypatch.setattr(booking_holds, "_by_room", booking_holds.defaultdict(list))
+    monkeypatch.setattr(booking_holds, "_by_id", {})
+    monkeypatch.setattr(booking_holds, "_swept_at", 0.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(booking_holds.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize("held_aware", [False, True])
+def test_naive_and_aware_times_compare(monday, held_aware):
+    naive = monday + timedelta(hours=9)
+    aware = naive.astimezone(ELSEWHERE)
+    held, asked = (aware, naive) if held_aware else (naive, aware)
+
+    hold = acquire(1, user_id=1, start_time=held, end_time=held + timedelta(hours=1))
+
+    assert blocking_hold(1, asked, asked + timedelta(minutes=30), user_id=2) == hold
+    assert blocking_hold(1, asked + timedelta(hours=1), asked + timedelta(hours=2), user_id=2) is None
+    assert hold.covers(1, asked, asked + timedelta(hours=1))
+    with pytest.raises(HoldConflictError):
+        acquire(1, user_id=2, start_time=asked + timedelta(minutes=45), end_time=asked + timedelta(hours=2))
+
+
+def test_own_holds_are_replaced_and_limited(monday, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_HOLDS_PER_USER", 2)
+    start = monday + timedelta(hours=9)
+    first = acquire(1, 1, start, start + timedelta(hours=1))
+    second = acquire(1, 1, start + timedelta(minutes=30), start + timedelta(hours=2))
+
+    assert booking_holds.get_hold(first.id) is None and booking_holds.get_hold(second.id) == second
+    acquire(2, 1, start, start + timedelta(hours=1))
+    with pytest.raises(HoldLimitError):
+        acquire(3, 1, start, start + timedelta(hours=1))
+    # Other users are not affected
+    acquire(3, 2, start, start + timedelta(hours=1))
+
+
+def test_holds_expire(monday, monkeypatch, clock):
+    monkeypatch.setattr(settings, "BOOKING_HOLD_SECONDS", 60)
+    start = monday + timedelta(hours=9)
+    hold = acquire(1, 1, start, start + timedelta(hours=1))
+    acquire(2, 1, start, start + timedelta(hours=1))
+
+    clock[0] += 61
+    assert booking_holds.get_hold(hold.id) is None
+    assert blocking_hold(1, start, start + timedelta(hours=1), user_id=2) is None
+    # The sweep drops holds of rooms nobody checks again
+    assert booking_holds._by_room == {} and booking_holds._by_id == {}
+
+
+def test_booking_requests_respect_holds(db, monday):
+    alice, bob = add_user(db, "alice@example.edu"), add_user(db, "bob@example.edu")
+    room = add_room(db, "R1")
+    start = monday + timedelta(hours=9)
+    end = start + timedelta(hours=1)
+    hold = create_hold(
+        db, user_id=alice, room_id=room, start_time=start.astimezone(ELSEWHERE), end_time=end.astimezone(ELSEWHERE)
+    )
+
+    with pytest.raises(BookingConflictError):
+        create_pending_booking(db, user_id=bob, room_id=room, start_time=start, end_time=end)
+    with pytest.raises(InvalidHoldError):
+        create_pending_booking(db, user_id=bob, room_id=room, start_time=start, end_time=end, hold_id=hold.id)
+
+    booking = create_pending_booking(db, user_id=alice, room_id=room, start_time=start, end_time=end, hold_id=hold.id)
+    assert booking.id is not None
+    assert booking_holds.get_hold(hold.id) is None
+    # Now it is booked rather than held
+    with pytest.raises(BookingConflictError):
+        create_hold(db, user_id=bob, room_id=room, start_time=start, end_time=end)
+
+
+def test_holds_api(client, db, monday):
+    alice, bob = auth(add_user(db, "alice@example.edu")), auth(add_user(db, "bob@example.edu"))
+    room = add_room(db, "R1")
+    start = monday + timedelta(hours=9)
+    body = {"room_id": room, "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+
+    response = client.post("/holds", json=body, headers=alice)
+    assert response.status_code == 201, response.text
+    hold_id = response.json()["id"]
+    aware = {
+        **body,
+        "start_time": start.astimezone(ELSEWHERE).isoformat(),
+        "end_time": (start + timedelta(hours=1)).astimezone(ELSEWHERE).isoformat(),
+    }
+    assert client.post("/holds", json=aware, headers=bob).status_code == 409
+    assert client.post("/bookings", json=aware, headers=bob).status_code == 409
+
+    assert client.delete(f"/holds/{hold_id}", headers=bob).status_code == 404
+    assert client.delete(f"/holds/{hold_id}", headers=alice).status_code == 204
+    assert client.post("/holds", json=aware, headers=bob).status_code == 201
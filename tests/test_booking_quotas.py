@@ -0,0 +1,134 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.booking_usage import BookingUsage
+from app.services import booking_quotas
+from app.services.booking_quotas import BookingQuotaExceededError
+from app.services.booking_service import (
+    BookingConflictError,
+    approve_booking,
+    cancel_booking,
+    create_pending_booking,
+    reject_booking,
+)
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture
+def quotas(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_QUOTA_HOURS_PER_WEEK", {"STUDENT": 3})
+
+
+def _book(db, user_id, room_id, start, hours: float = 1):
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=hours)
+    )
+
+
+def _usage(db) -> dict[tuple[int, int], int]:
+    db.rollback()
+    return {(u, w): m for u, w, m in db.execute(select(BookingUsage.user_id, BookingUsage.week, BookingUsage.minutes))}
+
+
+def test_helpers(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_QUOTA_HOURS_PER_WEEK", {"STUDENT": 2.5})
+    assert booking_quotas.week_of(datetime(2026, 1, 1)) == 202601
+    assert booking_quotas.week_of(datetime(2027, 1, 1)) == 202653
+    assert booking_quotas.minutes_of(datetime(2026, 1, 1, 9), datetime(2026, 1, 1, 9, 30, 1)) == 31
+    assert booking_quotas.limit_minutes("STUDENT") == 150
+    assert booking_quotas.limit_minutes("STAFF") is None
+
+
+def test_usage_is_capped_and_given_back(db, quotas, monday):
+    student, staff = add_user(db, "s@example.edu"), add_user(db, "staff@example.edu", "STAFF")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+
+    first = _book(db, student, room, nine, hours=2)
+    _book(db, student, room, nine + timedelta(hours=3))
+    with pytest.raises(BookingQuotaExceededError):
+        _book(db, student, room, nine + timedelta(hours=5))
+    db.rollback()
+    # Another week
+    _book(db, student, room, nine + timedelta(days=7), hours=3)
+    # Roles without a quota are not limited
+    other_room = add_room(db, "R2")
+    for day in range(3):
+        _book(db, staff, other_room, nine + timedelta(days=day), hours=4)
+
+    week = booking_quotas.week_of(nine)
+    assert _usage(db)[(student, week)] == 180
+
+    approve_booking(db, booking_id=first.id)
+    assert _usage(db)[(student, week)] == 180
+    cancel_booking(db, booking_id=first.id)
+    assert _usage(db)[(student, week)] == 60
+    _book(db, student, room, nine + timedelta(hours=5), hours=2)
+
+
+def test_quota_api(client, db, quotas, monday):
+    student = add_user(db, "s@example.edu")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+    body = {"room_id": room, "start_time": nine.isoformat(), "end_time": (nine + timedelta(hours=3)).isoformat()}
+    assert client.post("/bookings", json=body, headers=auth(student)).status_code == 201
+
+    later = {
+        **body,
+        "start_time": (nine + timedelta(hours=4)).isoformat(),
+        "end_time": (nine + timedelta(hours=5)).isoformat(),
+    }
+    response = client.post("/bookings", json=later, headers=auth(student))
+    assert response.status_code == 403
+    assert "quota" in response.json()["detail"]
+
+    usage = client.get("/bookings/quota", params={"at": nine.isoformat()}, headers=auth(student)).json()
+    assert usage == {"week": booking_quotas.week_of(nine), "used_hours": 3.0, "limit_hours": 3.0}
+
+
+def test_quota_api_when_off(client, db):
+    assert client.get("/bookings/quota", headers=auth(add_user(db, "s@example.edu"))).status_code == 404
+
+
+def test_usage_across_shards(db, quotas, sharded, monday):
+    student = add_user(db, "s@example.edu")
+    north, south = add_room(db, "N1", "North Hall"), add_room(db, "S1", "South Hall")
+    nine = monday + timedelta(hours=9)
+
+    _book(db, student, north, nine, hours=2)
+    with pytest.raises(BookingQuotaExceededError):
+        _book(db, student, south, nine, hours=2)
+    db.rollback()
+    _book(db, student, south, nine)
+
+    usage = booking_quotas.week_usage(db, student, "STUDENT", nine)
+    assert (usage.minutes, usage.limit_minutes) == (180, 180)
+
+
+def test_usage_matches_a_rebuild(db, quotas, monday):
+    rng = random.Random(48)
+    users = [add_user(db, f"s{i}@example.edu") for i in range(3)]
+    rooms = [add_room(db, f"R{i}") for i in range(2)]
+    ids = []
+    for _ in range(120):
+        op = rng.choice(["create", "create", "approve", "reject", "cancel"])
+        try:
+            if op == "create" or not ids:
+                start = monday + timedelta(days=rng.choice([0, 1, 7]), hours=rng.randint(8, 18))
+                booking = _book(db, rng.choice(users), rng.choice(rooms), start, hours=rng.choice([0.5, 1, 2]))
+                ids.append(booking.id)
+            else:
+                {"approve": approve_booking, "reject": reject_booking, "cancel": cancel_booking}[op](
+                    db, booking_id=rng.choice(ids)
+                )
+        except (BookingConflictError, BookingQuotaExceededError, ValueError):
+            db.rollback()
+
+    live = {key: minutes for key, minutes in _usage(db).items() if minutes}
+    booking_quotas.rebuild(db)
+    assert live == _usage(db)
+    assert live
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.services.booking_service import create_pending_booking
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture
+def people(db):
+    return {
+        "owner": add_user(db, "owner@example.edu"),
+        "other": add_user(db, "other@example.edu"),
+        "staff": add_user(db, "staff@example.edu", "STAFF"),
+    }
+
+
+def _pending(db, user_id: int, room_id: int, start: datetime) -> int:
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=1)
+    ).id
+
+
+def _state(db, booking_id: int) -> tuple[str, int]:
+    db.rollback()
+    return tuple(db.execute(select(Booking.status, Booking.version).where(Booking.id == booking_id)).one())
+
+
+def test_concurrent_approve_and_cancel_one_wins(client, db, people, monday):
+    room = add_room(db, "R1")
+    for hour in range(8, 13):
+        booking_id = _pending(db, people["owner"], room, monday + timedelta(hours=hour))
+        calls = [
+            (f"/bookings/{booking_id}/approve", people["staff"]),
+            (f"/bookings/{booking_id}/cancel", people["owner"]),
+        ]
+
+        with ThreadPoolExecutor(2) as pool:
+            responses = list(
+                pool.map(lambda c: client.post(c[0], headers={**auth(c[1]), "If-Match": '"1"'}), calls)
+            )
+
+        codes = [r.status_code for r in responses]
+        assert sorted(codes) == [200, 409]
+        winner = responses[codes.index(200)].json()
+        assert _state(db, booking_id) == (winner["status"], 2)
+
+
+def test_stale_version_is_refused(client, db, people, monday):
+    booking_id = _pending(db, people["owner"], add_room(db, "R1"), monday + timedelta(hours=9))
+    staff = auth(people["staff"])
+
+    assert client.post(f"/bookings/{booking_id}/approve", headers={**staff, "If-Match": "1"}).json()["version"] == 2
+
+    for path, headers in (
+        ("reject", staff),
+        ("cancel", auth(people["owner"])),
+    ):
+        response = client.post(f"/bookings/{booking_id}/{path}", headers={**headers, "If-Match": 'W/"1"'})
+        assert response.status_code == 409
+    assert _state(db, booking_id) == (BookingStatus.APPROVED.value, 2)
+
+    response = client.post(f"/bookings/{booking_id}/cancel", headers={**auth(people["owner"]), "If-Match": "2"})
+    assert (response.status_code, response.json()["version"]) == (200, 3)
+
+
+def test_only_the_owner_or_staff_can_cancel(client, db, people, monday):
+    booking_id = _pending(db, people["owner"], add_room(db, "R1"), monday + timedelta(hours=9))
+
+    assert client.post(f"/bookings/{booking_id}/cancel", headers=auth(people["other"])).status_code == 403
+    assert _state(db, booking_id) == (BookingStatus.PENDING.value, 1)
+
+    assert client.post(f"/bookings/{booking_id}/cancel", headers=auth(people["staff"])).status_code == 200
+    assert _state(db, booking_id) == (BookingStatus.CANCELLED.value, 2)
+    response = client.post(f"/bookings/{booking_id}/cancel", headers=auth(people["owner"]))
+    assert (response.status_code, response.json()["detail"]) == (400, "Booking already cancelled")
+
+
+@pytest.mark.parametrize("slot_bitmaps", [False, True])
+def test_a_booking_that_already_started_cannot_be_approved(client, db, people, monkeypatch, slot_bitmaps):
+    monkeypatch.setattr(settings, "SLOT_BITMAPS", slot_bitmaps)
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    booking_id = _pending(db, people["owner"], add_room(db, "R1"), start)
+    # Requested in time, not approved before it started
+    past = start - timedelta(days=2)
+    db.execute(
+        update(Booking).where(Booking.id == booking_id).values(start_time=past, end_time=past + timedelta(hours=1))
+    )
+    db.commit()
+
+    response = client.post(f"/bookings/{booking_id}/approve", headers=auth(people["staff"]))
+
+    assert response.status_code == 400
+    assert _state(db, booking_id) == (BookingStatus.PENDING.value, 1)
+
+
+def test_approve_and_reject_errors(client, db, people, monday, monkeypatch):
+    # Overlapping requests may queue up
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+    room = add_room(db, "R1")
+    staff = auth(people["staff"])
+    start = monday + timedelta(hours=9)
+    first, second = (_pending(db, user, room, start) for user in (people["owner"], people["other"]))
+
+    assert client.post(f"/bookings/{first}/approve", headers=staff).status_code == 200
+    # Overlaps the approved booking
+    assert client.post(f"/bookings/{second}/approve", headers=staff).status_code == 409
+    assert client.post(f"/bookings/{first}/reject", headers=staff).status_code == 400
+    assert client.post("/bookings/999999/approve", headers=staff).status_code == 404
+    # Students cannot approve
+    assert client.post(f"/bookings/{second}/approve", headers=auth(people["owner"])).status_code == 403
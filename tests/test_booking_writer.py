@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db.session import SessionLocal
+from app.models.booking import Booking
+from app.services import booking_quotas, booking_writer
+from app.services.booking_service import BookingConflictError, create_pending_booking
+from app.services.booking_writer import BookingWriteQueue, _BookingRequest
+from conftest import add_room, add_user, auth
+
+
+def _outcome(request: _BookingRequest):
+    error = request.future.exception(timeout=0)
+    return type(error) if error else request.future.result(timeout=0).room_id
+
+
+def _bookings(db) -> list[tuple[int, int]]:
+    db.rollback()
+    return db.execute(select(Booking.room_id, Booking.user_id).order_by(Booking.id)).all()
+
+
+def test_overlapping_requests_in_one_batch(db, monday):
+    a, b = add_user(db, "a@example.edu"), add_user(db, "b@example.edu")
+    room = add_room(db, "R1")
+    start = monday + timedelta(hours=9)
+    batch = [
+        _BookingRequest(a, room, start, start + timedelta(hours=2)),
+        _BookingRequest(b, room, start + timedelta(hours=1), start + timedelta(hours=3)),
+        # Touching is not overlapping
+        _BookingRequest(b, room, start + timedelta(hours=2), start + timedelta(hours=3)),
+    ]
+
+    BookingWriteQueue(SessionLocal)._commit_batch(batch)
+
+    assert [_outcome(r) for r in batch] == [room, BookingConflictError, room]
+    assert _bookings(db) == [(room, a), (room, b)]
+
+
+def test_a_failing_member_does_not_fail_the_batch(db, monday, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_QUOTA_HOURS_PER_WEEK", {"STUDENT": 1})
+    a, b = add_user(db, "a@example.edu"), add_user(db, "b@example.edu")
+    r1, r2 = add_room(db, "R1"), add_room(db, "R2")
+    start = monday + timedelta(hours=9)
+    batch = [
+        _BookingRequest(a, r1, start, start + timedelta(hours=1), quota=(60, 0)),
+        # Over the quota: rejected on its own
+        _BookingRequest(b, r1, start + timedelta(hours=2), start + timedelta(hours=4), quota=(60, 0)),
+        # Cannot be inserted at all (no user): the batch is retried request by request
+        _BookingRequest(None, r2, start, start + timedelta(hours=1)),
+        _BookingRequest(b, r2, start + timedelta(hours=1), start + timedelta(hours=2), quota=(60, 0)),
+    ]
+
+    BookingWriteQueue(SessionLocal)._commit_batch(batch)
+
+    outcomes = [_outcome(r) for r in batch]
+    assert outcomes[:2] == [r1, booking_quotas.BookingQuotaExceededError]
+    assert outcomes[2] not in (r1, r2)
+    assert outcomes[3] == r2
+    assert _bookings(db) == [(r1, a), (r2, b)]
+    # Quota charged once per booking, not again for the failed attempt
+    assert booking_quotas.week_usage(db, b, "STUDENT", start).minutes == 60
+
+
+@pytest.mark.parametrize("waitlist", [False, True])
+def test_conflict_message_matches_the_direct_path(db, monday, monkeypatch, waitlist):
+    monkeypatch.setattr(settings, "WAITLIST_MODE", waitlist)
+    a, b = add_user(db, "a@example.edu"), add_user(db, "b@example.edu")
+    room = add_room(db, "R1")
+    start = monday + timedelta(hours=9)
+    booking = create_pending_booking(db, user_id=a, room_id=room, start_time=start, end_time=start + timedelta(hours=1))
+    if waitlist:
+        db.execute(
+            Booking.__table__.update().where(Booking.id == booking.id).values(status=BookingStatus.APPROVED.value)
+        )
+        db.commit()
+
+    messages = []
+    for group_commit in (False, True):
+        monkeypatch.setattr(settings, "BOOKING_GROUP_COMMIT", group_commit)
+        monkeypatch.setattr(booking_writer, "_writers", {})
+        with pytest.raises(BookingConflictError) as e:
+            create_pending_booking(db, user_id=b, room_id=room, start_time=start, end_time=start + timedelta(hours=1))
+        messages.append(str(e.value))
+
+    assert messages[0] == messages[1]
+
+
+def test_concurrent_overlapping_posts_get_201_and_409(client, db, monday, monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_GROUP_COMMIT", True)
+    # The first request waits for the second: both land in one batch
+    monkeypatch.setattr(booking_writer, "_writers", {0: BookingWriteQueue(SessionLocal, max_batch=2, max_wait=5)})
+    users = [add_user(db, "a@example.edu"), add_user(db, "b@example.edu")]
+    room = add_room(db, "R1")
+    start = monday + timedelta(hours=9)
+    body = {"room_id": room, "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+
+    with ThreadPoolExecutor(2) as pool:
+        responses = list(pool.map(lambda u: client.post("/bookings", json=body, headers=auth(u)), users))
+
+    assert sorted(r.status_code for r in responses) == [201, 409]
+    assert len(_bookings(db)) == 1
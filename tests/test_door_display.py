@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.services import door_display
+from app.services.booking_service import approve_booking, cancel_booking, create_pending_booking, reject_booking
+from conftest import add_room, add_user
+
+
+@pytest.fixture
+def display(monkeypatch):
+    for name in ("_rooms", "_bookings", "_entries", "_loaded_seq", "_building_rooms"):
+        monkeypatch.setattr(door_display, name, {})
+    monkeypatch.setattr(door_display, "_changes", [])
+    monkeypatch.setattr(door_display, "_loaded", False)
+    yield
+    door_display.uninstall()
+
+
+def _approved(db, room_id, user_id, start, end) -> int:
+    booking = Booking(
+        room_id=room_id, user_id=user_id, start_time=start, end_time=end, status=BookingStatus.APPROVED.value
+    )
+    db.add(booking)
+    db.commit()
+    return booking.id
+
+
+def _now_next(client, room_id) -> tuple[int | None, int | None]:
+    body = client.get(f"/rooms/{room_id}/now").json()
+    return tuple(slot and slot["booking_id"] for slot in (body["now"], body["next"]))
+
+
+def test_now_and_next(client, db, display):
+    user, room = add_user(db, "s@example.edu"), add_room(db, "R1")
+    now = datetime.now().replace(microsecond=0)
+    current = _approved(db, room, user, now - timedelta(minutes=30), now + timedelta(minutes=30))
+    upcoming = _approved(db, room, user, now + timedelta(hours=2), now + timedelta(hours=3))
+
+    response = client.get(f"/rooms/{room}/now")
+    assert (response.json()["now"]["booking_id"], response.json()["next"]["booking_id"]) == (current, upcoming)
+    assert client.get(f"/rooms/{room}/now", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/rooms/999/now").status_code == 404
+
+    # This worker's own changes are picked up after the commit
+    cancel_booking(db, booking_id=current)
+    assert _now_next(client, room) == (None, upcoming)
+    start = now.replace(minute=0, second=0) + timedelta(hours=4)
+    end = start + timedelta(hours=1)
+    booking = create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=end)
+    approve_booking(db, booking_id=booking.id)
+    cancel_booking(db, booking_id=upcoming)
+    assert _now_next(client, room) == (None, booking.id)
+
+
+def test_the_clock_moves_entries_along(client, db, display, monkeypatch):
+    user, room = add_user(db, "s@example.edu"), add_room(db, "R1")
+    now = datetime.now().replace(microsecond=0)
+    first = _approved(db, room, user, now + timedelta(minutes=10), now + timedelta(minutes=20))
+    second = _approved(db, room, user, now + timedelta(minutes=20), now + timedelta(minutes=40))
+    assert _now_next(client, room) == (None, first)
+
+    later = datetime.now(timezone.utc) + timedelta(minutes=25)
+    monkeypatch.setattr(door_display, "_now", lambda: later)
+    assert _now_next(client, room) == (second, None)
+
+
+def test_aware_and_naive_booking_times_mix(db, display, monkeypatch):
+    """Postgres returns aware times; they must compare with the clock and with naive ones."""
+    monkeypatch.setattr(door_display, "_loaded", True)
+    monkeypatch.setattr(door_display, "_reload_at", float("inf"))
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    naive_local = (now + timedelta(hours=1)).astimezone().replace(tzinfo=None)
+    rows = [
+        (naive_local, naive_local + timedelta(hours=1), 2),
+        (now - timedelta(minutes=5), now + timedelta(hours=1), 1),
+    ]
+    door_display._install(1, {7: rows}, now, [7])
+
+    entry = door_display.get_entry(7)
+    body = orjson.loads(entry.body)
+    assert (body["now"]["booking_id"], body["next"]["booking_id"]) == (1, 2)
+    assert entry.changes_at == now + timedelta(hours=1)
+    # Times are shown as stored: aware ones in UTC, naive ones as they are
+    assert body["now"]["end_time"] == (now + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    assert body["next"]["start_time"] == naive_local.isoformat()
+
+    monkeypatch.setattr(door_display, "_now", lambda: now + timedelta(hours=1, minutes=30))
+    body = orjson.loads(door_display.get_entry(7).body)
+    assert (body["now"]["booking_id"], body["next"]) == (2, None)
+
+
+def test_pending_requests_and_rejections_do_not_reload(client, db, display, monday, monkeypatch):
+    user, room = add_user(db, "s@example.edu"), add_room(db, "R1")
+    client.get(f"/rooms/{room}/now")
+    reloads = []
+    monkeypatch.setattr(door_display, "reload_room", reloads.append)
+
+    start = monday + timedelta(hours=9)
+    end = start + timedelta(hours=1)
+    pending = create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=end)
+    reject_booking(db, booking_id=pending.id)
+    assert reloads == []
+
+    pending = create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=end)
+    approve_booking(db, booking_id=pending.id)
+    cancel_booking(db, booking_id=pending.id)
+    assert reloads == [room, room]
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services.booking_service import approve_booking, create_pending_booking
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture
+def bookings(db, monday):
+    user = add_user(db, "s@example.edu")
+    rooms = [add_room(db, code, f"Main {code}") for code in ("A", "B", "C")]
+    for i, room in enumerate(rooms):
+        start = monday + timedelta(hours=9 + i, minutes=15)
+        booking = create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=start + timedelta(hours=1))
+        if i:
+            approve_booking(db, booking_id=booking.id)
+    return user, rooms
+
+
+def _both(client, monkeypatch, path, **kwargs):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    slow = client.get(path, **kwargs)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get(path, **kwargs)
+    assert slow.status_code == fast.status_code == 200
+    return slow, fast
+
+
+@pytest.mark.parametrize("catalog", [False, True])
+def test_rooms_render_the_same(client, monkeypatch, bookings, catalog):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CACHE", catalog)
+    if catalog:
+        from app.services.room_catalog import load_room_catalog
+
+        load_room_catalog()
+    slow, fast = _both(client, monkeypatch, "/rooms", params={"limit": 10})
+    assert fast.json() == slow.json()
+    assert [r["code"] for r in fast.json()] == ["A", "B", "C"]
+
+
+def test_my_bookings_render_the_same(client, monkeypatch, bookings):
+    user, _ = bookings
+    slow, fast = _both(client, monkeypatch, "/bookings", headers=auth(user))
+    assert fast.content == slow.content
+    assert len(fast.json()) == 3
+
+
+def test_availability_renders_the_same(client, monkeypatch, bookings, monday):
+    _, rooms = bookings
+    slow, fast = _both(client, monkeypatch, f"/rooms/{rooms[1]}/availability", params={"date": monday.date().isoformat()})
+    assert fast.json() == slow.json()
+    assert len(fast.json()["booked_slots"]) == 1
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.services import idempotency_service
+from app.services.idempotency_service import (
+    IdempotencyInProgressError,
+    IdempotencyKeyMismatchError,
+    StoredResponse,
+    execute_idempotent,
+)
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    idempotency_service._cache.clear()
+    yield
+    idempotency_service._cache.clear()
+
+
+def _run(user_id, key="k1", request_hash="h1", status_code=201):
+    calls = []
+
+    def handler():
+        calls.append(1)
+        return StoredResponse(status_code, b'{"id": 1}')
+
+    response, replayed = execute_idempotent(user_id=user_id, key=key, request_hash=request_hash, handler=handler)
+    return response, replayed, len(calls)
+
+
+def test_retry_replays_the_stored_response(db):
+    user = add_user(db, "s@example.edu")
+    assert _run(user) == (StoredResponse(201, b'{"id": 1}'), False, 1)
+    assert _run(user) == (StoredResponse(201, b'{"id": 1}'), True, 0)
+
+    # From the database once this worker's cache no longer has it
+    idempotency_service._cache.clear()
+    assert _run(user) == (StoredResponse(201, b'{"id": 1}'), True, 0)
+
+
+def test_key_reused_for_another_request_is_rejected(db):
+    user = add_user(db, "s@example.edu")
+    _run(user)
+    with pytest.raises(IdempotencyKeyMismatchError):
+        _run(user, request_hash="h2")
+
+
+def test_stored_times_from_postgres_compare(db, aware_datetimes):
+    user = add_user(db, "s@example.edu")
+    _run(user)
+    idempotency_service._cache.clear()
+
+    # Loaded aware (timestamptz), cached aware, compared against the clock both times
+    assert _run(user)[1:] == (True, 0)
+    assert _run(user)[1:] == (True, 0)
+    assert idempotency_service._cache[(user, "k1")].expires_at.tzinfo is not None
+
+
+def test_expired_key_runs_again(db):
+    user = add_user(db, "s@example.edu")
+    _run(user)
+    idempotency_service._cache.clear()
+    db.execute(update(IdempotencyKey).values(expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+    db.commit()
+
+    assert _run(user, request_hash="h2")[1:] == (False, 1)
+
+
+def _claim_in_flight(db, user, age_seconds):
+    claimed_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    db.add(
+        IdempotencyKey(
+            user_id=user, key="k1", request_hash="h1", created_at=claimed_at, expires_at=claimed_at + timedelta(days=1)
+        )
+    )
+    db.commit()
+
+
+def test_in_flight_key_is_refused_while_its_lease_lasts(db, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    user = add_user(db, "s@example.edu")
+    _claim_in_flight(db, user, age_seconds=1)
+
+    with pytest.raises(IdempotencyInProgressError):
+        _run(user)
+
+
+@pytest.mark.parametrize("request_hash", ["h1", "h2"])
+def test_claim_of_a_crashed_worker_is_taken_over(db, monkeypatch, request_hash):
+    user = add_user(db, "s@example.edu")
+    _claim_in_flight(db, user, age_seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1)
+
+    assert _run(user, request_hash=request_hash)[1:] == (False, 1)
+    row = db.scalar(select(IdempotencyKey))
+    assert (row.request_hash, row.status_code) == (request_hash, 201)
+
+
+def test_booking_retry_with_the_same_key_creates_one_booking(client, db, monday):
+    user, room = add_user(db, "s@example.edu"), add_room(db, "A")
+    start = monday + timedelta(hours=9)
+    body = {"room_id": room, "start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+    headers = {**auth(user), "Idempotency-Key": "retry-1"}
+
+    first = client.post("/bookings", json=body, headers=headers)
+    retry = client.post("/bookings", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(client.get("/bookings", headers=auth(user)).json()) == 1
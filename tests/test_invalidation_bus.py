@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.metadata import target_metadata
+from app.db.session import SessionLocal
+from app.models.change_log_entry import ChangeLogEntry
+from app.services import invalidation_bus
+from app.services.invalidation_bus import InvalidationBus
+
+
+@pytest.fixture
+def received(monkeypatch):
+    calls: list[tuple[str, int | None]] = []
+    monkeypatch.setattr(invalidation_bus, "_handlers", invalidation_bus.defaultdict(list))
+    for entity in (invalidation_bus.ROOM, invalidation_bus.AVAILABILITY):
+        invalidation_bus.subscribe(entity, lambda entity_id, entity=entity: calls.append((entity, entity_id)))
+    return calls
+
+
+def test_handlers_run_once_per_change_after_the_commit(db, received):
+    invalidation_bus.publish(db, invalidation_bus.AVAILABILITY, 1)
+    invalidation_bus.publish(db, invalidation_bus.AVAILABILITY, 1)
+    invalidation_bus.publish(db, invalidation_bus.ROOM)
+    assert received == []
+
+    db.commit()
+    assert received == [(invalidation_bus.AVAILABILITY, 1), (invalidation_bus.ROOM, None)]
+
+    db.execute(select(1))
+    invalidation_bus.publish(db, invalidation_bus.ROOM, 2)
+    db.rollback()
+    db.commit()
+    assert len(received) == 2
+
+
+def test_savepoints_do_not_dispatch_early(db, received):
+    invalidation_bus.publish(db, invalidation_bus.ROOM, 1)
+    with db.begin_nested():
+        invalidation_bus.publish(db, invalidation_bus.ROOM, 2)
+    assert received == []
+
+    db.commit()
+    assert received == [(invalidation_bus.ROOM, 1), (invalidation_bus.ROOM, 2)]
+
+
+def test_handlers_can_open_a_session_from_a_one_connection_pool(tmp_path, received, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=1
+    )
+    target_metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    reloaded = []
+
+    def reload(entity_id):
+        # Times out if the publishing session still held the only connection
+        with factory() as s:
+            reloaded.append(s.scalar(select(1)))
+
+    invalidation_bus.subscribe(invalidation_bus.ROOM, reload)
+    with factory() as s:
+        s.execute(select(1))
+        invalidation_bus.publish(s, invalidation_bus.ROOM, 1)
+        s.commit()
+
+    assert reloaded == [1]
+    engine.dispose()
+
+
+def test_other_workers_receive_changes_through_the_change_log(db, received, monkeypatch):
+    monkeypatch.setattr(settings, "INVALIDATION_BUS", True)
+    bus = InvalidationBus([SessionLocal], poll_interval=0.01, retention_seconds=3600)
+    bus.start()
+    try:
+        # Our own change: dispatched after the commit, and skipped by the poll
+        invalidation_bus.publish(db, invalidation_bus.ROOM, 1)
+        db.commit()
+        # Another worker's change
+        db.execute(
+            insert(ChangeLogEntry).values(
+                entity=invalidation_bus.AVAILABILITY, entity_id=7, origin="other", created_at=datetime.now(timezone.utc)
+            )
+        )
+        db.commit()
+
+        deadline = time.monotonic() + 5
+        while (invalidation_bus.AVAILABILITY, 7) not in received and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+    finally:
+        bus.stop()
+
+    assert received == [(invalidation_bus.ROOM, 1), (invalidation_bus.AVAILABILITY, 7)]
+    assert bus.lag.snapshot()["received"] == 1
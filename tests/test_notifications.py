@@ -0,0 +1,144 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.shards import get_shard_sessionmaker
+from app.models.outbox_message import OutboxMessage
+from app.services.booking_service import (
+    BookingVersionConflictError,
+    apply_booking_decisions,
+    approve_booking,
+    cancel_booking,
+    create_pending_booking,
+    reject_booking,
+)
+from app.services.notification_dispatcher import DEAD, PENDING, SENT, NotificationDispatcher
+from conftest import add_room, add_user
+
+
+class FakeSmtp:
+    def __init__(self) -> None:
+        self.sent = []
+        self.failing = False
+
+    def send(self, message) -> None:
+        if self.failing:
+            raise smtplib.SMTPServerDisconnected("gone")
+        self.sent.append(message)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATIONS_ENABLED", True)
+    return FakeSmtp()
+
+
+def _dispatcher(smtp, **kwargs) -> NotificationDispatcher:
+    return NotificationDispatcher(smtp, sender="cbs@example.edu", **kwargs)
+
+
+def _book(db, user_id, room_id, start):
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=1)
+    )
+
+
+def _outbox(shard: int = 0) -> list[tuple[int, str, str, int]]:
+    with get_shard_sessionmaker(shard)() as s:
+        return s.execute(
+            select(OutboxMessage.booking_id, OutboxMessage.event, OutboxMessage.status, OutboxMessage.attempts)
+            .order_by(OutboxMessage.id)
+        ).all()
+
+
+def test_outbox_rows_are_written_with_committed_changes_only(db, smtp, monday):
+    user = add_user(db, "s@example.edu")
+    room = add_room(db, "R1")
+    a = _book(db, user, room, monday + timedelta(hours=9))
+    b = _book(db, user, room, monday + timedelta(hours=11))
+    # Creating a request sends nothing
+    assert _outbox() == []
+
+    approve_booking(db, booking_id=a.id)
+    with pytest.raises(BookingVersionConflictError):
+        apply_booking_decisions(db, approve=[], reject=[(b.id, b.version + 1)])
+
+    assert _outbox() == [(a.id, "APPROVED", PENDING, 0)]
+
+
+def test_one_email_per_user_with_the_latest_event_per_booking(db, smtp, monday):
+    alice, bob = add_user(db, "alice@example.edu"), add_user(db, "bob@example.edu")
+    room = add_room(db, "R1")
+    a = _book(db, alice, room, monday + timedelta(hours=9))
+    b = _book(db, alice, room, monday + timedelta(hours=11))
+    c = _book(db, bob, room, monday + timedelta(hours=13))
+    approve_booking(db, booking_id=a.id)
+    cancel_booking(db, booking_id=a.id)
+    reject_booking(db, booking_id=b.id)
+    approve_booking(db, booking_id=c.id)
+
+    assert _dispatcher(smtp).dispatch_once() == 4
+
+    by_recipient = {m["To"]: m for m in smtp.sent}
+    assert sorted(by_recipient) == ["alice@example.edu", "bob@example.edu"]
+    body = by_recipient["alice@example.edu"].get_content()
+    assert f"#{a.id} R1 (R1)" in body and "CANCELLED" in body and "APPROVED" not in body
+    assert by_recipient["alice@example.edu"]["Subject"] == "2 booking updates"
+    assert by_recipient["bob@example.edu"]["Subject"] == "Booking approved: R1 (R1)"
+    assert {status for _, _, status, _ in _outbox()} == {SENT}
+    # Nothing left to send
+    assert _dispatcher(smtp).dispatch_once() == 0
+
+
+def test_failures_back_off_then_go_dead(db, smtp, monday):
+    user = add_user(db, "s@example.edu")
+    booking = _book(db, user, add_room(db, "R1"), monday + timedelta(hours=9))
+    approve_booking(db, booking_id=booking.id)
+    smtp.failing = True
+    dispatcher = _dispatcher(smtp, max_attempts=2)
+
+    assert dispatcher.dispatch_once() == 1
+    assert _outbox() == [(booking.id, "APPROVED", PENDING, 1)]
+    # Backing off: not due yet
+    assert dispatcher.dispatch_once() == 0
+
+    with get_shard_sessionmaker(0)() as s:
+        s.execute(update(OutboxMessage).values(available_at=monday - timedelta(days=30)))
+        s.commit()
+    assert dispatcher.dispatch_once() == 1
+    ((_, _, status, attempts),) = _outbox()
+    assert (status, attempts) == (DEAD, 2)
+    assert smtp.sent == []
+
+
+def test_a_claimed_row_is_not_handed_to_another_dispatcher(db, smtp, monday):
+    user = add_user(db, "s@example.edu")
+    booking = _book(db, user, add_room(db, "R1"), monday + timedelta(hours=9))
+    approve_booking(db, booking_id=booking.id)
+
+    first = _dispatcher(smtp)
+    claimed = first._claim(0)
+    assert [row.booking_id for row in claimed] == [booking.id]
+    assert _dispatcher(smtp)._claim(0) == []
+
+    first._settle(claimed, [])
+    assert _outbox()[0][2] == SENT
+
+
+def test_shard_outboxes_are_drained(db, smtp, sharded, monday):
+    user = add_user(db, "s@example.edu")
+    north, south = add_room(db, "N1", "North Hall"), add_room(db, "S1", "South Hall")
+    for room in (north, south):
+        approve_booking(db, booking_id=_book(db, user, room, monday + timedelta(hours=9)).id)
+    assert len(_outbox(0)) == len(_outbox(1)) == 1
+
+    assert _dispatcher(smtp).dispatch_once() == 2
+
+    assert len(smtp.sent) == 1
+    assert _outbox(0)[0][2] == _outbox(1)[0][2] == SENT
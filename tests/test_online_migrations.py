@@ -0,0 +1,142 @@
+import pytest
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, create_engine, inspect, text
+
+from app.db.online_migrations import (
+    OnlineMigrationError,
+    backfill,
+    create_index_concurrently,
+    drop_index_concurrently,
+    job_status,
+    rebuild_sqlite_table,
+)
+
+FAST = {"pause_seconds": 0}
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/online.db")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE items (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, size INTEGER)")
+        conn.exec_driver_sql("CREATE INDEX ix_items_name ON items (name)")
+        conn.execute(
+            text("INSERT INTO items (name, size) VALUES (:name, NULL)"), [{"name": f"n{i}"} for i in range(1, 101)]
+        )
+    yield engine
+    engine.dispose()
+
+
+def _rows(engine, sql: str) -> list:
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(sql).all()
+
+
+def test_backfill_in_batches_and_resume(engine):
+    def stop_after_two(progress):
+        if progress.rows_done == 20:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        backfill(engine, "sizes", "items", "size = id * 2", batch_size=10, report=stop_after_two, **FAST)
+    assert _rows(engine, "SELECT COUNT(*) FROM items WHERE size IS NOT NULL") == [(20,)]
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO items (name) VALUES ('late')")
+    seen = []
+    assert backfill(engine, "sizes", "items", "size = id * 2", batch_size=10, report=seen.append, **FAST) == 81
+    assert _rows(engine, "SELECT COUNT(*) FROM items WHERE size IS NULL OR size != id * 2") == [(0,)]
+    assert seen[-1].finished and seen[-1].fraction == 1.0
+
+    ((job),) = job_status(engine)
+    assert (job.name, job.rows_done, job.last_key) == ("sizes", 101, 101)
+    assert job.finished_at is not None
+    # Finished: nothing to do unless restarted
+    assert backfill(engine, "sizes", "items", "size = 0", **FAST) == 0
+    assert backfill(engine, "sizes", "items", "size = 0", where="id <= 5", restart=True, **FAST) == 5
+
+
+def test_backfill_batch_size_adapts(engine):
+    sizes = []
+    report = lambda p: sizes.append(p.batch_size)  # noqa: E731
+    backfill(engine, "grow", "items", "size = 1", batch_size=40, target_batch_seconds=60, report=report, **FAST)
+    # Fast batches never grow past batch_size
+    assert sizes == [40, 40, 40, 0]
+
+    sizes.clear()
+    backfill(engine, "shrink", "items", "size = 2", batch_size=64, target_batch_seconds=0, report=report, **FAST)
+    # Reported before each adjustment: 64 rows, then the remaining 36 with the halved size
+    assert sizes == [64, 50, 0]
+
+
+def test_a_job_name_is_tied_to_its_kind_and_table(engine):
+    backfill(engine, "job", "items", "size = 1", **FAST)
+    with pytest.raises(OnlineMigrationError):
+        backfill(engine, "job", "other", "size = 1", **FAST)
+
+
+def test_index_helpers_are_idempotent(engine):
+    create_index_concurrently(engine, "ix_items_size", "items", ["size"], where="size IS NOT NULL")
+    create_index_concurrently(engine, "ix_items_size", "items", ["size"], where="size IS NOT NULL")
+    assert "ix_items_size" in {ix["name"] for ix in inspect(engine).get_indexes("items")}
+
+    drop_index_concurrently(engine, "ix_items_size")
+    drop_index_concurrently(engine, "ix_items_size")
+    assert "ix_items_size" not in {ix["name"] for ix in inspect(engine).get_indexes("items")}
+
+
+def _model() -> Table:
+    # The new definition: `size` dropped, `color` added, `name` made NOT NULL with a second index
+    return Table(
+        "items",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(20), nullable=False, server_default=""),
+        Column("color", String(10), nullable=False, server_default="red"),
+        Index("ix_items_name", "name"),
+        Index("ix_items_color_name", "color", "name"),
+    )
+
+
+def test_rebuild_mirrors_writes_made_during_the_copy(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM items WHERE id = 100")
+
+    def write_meanwhile(progress):
+        if progress.rows_done == 30:
+            with engine.begin() as conn:
+                # Already copied, not yet copied, and new
+                conn.exec_driver_sql("UPDATE items SET name = 'renamed' WHERE id IN (5, 50)")
+                conn.exec_driver_sql("DELETE FROM items WHERE id IN (6, 60)")
+                conn.exec_driver_sql("INSERT INTO items (name) VALUES ('new')")
+
+    rebuild_sqlite_table(engine, _model(), chunk_size=30, report=write_meanwhile, **FAST)
+
+    rows = dict(_rows(engine, "SELECT id, name FROM items"))
+    assert len(rows) == 98
+    assert (rows[5], rows[50]) == ("renamed", "renamed")
+    assert 6 not in rows and 60 not in rows
+    # AUTOINCREMENT and its sequence survive: the deleted id 100 is not handed out again
+    assert rows[101] == "new"
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO items (name) VALUES ('after')")
+    assert _rows(engine, "SELECT MAX(id), MIN(color), MAX(color) FROM items") == [(102, "red", "red")]
+    assert [c["name"] for c in inspect(engine).get_columns("items")] == ["id", "name", "color"]
+    assert {ix["name"] for ix in inspect(engine).get_indexes("items")} == {"ix_items_name", "ix_items_color_name"}
+    assert _rows(engine, "SELECT name FROM sqlite_master WHERE type = 'trigger'") == []
+
+
+def test_rebuild_resumes_after_an_interruption(engine):
+    def stop(progress):
+        if progress.rows_done == 40:
+            raise Interrupted
+
+    with pytest.raises(Interrupted):
+        rebuild_sqlite_table(engine, _model(), chunk_size=20, report=stop, **FAST)
+    assert rebuild_sqlite_table(engine, _model(), chunk_size=20, **FAST) == 60
+
+    assert _rows(engine, "SELECT COUNT(*), MAX(id) FROM items") == [(100, 100)]
+    assert rebuild_sqlite_table(engine, _model(), **FAST) == 0
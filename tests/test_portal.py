@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.services import room_catalog
+from app.services.booking_service import approve_booking, cancel_booking, create_pending_booking
+from conftest import add_room, add_user, auth
+
+
+def _book(db, user_id, room_id, start, hours: int = 1):
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=hours)
+    )
+
+
+@pytest.fixture(params=[False, True], ids=["db", "catalog"])
+def catalog_cache(request, monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CACHE", request.param)
+    monkeypatch.setattr(room_catalog, "_catalog", None)
+
+
+def test_bootstrap(client, db, catalog_cache, monday):
+    student, other = add_user(db, "s@example.edu"), add_user(db, "o@example.edu")
+    # Created out of code order
+    c, a, b = (add_room(db, code) for code in ("C", "A", "B"))
+    nine = monday + timedelta(hours=9)
+
+    approved = _book(db, student, a, nine)
+    approve_booking(db, booking_id=approved.id)
+    pending = _book(db, student, b, nine + timedelta(hours=2))
+    cancelled = _book(db, student, c, nine)
+    cancel_booking(db, booking_id=cancelled.id)
+    theirs = _book(db, other, c, nine + timedelta(hours=3))
+    approve_booking(db, booking_id=theirs.id)
+    # Already over
+    db.add(
+        Booking(
+            room_id=c,
+            user_id=student,
+            start_time=datetime(2000, 1, 1, 9),
+            end_time=datetime(2000, 1, 1, 10),
+            status=BookingStatus.APPROVED.value,
+        )
+    )
+    db.commit()
+
+    response = client.get(
+        "/portal/bootstrap", params={"date": monday.date().isoformat(), "rooms_limit": 2}, headers=auth(student)
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"]["email"] == "s@example.edu"
+    assert [r["code"] for r in body["rooms"]] == ["A", "B"]
+    assert [bk["id"] for bk in body["upcoming_bookings"]] == [approved.id, pending.id]
+    # Only APPROVED bookings, for the rooms on the first page
+    assert [(r["room_id"], len(r["booked_slots"])) for r in body["availability"]] == [(a, 1), (b, 0)]
+
+    response = client.get(
+        "/portal/bootstrap",
+        params={"date": monday.date().isoformat(), "room_id": [c, 999, a, c]},
+        headers=auth(student),
+    )
+    # Request order, duplicates and unknown rooms dropped
+    assert [(r["room_id"], len(r["booked_slots"])) for r in response.json()["availability"]] == [(c, 1), (a, 1)]
+
+
+def test_availability_is_read_from_each_shard(client, db, sharded, monday):
+    student = add_user(db, "s@example.edu")
+    north, south = add_room(db, "N1", "North Hall"), add_room(db, "S1", "South Hall")
+    nine = monday + timedelta(hours=9)
+    for room in (north, south):
+        approve_booking(db, booking_id=_book(db, student, room, nine).id)
+
+    body = client.get(
+        "/portal/bootstrap", params={"date": monday.date().isoformat()}, headers=auth(student)
+    ).json()
+
+    assert [(r["room_id"], len(r["booked_slots"])) for r in body["availability"]] == [(north, 1), (south, 1)]
+    assert len(body["upcoming_bookings"]) == 2
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"rooms_limit": 0}, {"rooms_limit": 101}, {"bookings_limit": 0}, {"room_id": list(range(1, 52))}],
+)
+def test_limits(client, db, params):
+    student = add_user(db, "s@example.edu")
+    assert client.get("/portal/bootstrap", params=params, headers=auth(student)).status_code == 400
+
+
+def test_requires_a_login(client, db):
+    assert client.get("/portal/bootstrap").status_code == 401
@@ -0,0 +1,171 @@
+import itertools
+import sys
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.security import create_profile_token, verify_profile_token
+from app.models.request_profile import RequestProfile
+from app.services.request_profiles import to_speedscope
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture
+def admin(db):
+    user_id = add_user(db, "admin@example.edu", "ADMIN")
+    return user_id, auth(user_id)
+
+
+@pytest.fixture(autouse=True)
+def _requests(monkeypatch):
+    # Each test counts sampled requests from the start
+    monkeypatch.setattr(profiling, "_requests", itertools.count(1))
+
+
+def _profiles(db) -> list[RequestProfile]:
+    db.rollback()
+    return list(db.scalars(select(RequestProfile).order_by(RequestProfile.id)))
+
+
+def _wait_for_sampler() -> None:
+    deadline = time.monotonic() + 5
+    while profiling._sampler is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert profiling._sampler is None
+
+
+def test_profile_tokens_are_signed_and_expire(monkeypatch):
+    value, _ = create_profile_token(7, 5)
+    assert verify_profile_token(value) == 7
+
+    payload, _, signature = value.rpartition(".")
+    assert verify_profile_token(payload.replace("1.7.", "1.8.") + "." + signature) is None
+    assert verify_profile_token(create_profile_token(7, -1)[0]) is None
+    assert verify_profile_token("garbage") is None
+    monkeypatch.setattr(settings, "JWT_SECRET", "another-secret")
+    assert verify_profile_token(value) is None
+
+
+def test_only_admins_get_a_token(client, db, admin):
+    student = auth(add_user(db, "s@example.edu"))
+    assert client.post("/admin/profiles/token", headers=student).status_code == 403
+
+    response = client.post("/admin/profiles/token", headers=admin[1])
+    assert response.status_code == 200
+    assert response.json()["header"] == "X-Profile"
+    assert verify_profile_token(response.json()["value"]) == admin[0]
+
+
+def test_a_request_with_the_header_is_profiled(client, db, admin):
+    admin_id, headers = admin
+    add_room(db, "R1")
+    value = client.post("/admin/profiles/token", headers=headers).json()["value"]
+
+    assert client.get("/rooms", headers=headers).status_code == 200
+    assert _profiles(db) == []
+    # A forged header is ignored
+    assert client.get("/rooms", headers={**headers, "X-Profile": value[:-1] + "0"}).status_code == 200
+    assert _profiles(db) == []
+
+    assert client.get("/rooms", headers={**headers, "X-Profile": value}).status_code == 200
+    (profile,) = _profiles(db)
+    assert (profile.method, profile.path, profile.status_code) == ("GET", "/rooms", 200)
+    assert (profile.trigger, profile.requested_by) == (profiling.TRIGGER_HEADER, admin_id)
+    assert profile.sql_count >= 1 and profile.sql_ms > 0
+    assert profile.duration_ms > 0 and profile.interval_ms > 0
+    _wait_for_sampler()
+
+
+def test_profiles_are_listed_and_downloaded(client, db, admin):
+    _, headers = admin
+    value = client.post("/admin/profiles/token", headers=headers).json()["value"]
+    client.get("/rooms", headers={**headers, "X-Profile": value})
+    (stored,) = _profiles(db)
+
+    listed = client.get("/admin/profiles", params={"path": "/rooms"}, headers=headers).json()
+    assert [p["id"] for p in listed] == [stored.id]
+    assert client.get("/admin/profiles", params={"path": "/bookings"}, headers=headers).json() == []
+    assert client.get("/admin/profiles", params={"limit": 0}, headers=headers).status_code == 400
+
+    detail = client.get(f"/admin/profiles/{stored.id}", headers=headers).json()
+    assert len(detail["sql"]) == detail["sql_count"] == stored.sql_count
+    assert any("rooms" in timing["statement"] for timing in detail["sql"])
+
+    collapsed = client.get(f"/admin/profiles/{stored.id}/download", params={"format": "collapsed"}, headers=headers)
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-disposition"] == f'attachment; filename="profile-{stored.id}.collapsed.txt"'
+    speedscope = client.get(f"/admin/profiles/{stored.id}/download", headers=headers)
+    assert speedscope.json()["profiles"][0]["type"] == "sampled"
+
+    assert client.get("/admin/profiles/999", headers=headers).status_code == 404
+    student = auth(add_user(db, "s@example.edu"))
+    assert client.get("/admin/profiles", headers=student).status_code == 403
+    _wait_for_sampler()
+
+
+def test_sampled_requests_skip_the_profile_endpoints_and_keep_the_newest(client, db, admin, monkeypatch):
+    _, headers = admin
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_EVERY", 2)
+    monkeypatch.setattr(settings, "PROFILE_KEEP", 2)
+
+    for _ in range(6):
+        client.get("/rooms", headers=headers)
+    client.get("/admin/profiles", headers=headers)
+    client.get("/admin/profiles", headers=headers)
+
+    profiles = _profiles(db)
+    assert len(profiles) == 2
+    assert {(p.path, p.trigger, p.requested_by) for p in profiles} == {("/rooms", profiling.TRIGGER_SAMPLE, None)}
+    assert db.scalar(select(func.max(RequestProfile.id))) == profiles[-1].id == 3
+    _wait_for_sampler()
+
+
+def test_the_switch_interval_is_restored(client, db, admin):
+    _, headers = admin
+    before = sys.getswitchinterval()
+    value = client.post("/admin/profiles/token", headers=headers).json()["value"]
+
+    client.get("/rooms", headers={**headers, "X-Profile": value})
+
+    _wait_for_sampler()
+    assert sys.getswitchinterval() == before
+
+
+def _busy(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_are_collapsed_into_stacks(db):
+    profile = profiling.Profile("GET", "/x", profiling.TRIGGER_SAMPLE, None)
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,))
+    worker.start()
+    try:
+        profile.threads = {worker.ident}
+        for _ in range(20):
+            profile.sample(sys._current_frames())
+            time.sleep(0.001)
+    finally:
+        stop.set()
+        worker.join()
+    profile.duration_ms = 40.0
+
+    assert profile.ticks == 20 and sum(profile.stacks.values()) == 20
+    assert profile.interval_ms == 2.0
+    lines = profile.collapsed().splitlines()
+    assert all(line.rpartition(" ")[0].split(";")[-1].startswith("_busy (tests/test_profiling.py:") for line in lines)
+    assert sum(int(line.rpartition(" ")[2]) for line in lines) == 20
+
+    stored = RequestProfile(id=1, method="GET", path="/x", interval_ms=profile.interval_ms, stacks=profile.collapsed())
+    document = to_speedscope(stored)
+    (sampled,) = document["profiles"]
+    assert sampled["endValue"] == 40.0 == sum(sampled["weights"])
+    frames = document["shared"]["frames"]
+    assert {"name": "_busy", "file": "tests/test_profiling.py"}.items() <= next(
+        f for f in frames if f["name"] == "_busy"
+    ).items()
@@ -0,0 +1,96 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import Budget, InMemoryTokenBucketStore, SQLiteTokenBucketStore
+from conftest import add_user, auth
+
+WRITE = Budget(rate=0.5, burst=2)
+READ = Budget(rate=10.0, burst=20)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteTokenBucketStore(str(tmp_path / "ratelimit.db"))
+    return InMemoryTokenBucketStore()
+
+
+def test_burst_then_retry_after_then_refill(store, clock):
+    assert [store.take("k", WRITE).allowed for _ in range(2)] == [True, True]
+
+    denied = store.take("k", WRITE)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(2.0)
+
+    clock.now += 2.0
+    assert store.take("k", WRITE).allowed
+    assert not store.take("k", WRITE).allowed
+    # Other keys have their own buckets
+    assert store.take("other", WRITE).allowed
+
+
+def test_prune_keeps_buckets_that_are_still_refilling(clock, monkeypatch):
+    store = InMemoryTokenBucketStore()
+    monkeypatch.setattr(store, "MAX_BUCKETS", 2)
+    store.take("write:user:1", WRITE)
+    store.take("write:user:1", WRITE)
+
+    # READ refills in 2 s, WRITE needs 4 s: a prune triggered by reads must not use their budget
+    clock.now += 3.0
+    store.take("read:user:1", READ)
+    store.take("read:user:2", READ)
+
+    assert "write:user:1" in store._buckets
+    assert store.take("write:user:1", WRITE).allowed
+    assert not store.take("write:user:1", WRITE).allowed
+
+
+def test_prune_drops_full_buckets_at_most_once_per_interval(clock, monkeypatch):
+    store = InMemoryTokenBucketStore()
+    monkeypatch.setattr(store, "MAX_BUCKETS", 2)
+    prunes = []
+    prune = store._prune
+    monkeypatch.setattr(store, "_prune", lambda now: prunes.append(now) or prune(now))
+
+    for n in range(10):
+        store.take(f"read:user:{n}", READ)
+    assert len(prunes) == 1
+    assert len(store._buckets) == 10
+
+    clock.now += store.PRUNE_INTERVAL_SECONDS
+    store.take("read:user:99", READ)
+    assert len(prunes) == 2
+    # Every older bucket was full again; only the one just spent remains
+    assert list(store._buckets) == ["read:user:99"]
+
+
+def test_write_endpoint_returns_429_with_retry_after(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_WRITE_BURST", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_WRITE_PER_MINUTE", 1)
+    monkeypatch.setattr(rate_limit, "_store", InMemoryTokenBucketStore())
+    headers = auth(add_user(db, "s@example.edu"))
+
+    # An invalid body still spends the token: admission happens before validation
+    assert client.post("/bookings", json={}, headers=headers).status_code == 422
+    response = client.post("/bookings", json={}, headers=headers)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
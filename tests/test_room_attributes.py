@@ -0,0 +1,115 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services import room_catalog
+from app.services.booking_service import approve_booking, create_pending_booking
+from app.services.room_catalog import CachedRoom, RoomCatalog
+from conftest import add_user, auth
+
+
+@pytest.fixture(params=[False, True], ids=["sql", "catalog"])
+def catalog_cache(request, monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CACHE", request.param)
+    monkeypatch.setattr(room_catalog, "_catalog", None)
+    # As in the lifespan: reload after each room change committed here
+    room_catalog.install()
+    yield request.param
+    room_catalog.uninstall()
+
+
+@pytest.fixture
+def admin(db):
+    return auth(add_user(db, "admin@example.edu", "ADMIN"))
+
+
+def _codes(response) -> list[str]:
+    assert response.status_code == 200, response.text
+    return [room["code"] for room in response.json()]
+
+
+def _create_rooms(client, admin):
+    for name in ("projector", "accessible", "whiteboard"):
+        assert client.post("/rooms/attributes", json={"name": name}, headers=admin).status_code == 201
+    for code, attributes in [
+        ("A", ["projector", "accessible"]),
+        ("B", ["projector"]),
+        ("C", []),
+        ("D", ["accessible", "projector", "whiteboard"]),
+    ]:
+        response = client.post("/rooms", json={"code": code, "name": code, "attributes": attributes}, headers=admin)
+        assert response.status_code == 201, response.text
+
+
+def test_has_filters_rooms(client, db, admin, catalog_cache):
+    _create_rooms(client, admin)
+
+    assert _codes(client.get("/rooms", params={"has": "projector"})) == ["A", "B", "D"]
+    assert _codes(client.get("/rooms", params={"has": "Accessible, projector"})) == ["A", "D"]
+    assert _codes(client.get("/rooms", params={"has": "accessible,projector", "limit": 1, "offset": 1})) == ["D"]
+    assert _codes(client.get("/rooms", params={"has": ""})) == ["A", "B", "C", "D"]
+    assert _codes(client.get("/rooms", params={"q": "d", "has": "whiteboard"})) == ["D"]
+    assert client.get("/rooms", params={"has": "sofa"}).status_code == 400
+
+    free = client.get(
+        "/rooms/free-slots", params={"date": "2030-01-07", "has": "whiteboard", "duration_minutes": 60}
+    ).json()
+    assert [r["room_id"] for r in free] == [r["id"] for r in client.get("/rooms", params={"has": "whiteboard"}).json()]
+
+
+def test_vocabulary_changes(client, db, admin, catalog_cache):
+    _create_rooms(client, admin)
+    bits = {a["name"]: a["bit"] for a in client.get("/rooms/attributes").json()}
+    assert bits == {"accessible": 1, "projector": 0, "whiteboard": 2}
+
+    assert client.post("/rooms/attributes", json={"name": "Projector"}, headers=admin).status_code == 409
+    assert client.post("/rooms/attributes", json={"name": "two words"}, headers=admin).status_code == 409
+    staff = auth(add_user(db, "staff@example.edu", "STAFF"))
+    assert client.post("/rooms/attributes", json={"name": "sofa"}, headers=staff).status_code == 403
+
+    assert client.delete("/rooms/attributes/projector", headers=admin).status_code == 204
+    assert client.delete("/rooms/attributes/projector", headers=admin).status_code == 404
+    rooms = {r["code"]: r for r in client.get("/rooms").json()}
+    assert rooms["D"]["attributes_mask"] == 0b110
+    # The freed bit is reused
+    assert client.post("/rooms/attributes", json={"name": "sofa"}, headers=admin).json()["bit"] == 0
+    assert _codes(client.get("/rooms", params={"has": "sofa"})) == []
+
+    d = rooms["D"]["id"]
+    response = client.put(f"/rooms/{d}/attributes", json={"attributes": ["sofa"]}, headers=staff)
+    assert response.json()["attributes_mask"] == 0b1
+    assert _codes(client.get("/rooms", params={"has": "sofa"})) == ["D"]
+    assert client.put(f"/rooms/{d}/attributes", json={"attributes": ["bath"]}, headers=staff).status_code == 400
+
+
+def test_busy_rooms_are_left_out_of_free_slots(client, db, admin, monday):
+    _create_rooms(client, admin)
+    rooms = {r["code"]: r["id"] for r in client.get("/rooms").json()}
+    user = add_user(db, "s@example.edu")
+    booking = create_pending_booking(
+        db, user_id=user, room_id=rooms["A"], start_time=monday, end_time=monday + timedelta(hours=1)
+    )
+    approve_booking(db, booking_id=booking.id)
+
+    free = client.get(
+        "/rooms/free-slots",
+        params={"date": monday.date().isoformat(), "has": "accessible", "duration_minutes": 24 * 60},
+    ).json()
+    assert [r["room_id"] for r in free] == [rooms["D"]]
+
+
+def test_with_attributes_matches_a_scan():
+    rng = random.Random(42)
+    for _ in range(200):
+        masks = [rng.getrandbits(5) for _ in range(rng.randint(0, 70))]
+        rooms = tuple(CachedRoom(i, f"R{i:03}", "", None, 1, mask) for i, mask in enumerate(masks))
+        # Bit 5 is in the vocabulary but no room has it; bit 6 is past the index
+        index = tuple(sum(1 << i for i, mask in enumerate(masks) if mask >> bit & 1) for bit in range(6))
+        catalog = RoomCatalog(1, rooms, {r.id: r for r in rooms}, {}, index)
+        wanted = rng.choice([0, rng.getrandbits(5), 1 << 5, 1 << 6])
+        offset, limit = rng.randint(0, 10), rng.choice([None, 1, 5])
+
+        expected = [r for r in rooms if r.attributes_mask & wanted == wanted]
+        assert catalog.with_attributes(wanted, offset, limit) == expected[offset:][:limit]
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.room import Room
+from app.services import room_catalog
+from app.services.room_catalog import (
+    bump_room_catalog_version,
+    get_cached_room,
+    get_room_catalog,
+    load_room_catalog,
+)
+from conftest import add_room, add_user, auth
+
+
+@pytest.fixture
+def catalog(db, monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CACHE", True)
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CHECK_SECONDS", 3600)
+    monkeypatch.setattr(room_catalog, "_catalog", None)
+
+
+def _add_room_elsewhere(code: str) -> int:
+    """A room created by another worker: committed with a version bump, not installed here."""
+    with SessionLocal() as other:
+        room = Room(code=code, name=code, capacity=10)
+        other.add(room)
+        bump_room_catalog_version(other)
+        other.commit()
+        return room.id
+
+
+def test_snapshot_is_revalidated_after_the_check_interval(db, catalog, monkeypatch):
+    add_room(db, "B")
+    first = load_room_catalog()
+    _add_room_elsewhere("A")
+
+    assert get_room_catalog() is first
+
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CHECK_SECONDS", 0)
+    fresh = get_room_catalog()
+    assert fresh.version == first.version + 1
+    assert [r.code for r in fresh.rooms] == ["A", "B"]
+    # Unchanged version: the snapshot is kept
+    assert get_room_catalog() is fresh
+
+
+def test_a_miss_rechecks_before_reporting_a_room_missing(db, catalog):
+    load_room_catalog()
+    room_id = _add_room_elsewhere("A")
+
+    assert get_cached_room(room_id).code == "A"
+    assert get_cached_room(room_id + 1) is None
+
+
+def test_an_older_snapshot_never_replaces_a_newer_one(db, catalog):
+    with SessionLocal() as s:
+        old = room_catalog._load(s)
+    _add_room_elsewhere("A")
+    new = load_room_catalog()
+
+    assert room_catalog._install(old) is new
+
+
+def test_with_attributes_matches_a_scan():
+    rng = random.Random(34)
+    rooms = tuple(
+        room_catalog.CachedRoom(i, f"R{i:03}", "", None, 10, rng.getrandbits(5)) for i in range(200)
+    )
+    catalog = room_catalog.RoomCatalog(1, rooms, {}, {}, room_catalog._attribute_index(rooms, 5))
+
+    for mask in range(1 << 6):
+        expected = [r for r in rooms if r.attributes_mask & mask == mask]
+        assert catalog.with_attributes(mask) == expected
+        assert catalog.with_attributes(mask, 5, 10) == expected[5:15]
+
+
+def test_rooms_endpoint_serves_the_snapshot(client, db, catalog, monkeypatch):
+    staff = auth(add_user(db, "staff@example.edu", "STAFF"))
+    add_room(db, "B")
+    assert [r["code"] for r in client.get("/rooms").json()] == ["B"]
+
+    assert client.post("/rooms", json={"code": "A", "name": "A"}, headers=staff).status_code == 201
+    # No invalidation bus running: this worker sees the room after its next version check
+    assert [r["code"] for r in client.get("/rooms").json()] == ["B"]
+    monkeypatch.setattr(settings, "ROOM_CATALOG_CHECK_SECONDS", 0)
+    assert [r["code"] for r in client.get("/rooms").json()] == ["A", "B"]
@@ -0,0 +1,99 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text, update
+
+from app.models.room import Room
+from app.services import room_search
+from app.services.room_search import search_rooms, similarity
+
+ROOMS = [
+    ("SCI-101", "Science Lab", "North Hall"),
+    ("SCI-102", "Science Lecture Theatre", "North Hall"),
+    ("ENG-201", "Engineering Workshop", "South Hall"),
+    ("LIB-1", "Library Quiet Room", None),
+    ("B1", "Seminar Room", "Business School"),
+]
+
+
+def _migration():
+    path = next(Path(__file__).parents[1].glob("alembic/versions/92e67b9b5da6_*.py"))
+    spec = importlib.util.spec_from_file_location("room_search_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(params=["fts", "scan"])
+def rooms(request, db):
+    if request.param == "fts":
+        for statement in _migration().SQLITE_UPGRADE:
+            db.execute(text(statement))
+    for code, name, location in ROOMS:
+        db.add(Room(code=code, name=name, capacity=10, location=location))
+    db.commit()
+    yield request.param
+    db.rollback()
+    for statement in _migration().SQLITE_DOWNGRADE:
+        db.execute(text(statement))
+    db.commit()
+
+
+def _codes(db, query, **kwargs) -> list[str]:
+    return [room.code for room in search_rooms(db, query, **kwargs)]
+
+
+def test_similarity():
+    assert similarity("lab", "Science Lab") == 1.0
+    assert similarity("", "Science Lab") == 0.0
+    assert similarity("xyz", "Science Lab") == 0.0
+    # A prefix matches more of the query than the same letters mid-word
+    assert similarity("sci", "Science") > similarity("ien", "Science")
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("science", ["SCI-101", "SCI-102"]),
+        # Prefix and typo tolerant
+        ("scien", ["SCI-101", "SCI-102"]),
+        ("sceince lab", ["SCI-101"]),
+        ("engineering", ["ENG-201"]),
+        ("south", ["ENG-201"]),
+        # Short queries also match substrings
+        ("b1", ["B1"]),
+        ("nothing like it", []),
+    ],
+)
+def test_matches_rank_best_first(db, rooms, query, expected):
+    assert _codes(db, query)[: len(expected)] == expected
+    if not expected:
+        assert _codes(db, query) == []
+
+
+def test_pages_reach_every_match(db, rooms):
+    everything = _codes(db, "hall", limit=100)
+
+    assert set(everything) == {"SCI-101", "SCI-102", "ENG-201"}
+    assert [code for offset in range(4) for code in _codes(db, "hall", limit=1, offset=offset)] == everything
+
+
+def test_index_narrows_the_candidates(db, rooms):
+    candidates = room_search._sqlite_candidates(db, "library", 0)
+
+    if rooms == "fts":
+        assert [code for _, code, _, _ in candidates] == ["LIB-1"]
+    else:
+        # No index (schema from create_all): search_rooms falls back to a scan
+        assert candidates is None
+    assert _codes(db, "library") == ["LIB-1"]
+
+
+def test_attribute_filter_applies_to_the_candidates(db, rooms):
+    db.execute(update(Room).where(Room.code.in_(["SCI-102", "ENG-201"])).values(attributes_mask=0b101))
+    db.commit()
+
+    assert set(_codes(db, "hall", attributes_mask=0b1)) == {"SCI-102", "ENG-201"}
+    assert _codes(db, "science", attributes_mask=0b100) == ["SCI-102"]
+    assert _codes(db, "science", attributes_mask=0b10) == []
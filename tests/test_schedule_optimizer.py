@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timedelta
+from itertools import combinations
+
+import pytest
+from sqlalchemy import select
+
+from app.core.enums import BookingStatus
+from app.db.shards import get_shard_sessionmaker
+from app.models.booking import Booking
+from app.services.booking_service import (
+    BookingVersionConflictError,
+    apply_booking_decisions,
+    create_pending_booking,
+)
+from app.services.schedule_optimizer import max_weight_schedule
+from conftest import add_room, add_user
+
+
+def _overlap(a, b) -> bool:
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def _best_weight(intervals) -> int:
+    best = 0
+    for size in range(1, len(intervals) + 1):
+        for subset in combinations(intervals, size):
+            if not any(_overlap(a, b) for a, b in combinations(subset, 2)):
+                best = max(best, sum(w for _, _, w in subset))
+    return best
+
+
+def test_max_weight_schedule_matches_brute_force():
+    rng = random.Random(20261019)
+    base = datetime(2026, 1, 5, 8)
+    for _ in range(3000):
+        intervals = []
+        for _ in range(rng.randint(0, 8)):
+            start = rng.randint(0, 20)
+            # Integer weights, so equal totals compare equal
+            intervals.append(
+                (base + timedelta(hours=start), base + timedelta(hours=start + rng.randint(1, 6)), rng.randint(0, 5))
+            )
+
+        chosen = max_weight_schedule(intervals)
+
+        assert len(set(chosen)) == len(chosen)
+        assert not any(_overlap(intervals[i], intervals[j]) for i, j in combinations(chosen, 2))
+        assert sum(intervals[i][2] for i in chosen) == _best_weight(intervals), intervals
+
+
+def test_max_weight_schedule_prefers_lower_indices_on_ties():
+    base = datetime(2026, 1, 5, 8)
+    one_hour = (base, base + timedelta(hours=1), 1)
+    assert max_weight_schedule([one_hour, one_hour, one_hour]) == [0]
+
+
+def _states(shard: int) -> list[tuple[int, str, int]]:
+    with get_shard_sessionmaker(shard)() as s:
+        return s.execute(select(Booking.id, Booking.status, Booking.version).order_by(Booking.id)).all()
+
+
+@pytest.mark.parametrize("use_shards", [False, True])
+def test_stale_version_applies_nothing(db, monday, request, use_shards):
+    if use_shards:
+        request.getfixturevalue("sharded")
+    shards = (0, 1) if use_shards else (0,)
+    user = add_user(db, "s@example.edu")
+    south, north, other = add_room(db, "S1", "South Hall"), add_room(db, "N1", "North Hall"), add_room(db, "S2")
+    start = monday + timedelta(hours=9)
+    a, b, c = (
+        create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=start + timedelta(hours=1))
+        for room in (south, north, other)
+    )
+    before = [row for shard in shards for row in _states(shard)]
+
+    with pytest.raises(BookingVersionConflictError):
+        apply_booking_decisions(
+            db,
+            approve=[(a.id, a.version), (b.id, b.version + 1)],
+            reject=[(c.id, c.version)],
+        )
+
+    assert [row for shard in shards for row in _states(shard)] == before
+    assert {status for _, status, _ in before} == {BookingStatus.PENDING.value}
+    # Nor do the caller's objects keep the rolled-back changes
+    assert (a.status, a.version) == (BookingStatus.PENDING.value, 1)
+
+    # With the current versions the same decisions go through
+    applied = apply_booking_decisions(db, approve=[(a.id, a.version), (b.id, b.version)], reject=[(c.id, c.version)])
+    assert {(x.id, x.version) for x in applied} == {(a.id, 2), (b.id, 2), (c.id, 2)}
+    statuses = {booking_id: status for shard in shards for booking_id, status, _ in _states(shard)}
+    assert statuses == {
+        a.id: BookingStatus.APPROVED.value,
+        b.id: BookingStatus.APPROVED.value,
+        c.id: BookingStatus.REJECTED.value,
+    }
@@ -0,0 +1,105 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.db import shards
+from app.db.shards import SHARD_ID_BITS, get_shard_sessionmaker, shard_for_booking, shard_for_location
+from app.models.booking import Booking
+from app.services.booking_service import create_pending_booking
+from conftest import add_room, add_user, auth
+
+
+def test_shard_for_location(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_SHARD_URLS", ["sqlite://", "sqlite://"])
+    monkeypatch.setattr(settings, "BOOKING_SHARD_MAP", {"north": 1, "North Hall Annex": 2, "west": 7})
+
+    assert shard_for_location("North Hall - Floor 1") == 1
+    # Longest matching building wins, case-insensitively
+    assert shard_for_location("north hall annex") == 2
+    assert shard_for_location("South Hall") == 0
+    assert shard_for_location(None) == 0
+    # Mapped to a shard that is not configured
+    assert shard_for_location("West Wing") == 0
+
+
+def test_shard_for_booking(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_SHARD_URLS", ["sqlite://"])
+
+    assert shard_for_booking(12) == 0
+    assert shard_for_booking((1 << SHARD_ID_BITS) + 12) == 1
+    assert shard_for_booking((2 << SHARD_ID_BITS) + 12) is None
+
+
+def test_bookings_are_written_to_and_acted_on_at_their_building_shard(client, db, sharded, monday):
+    student, staff = add_user(db, "s@example.edu"), add_user(db, "staff@example.edu", "STAFF")
+    north, south = add_room(db, "N1", "North Hall"), add_room(db, "S1", "South Hall")
+    start = monday + timedelta(hours=9)
+    body = {"start_time": start.isoformat(), "end_time": (start + timedelta(hours=1)).isoformat()}
+
+    north_id, south_id = (
+        client.post("/bookings", json={**body, "room_id": room}, headers=auth(student)).json()["id"]
+        for room in (north, south)
+    )
+
+    assert (shard_for_booking(north_id), shard_for_booking(south_id)) == (1, 0)
+    with get_shard_sessionmaker(1)() as s:
+        assert s.scalars(select(Booking.id)).all() == [north_id]
+    db.rollback()
+    assert db.scalars(select(Booking.id)).all() == [south_id]
+
+    response = client.post(f"/bookings/{north_id}/approve", headers=auth(staff))
+    assert response.json()["status"] == BookingStatus.APPROVED.value
+    # The direct path checks conflicts on the right shard too
+    assert client.post("/bookings", json={**body, "room_id": north}, headers=auth(staff)).status_code == 409
+    assert client.post(f"/bookings/{(2 << SHARD_ID_BITS) + 1}/approve", headers=auth(staff)).status_code == 404
+
+
+@pytest.mark.parametrize("limit, offset", [(10, 0), (2, 0), (2, 2), (3, 3)])
+def test_listing_merges_shards_newest_first(client, db, sharded, monday, limit, offset):
+    student = add_user(db, "s@example.edu")
+    north, south = add_room(db, "N1", "North Hall"), add_room(db, "S1", "South Hall")
+    ids = []
+    for day in range(5):
+        start = monday + timedelta(days=day, hours=9)
+        room = north if day % 2 else south
+        ids.append(
+            create_pending_booking(
+                db, user_id=student, room_id=room, start_time=start, end_time=start + timedelta(hours=1)
+            ).id
+        )
+        # created_at has one-second resolution on SQLite
+        with get_shard_sessionmaker(shard_for_booking(ids[-1]))() as s:
+            s.execute(
+                text("UPDATE bookings SET created_at = :t WHERE id = :id"), {"t": f"2026-01-0{day + 1}", "id": ids[-1]}
+            )
+            s.commit()
+
+    response = client.get(f"/bookings?limit={limit}&offset={offset}", headers=auth(student))
+
+    assert [b["id"] for b in response.json()] == ids[::-1][offset : offset + limit]
+
+
+def test_existing_shard_tables_get_new_nullable_columns(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/old_shard.db"
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        # A shard created before bookings had group_id
+        conn.execute(
+            text(
+                "CREATE TABLE bookings (id INTEGER PRIMARY KEY AUTOINCREMENT, room_id INTEGER NOT NULL,"
+                " user_id INTEGER NOT NULL, start_time DATETIME NOT NULL, end_time DATETIME NOT NULL,"
+                " status VARCHAR(20) NOT NULL, created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+                " version INTEGER NOT NULL DEFAULT 1)"
+            )
+        )
+    monkeypatch.setattr(settings, "BOOKING_SHARD_URLS", [url])
+
+    get_shard_sessionmaker(1)
+
+    assert "group_id" in {c["name"] for c in inspect(engine).get_columns("bookings")}
+    assert "ix_bookings_group_id" in {i["name"] for i in inspect(engine).get_indexes("bookings")}
+    # Idempotent: a second worker finds nothing to add
+    shards._ensure_shard_schema(engine, 1)
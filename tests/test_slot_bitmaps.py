@@ -0,0 +1,132 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.models.room_day_slots import RoomDaySlots
+from app.services import slot_bitmaps
+from app.services.booking_service import (
+    BookingConflictError,
+    InvalidBookingTimeError,
+    approve_booking,
+    cancel_booking,
+    create_pending_booking,
+    reject_booking,
+)
+from conftest import add_room, add_user
+
+
+def test_day_masks_round_outwards_and_split_at_midnight():
+    day = datetime(2026, 1, 5)
+    assert slot_bitmaps.day_masks(day, day + timedelta(minutes=15)) == {day.date(): 0b1}
+    assert slot_bitmaps.day_masks(day + timedelta(minutes=20), day + timedelta(minutes=31)) == {day.date(): 0b110}
+    late = day + timedelta(hours=23, minutes=45)
+    assert slot_bitmaps.day_masks(late, late + timedelta(minutes=30)) == {
+        day.date(): 1 << 95,
+        date(2026, 1, 6): 0b1,
+    }
+
+
+def test_free_runs_match_a_scan():
+    rng = random.Random(38)
+    for _ in range(2000):
+        slots = rng.randint(1, 40)
+        busy = rng.getrandbits(slots)
+        min_slots = rng.randint(1, 6)
+        runs, start = [], None
+        for i in range(slots + 1):
+            free = i < slots and not busy >> i & 1
+            if free and start is None:
+                start = i
+            elif not free and start is not None:
+                if i - start >= min_slots:
+                    runs.append((start, i))
+                start = None
+        assert slot_bitmaps.free_runs(busy, slots, min_slots) == runs, (bin(busy), slots, min_slots)
+
+
+def test_stored_time_on_sqlite_keeps_the_wall_clock(db):
+    aware = datetime(2026, 1, 5, 9, tzinfo=timezone(timedelta(hours=2)))
+    assert slot_bitmaps.stored_time(db, aware) == datetime(2026, 1, 5, 9)
+    assert slot_bitmaps.stored_time(db, datetime(2026, 1, 5, 9)) == datetime(2026, 1, 5, 9)
+
+
+def _bitmaps(db) -> dict:
+    db.rollback()
+    return {
+        (room_id, day): (slot_bitmaps.to_bits(a), slot_bitmaps.to_bits(ap))
+        for room_id, day, a, ap in db.execute(
+            select(RoomDaySlots.room_id, RoomDaySlots.day, RoomDaySlots.active, RoomDaySlots.approved)
+        )
+        if slot_bitmaps.to_bits(a) or slot_bitmaps.to_bits(ap)
+    }
+
+
+@pytest.mark.parametrize("waitlist", [False, True])
+def test_bitmaps_follow_every_booking_change(db, monday, monkeypatch, waitlist):
+    monkeypatch.setattr(settings, "SLOT_BITMAPS", True)
+    monkeypatch.setattr(settings, "WAITLIST_MODE", waitlist)
+    rng = random.Random(380 + waitlist)
+    user = add_user(db, "s@example.edu")
+    rooms = [add_room(db, "R1"), add_room(db, "R2")]
+    ids: list[int] = []
+
+    for _ in range(150):
+        op = rng.choice(["create", "create", "approve", "reject", "cancel"])
+        try:
+            if op == "create" or not ids:
+                # Includes requests running past midnight
+                start = monday + timedelta(
+                    days=rng.randint(0, 1), hours=rng.choice([9, 10, 23]), minutes=15 * rng.randint(0, 3)
+                )
+                booking = create_pending_booking(
+                    db,
+                    user_id=user,
+                    room_id=rng.choice(rooms),
+                    start_time=start,
+                    end_time=start + slot_bitmaps.SLOT * rng.randint(1, 8),
+                )
+                ids.append(booking.id)
+            else:
+                {"approve": approve_booking, "reject": reject_booking, "cancel": cancel_booking}[op](
+                    db, booking_id=rng.choice(ids)
+                )
+        except (BookingConflictError, ValueError):
+            pass
+
+        live = _bitmaps(db)
+        slot_bitmaps.rebuild(db)
+        assert live == _bitmaps(db), op
+
+    db.rollback()
+    statuses = set(db.scalars(select(Booking.status)))
+    assert {BookingStatus.APPROVED.value, BookingStatus.CANCELLED.value} <= statuses
+
+
+def test_unaligned_bookings_are_refused(db, monday, monkeypatch):
+    monkeypatch.setattr(settings, "SLOT_BITMAPS", True)
+    start = monday + timedelta(hours=9, minutes=5)
+    with pytest.raises(InvalidBookingTimeError):
+        create_pending_booking(
+            db,
+            user_id=add_user(db, "s@example.edu"),
+            room_id=add_room(db, "R1"),
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+
+
+def test_aware_request_times(db, monday, monkeypatch):
+    monkeypatch.setattr(settings, "SLOT_BITMAPS", True)
+    user, room = add_user(db, "s@example.edu"), add_room(db, "R1")
+    start = (monday + timedelta(hours=9)).replace(tzinfo=timezone.utc)
+    create_pending_booking(db, user_id=user, room_id=room, start_time=start, end_time=start + timedelta(hours=1))
+
+    with pytest.raises(BookingConflictError):
+        later = start + timedelta(minutes=45)
+        create_pending_booking(db, user_id=user, room_id=room, start_time=later, end_time=later + timedelta(hours=1))
+    assert _bitmaps(db) == {(room, monday.date()): (0b1111 << 36, 0)}
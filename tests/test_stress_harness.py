@@ -0,0 +1,75 @@
+import importlib.util
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+
+from app.db.metadata import target_metadata
+from app.models.booking import Booking
+from app.models.room import Room
+from app.models.user import User
+
+ROOT = Path(__file__).parents[1]
+SCRIPT = ROOT / "scripts" / "stress_double_booking.py"
+
+
+def _harness():
+    spec = importlib.util.spec_from_file_location("stress_double_booking", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_check_invariant_counts_overlaps(tmp_path):
+    url = f"sqlite:///{tmp_path}/stress.db"
+    engine = create_engine(url)
+    target_metadata.create_all(engine)
+    start = datetime(2030, 1, 7, 9)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"email": "s@example.edu", "name": "s", "password_hash": "x", "role": "STUDENT"}])
+        conn.execute(insert(Room), [{"code": code, "name": code, "capacity": 1} for code in ("R1", "R2")])
+        booking = {"user_id": 1, "start_time": start, "end_time": start + timedelta(hours=1)}
+        conn.execute(
+            insert(Booking),
+            [
+                {**booking, "room_id": 1, "status": "APPROVED"},
+                {**booking, "room_id": 1, "status": "PENDING"},
+                {**booking, "room_id": 1, "status": "CANCELLED"},
+                # Other room, and touching is not overlapping
+                {**booking, "room_id": 2, "status": "APPROVED"},
+                {
+                    **booking,
+                    "room_id": 2,
+                    "status": "APPROVED",
+                    "start_time": start + timedelta(hours=1),
+                    "end_time": start + timedelta(hours=2),
+                },
+            ],
+        )
+    engine.dispose()
+
+    harness = _harness()
+
+    counts = harness.check_invariant(url, waitlist=False)
+    assert counts == {"bookings": 5, "approved overlaps": 0, "active overlaps": 1}
+    assert harness.check_invariant(url, waitlist=True) == {"bookings": 5, "approved overlaps": 0}
+
+
+def test_short_run_keeps_the_invariant():
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    env.pop("DATABASE_URL", None)
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), "--workers", "2", "--clients", "8", "--duration", "1", "--rooms", "2"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "approved overlaps 0" in result.stdout
+    assert "5xx / transport 0 / 0" in result.stdout
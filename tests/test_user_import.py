@@ -0,0 +1,100 @@
+import csv
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app.models.user import User
+from app.services import user_import
+from app.services.user_import import import_users, read_csv
+from conftest import add_user, auth
+
+UPLOAD = """email,name,role,password
+new@example.edu,New Student,,
+staff@example.edu,Staff Member,staff,a-long-password
+existing@example.edu,Existing,ADMIN,
+not-an-email,Nobody,,
+new@example.edu,Twice,,
+"""
+
+
+@pytest.fixture
+def admin(db):
+    return auth(add_user(db, "admin@example.edu", "ADMIN"))
+
+
+def _upload(client, headers, body: str, **params):
+    return client.post(
+        "/admin/users/import",
+        params=params,
+        files={"file": ("users.csv", body.encode(), "text/csv")},
+        headers=headers,
+    )
+
+
+def test_import_returns_invites_as_a_csv_download(client, db, admin):
+    add_user(db, "existing@example.edu")
+
+    response = _upload(client, admin, UPLOAD)
+
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    assert response.headers["cache-control"] == "no-store"
+    counts = {k: response.headers[f"x-import-{k}"] for k in ("created", "existing", "roles-updated", "invalid")}
+    assert counts == {"created": "2", "existing": "1", "roles-updated": "0", "invalid": "2"}
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    invites = {r["email"]: r["token"] for r in rows if r["token"]}
+    assert list(invites) == ["new@example.edu"]
+    assert [(r["line"], r["error"]) for r in rows if r["error"]] == [
+        ("5", "invalid email"),
+        ("6", "duplicate email in input"),
+    ]
+
+    # The token is the initial password
+    login = client.post("/auth/login", data={"username": "new@example.edu", "password": invites["new@example.edu"]})
+    assert login.status_code == 200
+    db.rollback()
+    roles = dict(db.execute(select(User.email, User.role)).all())
+    assert roles["staff@example.edu"] == "STAFF" and roles["existing@example.edu"] == "STUDENT"
+
+
+def test_invite_tokens_get_the_normal_hash_cost(db):
+    add_user(db, "existing@example.edu")
+    invites = []
+    import_users(db, read_csv(io.StringIO(UPLOAD)), workers=1, on_invite=lambda e, t: invites.append(e))
+    db.rollback()
+
+    hashes = dict(db.execute(select(User.email, User.password_hash)).all())
+    assert invites == ["new@example.edu"]
+    assert hashes["new@example.edu"].split("$")[2] == hashes["staff@example.edu"].split("$")[2] == "12"
+
+
+def test_update_roles(client, db, admin):
+    add_user(db, "existing@example.edu")
+    response = _upload(client, admin, UPLOAD, update_roles="true")
+    assert response.headers["x-import-roles-updated"] == "1"
+    db.rollback()
+    assert db.scalar(select(User.role).where(User.email == "existing@example.edu")) == "ADMIN"
+
+
+def test_bad_uploads(client, db, admin):
+    assert _upload(client, admin, "email,role\na@example.edu,STUDENT\n").status_code == 400
+    student = auth(add_user(db, "s@example.edu"))
+    assert _upload(client, student, UPLOAD).status_code == 403
+
+
+def test_imports_share_one_hashing_pool(db):
+    body = "email,name\n" + "".join(f"u{i}@example.edu,U{i}\n" for i in range(6))
+    try:
+        first = import_users(db, read_csv(io.StringIO(body)), workers=2, chunk_size=2)
+        pool = user_import._pool
+        assert first.created == 6 and pool is not None
+
+        more = "email,name\n" + "".join(f"v{i}@example.edu,V{i}\n" for i in range(3))
+        assert import_users(db, read_csv(io.StringIO(more)), workers=2).created == 3
+        assert user_import._pool is pool
+    finally:
+        user_import.shutdown_hash_pool()
+    assert user_import._pool is None
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core import events
+from app.core.config import settings
+from app.core.enums import BookingStatus
+from app.models.booking import Booking
+from app.services.booking_service import approve_booking, cancel_booking, create_pending_booking
+from conftest import add_room, add_user
+
+
+@pytest.fixture
+def promoted():
+    seen = []
+
+    def on_promoted(booking, freed_by):
+        seen.append((booking.id, freed_by.id))
+
+    events.subscribe(events.BOOKING_PROMOTED, on_promoted)
+    yield seen
+    events.unsubscribe(events.BOOKING_PROMOTED, on_promoted)
+
+
+def _book(db, user_id, room_id, start, hours=1.0):
+    return create_pending_booking(
+        db, user_id=user_id, room_id=room_id, start_time=start, end_time=start + timedelta(hours=hours)
+    ).id
+
+
+def _statuses(db) -> dict[int, str]:
+    db.rollback()
+    return dict(db.execute(select(Booking.id, Booking.status)).all())
+
+
+def test_cancelling_an_approved_booking_promotes_the_earliest_requests_that_fit(db, monday, monkeypatch, promoted):
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+    user = add_user(db, "s@example.edu")
+    room, other_room = add_room(db, "R1"), add_room(db, "R2")
+    nine = monday + timedelta(hours=9)
+    approved = _book(db, user, room, nine, 2)
+    first = _book(db, user, room, nine)
+    # Requested after `first` and overlapping it: stays on the waitlist
+    second = _book(db, user, room, nine + timedelta(minutes=30))
+    third = _book(db, user, room, nine + timedelta(hours=1))
+    elsewhere = _book(db, user, other_room, nine)
+    approve_booking(db, booking_id=approved)
+
+    cancel_booking(db, booking_id=approved)
+
+    assert _statuses(db) == {
+        approved: BookingStatus.CANCELLED.value,
+        first: BookingStatus.APPROVED.value,
+        second: BookingStatus.PENDING.value,
+        third: BookingStatus.APPROVED.value,
+        elsewhere: BookingStatus.PENDING.value,
+    }
+    assert sorted(promoted) == [(first, approved), (third, approved)]
+
+
+def test_promotion_goes_by_request_time_not_id(db, monday, monkeypatch, promoted):
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+    user = add_user(db, "s@example.edu")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+    approved = _book(db, user, room, nine)
+    later_request, earlier_request = _book(db, user, room, nine), _book(db, user, room, nine)
+    approve_booking(db, booking_id=approved)
+    db.execute(update(Booking).where(Booking.id == earlier_request).values(created_at=datetime(2000, 1, 1)))
+    db.commit()
+
+    cancel_booking(db, booking_id=approved)
+
+    assert promoted == [(earlier_request, approved)]
+    assert _statuses(db)[later_request] == BookingStatus.PENDING.value
+
+
+def test_no_promotion_for_pending_cancellations_or_outside_waitlist_mode(db, monday, monkeypatch, promoted):
+    monkeypatch.setattr(settings, "WAITLIST_MODE", True)
+    user = add_user(db, "s@example.edu")
+    room = add_room(db, "R1")
+    nine = monday + timedelta(hours=9)
+    approved, waiting, pending = _book(db, user, room, nine), _book(db, user, room, nine), _book(db, user, room, nine)
+    approve_booking(db, booking_id=approved)
+
+    cancel_booking(db, booking_id=pending)
+    monkeypatch.setattr(settings, "WAITLIST_MODE", False)
+    cancel_booking(db, booking_id=approved)
+
+    assert promoted == []
+    assert _statuses(db)[waiting] == BookingStatus.PENDING.value